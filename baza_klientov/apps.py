@@ -20,7 +20,6 @@ class BazaKlientovConfig(AppConfig):
     def ready(self):
         """
         Метод вызывается при готовности приложения
-        Можно использовать для регистрации сигналов
+        Регистрирует сигналы индекса поиска клиентов
         """
-        # Пока ничего не делаем
-        pass
\ No newline at end of file
+        from . import signals  # noqa: F401
\ No newline at end of file
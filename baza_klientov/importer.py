@@ -0,0 +1,347 @@
+"""
+importer.py для приложения baza_klientov
+Массовый импорт клиентов и контактных лиц из CSV или XLSX (перенос из старой CRM)
+
+Файл читается потоково: CSV – построчно через csv.reader, XLSX – в
+режиме openpyxl read_only. Строки проверяются пачками по правилам
+ClientForm и ContactPersonForm, клиенты и контакты каждой пачки
+создаются через bulk_create. Номера клиентов выделяются одним блоком:
+максимальный существующий номер читается один раз на весь импорт
+(вместо полного просмотра таблицы в _generate_client_number на каждого
+клиента).
+
+Формат файла: первая строка – заголовки. Одна строка – один клиент и
+(необязательно) его контактное лицо. Заголовки – имена полей или их
+русские названия (см. COLUMN_ALIASES):
+    name / Название, address / Адрес, bank_details / Реквизиты,
+    discount / Скидка, has_edo / ЭДО,
+    contact_full_name / Контакт, contact_position / Должность,
+    contact_phone / Телефон, contact_mobile / Сотовый,
+    contact_email / E-mail, contact_comments / Комментарии,
+    contact_is_primary / Основной (по умолчанию – да)
+
+Строки с ошибками не импортируются и попадают в отчёт (ключ 'errors' итога):
+номер строки файла, поле и сообщение. Весь импорт идёт в одной транзакции.
+
+Функции:
+- iter_rows: потоковое чтение строк CSV/XLSX
+- import_clients: проверка и создание клиентов и контактов
+- write_error_report: отчёт об ошибках в CSV
+"""
+
+import codecs
+import csv
+import re
+from itertools import chain, islice
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .forms import ClientForm, ContactPersonForm
+from .models import Client, ContactPerson
+from .search import bump_search_version
+
+
+# Сколько строк проверять и вставлять за один раз
+IMPORT_CHUNK_SIZE = getattr(settings, 'CLIENT_IMPORT_CHUNK_SIZE', 1000)
+
+# Сколько первых строк CSV использовать для определения разделителя
+CSV_SNIFF_LINES = 20
+
+# Заголовки столбцов: русское название → имя поля
+COLUMN_ALIASES = {
+    'название': 'name',
+    'наименование': 'name',
+    'клиент': 'name',
+    'адрес': 'address',
+    'реквизиты': 'bank_details',
+    'банковские реквизиты': 'bank_details',
+    'скидка': 'discount',
+    'скидка (%)': 'discount',
+    'эдо': 'has_edo',
+    'контакт': 'contact_full_name',
+    'контактное лицо': 'contact_full_name',
+    'фио': 'contact_full_name',
+    'должность': 'contact_position',
+    'телефон': 'contact_phone',
+    'сотовый': 'contact_mobile',
+    'e-mail': 'contact_email',
+    'email': 'contact_email',
+    'комментарии': 'contact_comments',
+    'основной': 'contact_is_primary',
+}
+
+CLIENT_FIELDS = ClientForm._meta.fields
+CONTACT_FIELDS = ContactPersonForm._meta.fields
+KNOWN_COLUMNS = set(CLIENT_FIELDS) | {f'contact_{name}' for name in CONTACT_FIELDS}
+
+# Значения логических полей, которые считаются «да»
+TRUE_VALUES = {'1', 'true', 'yes', 'on', 'да', 'д', '+', 'x'}
+
+
+class ImportFormatError(Exception):
+    """Файл нельзя прочитать как таблицу клиентов."""
+
+
+# ========== ЧТЕНИЕ ФАЙЛА ==========
+
+def _column_name(header):
+    """Имя поля для заголовка столбца (None – столбец не импортируется)."""
+    header = str(header or '').strip().lower()
+    header = COLUMN_ALIASES.get(header, header)
+    return header if header in KNOWN_COLUMNS else None
+
+
+def _cell_text(value):
+    """Значение ячейки как строка для формы (числа Excel без «.0»)."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'да' if value else ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _iter_csv(fileobj):
+    """Строки CSV: кодировка UTF-8 (с BOM или без), разделитель «;», «,» или табуляция."""
+    text = codecs.getreader('utf-8-sig')(fileobj)
+
+    # Разделитель определяется по первым строкам, остальные читаются потоком
+    sample = [line for line in islice(text, CSV_SNIFF_LINES)]
+    try:
+        dialect = csv.Sniffer().sniff(''.join(sample), delimiters=';,\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(chain(sample, text), dialect)
+
+
+def _iter_xlsx(fileobj):
+    """Строки первого листа XLSX (openpyxl read_only – без загрузки книги в память)."""
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Не удалось открыть файл Excel: {e}")
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    """
+    Потоково читает строки файла импорта.
+
+    Args:
+        fileobj: двоичный файловый объект
+        filename: имя файла – по расширению выбирается формат (.csv или .xlsx)
+
+    Yields:
+        tuple: (номер строки в файле, словарь {поле: текст})
+
+    Исключения:
+        ImportFormatError: неизвестный формат или нет столбца name
+    """
+    name = filename.lower()
+    if name.endswith('.xlsx'):
+        rows = _iter_xlsx(fileobj)
+    elif name.endswith('.csv'):
+        rows = _iter_csv(fileobj)
+    else:
+        raise ImportFormatError('Поддерживаются файлы .csv и .xlsx')
+
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFormatError('Файл пуст')
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFormatError(f"Не удалось прочитать CSV: {e}")
+
+    columns = [_column_name(cell) for cell in header]
+    if 'name' not in columns:
+        raise ImportFormatError('В первой строке нет столбца «name» (или «Название»)')
+
+    try:
+        for row_number, row in enumerate(rows, start=2):
+            values = {column: _cell_text(value) for column, value in zip(columns, row) if column}
+            if any(values.values()):
+                yield row_number, values
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFormatError(f"Не удалось прочитать CSV: {e}")
+
+
+# ========== ПРОВЕРКА И СОЗДАНИЕ ==========
+
+def _form_errors(form_errors, prefix=''):
+    """Ошибки формы как список (поле, сообщение)."""
+    return [
+        (f'{prefix}{name}', message)
+        for name, messages in form_errors.items()
+        for message in messages
+    ]
+
+
+class _RowValidator:
+    """
+    Проверка строк по правилам ClientForm и ContactPersonForm.
+
+    Формы создаются один раз и для каждой строки получают новые данные
+    и новый объект модели: конструктор формы глубоко копирует все поля
+    с виджетами, и на 50 тыс. строк это основная часть времени импорта.
+    """
+
+    def __init__(self):
+        self.client_form = ClientForm({})
+        self.contact_form = ContactPersonForm({})
+
+    @staticmethod
+    def _check(form, data, instance):
+        """Проверяет данные формой; возвращает ошибки (пустой словарь – данные верны)."""
+        form.data = data
+        form.instance = instance
+        form._errors = None  # следующий form.errors заново вызовет full_clean()
+        return form.errors
+
+    def validate(self, values):
+        """
+        Проверяет строку файла.
+
+        Returns:
+            tuple: (Client или None, ContactPerson или None, список ошибок (поле, сообщение))
+        """
+        client_data = {name: values.get(name, '') for name in CLIENT_FIELDS}
+        client_data['discount'] = client_data['discount'] or '0'
+        client_data['has_edo'] = client_data['has_edo'].lower() in TRUE_VALUES
+
+        client = Client()
+        errors = _form_errors(self._check(self.client_form, client_data, client))
+
+        contact = None
+        if values.get('contact_full_name'):
+            contact_data = {name: values.get(f'contact_{name}', '') for name in CONTACT_FIELDS}
+            is_primary = contact_data['is_primary']
+            contact_data['is_primary'] = not is_primary or is_primary.lower() in TRUE_VALUES
+
+            contact = ContactPerson()
+            errors += _form_errors(self._check(self.contact_form, contact_data, contact), prefix='contact_')
+
+        if errors:
+            return None, None, errors
+        return client, contact, []
+
+
+def _next_client_number():
+    """
+    Первый свободный номер клиента: максимальный номер «K-N» + 1.
+    Таблица читается один раз на весь импорт.
+    """
+    max_number = 0
+    for client_number in Client.objects.values_list('client_number', flat=True).iterator():
+        match = re.search(r'K-(\d+)', client_number)
+        if match:
+            max_number = max(max_number, int(match.group(1)))
+    return max_number + 1
+
+
+def _lock_clients_table():
+    """
+    PostgreSQL: блокирует вставку клиентов другими сеансами до конца
+    транзакции (чтение не блокируется), чтобы выделенные номера не заняли.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {connection.ops.quote_name(Client._meta.db_table)} IN EXCLUSIVE MODE')
+
+
+def import_clients(rows, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False, progress=None):
+    """
+    Импортирует клиентов и контактных лиц.
+
+    Args:
+        rows: итератор (номер строки, словарь полей) – см. iter_rows
+        chunk_size: сколько строк проверять и вставлять за раз
+        dry_run: только проверить строки, ничего не сохраняя
+        progress: функция progress(обработано строк, создано клиентов)
+
+    Returns:
+        dict: {'rows', 'clients', 'contacts', 'first_number', 'last_number',
+               'errors' – список (номер строки, поле, сообщение)}
+    """
+    result = {
+        'rows': 0,
+        'clients': 0,
+        'contacts': 0,
+        'first_number': '',
+        'last_number': '',
+        'errors': [],
+    }
+    rows = iter(rows)
+
+    with transaction.atomic():
+        _lock_clients_table()
+        next_number = _next_client_number()
+        validator = _RowValidator()
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            clients, contacts = [], []
+            for row_number, values in chunk:
+                client, contact, errors = validator.validate(values)
+                if errors:
+                    result['errors'].extend((row_number, name, message) for name, message in errors)
+                    continue
+
+                client.client_number = f"K-{next_number}"
+                next_number += 1
+                clients.append(client)
+                if contact is not None:
+                    contact.client = client
+                    contacts.append(contact)
+
+            result['rows'] += len(chunk)
+
+            if clients:
+                if not result['first_number']:
+                    result['first_number'] = clients[0].client_number
+                result['last_number'] = clients[-1].client_number
+
+                if not dry_run:
+                    # bulk_create заполняет id клиентов, контакты берут client_id из них
+                    Client.objects.bulk_create(clients)
+                    ContactPerson.objects.bulk_create(contacts)
+
+                result['clients'] += len(clients)
+                result['contacts'] += len(contacts)
+
+            if progress:
+                progress(result['rows'], result['clients'])
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    # bulk_create не отправляет post_save – индекс поиска обновляем явно
+    if result['clients'] and not dry_run:
+        bump_search_version()
+
+    return result
+
+
+def write_error_report(result, fileobj):
+    """
+    Записывает отчёт об ошибках импорта в CSV (разделитель «;», UTF-8 с BOM –
+    открывается в Excel).
+
+    Args:
+        result: итог import_clients
+        fileobj: текстовый файловый объект
+    """
+    fileobj.write('﻿')
+    writer = csv.writer(fileobj, delimiter=';')
+    writer.writerow(['Строка', 'Поле', 'Ошибка'])
+    writer.writerows(result['errors'])
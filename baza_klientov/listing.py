@@ -0,0 +1,152 @@
+"""
+listing.py для приложения baza_klientov
+Постраничный список клиентов для главной страницы базы клиентов
+
+Список выводится страницами по ключу (keyset): следующая страница начинается
+после последнего клиента текущей по (created_at, id), а не через OFFSET.
+Поэтому время отрисовки любой страницы не растёт с размером таблицы –
+запрос читает из индекса (created_at, id) ровно одну страницу.
+
+Для клиентов страницы одним запросом подсчитываются контактные лица и
+просчёты (подзапросы), основные контактные лица подгружаются prefetch_related –
+шаблон не делает запросов на каждую строку.
+
+Функции:
+- with_list_data: аннотации и prefetch для строк списка
+- encode_cursor / decode_cursor: курсор страницы в URL
+- get_client_page: страница клиентов до/после курсора
+- get_clients_by_ids: клиенты с данными для списка в заданном порядке
+"""
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from calculator.models_list_proschet import Proschet
+from .models import Client, ContactPerson
+
+
+# Сколько клиентов показывать на одной странице списка
+CLIENTS_PAGE_SIZE = getattr(settings, 'BAZA_KLIENTOV_PAGE_SIZE', 50)
+
+CURSOR_DATETIME_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def _count_subquery(queryset, field):
+    """Подзапрос: количество строк queryset, ссылающихся на клиента через field."""
+    counts = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def with_list_data(queryset):
+    """
+    Добавляет к клиентам данные для строки списка.
+
+    Args:
+        queryset: QuerySet клиентов
+
+    Returns:
+        QuerySet: клиенты с contacts_count, proschets_count и
+                  primary_contacts (список основных контактных лиц)
+    """
+    return queryset.annotate(
+        contacts_count=_count_subquery(ContactPerson.objects.all(), 'client'),
+        proschets_count=_count_subquery(Proschet.objects.filter(is_deleted=False), 'client'),
+    ).prefetch_related(
+        Prefetch(
+            'contact_persons',
+            queryset=ContactPerson.objects.filter(is_primary=True),
+            to_attr='primary_contacts',
+        )
+    )
+
+
+def encode_cursor(client):
+    """Курсор страницы для URL: время создания (UTC) и id клиента."""
+    created_at = client.created_at.astimezone(dt_timezone.utc)
+    return f"{created_at.strftime(CURSOR_DATETIME_FORMAT)}-{client.id}"
+
+
+def decode_cursor(value):
+    """
+    Разбирает курсор из URL.
+
+    Returns:
+        tuple или None: (created_at, id); None, если курсор некорректный
+    """
+    try:
+        created_at, client_id = value.split('-')
+        created_at = datetime.strptime(created_at, CURSOR_DATETIME_FORMAT).replace(tzinfo=dt_timezone.utc)
+        return created_at, int(client_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_client_page(after=None, before=None, page_size=CLIENTS_PAGE_SIZE):
+    """
+    Страница клиентов (новые сверху) по ключу (created_at, id).
+
+    Args:
+        after: курсор – страница начинается после этого клиента
+        before: курсор – страница заканчивается перед этим клиентом
+        page_size: размер страницы
+
+    Returns:
+        dict: {'clients', 'next_cursor', 'prev_cursor'}; курсоры None,
+              если соседней страницы нет
+    """
+    queryset = with_list_data(Client.objects.all())
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before else None
+
+    if before:
+        created_at, client_id = before
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=client_id)
+        ).order_by('created_at', 'id')
+    else:
+        if after:
+            created_at, client_id = after
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=client_id)
+            )
+        queryset = queryset.order_by('-created_at', '-id')
+
+    # Читаем на одного клиента больше, чтобы узнать, есть ли ещё страница
+    clients = list(queryset[:page_size + 1])
+    has_more = len(clients) > page_size
+    clients = clients[:page_size]
+
+    if before:
+        clients.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = after is not None, has_more
+
+    return {
+        'clients': clients,
+        'next_cursor': encode_cursor(clients[-1]) if clients and has_older else None,
+        'prev_cursor': encode_cursor(clients[0]) if clients and has_newer else None,
+    }
+
+
+def get_clients_by_ids(ids):
+    """
+    Клиенты с данными для списка в порядке ids (например, результаты поиска).
+
+    Args:
+        ids: список id клиентов
+
+    Returns:
+        list: клиенты в том же порядке
+    """
+    clients = with_list_data(Client.objects.filter(id__in=ids)).in_bulk()
+    return [clients[client_id] for client_id in ids if client_id in clients]
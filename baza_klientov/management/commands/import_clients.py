@@ -0,0 +1,78 @@
+"""
+baza_klientov/management/commands/import_clients.py
+Массовый импорт клиентов и контактных лиц из CSV или XLSX (перенос из старой CRM).
+
+Строки проверяются по правилам форм клиента и контактного лица; строки
+с ошибками пропускаются и попадают в отчёт (CSV: строка, поле, ошибка).
+Формат столбцов – в baza_klientov/importer.py.
+
+Пример:
+    python manage.py import_clients clients.xlsx
+    python manage.py import_clients crm_export.csv --report errors.csv
+    python manage.py import_clients crm_export.csv --dry-run
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from baza_klientov.importer import (
+    iter_rows, import_clients, write_error_report, ImportFormatError, IMPORT_CHUNK_SIZE,
+)
+
+
+class Command(BaseCommand):
+    help = 'Импортирует клиентов и контактных лиц из файла CSV или XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .csv или .xlsx (первая строка – заголовки)')
+        parser.add_argument(
+            '--report',
+            help='Куда записать отчёт об ошибках (CSV); по умолчанию <файл>.errors.csv'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help=f'Сколько строк проверять и вставлять за раз (по умолчанию {IMPORT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только проверить файл, ничего не сохраняя'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        path = options['path']
+
+        def report(rows, clients):
+            self.stdout.write(f"  строк: {rows}, клиентов: {clients} ({time.perf_counter() - started:.1f} с)")
+
+        try:
+            with open(path, 'rb') as import_file:
+                result = import_clients(
+                    iter_rows(import_file, path),
+                    chunk_size=options['chunk_size'],
+                    dry_run=options['dry_run'],
+                    progress=report,
+                )
+        except OSError as e:
+            raise CommandError(f"Не удалось открыть файл: {e}")
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+
+        if result['errors']:
+            report_path = options['report'] or f"{path}.errors.csv"
+            with open(report_path, 'w', encoding='utf-8', newline='') as report_file:
+                write_error_report(result, report_file)
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Ошибок: {len(result['errors'])}, отчёт: {report_path}"
+            ))
+
+        action = 'Проверено' if options['dry_run'] else 'Импортировано'
+        numbers = f" ({result['first_number']} – {result['last_number']})" if result['clients'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {action}: клиентов {result['clients']}{numbers}, контактов {result['contacts']} "
+            f"из {result['rows']} строк за {time.perf_counter() - started:.1f} с"
+        ))
@@ -0,0 +1,44 @@
+"""
+Триграммные GIN-индексы (pg_trgm) для поиска клиентов – baza_klientov/search.py.
+
+Только для PostgreSQL: на других СУБД миграция ничего не делает
+(там работает индекс поиска в памяти процесса).
+"""
+
+from django.db import migrations
+
+
+TRGM_INDEXES = [
+    ('baza_klientov_client_name_trgm', 'baza_klientov_client', 'name'),
+    ('baza_klientov_client_number_trgm', 'baza_klientov_client', 'client_number'),
+    ('baza_klientov_client_address_trgm', 'baza_klientov_client', 'address'),
+    ('baza_klientov_contact_full_name_trgm', 'baza_klientov_contactperson', 'full_name'),
+]
+
+
+def create_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, table, column in TRGM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ({column} gin_trgm_ops)'
+        )
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, _, _ in TRGM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baza_klientov', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('baza_klientov', '0002_client_search_trgm_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='client',
+            name='baza_klient_created_d83634_idx',
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['created_at', 'id'], name='baza_klient_created_0af71a_idx'),
+        ),
+    ]
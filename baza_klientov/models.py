@@ -97,7 +97,8 @@ class Client(models.Model):
         indexes = [
             models.Index(fields=['client_number']),
             models.Index(fields=['name']),
-            models.Index(fields=['created_at']),
+            # Постраничный список по ключу (created_at, id) – listing.py
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -309,7 +310,7 @@ class ContactPerson(models.Model):
         """Преобразует объект в словарь для JSON"""
         return {
             'id': self.id,
-            'client_id': self.client.id,
+            'client_id': self.client_id,
             'full_name': self.full_name,
             'position': self.position or "",
             'phone': self.phone or "",
@@ -0,0 +1,343 @@
+"""
+search.py для приложения baza_klientov
+Быстрый поиск клиентов для подсказок при вводе (typeahead)
+
+Поиск идёт по названию, номеру, адресу клиента и ФИО его контактных лиц,
+находит совпадения по подстроке (в том числе начало номера «K-12») и
+нечёткие совпадения с опечатками. Результаты упорядочены по релевантности
+и отдаются страницами.
+
+PostgreSQL: триграммные GIN-индексы pg_trgm (миграция 0002) – ILIKE '%...%'
+и оператор похожести слов <% используют индекс, поэтому поиск не читает
+всю таблицу клиентов.
+
+SQLite (разработка и тесты): in-process триграммный индекс в памяти процесса
+(_TrigramIndex) с тем же расчётом релевантности. Он перестраивается при
+изменении клиентов и контактов – по версии в кэше Django (signals.py).
+
+Релевантность:
+- похожесть (similarity / word_similarity pg_trgm) по названию и номеру,
+  по адресу – с весом ADDRESS_WEIGHT, по контактам – CONTACT_WEIGHT;
+- бонус за начало номера (PREFIX_NUMBER_BONUS) и начало названия
+  или ФИО контакта (PREFIX_NAME_BONUS).
+"""
+
+import re
+import threading
+import uuid
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection
+
+from .models import Client, ContactPerson
+
+
+# Размер страницы результатов (по умолчанию и максимальный)
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+# Веса совпадений в разных полях
+ADDRESS_WEIGHT = 0.8
+CONTACT_WEIGHT = 0.9
+PREFIX_NUMBER_BONUS = 2.0
+PREFIX_NAME_BONUS = 1.0
+PREFIX_CONTACT_BONUS = 0.5
+
+# Порог похожести слова для нечёткого совпадения (pg_trgm.word_similarity_threshold)
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+SEARCH_VERSION_KEY = 'baza_klientov:search:version'
+
+
+def get_search_version():
+    """
+    Текущая версия данных поиска. Версия – случайный токен, а не счётчик:
+    после очистки кэша она не совпадёт с версией уже построенного индекса.
+    """
+    version = cache.get(SEARCH_VERSION_KEY)
+    if version is None:
+        cache.add(SEARCH_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(SEARCH_VERSION_KEY)
+    return version
+
+
+def bump_search_version():
+    """Помечает индекс поиска в памяти устаревшим (вызывается сигналами)."""
+    cache.set(SEARCH_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+# ========== POSTGRESQL ==========
+
+def _like_escape(value):
+    """Экранирует спецсимволы шаблона LIKE."""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _search_postgresql(query, limit, offset):
+    """
+    Ранжированный поиск на pg_trgm. Возвращает список (id клиента, релевантность).
+    """
+    clients_table = connection.ops.quote_name(Client._meta.db_table)
+    contacts_table = connection.ops.quote_name(ContactPerson._meta.db_table)
+
+    sql = f"""
+        WITH matches AS (
+            SELECT c.id,
+                   GREATEST(
+                       similarity(c.name, %(q)s),
+                       word_similarity(%(q)s, c.name),
+                       similarity(c.client_number, %(q)s),
+                       word_similarity(%(q)s, COALESCE(c.address, '')) * %(address_weight)s
+                   )
+                   + CASE WHEN c.client_number ILIKE %(prefix)s THEN %(number_bonus)s ELSE 0 END
+                   + CASE WHEN c.name ILIKE %(prefix)s THEN %(name_bonus)s ELSE 0 END AS rank
+            FROM {clients_table} c
+            WHERE c.name ILIKE %(contains)s
+               OR c.client_number ILIKE %(contains)s
+               OR c.address ILIKE %(contains)s
+               OR %(q)s <%% c.name
+            UNION ALL
+            SELECT p.client_id,
+                   GREATEST(similarity(p.full_name, %(q)s), word_similarity(%(q)s, p.full_name)) * %(contact_weight)s
+                   + CASE WHEN p.full_name ILIKE %(prefix)s THEN %(contact_bonus)s ELSE 0 END
+            FROM {contacts_table} p
+            WHERE p.full_name ILIKE %(contains)s
+               OR %(q)s <%% p.full_name
+        )
+        SELECT id, MAX(rank) AS rank
+        FROM matches
+        GROUP BY id
+        ORDER BY rank DESC, id DESC
+        LIMIT %(limit)s OFFSET %(offset)s
+    """
+    escaped = _like_escape(query)
+    params = {
+        'q': query,
+        'prefix': f'{escaped}%',
+        'contains': f'%{escaped}%',
+        'address_weight': ADDRESS_WEIGHT,
+        'contact_weight': CONTACT_WEIGHT,
+        'number_bonus': PREFIX_NUMBER_BONUS,
+        'name_bonus': PREFIX_NAME_BONUS,
+        'contact_bonus': PREFIX_CONTACT_BONUS,
+        'limit': limit,
+        'offset': offset,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(client_id, float(rank)) for client_id, rank in cursor.fetchall()]
+
+
+# ========== ИНДЕКС В ПАМЯТИ (SQLITE) ==========
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def trigrams(text):
+    """
+    Множество триграмм строки – как в pg_trgm: слова в нижнем регистре,
+    дополненные двумя пробелами в начале и одним в конце.
+    """
+    result = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f'  {word} '
+        for index in range(len(padded) - 2):
+            result.add(padded[index:index + 3])
+    return result
+
+
+def similarity(query_trigrams, text_trigrams):
+    """Похожесть двух множеств триграмм (similarity из pg_trgm)."""
+    if not query_trigrams or not text_trigrams:
+        return 0.0
+    shared = len(query_trigrams & text_trigrams)
+    return shared / (len(query_trigrams) + len(text_trigrams) - shared)
+
+
+def word_similarity(query_trigrams, text_trigrams):
+    """
+    Доля триграмм запроса, найденных в тексте. Упрощение word_similarity
+    из pg_trgm (там учитывается ещё и непрерывность фрагмента текста).
+    """
+    if not query_trigrams:
+        return 0.0
+    return len(query_trigrams & text_trigrams) / len(query_trigrams)
+
+
+class _TrigramIndex:
+    """
+    Триграммный индекс клиентов в памяти процесса.
+
+    Хранит для каждого клиента строки полей и их триграммы, а также
+    обратный индекс «триграмма → клиенты», по которому выбираются кандидаты.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.entries = {}
+        self.postings = {}
+
+        for client_id, number, name, address in Client.objects.values_list(
+            'id', 'client_number', 'name', 'address'
+        ).iterator():
+            self.entries[client_id] = {
+                'number': number.lower(),
+                'name': name.lower(),
+                'address': (address or '').lower(),
+                'contacts': [],
+                'number_trigrams': trigrams(number),
+                'name_trigrams': trigrams(name),
+                'address_trigrams': trigrams(address),
+                'contact_trigrams': [],
+            }
+
+        for client_id, full_name in ContactPerson.objects.values_list('client_id', 'full_name').iterator():
+            entry = self.entries.get(client_id)
+            if entry is not None:
+                entry['contacts'].append(full_name.lower())
+                entry['contact_trigrams'].append(trigrams(full_name))
+
+        for client_id, entry in self.entries.items():
+            all_trigrams = entry['number_trigrams'] | entry['name_trigrams'] | entry['address_trigrams']
+            for contact_trigrams in entry['contact_trigrams']:
+                all_trigrams |= contact_trigrams
+            for trigram in all_trigrams:
+                self.postings.setdefault(trigram, []).append(client_id)
+
+    def rank(self, entry, query, query_trigrams):
+        """Релевантность клиента или None, если он не подходит под запрос (как в SQL-версии)."""
+        rank = None
+
+        client_match = (
+            query in entry['name']
+            or query in entry['number']
+            or query in entry['address']
+            or word_similarity(query_trigrams, entry['name_trigrams']) >= WORD_SIMILARITY_THRESHOLD
+        )
+        if client_match:
+            rank = max(
+                similarity(query_trigrams, entry['name_trigrams']),
+                word_similarity(query_trigrams, entry['name_trigrams']),
+                similarity(query_trigrams, entry['number_trigrams']),
+                word_similarity(query_trigrams, entry['address_trigrams']) * ADDRESS_WEIGHT,
+            )
+            if entry['number'].startswith(query):
+                rank += PREFIX_NUMBER_BONUS
+            if entry['name'].startswith(query):
+                rank += PREFIX_NAME_BONUS
+
+        for full_name, contact_trigrams in zip(entry['contacts'], entry['contact_trigrams']):
+            contact_word_similarity = word_similarity(query_trigrams, contact_trigrams)
+            if query not in full_name and contact_word_similarity < WORD_SIMILARITY_THRESHOLD:
+                continue
+            contact_rank = max(similarity(query_trigrams, contact_trigrams), contact_word_similarity) * CONTACT_WEIGHT
+            if full_name.startswith(query):
+                contact_rank += PREFIX_CONTACT_BONUS
+            rank = contact_rank if rank is None else max(rank, contact_rank)
+
+        return rank
+
+    def search(self, query, limit, offset):
+        """Список (id клиента, релевантность) для страницы результатов."""
+        query = query.lower()
+        query_trigrams = trigrams(query)
+
+        # Кандидаты – клиенты с общими триграммами; подстроки короче
+        # триграммы (например, «K-») проверяются по всем клиентам
+        if query_trigrams:
+            candidates = Counter()
+            for trigram in query_trigrams:
+                candidates.update(self.postings.get(trigram, ()))
+            candidate_ids = candidates.keys()
+        else:
+            candidate_ids = self.entries.keys()
+
+        ranked = []
+        for client_id in candidate_ids:
+            rank = self.rank(self.entries[client_id], query, query_trigrams)
+            if rank is not None:
+                ranked.append((client_id, rank))
+
+        ranked.sort(key=lambda item: (-item[1], -item[0]))
+        return ranked[offset:offset + limit]
+
+
+_fallback_index = None
+_fallback_lock = threading.Lock()
+
+
+def _get_fallback_index():
+    """Индекс в памяти для текущей версии данных (перестраивается после изменений)."""
+    global _fallback_index
+
+    version = get_search_version()
+    index = _fallback_index
+    if index is not None and index.version == version:
+        return index
+
+    with _fallback_lock:
+        if _fallback_index is None or _fallback_index.version != version:
+            _fallback_index = _TrigramIndex(version)
+        return _fallback_index
+
+
+# ========== ПОИСК ==========
+
+def search_clients(query, page=1, page_size=SEARCH_PAGE_SIZE):
+    """
+    Ищет клиентов по названию, номеру, адресу и ФИО контактных лиц.
+
+    Args:
+        query: строка поиска (пустая – последние добавленные клиенты)
+        page: номер страницы, с 1
+        page_size: размер страницы (не больше SEARCH_MAX_PAGE_SIZE)
+
+    Returns:
+        tuple: (список словарей клиентов по убыванию релевантности,
+                есть ли следующая страница)
+    """
+    query = (query or '').strip()
+    page = max(1, int(page))
+    page_size = max(1, min(int(page_size), SEARCH_MAX_PAGE_SIZE))
+    offset = (page - 1) * page_size
+
+    # Читаем на одну строку больше, чтобы узнать, есть ли следующая страница
+    if not query:
+        ids = list(
+            Client.objects.order_by('-created_at', '-id')
+            .values_list('id', flat=True)[offset:offset + page_size + 1]
+        )
+        ranked = [(client_id, None) for client_id in ids]
+    elif connection.vendor == 'postgresql':
+        ranked = _search_postgresql(query, page_size + 1, offset)
+    else:
+        ranked = _get_fallback_index().search(query, page_size + 1, offset)
+
+    has_more = len(ranked) > page_size
+    ranked = ranked[:page_size]
+
+    ids = [client_id for client_id, _ in ranked]
+    clients = Client.objects.in_bulk(ids)
+    primary_contacts = {
+        contact.client_id: contact.full_name
+        for contact in ContactPerson.objects.filter(client_id__in=ids, is_primary=True)
+    }
+
+    results = []
+    for client_id, rank in ranked:
+        client = clients.get(client_id)
+        if client is None:
+            continue
+        results.append({
+            'id': client.id,
+            'client_number': client.client_number,
+            'name': client.name,
+            'address': client.address or "",
+            'discount': client.discount,
+            'has_edo': client.has_edo,
+            'primary_contact': primary_contacts.get(client.id, ""),
+            'rank': round(rank, 3) if rank is not None else None,
+        })
+
+    return results, has_more
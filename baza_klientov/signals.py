@@ -0,0 +1,27 @@
+"""
+signals.py для приложения baza_klientov
+Сигналы для поддержания индекса поиска клиентов
+
+Функции:
+- client_search_data_changed: помечает индекс поиска в памяти устаревшим
+  при изменении или удалении клиента или контактного лица
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Client, ContactPerson
+from .search import bump_search_version
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=ContactPerson)
+@receiver(post_delete, sender=ContactPerson)
+def client_search_data_changed(sender, **kwargs):
+    """
+    Клиент или контакт изменён – индекс поиска в памяти (SQLite) будет
+    перестроен при следующем запросе. На PostgreSQL поиск идёт по GIN-индексам
+    и от версии не зависит.
+    """
+    bump_search_version()
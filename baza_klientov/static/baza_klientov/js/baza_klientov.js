@@ -22,8 +22,48 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Восстановление состояния формы (если нужно)
     restoreFormState();
+    
+    // Контактные лица выбранного клиента подгружаются отдельным запросом
+    loadClientContacts();
 });
 
+// Загрузка контактных лиц выбранного клиента (api/client/<id>/)
+function loadClientContacts() {
+    const contactsSection = document.querySelector('.contacts-section[data-detail-url]');
+    if (!contactsSection) return;
+    
+    fetch(contactsSection.getAttribute('data-detail-url'), {
+        headers: { 'X-Requested-With': 'XMLHttpRequest' },
+        credentials: 'same-origin',
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    })
+    .then(data => {
+        if (!data.success) {
+            throw new Error(data.error || 'Ошибка загрузки');
+        }
+        contactsSection.innerHTML = data.contacts_html;
+        
+        // Кнопки удаления появились только сейчас
+        contactsSection.querySelectorAll('.btn-delete-contact').forEach(btn => {
+            btn.addEventListener('click', handleDeleteContact);
+        });
+        // In-line редактирование контактов (baza_klientov_inline_edit.js)
+        document.dispatchEvent(new CustomEvent('contacts:loaded'));
+    })
+    .catch(error => {
+        console.error('Ошибка загрузки контактных лиц:', error);
+        const loading = contactsSection.querySelector('.contacts-loading');
+        if (loading) {
+            loading.textContent = 'Не удалось загрузить контактные лица. Обновите страницу.';
+        }
+    });
+}
+
 // Инициализация обработчиков событий
 function initEventListeners() {
     console.log('Инициализация обработчиков событий...');
@@ -38,6 +38,14 @@ document.addEventListener('DOMContentLoaded', function() {
     document.addEventListener('keydown', handleKeyPress);
 });
 
+// Контактные лица подгружаются после открытия карточки клиента (baza_klientov.js) –
+// обработчики для них назначаются после вставки списка
+document.addEventListener('contacts:loaded', function() {
+    initContactInlineEditListeners();
+    initPrimaryEditListeners();
+    initContactInputListeners();
+});
+
 // Инициализация обработчиков для редактируемых полей клиентов
 function initClientInlineEditListeners() {
     console.log('Инициализация обработчиков редактируемых полей клиентов...');
@@ -200,6 +208,12 @@ function initInlineInputListeners() {
         });
     }
     
+    initContactInputListeners();
+}
+
+// Инициализация обработчиков для полей ввода контактов
+// (вызывается повторно после загрузки списка контактов)
+function initContactInputListeners() {
     const contactsSection = document.querySelector('.contacts-section');
     if (contactsSection) {
         // Обработчики для полей ввода контактов
@@ -1,3 +1,174 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from baza_klientov.models import Client, ContactPerson
+from baza_klientov.importer import iter_rows, import_clients, ImportFormatError
+from baza_klientov.listing import get_client_page
+from baza_klientov.search import search_clients
+
+
+class ClientSearchTest(TestCase):
+    """Поиск клиентов для подсказок (baza_klientov/search.py, индекс в памяти на SQLite)."""
+
+    def setUp(self):
+        cache.clear()
+        self.printhouse = Client.objects.create(client_number='K-12', name='Типография Восток', address='Москва, ул. Ленина 5')
+        self.bakery = Client.objects.create(client_number='K-120', name='Пекарня Хлебный дом', address='Казань')
+        self.agency = Client.objects.create(client_number='K-7', name='Рекламное агентство Полёт', address='Самара')
+        ContactPerson.objects.create(client=self.agency, full_name='Смирнова Ольга Петровна', is_primary=True)
+
+    def ids(self, query, **kwargs):
+        results, _ = search_clients(query, **kwargs)
+        return [result['id'] for result in results]
+
+    def test_number_prefix_ranks_first(self):
+        ids = self.ids('K-12')
+        self.assertEqual(ids[0], self.printhouse.id)
+        self.assertIn(self.bakery.id, ids)
+        self.assertNotIn(self.agency.id, ids)
+
+    def test_fuzzy_name_with_typo(self):
+        self.assertEqual(self.ids('типогрфия'), [self.printhouse.id])
+
+    def test_contact_name_and_primary_contact(self):
+        results, _ = search_clients('смирнова')
+        self.assertEqual([result['id'] for result in results], [self.agency.id])
+        self.assertEqual(results[0]['primary_contact'], 'Смирнова Ольга Петровна')
+
+    def test_pagination(self):
+        first, has_more = search_clients('K-', page=1, page_size=2)
+        self.assertEqual(len(first), 2)
+        self.assertTrue(has_more)
+        second, has_more = search_clients('K-', page=2, page_size=2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse(has_more)
+        self.assertFalse({r['id'] for r in first} & {r['id'] for r in second})
+
+    def test_index_follows_changes(self):
+        self.assertEqual(self.ids('типография'), [self.printhouse.id])
+        self.printhouse.name = 'Цифровая печать'
+        self.printhouse.save()
+        self.assertEqual(self.ids('типография'), [])
+        self.assertEqual(self.ids('цифровая'), [self.printhouse.id])
+
+    def test_search_endpoint(self):
+        user = get_user_model().objects.create_user(username='manager', password='secret-123')
+        self.client.force_login(user)
+        response = self.client.get('/baza_klientov/api/search/', {'q': 'K-7'})
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['results'][0]['client_number'], 'K-7')
+        self.assertFalse(data['has_more'])
+
+
+class ClientListTest(TestCase):
+    """Постраничный список клиентов (baza_klientov/listing.py)."""
+
+    def setUp(self):
+        self.clients = [Client.objects.create(client_number=f'K-{i}', name=f'Клиент {i}') for i in range(1, 8)]
+        ContactPerson.objects.create(client=self.clients[0], full_name='Основной', is_primary=True)
+        ContactPerson.objects.create(client=self.clients[0], full_name='Второй')
+
+    def test_keyset_pages_cover_all_clients(self):
+        seen = []
+        page = get_client_page(page_size=3)
+        pages = [page]
+        while page['next_cursor']:
+            page = get_client_page(after=page['next_cursor'], page_size=3)
+            pages.append(page)
+        for page in pages:
+            seen.extend(client.id for client in page['clients'])
+
+        self.assertEqual(seen, [client.id for client in reversed(self.clients)])
+        self.assertIsNone(pages[0]['prev_cursor'])
+
+        back = get_client_page(before=pages[1]['prev_cursor'], page_size=3)
+        self.assertEqual(back['clients'], pages[0]['clients'])
+        self.assertIsNone(back['prev_cursor'])
+
+    def test_page_counts_without_per_row_queries(self):
+        # Клиенты со счётчиками и основные контакты
+        with self.assertNumQueries(2):
+            clients = get_client_page(page_size=10)['clients']
+            first = clients[-1]
+            self.assertEqual(first.contacts_count, 2)
+            self.assertEqual(first.proschets_count, 0)
+            self.assertEqual([contact.full_name for contact in first.primary_contacts], ['Основной'])
+
+
+class ClientDetailApiTest(TestCase):
+    """Контактные лица карточки клиента подгружаются через api/client/<id>/."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='manager', password='secret')
+        self.client.force_login(self.user)
+        self.customer = Client.objects.create(client_number='K-1', name='Типография Восток')
+        ContactPerson.objects.create(client=self.customer, full_name='Второй Контакт')
+        ContactPerson.objects.create(client=self.customer, full_name='Основной Контакт', is_primary=True)
+
+    def test_detail_returns_contacts_markup(self):
+        response = self.client.get(reverse('baza_klientov:client_detail', args=[self.customer.id]))
+        data = response.json()
+
+        self.assertTrue(data['success'])
+        self.assertEqual([contact['full_name'] for contact in data['contacts']], ['Основной Контакт', 'Второй Контакт'])
+        self.assertIn('Основной Контакт', data['contacts_html'])
+        self.assertIn('btn-delete-contact', data['contacts_html'])
+
+    def test_index_does_not_load_contacts(self):
+        response = self.client.get(reverse('baza_klientov:index'), {'client_id': self.customer.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('contact_persons', response.context)
+        self.assertNotContains(response, 'Второй Контакт')
+        self.assertContains(response, reverse('baza_klientov:client_detail', args=[self.customer.id]))
+
+
+class ClientImportTest(TestCase):
+    """Массовый импорт клиентов (baza_klientov/importer.py)."""
+
+    CSV = (
+        'Название;Скидка;ЭДО;Контакт;E-mail\n'
+        'ООО "Первый";5;да;Иванов Иван;ivanov@example.com\n'
+        ';10;;;\n'
+        'ООО "Второй";150;;Петров;\n'
+        'ООО "Третий";;;;\n'
+        'ООО "Четвёртый";0;нет;Сидоров;not-an-email\n'
+    )
+
+    def run_import(self, **kwargs):
+        return import_clients(iter_rows(io.BytesIO(self.CSV.encode('utf-8-sig')), 'clients.csv'), **kwargs)
+
+    def test_valid_rows_are_created_with_sequential_numbers(self):
+        Client.objects.create(client_number='K-41', name='Существующий')
+
+        result = self.run_import(chunk_size=2)
+
+        self.assertEqual((result['rows'], result['clients'], result['contacts']), (5, 2, 1))
+        self.assertEqual((result['first_number'], result['last_number']), ('K-42', 'K-43'))
+        first = Client.objects.get(client_number='K-42')
+        self.assertEqual((first.name, first.discount, first.has_edo), ('ООО "Первый"', 5, True))
+        contact = first.contact_persons.get()
+        self.assertEqual((contact.full_name, contact.is_primary), ('Иванов Иван', True))
+
+    def test_errors_are_reported_per_row(self):
+        result = self.run_import()
+
+        self.assertEqual(
+            [(row_number, name) for row_number, name, _ in result['errors']],
+            [(3, 'name'), (4, 'discount'), (6, 'contact_email')],
+        )
+
+    def test_dry_run_saves_nothing(self):
+        result = self.run_import(dry_run=True)
+
+        self.assertEqual(result['clients'], 2)
+        self.assertFalse(Client.objects.exists())
 
-# Create your tests here.
+    def test_missing_name_column(self):
+        with self.assertRaises(ImportFormatError):
+            list(iter_rows(io.BytesIO('Адрес;Скидка\nМосква;5\n'.encode()), 'clients.csv'))
@@ -15,6 +15,15 @@ urlpatterns = [
     # Главная страница приложения
     path('', views.index, name='index'),
     
+    # API поиска клиентов для подсказок при вводе (AJAX)
+    path('api/search/', views.search_clients_api, name='search_clients'),
+    
+    # API данных клиента для панели деталей (AJAX)
+    path('api/client/<int:client_id>/', views.client_detail_api, name='client_detail'),
+    
+    # API массового импорта клиентов из CSV/XLSX (AJAX)
+    path('api/import_clients/', views.import_clients_upload, name='import_clients'),
+    
     # API для создания нового клиента (AJAX)
     path('api/create_client/', views.create_client, name='create_client'),
     
@@ -6,34 +6,128 @@ views.py для приложения baza_klientov
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse
+from django.template.loader import render_to_string
 from django.contrib import messages
 from django.views.decorators.http import require_POST, require_GET
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.cache import never_cache
+from urllib.parse import urlencode
 import json
 from .models import Client, ContactPerson
 from .forms import ClientForm, ContactPersonForm, ClientInlineUpdateForm, ContactPersonInlineUpdateForm
+from .search import search_clients, SEARCH_PAGE_SIZE
+from .listing import get_client_page, get_clients_by_ids, with_list_data, CLIENTS_PAGE_SIZE
+from .importer import iter_rows, import_clients, ImportFormatError
+
+# Сколько ошибок импорта возвращать в ответе (полный отчёт – команда import_clients)
+IMPORT_ERRORS_IN_RESPONSE = 500
 
 @login_required(login_url='/login/')
 def get_clients_api(request):
-    """API endpoint для получения списка клиентов"""
+    """
+    API endpoint для получения списка клиентов
+
+    Отдаёт страницу клиентов (параметры q, page, page_size – как у
+    search_clients_api; без q – последние добавленные), весь список
+    целиком больше не читается.
+
+    Returns:
+        JsonResponse: {'success', 'clients', 'count', 'page', 'has_more'}
+    """
     try:
-        clients = Client.objects.all().order_by('client_number')
-        clients_data = [client.to_dict() for client in clients]
-        
+        page = int(request.GET.get('page', 1))
+        page_size = int(request.GET.get('page_size', SEARCH_PAGE_SIZE))
+    except ValueError:
         return JsonResponse({
-            'success': True,
-            'clients': clients_data,
-            'count': len(clients_data)
-        })
-    except Exception as e:
+            'success': False,
+            'message': 'Некорректный номер или размер страницы'
+        }, status=400)
+
+    clients_data, has_more = search_clients(request.GET.get('q', ''), page=page, page_size=page_size)
+
+    return JsonResponse({
+        'success': True,
+        'clients': clients_data,
+        'count': len(clients_data),
+        'page': max(1, page),
+        'has_more': has_more,
+    })
+
+
+@login_required(login_url='/login/')
+@require_GET
+def search_clients_api(request):
+    """
+    Поиск клиентов для подсказок при вводе (typeahead)
+
+    Ищет по названию, номеру, адресу и ФИО контактных лиц, понимает начало
+    номера («K-12») и опечатки. Результаты ранжированы по релевантности.
+
+    Args:
+        request: GET-запрос с параметрами q, page (с 1) и page_size (до 50)
+
+    Returns:
+        JsonResponse: {'success', 'results', 'page', 'has_more'}
+    """
+    try:
+        page = int(request.GET.get('page', 1))
+        page_size = int(request.GET.get('page_size', SEARCH_PAGE_SIZE))
+    except ValueError:
         return JsonResponse({
             'success': False,
-            'message': f'Ошибка при получении клиентов: {str(e)}'
-        }, status=500)
+            'error': 'Некорректный номер или размер страницы'
+        }, status=400)
 
+    results, has_more = search_clients(request.GET.get('q', ''), page=page, page_size=page_size)
+
+    return JsonResponse({
+        'success': True,
+        'results': results,
+        'page': max(1, page),
+        'has_more': has_more,
+    })
+
+
+@login_required(login_url='/login/')
+@require_GET
+def client_detail_api(request, client_id):
+    """
+    Данные клиента для панели деталей (подгружаются по выбору клиента в списке)
+
+    Страница базы клиентов не читает контактные лица выбранного клиента –
+    карточка запрашивает их здесь после открытия (baza_klientov.js).
+
+    Args:
+        request: GET-запрос
+        client_id: ID клиента
+
+    Returns:
+        JsonResponse: {'success', 'client' (со счётчиками contacts_count и
+                      proschets_count), 'contacts', 'contacts_html' – готовый
+                      список контактов (partials/contacts.html)}
+    """
+    client = with_list_data(Client.objects.filter(id=client_id)).first()
+    if client is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'Клиент не найден'
+        }, status=404)
+
+    client_data = client.to_dict()
+    client_data['contacts_count'] = client.contacts_count
+    client_data['proschets_count'] = client.proschets_count
+
+    contacts = list(ContactPerson.objects.filter(client_id=client.id).order_by('-is_primary', 'full_name'))
+
+    return JsonResponse({
+        'success': True,
+        'client': client_data,
+        'contacts': [contact.to_dict() for contact in contacts],
+        'contacts_html': render_to_string(
+            'baza_klientov/partials/contacts.html', {'contact_persons': contacts}, request=request
+        ),
+    })
 
 
 @login_required(login_url='/login/')
@@ -42,23 +136,39 @@ def index(request):
     """
     Главная страница базы клиентов
     
-    Отображает список клиентов с возможностью поиска и фильтрации
+    Отображает постраничный список клиентов с возможностью поиска.
+    Страницы списка – по ключу (параметры after/before, см. listing.py),
+    результаты поиска – по номеру страницы (параметр page).
     """
     
     # Поиск по клиентам (если есть параметр search)
     search_query = request.GET.get('search', '').strip()
     
-    # Получаем всех клиентов
-    clients = Client.objects.all().order_by('-created_at')
+    # Параметры текущей страницы – сохраняются в ссылках на клиентов
+    page_params = {}
     
-    # Применяем поиск, если есть запрос
     if search_query:
-        clients = clients.filter(
-            Q(client_number__icontains=search_query) |
-            Q(name__icontains=search_query) |
-            Q(address__icontains=search_query) |
-            Q(contact_persons__full_name__icontains=search_query)
-        ).distinct()  # Убираем дубликаты при поиске по связанным полям
+        # Поиск по индексу (search.py), клиенты страницы – одним запросом
+        try:
+            page = max(1, int(request.GET.get('page', 1)))
+        except ValueError:
+            page = 1
+        results, has_more = search_clients(search_query, page=page, page_size=CLIENTS_PAGE_SIZE)
+        clients = get_clients_by_ids([result['id'] for result in results])
+        page_params = {'search': search_query, 'page': page}
+        next_page_query = urlencode({'search': search_query, 'page': page + 1}) if has_more else None
+        prev_page_query = urlencode({'search': search_query, 'page': page - 1}) if page > 1 else None
+    else:
+        after = request.GET.get('after')
+        before = request.GET.get('before')
+        client_page = get_client_page(after=after, before=before)
+        clients = client_page['clients']
+        if before:
+            page_params = {'before': before}
+        elif after:
+            page_params = {'after': after}
+        next_page_query = urlencode({'after': client_page['next_cursor']}) if client_page['next_cursor'] else None
+        prev_page_query = urlencode({'before': client_page['prev_cursor']}) if client_page['prev_cursor'] else None
     
     # Форма для добавления нового клиента
     client_form = ClientForm()
@@ -66,16 +176,14 @@ def index(request):
     # Форма для добавления контактного лица (сначала пустая)
     contact_form = ContactPersonForm()
     
-    # Получаем ID выбранного клиента для отображения контактов
+    # Получаем ID выбранного клиента для отображения деталей
+    # (контактные лица карточка подгружает сама – client_detail_api)
     selected_client_id = request.GET.get('client_id')
     selected_client = None
-    contact_persons = []
     
     if selected_client_id:
         try:
             selected_client = Client.objects.get(id=selected_client_id)
-            # Получаем все контактные лица для этого клиента
-            contact_persons = ContactPerson.objects.filter(client=selected_client).order_by('-is_primary', 'full_name')
         except Client.DoesNotExist:
             messages.error(request, "Выбранный клиент не найден")
     
@@ -106,10 +214,12 @@ def index(request):
     context = {
         'clients': clients,
         'selected_client': selected_client,
-        'contact_persons': contact_persons,
         'client_form': client_form,
         'contact_form': contact_form,
         'search_query': search_query,
+        'page_query': urlencode(page_params),
+        'next_page_query': next_page_query,
+        'prev_page_query': prev_page_query,
     }
     
     # Отображаем шаблон
@@ -144,6 +254,49 @@ def create_client(request):
         }, status=400)
 
 
+@login_required(login_url='/login/')
+@require_POST
+def import_clients_upload(request):
+    """
+    Массовый импорт клиентов из загруженного файла CSV или XLSX
+
+    Args:
+        request: POST-запрос с файлом в поле 'import_file'
+
+    Returns:
+        JsonResponse: {'success', 'clients', 'contacts', 'rows',
+                      'errors_count', 'errors' – первые ошибки по строкам}
+    """
+    import_file = request.FILES.get('import_file')
+    if not import_file:
+        return JsonResponse({
+            'success': False,
+            'error': 'Файл не выбран'
+        }, status=400)
+
+    try:
+        result = import_clients(iter_rows(import_file, import_file.name))
+    except ImportFormatError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'rows': result['rows'],
+        'clients': result['clients'],
+        'contacts': result['contacts'],
+        'first_number': result['first_number'],
+        'last_number': result['last_number'],
+        'errors_count': len(result['errors']),
+        'errors': [
+            {'row': row_number, 'field': name, 'message': message}
+            for row_number, name, message in result['errors'][:IMPORT_ERRORS_IN_RESPONSE]
+        ],
+    })
+
+
 @require_POST
 def create_contact_person(request):
     """
@@ -159,15 +159,28 @@ class Laminate(models.Model):
             self.laminator_price = Decimal('0.00')
 
         # 2. Цена плёнки за лист (берётся из модели Material)
-        if self.film and self.film.type == 'film':
-            # get_price() возвращает цену с учётом наценки (для плёнки)
-            self.film_price = self.film.get_price().quantize(Decimal('0.01'))
-        else:
-            self.film_price = Decimal('0.00')
+        self.film_price = self.compute_film_price(self.film)
 
         # 3. Общая стоимость = (цена ламинации + цена плёнки) × количество листов
-        total = (self.laminator_price + self.film_price) * Decimal(str(sheet_count))
-        self.total_price = total.quantize(Decimal('0.01'))
+        self.total_price = self.compute_total_price(self.laminator_price, self.film_price, sheet_count)
+
+    @staticmethod
+    def compute_film_price(film):
+        """
+        Цена плёнки за лист по формуле recalculate_price. Вынесена отдельно
+        (как PrintComponent.compute_total_price), чтобы массовый пересчёт
+        после изменения цены плёнки (sklad/repricing.py) считал так же.
+        """
+        if film is not None and film.type == 'film':
+            # get_price() возвращает цену с учётом наценки (для плёнки)
+            return Decimal(film.get_price()).quantize(Decimal('0.01'))
+        return Decimal('0.00')
+
+    @staticmethod
+    def compute_total_price(laminator_price, film_price, sheet_count):
+        """Общая стоимость ламинации: (цена ламинации + цена плёнки) × количество листов."""
+        total = (laminator_price + film_price) * Decimal(str(sheet_count or 0))
+        return total.quantize(Decimal('0.01'))
 
     def to_dict(self):
         """Преобразует объект в словарь для JSON-ответов (AJAX)."""
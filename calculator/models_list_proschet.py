@@ -330,26 +330,36 @@ class PrintComponent(models.Model):
             except VichisliniyaListovModel.DoesNotExist:
                 sheet_count = Decimal('0.00')
 
-            # Цена печати за лист (может быть None)
-            price_per_sheet = self.price_per_sheet if self.price_per_sheet is not None else Decimal('0.00')
-            # Цена бумаги за лист
-            material_price = self.material_price_per_unit
+            self.total_circulation_price = self.compute_total_price(
+                self.price_per_sheet, self.material_price_per_unit, sheet_count, self.printing_mode
+            )
+        except Exception as e:
+            print(f"⚠️ Ошибка при пересчёте общей стоимости компонента {self.id}: {e}")
+            self.total_circulation_price = Decimal('0.00')
 
-            # Количество прогонов принтера – рассчитываем на основе актуального количества листов
-            runs = int(sheet_count) * (2 if self.printing_mode == 'duplex' else 1)
+    @staticmethod
+    def compute_total_price(price_per_sheet, material_price, sheet_count, printing_mode):
+        """
+        Общая стоимость компонента по формуле refresh_total_price. Вынесена
+        отдельно, чтобы массовый пересчёт после изменения цены бумаги
+        (sklad/repricing.py) считал так же, не загружая компоненты целиком.
+        """
+        # Цена печати за лист и цена бумаги могут быть не заданы
+        price_per_sheet = price_per_sheet if price_per_sheet is not None else Decimal('0.00')
+        material_price = material_price if material_price is not None else Decimal('0.00')
 
-            # Общая стоимость печати = цена за лист * количество прогонов
-            printing_cost = price_per_sheet * runs
+        # Количество прогонов принтера – рассчитываем на основе актуального количества листов
+        runs = int(sheet_count) * (2 if printing_mode == 'duplex' else 1)
 
-            # Общая стоимость бумаги = цена бумаги за лист * количество листов
-            material_cost = material_price * sheet_count
+        # Общая стоимость печати = цена за лист * количество прогонов
+        printing_cost = price_per_sheet * runs
 
-            # Итоговая стоимость компонента
-            total = printing_cost + material_cost
-            self.total_circulation_price = total.quantize(Decimal('0.01'))
-        except Exception as e:
-            print(f"⚠️ Ошибка при пересчёте общей стоимости компонента {self.id}: {e}")
-            self.total_circulation_price = Decimal('0.00')
+        # Общая стоимость бумаги = цена бумаги за лист * количество листов
+        material_cost = material_price * sheet_count
+
+        # Итоговая стоимость компонента
+        total = printing_cost + material_cost
+        return total.quantize(Decimal('0.01'))
 
     def save(self, *args, **kwargs):
         """Переопределённый метод сохранения с генерацией номера, расчётом цены и общей стоимости."""
@@ -417,11 +427,22 @@ class PrintComponent(models.Model):
         """Расчёт цены за лист интерполяцией (без изменений)."""
         try:
             from print_price.models import PrintPrice
+            from print_price.utils import CURVE_FIELDS, build_price_curves
+            from devices.interpolation import MONOTONE_CUBIC, evaluate
+
+            sheet_count_int = int(float(sheet_count))
+            interpolation_method = getattr(printer, 'devices_interpolation_method', 'linear')
+            # Монотонный сплайн: коэффициенты сохранены у принтера, опорные точки не читаются
+            if interpolation_method == MONOTONE_CUBIC:
+                curves = printer.devices_price_curves or build_price_curves(
+                    PrintPrice.objects.filter(printer=printer).order_by('copies').values_list('copies', *CURVE_FIELDS)
+                )
+                result = evaluate(curves['price_per_sheet'], sheet_count_int)
+                return Decimal('0.00') if result is None else Decimal(str(round(result, 2)))
+
             price_points = PrintPrice.objects.filter(printer=printer).order_by('copies')
             if not price_points.exists():
                 return Decimal('0.00')
-            sheet_count_int = int(float(sheet_count))
-            interpolation_method = getattr(printer, 'devices_interpolation_method', 'linear')
             min_price = price_points.first()
             max_price = price_points.last()
 
@@ -659,43 +680,46 @@ class AdditionalWork(models.Model):
         return f"{self.number}: {self.title} (для компонента {self.print_component.number})"
 
     # ----- ВСПОМОГАТЕЛЬНЫЙ МЕТОД: вычисление эффективной цены за единицу с учётом интерполяции -----
-    def _get_effective_price(self, sheet_count=None, circulation=None):
+    def _get_effective_price(self, sheet_count=None, circulation=None, cost=None):
         """
         Возвращает цену за единицу работы с учётом количества листов или тиража.
         - Для формул 2 и 3 используется интерполяция по тиражу.
         - Для остальных формул (1,4,5,6) – по листам.
         Если работа не связана со справочником, возвращает self.price (итоговая цена).
+        cost – уже интерполированная себестоимость (пакетный пересчёт,
+        spravochnik_dopolnitelnyh_rabot/resync.py): тогда опорные точки не читаются.
         """
         # Если нет связанной работы из справочника, возвращаем базовую цену (итоговую)
         if not self.work:
             return self.price
 
-        # Получаем себестоимость (cost) через интерполяцию
-        if self.formula_type in [2, 3]:
-            if circulation is None:
-                if self.print_component and self.print_component.proschet:
-                    circulation = self.print_component.proschet.circulation
-                else:
-                    circulation = 0
-            try:
-                cost = calculate_price_for_work_by_circulation(self.work, circulation)
-            except Exception as e:
-                print(f"⚠️ Ошибка при вычислении себестоимости по тиражу для работы {self.id}: {e}")
-                cost = Decimal('0')
-        else:
-            if sheet_count is None:
+        # Получаем себестоимость (cost) через интерполяцию, если она не передана
+        if cost is None:
+            if self.formula_type in [2, 3]:
+                if circulation is None:
+                    if self.print_component and self.print_component.proschet:
+                        circulation = self.print_component.proschet.circulation
+                    else:
+                        circulation = 0
                 try:
-                    vich_data = VichisliniyaListovModel.objects.get(
-                        vichisliniya_listov_print_component=self.print_component
-                    )
-                    sheet_count = vich_data.vichisliniya_listov_list_count
-                except VichisliniyaListovModel.DoesNotExist:
-                    sheet_count = Decimal('0')
-            try:
-                cost = calculate_price_for_work(self.work, sheet_count)
-            except Exception as e:
-                print(f"⚠️ Ошибка при вычислении себестоимости по листам для работы {self.id}: {e}")
-                cost = Decimal('0')
+                    cost = calculate_price_for_work_by_circulation(self.work, circulation)
+                except Exception as e:
+                    print(f"⚠️ Ошибка при вычислении себестоимости по тиражу для работы {self.id}: {e}")
+                    cost = Decimal('0')
+            else:
+                if sheet_count is None:
+                    try:
+                        vich_data = VichisliniyaListovModel.objects.get(
+                            vichisliniya_listov_print_component=self.print_component
+                        )
+                        sheet_count = vich_data.vichisliniya_listov_list_count
+                    except VichisliniyaListovModel.DoesNotExist:
+                        sheet_count = Decimal('0')
+                try:
+                    cost = calculate_price_for_work(self.work, sheet_count)
+                except Exception as e:
+                    print(f"⚠️ Ошибка при вычислении себестоимости по листам для работы {self.id}: {e}")
+                    cost = Decimal('0')
 
         # Применяем наценку, чтобы получить итоговую цену
         if self.markup_percent is not None and self.markup_percent > 0:
@@ -706,10 +730,11 @@ class AdditionalWork(models.Model):
         return effective_price
 
     # ----- МЕТОД ПЕРЕСЧЁТА ОБЩЕЙ СТОИМОСТИ -----
-    def recalculate_price(self, sheet_count, cuts_count, circulation):
+    def recalculate_price(self, sheet_count, cuts_count, circulation, cost=None):
         """
         Пересчитывает общую стоимость работы (total_price) на основе переданных параметров.
         Для формулы 3 использует effective_price, вычисленную по тиражу, для остальных – по листам.
+        cost – уже интерполированная себестоимость единицы (см. _get_effective_price).
         """
         qty = self.quantity if self.quantity else 1
         items = self.items_per_sheet if self.items_per_sheet else 1
@@ -723,10 +748,10 @@ class AdditionalWork(models.Model):
         # Получаем effective_price в зависимости от типа формулы
         if self.formula_type == 3:
             # Для формулы 3 используем тираж
-            effective_price = self._get_effective_price(circulation=circulation)
+            effective_price = self._get_effective_price(circulation=circulation, cost=cost)
         else:
             # Для остальных используем листы
-            effective_price = self._get_effective_price(sheet_count=sheet_count)
+            effective_price = self._get_effective_price(sheet_count=sheet_count, cost=cost)
 
         # Вычисление общей стоимости в зависимости от типа формулы
         if self.formula_type == 1:
@@ -773,6 +798,23 @@ class AdditionalWork(models.Model):
 
         self.total_price = total.quantize(Decimal('0.01'))
 
+    # ----- КОПИРОВАНИЕ ПОЛЕЙ ИЗ СПРАВОЧНИКА -----
+    # Поля, которые копируются из справочника (Work) при сохранении
+    WORK_SYNC_FIELDS = ['title', 'cost', 'markup_percent', 'price', 'formula_type', 'lines_count', 'items_per_sheet']
+
+    def copy_from_work(self, source_work):
+        """
+        Копирует в работу актуальные данные из справочника (WORK_SYNC_FIELDS).
+        Общий итог не пересчитывается – для этого recalculate_price.
+        """
+        self.title = source_work.name
+        self.cost = source_work.cost
+        self.markup_percent = source_work.markup_percent
+        self.price = source_work.price
+        self.formula_type = source_work.formula_type
+        self.lines_count = source_work.default_lines_count
+        self.items_per_sheet = source_work.default_items_per_sheet
+
     # ----- ПЕРЕОПРЕДЕЛЁННЫЙ МЕТОД СОХРАНЕНИЯ -----
     def save(self, *args, **kwargs):
         # 1. Генерация номера (как было)
@@ -797,22 +839,7 @@ class AdditionalWork(models.Model):
         # ===== ДОБАВЛЯЕМ: синхронизация с Work =====
         if self.work_id:
             # Получаем актуальные данные из справочника
-            source_work = self.work  # объект уже загружен, т.к. мы его установили
-            # Обновляем поля, если они отличаются
-            if self.title != source_work.name:
-                self.title = source_work.name
-            if self.cost != source_work.cost:
-                self.cost = source_work.cost
-            if self.markup_percent != source_work.markup_percent:
-                self.markup_percent = source_work.markup_percent
-            if self.price != source_work.price:
-                self.price = source_work.price
-            if self.formula_type != source_work.formula_type:
-                self.formula_type = source_work.formula_type
-            if self.lines_count != source_work.default_lines_count:
-                self.lines_count = source_work.default_lines_count
-            if self.items_per_sheet != source_work.default_items_per_sheet:
-                self.items_per_sheet = source_work.default_items_per_sheet
+            self.copy_from_work(self.work)
         # ===== КОНЕЦ ДОБАВЛЕНИЯ =====
 
         # 2. Получение данных из связанного печатного компонента и просчёта (без изменений)
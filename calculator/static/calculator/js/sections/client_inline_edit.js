@@ -8,6 +8,9 @@ calculator/static/calculator/js/sections/client_inline_edit.js
 
 "use strict";
 
+// Размер страницы клиентов в выпадающем списке (остальные – через поиск)
+const CLIENT_OPTIONS_PAGE_SIZE = 50;
+
 // ===== 1. ОСНОВНАЯ ФУНКЦИЯ ОБНОВЛЕНИЯ СЕКЦИИ КЛИЕНТА =====
 // Вызывается при выборе просчёта в списке просчётов
 function updateClientSection(proschetId, clientData) {
@@ -215,22 +218,11 @@ function startClientSelection(proschetId) {
         clientNameElement.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Загрузка...';
     }
 
-    // Загружаем список клиентов с сервера
-    fetch('/calculator/get-clients/', {
-        method: 'GET',
-        headers: {
-            'X-Requested-With': 'XMLHttpRequest',
-            'X-CSRFToken': getCsrfToken()
-        }
-    })
-    .then(response => response.json())
+    // Загружаем первую страницу клиентов (текущий клиент всегда в ней)
+    fetchClientOptions('', clientNameElement ? clientNameElement.dataset.clientId : '')
     .then(data => {
-        if (data.success && data.clients) {
-            // Показываем выпадающий список, передавая ID текущего клиента для предзаполнения
-            showClientDropdown(data.clients, proschetId);
-        } else {
-            throw new Error(data.message || 'Ошибка загрузки клиентов');
-        }
+        // Показываем выпадающий список, передавая ID текущего клиента для предзаполнения
+        showClientDropdown(data.clients, proschetId, data.has_more);
     })
     .catch(error => {
         console.error('Ошибка:', error);
@@ -244,7 +236,29 @@ function startClientSelection(proschetId) {
     });
 }
 
-function showClientDropdown(clients, proschetId) {
+// Страница клиентов для выпадающего списка (весь список сервер не отдаёт)
+function fetchClientOptions(query, selectedId) {
+    const params = new URLSearchParams({ page_size: CLIENT_OPTIONS_PAGE_SIZE });
+    if (query) params.set('q', query);
+    if (selectedId) params.set('selected', selectedId);
+
+    return fetch(`/calculator/get-clients/?${params}`, {
+        method: 'GET',
+        headers: {
+            'X-Requested-With': 'XMLHttpRequest',
+            'X-CSRFToken': getCsrfToken()
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success || !data.clients) {
+            throw new Error(data.message || 'Ошибка загрузки клиентов');
+        }
+        return data;
+    });
+}
+
+function showClientDropdown(clients, proschetId, hasMore) {
     const clientNameElement = document.getElementById('current-client-name');
     if (!clientNameElement) return;
 
@@ -252,9 +266,31 @@ function showClientDropdown(clients, proschetId) {
     const currentClientId = clientNameElement.dataset.clientId;
     console.log('Текущий ID клиента для предзаполнения:', currentClientId);
 
+    // Поле поиска: список подгружается с сервера по мере ввода
+    const searchInput = document.createElement('input');
+    searchInput.type = 'search';
+    searchInput.className = 'client-inline-search';
+    searchInput.placeholder = 'Поиск клиента...';
+    searchInput.autocomplete = 'off';
+
     // Создаём выпадающий список
     const select = document.createElement('select');
     select.className = 'client-inline-select';
+    fillClientOptions(select, clients, currentClientId, hasMore);
+
+    // Заменяем имя на поле поиска и выпадающий список
+    clientNameElement.innerHTML = '';
+    clientNameElement.appendChild(searchInput);
+    clientNameElement.appendChild(select);
+    select.focus();
+
+    // Настраиваем обработчики событий для select
+    setupSelectListeners(select, proschetId);
+    setupClientSearchListeners(searchInput, select, proschetId);
+}
+
+function fillClientOptions(select, clients, currentClientId, hasMore) {
+    select.innerHTML = '';
 
     // Опция "Не выбран"
     const emptyOption = document.createElement('option');
@@ -287,13 +323,42 @@ function showClientDropdown(clients, proschetId) {
         select.appendChild(option);
     });
 
-    // Заменяем имя на выпадающий список
-    clientNameElement.innerHTML = '';
-    clientNameElement.appendChild(select);
-    select.focus();
+    // Показаны не все клиенты – подсказываем уточнить поиск
+    if (hasMore) {
+        const moreOption = document.createElement('option');
+        moreOption.disabled = true;
+        moreOption.textContent = '… уточните поиск, чтобы увидеть остальных';
+        select.appendChild(moreOption);
+    }
+}
 
-    // Настраиваем обработчики событий для select
-    setupSelectListeners(select, proschetId);
+function setupClientSearchListeners(searchInput, select, proschetId) {
+    const clientNameElement = document.getElementById('current-client-name');
+    let searchTimeout = null;
+
+    searchInput.addEventListener('input', function() {
+        clearTimeout(searchTimeout);
+        searchTimeout = setTimeout(() => {
+            const currentClientId = clientNameElement ? clientNameElement.dataset.clientId : '';
+            fetchClientOptions(searchInput.value.trim(), currentClientId)
+            .then(data => fillClientOptions(select, data.clients, currentClientId, data.has_more))
+            .catch(error => console.error('Ошибка поиска клиентов:', error));
+        }, 300);
+    });
+
+    // Потеря фокуса – как у select: завершаем, если фокус ушёл из секции
+    searchInput.addEventListener('blur', function() {
+        setTimeout(() => {
+            if (clientNameElement && clientNameElement.contains(document.activeElement)) return;
+            finishSelection(select, proschetId);
+        }, 200);
+    });
+
+    searchInput.addEventListener('keydown', function(e) {
+        if (e.key === 'Escape') {
+            finishSelection(select, proschetId);
+        }
+    });
 }
 
 function setupSelectListeners(select, proschetId) {
@@ -321,6 +386,9 @@ function setupSelectListeners(select, proschetId) {
     // При потере фокуса (клик вне поля)
     select.addEventListener('blur', function() {
         setTimeout(() => {
+            // Фокус перешёл в поле поиска клиента – выбор продолжается
+            const clientNameElement = document.getElementById('current-client-name');
+            if (clientNameElement && clientNameElement.contains(document.activeElement)) return;
             finishSelection(this, proschetId);
         }, 200);
     });
@@ -31,8 +31,13 @@ let listProschetSelectedProschetId = null;
 // URL для API запросов
 const listProschetApiUrls = {
     create: '/calculator/create-proschet/',
+    clients: '/calculator/get-clients/',
 };
 
+// Клиенты для формы создания подгружаются страницами по строке поиска
+const LIST_PROSCHET_CLIENTS_PAGE_SIZE = 50;
+let listProschetClientSearchTimeout = null;
+
 // Переменные для управления поиском
 let listProschetCurrentSearchQuery = '';
 let listProschetSearchTimeout = null;
@@ -102,6 +107,17 @@ function setupListProschetEventListeners() {
         });
     }
     
+    // Поиск клиента в форме создания (подгрузка с сервера)
+    const clientSearchInput = document.getElementById('id_client_search');
+    if (clientSearchInput) {
+        clientSearchInput.addEventListener('input', function() {
+            clearTimeout(listProschetClientSearchTimeout);
+            listProschetClientSearchTimeout = setTimeout(() => {
+                loadClientsForCreateForm(clientSearchInput.value.trim());
+            }, 300);
+        });
+    }
+    
     // Кнопка очистки поиска
     const searchClearBtn = document.getElementById('list-proschet-search-clear');
     if (searchClearBtn) {
@@ -868,10 +884,17 @@ function showClientSelectionForm() {
     if (clearClientBtn) clearClientBtn.style.display = 'none';
 }
 
-function loadClientsForCreateForm() {
-    console.log('📥 Загрузка клиентов для формы создания...');
+function loadClientsForCreateForm(query = '') {
+    console.log('📥 Загрузка клиентов для формы создания...', query);
+    
+    const params = new URLSearchParams({ page_size: LIST_PROSCHET_CLIENTS_PAGE_SIZE });
+    if (query) params.set('q', query);
+    
+    // Оставляем в списке уже выбранного клиента
+    const selectElement = document.getElementById('id_client');
+    if (selectElement && selectElement.value) params.set('selected', selectElement.value);
     
-    fetch('/calculator/get-clients/', {
+    fetch(`${listProschetApiUrls.clients}?${params}`, {
         method: 'GET',
         headers: {
             'X-Requested-With': 'XMLHttpRequest',
@@ -881,7 +904,7 @@ function loadClientsForCreateForm() {
     .then(response => response.json())
     .then(data => {
         if (data.success && data.clients) {
-            populateClientDropdown(data.clients);
+            populateClientDropdown(data.clients, data.has_more);
         }
     })
     .catch(error => {
@@ -889,10 +912,12 @@ function loadClientsForCreateForm() {
     });
 }
 
-function populateClientDropdown(clients) {
+function populateClientDropdown(clients, hasMore) {
     const selectElement = document.getElementById('id_client');
     if (!selectElement) return;
     
+    const selectedValue = selectElement.value;
+    
     // Очищаем существующие опции (кроме первой)
     while (selectElement.options.length > 1) {
         selectElement.remove(1);
@@ -905,6 +930,15 @@ function populateClientDropdown(clients) {
         option.textContent = `${client.client_number}: ${client.name}`;
         selectElement.appendChild(option);
     });
+    selectElement.value = selectedValue;
+    
+    // Показаны не все клиенты – подсказываем уточнить поиск
+    if (hasMore) {
+        const option = document.createElement('option');
+        option.disabled = true;
+        option.textContent = '… уточните поиск, чтобы увидеть остальных';
+        selectElement.appendChild(option);
+    }
     
     console.log(`✅ Загружено ${clients.length} клиентов`);
 }
@@ -1,3 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from baza_klientov.models import Client
+
+
+class GetClientsTest(TestCase):
+    """Клиенты для выпадающих списков калькулятора отдаются страницами (get-clients/)."""
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username='manager', password='secret-123')
+        self.client.force_login(user)
+        self.clients = [Client.objects.create(client_number=f'K-{i}', name=f'Клиент {i}') for i in range(1, 8)]
+
+    def test_default_response_is_paged(self):
+        data = self.client.get('/calculator/get-clients/', {'page_size': 3}).json()
+
+        self.assertTrue(data['success'])
+        self.assertEqual(data['count'], 3)
+        self.assertTrue(data['has_more'])
+
+    def test_search_query(self):
+        data = self.client.get('/calculator/get-clients/', {'q': 'K-7'}).json()
+
+        self.assertEqual(data['clients'][0]['id'], self.clients[-1].id)
+
+    def test_selected_client_is_kept_on_first_page(self):
+        oldest = self.clients[0]
+        data = self.client.get('/calculator/get-clients/', {'page_size': 3, 'selected': oldest.id}).json()
+
+        self.assertEqual(data['clients'][0]['id'], oldest.id)
+        self.assertEqual(len({client['id'] for client in data['clients']}), 4)
+
+    def test_invalid_page(self):
+        response = self.client.get('/calculator/get-clients/', {'page': 'x'})
+
+        self.assertEqual(response.status_code, 400)
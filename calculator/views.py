@@ -3,6 +3,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from baza_klientov.models import Client  # Импортируем модель клиентов
+from baza_klientov.search import search_clients, SEARCH_PAGE_SIZE  # Поиск клиентов для подсказок при вводе
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST, require_http_methods, require_GET
 from django.views.decorators.csrf import csrf_exempt
@@ -41,14 +42,6 @@ def index(request):
     # Получаем ВСЕ активные просчёты (не удаленные)
     proschets = Proschet.objects.filter(is_deleted=False).order_by('-created_at')
     
-    # Загружаем список клиентов для формы
-    clients = []
-    try:
-        from baza_klientov.models import Client
-        clients = Client.objects.all().order_by('client_number')
-    except ImportError:
-        pass  # Если приложение не установлено, оставляем пустой список
-    
     # Создаем пустую форму для создания нового просчёта
     form = ProschetForm()
     
@@ -56,7 +49,6 @@ def index(request):
     context = {
         'proschets': proschets,  # Список всех активных просчётов
         'form': form,  # Форма для создания нового просчёта
-        'clients': clients,  # Список клиентов для выпадающего списка
         'current_user': request.user,  # Текущий пользователь
         'total_count': proschets.count(),  # Общее количество просчётов
         'active_app': 'calculator',
@@ -548,31 +540,46 @@ def get_proschet(request, proschet_id):
 
 
 def get_clients(request):
-    """Получить список клиентов для выпадающего списка"""
+    """
+    Получить клиентов для выпадающего списка (страницами)
+
+    Весь список не отдаётся: без q – последние добавленные клиенты, с q –
+    ранжированные результаты поиска baza_klientov. Параметр selected
+    добавляет в первую страницу текущего клиента просчёта, чтобы его можно
+    было показать выбранным.
+
+    Параметры GET: q, page (с 1), page_size (до SEARCH_MAX_PAGE_SIZE), selected
+    """
     try:
-        clients = Client.objects.all().order_by('client_number')
-        clients_data = [
-            {
-                'id': client.id,
-                'client_number': client.client_number,
-                'name': client.name,
-                'discount': client.discount,
-                'has_edo': client.has_edo,
-            }
-            for client in clients
-        ]
-        
-        return JsonResponse({
-            'success': True,
-            'clients': clients_data,
-            'count': len(clients_data)
-        })
-        
-    except Exception as e:
+        page = int(request.GET.get('page', 1))
+        page_size = int(request.GET.get('page_size', SEARCH_PAGE_SIZE))
+    except ValueError:
         return JsonResponse({
             'success': False,
-            'message': f'Ошибка при получении клиентов: {str(e)}'
-        }, status=500)
+            'message': 'Некорректный номер или размер страницы'
+        }, status=400)
+
+    clients_data, has_more = search_clients(request.GET.get('q', ''), page=page, page_size=page_size)
+
+    selected_id = request.GET.get('selected', '')
+    if page <= 1 and selected_id.isdigit() and all(c['id'] != int(selected_id) for c in clients_data):
+        selected = Client.objects.filter(id=int(selected_id)).first()
+        if selected is not None:
+            clients_data.insert(0, {
+                'id': selected.id,
+                'client_number': selected.client_number,
+                'name': selected.name,
+                'discount': selected.discount,
+                'has_edo': selected.has_edo,
+            })
+
+    return JsonResponse({
+        'success': True,
+        'clients': clients_data,
+        'count': len(clients_data),
+        'page': max(1, page),
+        'has_more': has_more,
+    })
     
 
 # ============================================================================
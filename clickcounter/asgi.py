@@ -17,8 +17,8 @@ django.setup()
 from django.core.asgi import get_asgi_application
 from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-from channels.sessions import SessionMiddlewareStack
+from channels.sessions import CookieMiddleware
+from counter.middleware import WebSocketAuthMiddleware
 import counter.routing
 
 # Получаем стандартное Django ASGI приложение
@@ -30,9 +30,10 @@ application = ProtocolTypeRouter({
     # Обернутым в ASGIStaticFilesHandler для обслуживания статических файлов
     "http": ASGIStaticFilesHandler(django_asgi_app),
     
-    # WebSocket соединения
-    "websocket": SessionMiddlewareStack(
-        AuthMiddlewareStack(
+    # WebSocket соединения: пользователь определяется по cookie сессии
+    # одним слоем с кэшем (counter/middleware.py)
+    "websocket": CookieMiddleware(
+        WebSocketAuthMiddleware(
             URLRouter(
                 counter.routing.websocket_urlpatterns
             )
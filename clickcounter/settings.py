@@ -89,12 +89,113 @@ TEMPLATES = [
 WSGI_APPLICATION = 'clickcounter.wsgi.application'
 ASGI_APPLICATION = 'clickcounter.asgi.application'
 
-# ===== CHANNEL LAYERS - ДЛЯ ЛОКАЛЬНОЙ РАЗРАБОТКИ =====
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
+# ===== REDIS =====
+REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
+REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+
+# ===== CHANNEL LAYERS =====
+# CHANNEL_LAYER_BACKEND в .env выбирает слой каналов:
+#   memory       – InMemoryChannelLayer (по умолчанию, только один процесс daphne!)
+#   redis        – RedisChannelLayer (несколько воркеров, очереди в Redis)
+#   redis_pubsub – RedisPubSubChannelLayer (несколько воркеров, Redis Pub/Sub,
+#                  меньше задержка рассылки, но без буферизации сообщений)
+# С InMemoryChannelLayer рассылки доходят только до клиентов того же процесса,
+# поэтому для deployment/run_workers.py с --workers > 1 нужен Redis.
+CHANNEL_LAYER_BACKEND = os.environ.get('CHANNEL_LAYER_BACKEND', 'memory')
+
+if CHANNEL_LAYER_BACKEND == 'redis':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [(REDIS_HOST, REDIS_PORT)],
+                'capacity': 1500,   # максимум сообщений в очереди одного канала
+                'expiry': 10,       # через сколько секунд непрочитанное сообщение удаляется
+            },
+        }
     }
-}
+elif CHANNEL_LAYER_BACKEND == 'redis_pubsub':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {
+                'hosts': [(REDIS_HOST, REDIS_PORT)],
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer'
+        }
+    }
+
+# Рассылки доски заказов (counter/broadcast.py):
+# запросы на рассылку в пределах окна (секунды) объединяются в одну,
+# а у каждого соединения не больше WS_SEND_QUEUE_SIZE неотправленных сообщений
+# (при переполнении клиенту отправляется одна свежая полная доска).
+WS_BROADCAST_COALESCE_WINDOW = 0.05
+WS_SEND_QUEUE_SIZE = 8
+
+# Сколько секунд пользователь WebSocket-подключения хранится в кэше по ключу
+# сессии (counter/middleware.py). Выход и смена пароля сбрасывают кэш сразу.
+WS_AUTH_CACHE_TTL = 60
+
+# ===== КЭШ =====
+# Кэш используется для снимка доски заказов (counter/board_cache.py),
+# дерева категорий склада (sklad/tree_cache.py) и строк таблицы материалов
+# (sklad/materials_render.py).
+# По умолчанию – локальная память процесса (достаточно для одного воркера daphne).
+# Для нескольких воркеров включите Redis: USE_REDIS_CACHE=True в .env,
+# тогда снимок доски сериализуется один раз на все процессы.
+if os.environ.get('USE_REDIS_CACHE', 'False') == 'True':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/1',
+            'KEY_PREFIX': 'clickcounter',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'clickcounter',
+            # Строки таблицы материалов склада кэшируются по одной (sklad/materials_render.py)
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+
+# Время жизни снимка доски заказов в секундах (ограничивает устаревание рабочих часов)
+ORDER_BOARD_SNAPSHOT_TTL = 60
+
+# Сколько последних выданных заказов передаётся на доску по WebSocket.
+# Более старые доступны через поиск /counter/orders/completed/search/
+ORDER_BOARD_COMPLETED_LIMIT = 50
+
+# Через сколько дней после выдачи заказ переносится в архив (команда archive_orders)
+ORDER_ARCHIVE_AFTER_DAYS = 90
+ORDER_ARCHIVE_BATCH_SIZE = 1000
+
+# Время жизни дерева категорий склада в кэше (sklad/tree_cache.py), секунды.
+# Запись в категории или материалы сбрасывает дерево сразу; TTL ограничивает
+# устаревание в других процессах, если кэш – локальная память, а не Redis.
+SKLAD_TREE_CACHE_TTL = 300
+
+# Время жизни HTML строки таблицы материалов в кэше (sklad/materials_render.py), секунды.
+# Ключ строки содержит updated_at материала и категории, изменение видно сразу.
+SKLAD_ROW_CACHE_TTL = 3600
+
+# ===== РЕЗЕРВНОЕ КОПИРОВАНИЕ (counter/backup.py, команда create_backup) =====
+# Каталог для файлов резервных копий
+BACKUP_DIR = os.getenv('BACKUP_DIR', str(BASE_DIR / 'backups'))
+# Запас (секунды) при отборе изменений инкрементной копии
+BACKUP_INCREMENTAL_OVERLAP_SECONDS = 300
+# Сколько дней хранятся отметки об удалении (должно покрывать цепочку от полной копии)
+BACKUP_TOMBSTONE_RETENTION_DAYS = 35
+# Сколько таблиц выгружать одновременно при копии всей системы (system_backup,
+# только PostgreSQL); system_restore – сколько файлов проверять одновременно
+SYSTEM_BACKUP_WORKERS = 4
 
 # ===== БАЗА ДАННЫХ - PostgreSQL =====
 DATABASES = {
@@ -190,6 +291,13 @@ SESSION_COOKIE_AGE = 30 * 24 * 60 * 60
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_SAVE_EVERY_REQUEST = True
 
+# ===== РАБОЧЕЕ ВРЕМЯ ТИПОГРАФИИ =====
+# Используется для расчёта рабочих часов до готовности заказа (counter/working_hours.py).
+# Праздники, сокращённые и перенесённые дни задаются в админке (Производственный календарь).
+WORKING_HOURS_START = 10              # начало рабочего дня (час, локальное время)
+WORKING_HOURS_END = 18                # окончание рабочего дня (час, локальное время)
+WORKING_WEEKDAYS = (0, 1, 2, 3, 4)    # рабочие дни недели: 0 – понедельник ... 6 – воскресенье
+
 # ===== ЛОГИРОВАНИЕ =====
 LOGS_DIR = os.path.join(BASE_DIR, 'logs')
 if not os.path.exists(LOGS_DIR):
@@ -4,7 +4,7 @@ admin.py
 """
 
 from django.contrib import admin
-from .models import Client, Order
+from .models import Client, Order, ArchivedOrder, WorkingCalendarDay, BackupRun
 
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
@@ -28,7 +28,7 @@ class ClientAdmin(admin.ModelAdmin):
 class OrderAdmin(admin.ModelAdmin):
     """Административная панель для заказов."""
     
-    list_display = ('order_number', 'get_client_display', 'status', 'ready_datetime', 'created_at')
+    list_display = ('order_number', 'get_client_display', 'status', 'ready_datetime', 'created_at', 'completed_at')
     list_filter = ('status', 'created_at', 'ready_datetime')
     search_fields = ('order_number', 'customer_name', 'client__name', 'description')
     ordering = ('-created_at',)
@@ -45,4 +45,49 @@ class OrderAdmin(admin.ModelAdmin):
     def get_client_display(self, obj):
         """Возвращает отображаемое имя клиента."""
         return obj.get_client_display()
-    get_client_display.short_description = 'Клиент'
\ No newline at end of file
+    get_client_display.short_description = 'Клиент'
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    """Административная панель для архива выданных заказов (только просмотр)."""
+    
+    list_display = ('order_number', 'get_client_display', 'ready_datetime', 'completed_at', 'archived_at')
+    list_filter = ('completed_at', 'archived_at')
+    search_fields = ('order_number', 'customer_name', 'client__name', 'description')
+    ordering = ('-order_number',)
+    list_select_related = ('client',)
+    
+    def has_add_permission(self, request):
+        """Архивные записи создаются только командой archive_orders."""
+        return False
+    
+    def get_client_display(self, obj):
+        """Возвращает отображаемое имя клиента."""
+        return obj.get_client_display()
+    get_client_display.short_description = 'Клиент'
+
+
+@admin.register(WorkingCalendarDay)
+class WorkingCalendarDayAdmin(admin.ModelAdmin):
+    """Административная панель для производственного календаря."""
+    
+    list_display = ('date', 'day_type', 'work_start', 'work_end', 'description')
+    list_filter = ('day_type',)
+    search_fields = ('description',)
+    ordering = ('date',)
+    date_hierarchy = 'date'
+
+
+@admin.register(BackupRun)
+class BackupRunAdmin(admin.ModelAdmin):
+    """Журнал резервных копий (только просмотр)."""
+    
+    list_display = ('watermark', 'kind', 'since', 'file_name', 'created_at')
+    list_filter = ('kind',)
+    ordering = ('-watermark',)
+    readonly_fields = ('kind', 'since', 'watermark', 'file_name', 'summary', 'created_at')
+    
+    def has_add_permission(self, request):
+        """Записи журнала создаются только командой create_backup."""
+        return False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CounterConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'counter'
+    
+    def ready(self):
+        """Регистрация сигналов при запуске приложения."""
+        import counter.signals
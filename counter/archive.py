@@ -0,0 +1,191 @@
+"""
+archive.py
+Архивация и поиск выданных заказов.
+
+Доска заказов по WebSocket передаёт только активные заказы и последние
+ORDER_BOARD_COMPLETED_LIMIT выданных. Более старые выданные заказы
+доступны через постраничный HTTP-поиск (keyset-пагинация по номеру заказа),
+который объединяет выданные заказы из основной таблицы и архива.
+
+Выданные заказы старше ORDER_ARCHIVE_AFTER_DAYS переносятся в ArchivedOrder
+пачками (management-команда archive_orders).
+
+Функции:
+- archive_completed_orders – перенос старых выданных заказов в архив
+- search_completed_orders  – постраничный поиск выданных и архивных заказов
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Order, ArchivedOrder
+
+
+ARCHIVE_AFTER_DAYS = getattr(settings, 'ORDER_ARCHIVE_AFTER_DAYS', 90)
+ARCHIVE_BATCH_SIZE = getattr(settings, 'ORDER_ARCHIVE_BATCH_SIZE', 1000)
+
+# Размер страницы поиска выданных заказов (по умолчанию и максимальный)
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+
+# ==================== АРХИВАЦИЯ ====================
+
+def get_archivable_orders(days=None):
+    """
+    Возвращает QuerySet выданных заказов, которые пора перенести в архив.
+    Для старых заказов без даты выдачи используется дата создания.
+    """
+    if days is None:
+        days = ARCHIVE_AFTER_DAYS
+    cutoff = timezone.now() - timedelta(days=days)
+
+    return (
+        Order.objects
+        .filter(status=Order.STATUS_COMPLETED)
+        .annotate(archive_date=Coalesce('completed_at', 'created_at'))
+        .filter(archive_date__lt=cutoff)
+        .order_by('order_number')
+    )
+
+
+# Поля архивной записи, которые обновляются, если заказ с тем же номером уже в архиве
+ARCHIVE_UPDATE_FIELDS = [
+    'client', 'customer_name', 'description', 'ready_datetime', 'status', 'created_at', 'completed_at',
+    'updated_at',
+]
+
+
+def _archive_batch(queryset, numbers):
+    """
+    Переносит в архив заказы с номерами numbers (одна транзакция).
+
+    Заказы заново читаются с блокировкой строк и с теми же условиями
+    (выдан, дата выдачи старше порога): заказ, который успели вернуть в работу
+    или изменить после выбора пачки, не архивируется по устаревшим данным.
+    Из Order удаляются только заказы, архивная запись которых есть после
+    вставки. Уже существующая запись архива с тем же номером обновляется
+    текущими данными заказа.
+
+    Возвращает:
+        int: количество перенесённых заказов
+    """
+    with transaction.atomic():
+        orders = list(queryset.select_for_update().filter(order_number__in=numbers))
+        if not orders:
+            return 0
+
+        ArchivedOrder.objects.bulk_create(
+            [ArchivedOrder.from_order(order) for order in orders],
+            update_conflicts=True,
+            unique_fields=['order_number'],
+            update_fields=ARCHIVE_UPDATE_FIELDS,
+        )
+        archived = list(
+            ArchivedOrder.objects
+            .filter(order_number__in=[order.order_number for order in orders])
+            .values_list('order_number', flat=True)
+        )
+        Order.objects.filter(order_number__in=archived).delete()
+    return len(archived)
+
+
+def archive_completed_orders(days=None, batch_size=None, dry_run=False, progress=None):
+    """
+    Переносит выданные заказы старше days дней в архив пачками по batch_size.
+    Каждая пачка – отдельная транзакция: bulk_create в архив и удаление из Order.
+
+    Аргументы:
+        days: int, возраст (в днях), после которого заказ архивируется
+        batch_size: int, размер пачки
+        dry_run: bool, только посчитать заказы, ничего не переносить
+        progress: callable(archived_total) или None – вызывается после каждой пачки
+
+    Возвращает:
+        int: количество перенесённых (или найденных при dry_run) заказов
+    """
+    if batch_size is None:
+        batch_size = ARCHIVE_BATCH_SIZE
+
+    queryset = get_archivable_orders(days)
+    if dry_run:
+        return queryset.count()
+
+    archived_total = 0
+    last_number = 0
+
+    while True:
+        # Keyset по номеру заказа: каждая пачка начинается после предыдущей
+        numbers = list(
+            queryset.filter(order_number__gt=last_number).values_list('order_number', flat=True)[:batch_size]
+        )
+        if not numbers:
+            break
+
+        archived_total += _archive_batch(queryset, numbers)
+        last_number = numbers[-1]
+
+        if progress is not None:
+            progress(archived_total)
+
+    return archived_total
+
+
+# ==================== ПОИСК ====================
+
+def _search_filter(query):
+    """Строит условие поиска: номер заказа (если число), клиент или описание."""
+    query = (query or '').strip()
+    if not query:
+        return Q()
+
+    condition = (
+        Q(client__name__icontains=query)
+        | Q(customer_name__icontains=query)
+        | Q(description__icontains=query)
+    )
+    digits = query.lstrip('#№ ')
+    if digits.isdigit():
+        condition |= Q(order_number=int(digits))
+    return condition
+
+
+def search_completed_orders(query='', before=None, limit=SEARCH_PAGE_SIZE):
+    """
+    Постраничный поиск выданных заказов в основной таблице и в архиве.
+
+    Пагинация keyset-курсором по номеру заказа (по убыванию): каждая страница
+    читает не более limit + 1 строк из каждого источника по индексу,
+    независимо от общего размера архива.
+
+    Аргументы:
+        query: str, строка поиска (номер заказа, клиент или описание)
+        before: int или None, курсор – вернуть заказы с номером меньше before
+        limit: int, размер страницы
+
+    Возвращает:
+        tuple: (список словарей заказов, курсор следующей страницы или None)
+    """
+    limit = max(1, min(int(limit), SEARCH_MAX_PAGE_SIZE))
+    condition = _search_filter(query)
+
+    live = Order.objects.select_related('client').filter(condition, status=Order.STATUS_COMPLETED)
+    archived = ArchivedOrder.objects.select_related('client').filter(condition)
+    if before is not None:
+        live = live.filter(order_number__lt=before)
+        archived = archived.filter(order_number__lt=before)
+
+    live = list(live.order_by('-order_number')[:limit + 1])
+    archived = list(archived.order_by('-order_number')[:limit + 1])
+
+    # Слияние двух отсортированных списков по номеру заказа (по убыванию)
+    merged = sorted(live + archived, key=lambda order: order.order_number, reverse=True)
+    page = merged[:limit]
+
+    next_before = page[-1].order_number if len(merged) > limit else None
+    return [order.to_dict() for order in page], next_before
@@ -0,0 +1,727 @@
+"""
+backup.py
+Резервное копирование клиентов и заказов в потоковом формате.
+
+Формат (файл printshop_backup_*.jsonl.gz) – JSON Lines, сжатый gzip:
+- первая строка – заголовок:
+    {"type": "header", "format": "printshop-backup", "version": 2,
+     "kind": "full", "since": null, "watermark": ...,
+     "export_date": ..., "django_version": ..., "models": ["counter.client", ...]}
+- далее по одной строке на объект, в формате сериализатора Django:
+    {"model": "counter.client", "pk": 1, "fields": {...}}
+  модели идут в порядке зависимостей (BACKUP_MODELS);
+- в инкрементной копии после объектов – отметки об удалении:
+    {"type": "deleted", "model": "counter.order", "pk": 15}
+- последняя строка – итог с количеством объектов (и удалений) каждой модели:
+    {"type": "footer", "counts": {"counter.client": 120, ...}, "deleted": {...}}
+  По ней восстановление отличает полный файл от оборванной загрузки.
+
+Инкрементная копия (kind = "incremental") содержит только строки, изменённые
+(updated_at) после водяной отметки предыдущей копии (since), и удаления из
+BackupTombstone за тот же период. Водяная отметка (watermark) – момент начала
+выгрузки; следующая копия цепочки берёт её как since. Отбор идёт с запасом
+BACKUP_INCREMENTAL_OVERLAP секунд назад, чтобы не потерять строки из
+транзакций, зафиксированных уже после начала выгрузки: повторное
+применение строки или удаления ничего не меняет.
+
+Файл пишется генератором по QuerySet.iterator() и сжимается на лету,
+поэтому память при скачивании не зависит от размера таблиц.
+
+Прежний формат (один JSON с ключами "clients" и "orders") по-прежнему
+читается функцией read_backup.
+
+Восстановление (restore_backup) читает файл построчно и загружает записи
+пачками внутри одной транзакции: в PostgreSQL – через COPY FROM STDIN,
+в остальных базах – многострочными INSERT без pre_save (как loaddata).
+Проверка внешних ключей откладывается до конца загрузки, последовательности
+сбрасываются один раз. restore_backup_chain восстанавливает полную копию
+и применяет к ней цепочку инкрементных (INSERT ... ON CONFLICT DO UPDATE
+по первичному ключу, затем удаления).
+
+Функции:
+- iter_backup_lines     – строки резервной копии, полной или инкрементной (без сжатия)
+- gzip_stream           – сжатие потока строк в gzip
+- record_tombstone      – отметка об удалении объекта (сигнал post_delete)
+- prune_tombstones      – удаление устаревших отметок
+- read_backup           – чтение резервной копии любого формата
+- restore_backup        – восстановление из полной резервной копии
+- restore_backup_chain  – восстановление полной копии и цепочки инкрементных
+"""
+
+import gzip
+import io
+import json
+import zlib
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .board_cache import bump_board_version
+from .models import Client, Order, ArchivedOrder, BackupTombstone
+
+
+BACKUP_FORMAT = 'printshop-backup'
+BACKUP_FORMAT_VERSION = 2
+
+KIND_FULL = 'full'
+KIND_INCREMENTAL = 'incremental'
+
+# Модели в порядке зависимостей: сначала те, на кого ссылаются
+BACKUP_MODELS = [Client, Order, ArchivedOrder]
+
+# Сколько объектов читается из БД за один запрос
+BACKUP_CHUNK_SIZE = 2000
+
+# Сколько несжатых данных накапливается перед очередным блоком gzip
+GZIP_BUFFER_SIZE = 64 * 1024
+
+# Сколько объектов загружается одним запросом (COPY или INSERT) при восстановлении
+RESTORE_BATCH_SIZE = 2000
+
+# Запас (секунды) при отборе изменений инкрементной копии относительно since
+BACKUP_INCREMENTAL_OVERLAP = getattr(settings, 'BACKUP_INCREMENTAL_OVERLAP_SECONDS', 300)
+
+# Сколько дней хранятся отметки об удалении (должно покрывать самую длинную цепочку копий)
+TOMBSTONE_RETENTION_DAYS = getattr(settings, 'BACKUP_TOMBSTONE_RETENTION_DAYS', 35)
+
+# Первые байты gzip-файла
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class BackupFormatError(ValueError):
+    """Файл не является резервной копией или повреждён."""
+
+
+# ==================== ЗАПИСЬ ====================
+
+class BackupJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder без округления времени до миллисекунд: копия хранит значения точно."""
+
+    def default(self, o):
+        if isinstance(o, (datetime, time)):
+            value = o.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return super().default(o)
+
+
+def _dump(record):
+    return json.dumps(record, cls=BackupJSONEncoder, ensure_ascii=False)
+
+
+def iter_model_records(model, chunk_size=BACKUP_CHUNK_SIZE, changed_since=None):
+    """
+    Объекты модели в формате сериализатора Django (словари), пачками из БД.
+
+    Аргументы:
+        model: модель
+        chunk_size: сколько объектов читать из БД за один запрос
+        changed_since: datetime или None – только объекты с updated_at не раньше этого момента
+    """
+    # _base_manager – все строки таблицы, даже если менеджер по умолчанию их фильтрует
+    queryset = model._base_manager.order_by('pk')
+    if changed_since is not None:
+        queryset = queryset.filter(updated_at__gte=changed_since)
+
+    objects = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(objects, chunk_size))
+        if not chunk:
+            break
+        yield from serializers.serialize('python', chunk)
+
+
+def iter_deleted_pks(model, deleted_since, chunk_size=BACKUP_CHUNK_SIZE):
+    """
+    Первичные ключи объектов модели, удалённых не раньше deleted_since.
+
+    Ключи, которые снова есть в таблице (объект создан заново с тем же
+    номером), пропускаются: такая строка уже попала в копию как изменённая.
+    """
+    label = model._meta.label_lower
+    pks = (
+        BackupTombstone.objects
+        .filter(model_label=label, deleted_at__gte=deleted_since)
+        .order_by('object_pk')
+        .values_list('object_pk', flat=True)
+        .distinct()
+        .iterator(chunk_size=chunk_size)
+    )
+    while True:
+        chunk = {model._meta.pk.to_python(pk) for pk in islice(pks, chunk_size)}
+        if not chunk:
+            break
+        existing = set(model._base_manager.filter(pk__in=chunk).values_list('pk', flat=True))
+        yield from sorted(chunk - existing)
+
+
+def iter_backup_lines(models=None, chunk_size=BACKUP_CHUNK_SIZE, since=None, watermark=None, summary=None):
+    """
+    Строки резервной копии в формате JSON Lines (каждая с переводом строки).
+
+    Аргументы:
+        models: список моделей в порядке зависимостей (по умолчанию BACKUP_MODELS)
+        chunk_size: сколько объектов читать из БД за один запрос
+        since: datetime или None – водяная отметка предыдущей копии;
+               если задана, копия инкрементная (изменения и удаления после since)
+        watermark: datetime – водяная отметка этой копии (по умолчанию – текущий момент)
+        summary: dict или None – после выгрузки в него записываются итоги
+                 {'counts': {...}, 'deleted': {...}}
+    """
+    if models is None:
+        models = BACKUP_MODELS
+    if watermark is None:
+        watermark = timezone.now()
+
+    changed_since = None
+    if since is not None:
+        changed_since = since - timedelta(seconds=BACKUP_INCREMENTAL_OVERLAP)
+
+    yield _dump({
+        'type': 'header',
+        'format': BACKUP_FORMAT,
+        'version': BACKUP_FORMAT_VERSION,
+        'kind': KIND_FULL if since is None else KIND_INCREMENTAL,
+        'since': since,
+        'watermark': watermark,
+        'export_date': datetime.now().isoformat(),
+        'django_version': django.get_version(),
+        'models': [model._meta.label_lower for model in models],
+    }) + '\n'
+
+    counts = {}
+    for model in models:
+        label = model._meta.label_lower
+        counts[label] = 0
+        for record in iter_model_records(model, chunk_size, changed_since):
+            counts[label] += 1
+            yield _dump(record) + '\n'
+
+    footer = {'type': 'footer', 'counts': counts}
+
+    if since is not None:
+        deleted = {}
+        # Удаления – в обратном порядке зависимостей, как их применяет восстановление
+        for model in reversed(models):
+            label = model._meta.label_lower
+            deleted[label] = 0
+            for pk in iter_deleted_pks(model, changed_since, chunk_size):
+                deleted[label] += 1
+                yield _dump({'type': 'deleted', 'model': label, 'pk': pk}) + '\n'
+        footer['deleted'] = deleted
+
+    if summary is not None:
+        summary['counts'] = counts
+        summary['deleted'] = footer.get('deleted', {})
+
+    yield _dump(footer) + '\n'
+
+
+def gzip_stream(lines, level=6, buffer_size=GZIP_BUFFER_SIZE):
+    """
+    Сжимает поток строк в gzip, отдавая сжатые блоки по мере готовности.
+
+    Аргументы:
+        lines: итератор строк (str)
+        level: уровень сжатия zlib
+        buffer_size: сколько несжатых байт накапливать перед сжатием
+    """
+    # wbits=31: формат gzip (заголовок и контрольная сумма), а не «голый» zlib
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    buffer = []
+    buffered = 0
+
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        buffered += len(data)
+        if buffered >= buffer_size:
+            block = compressor.compress(b''.join(buffer))
+            buffer = []
+            buffered = 0
+            if block:
+                yield block
+
+    block = compressor.compress(b''.join(buffer)) + compressor.flush()
+    if block:
+        yield block
+
+
+# ==================== ОТМЕТКИ ОБ УДАЛЕНИИ ====================
+
+def record_tombstone(instance):
+    """Записывает отметку об удалении объекта (вызывается из сигнала post_delete)."""
+    BackupTombstone.objects.create(
+        model_label=instance._meta.label_lower,
+        object_pk=str(instance.pk),
+    )
+
+
+def prune_tombstones(days=None):
+    """
+    Удаляет отметки об удалении старше days дней (по умолчанию TOMBSTONE_RETENTION_DAYS).
+
+    Возвращает:
+        int: количество удалённых отметок
+    """
+    if days is None:
+        days = TOMBSTONE_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = BackupTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+# ==================== ЧТЕНИЕ ====================
+
+def _read_jsonl(fileobj):
+    """Читает сжатый JSON Lines: возвращает (заголовок, итератор объектов)."""
+    stream = gzip.open(fileobj, 'rt', encoding='utf-8')
+
+    try:
+        header = json.loads(stream.readline())
+    except (OSError, EOFError, ValueError) as e:
+        raise BackupFormatError(f'Не удалось прочитать заголовок резервной копии: {e}')
+
+    if header.get('type') != 'header' or header.get('format') != BACKUP_FORMAT:
+        raise BackupFormatError('Файл не является резервной копией (нет заголовка)')
+    if header.get('version', 0) > BACKUP_FORMAT_VERSION:
+        raise BackupFormatError(f"Версия резервной копии {header['version']} не поддерживается")
+    # Копии версии 1 – всегда полные и без водяной отметки
+    header.setdefault('kind', KIND_FULL)
+
+    def records():
+        footer = None
+        try:
+            for line in stream:
+                record = json.loads(line)
+                if record.get('type') == 'footer':
+                    footer = record
+                    break
+                yield record
+        except (OSError, EOFError, ValueError) as e:
+            raise BackupFormatError(f'Резервная копия повреждена: {e}')
+
+        if footer is None:
+            raise BackupFormatError('Резервная копия оборвана (нет итоговой записи)')
+        # Итог доступен вызывающему коду после чтения всех объектов
+        header['counts'] = footer.get('counts', {})
+        header['deleted'] = footer.get('deleted', {})
+
+    return header, records()
+
+
+def _read_legacy_json(fileobj):
+    """Читает прежний формат: один JSON с ключами 'clients' и 'orders'."""
+    try:
+        backup_data = json.loads(fileobj.read().decode('utf-8'))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise BackupFormatError(f'Ошибка чтения JSON: {e}')
+
+    if not isinstance(backup_data, dict) or 'clients' not in backup_data or 'orders' not in backup_data:
+        raise BackupFormatError('Неверный формат резервной копии (отсутствуют clients или orders)')
+
+    header = {
+        'type': 'header',
+        'format': 'legacy-json',
+        'kind': KIND_FULL,
+        'export_date': backup_data.get('export_date'),
+        'django_version': backup_data.get('django_version'),
+        'models': [Client._meta.label_lower, Order._meta.label_lower],
+    }
+
+    def records():
+        yield from backup_data['clients']
+        yield from backup_data['orders']
+
+    return header, records()
+
+
+def read_backup(fileobj):
+    """
+    Открывает резервную копию любого формата (gzip JSON Lines или прежний JSON).
+
+    Аргументы:
+        fileobj: файл, открытый в двоичном режиме (например, UploadedFile)
+
+    Возвращает:
+        tuple: (заголовок, итератор объектов в формате сериализатора Django).
+        Заголовок содержит 'models' – модели, данные которых есть в копии,
+        и 'kind' – тип копии (KIND_FULL или KIND_INCREMENTAL).
+
+    Исключения:
+        BackupFormatError – файл не является резервной копией или повреждён
+        (для JSON Lines – в том числе при чтении объектов)
+    """
+    magic = fileobj.read(len(GZIP_MAGIC))
+    fileobj.seek(0)
+
+    if magic == GZIP_MAGIC:
+        return _read_jsonl(fileobj)
+    return _read_legacy_json(fileobj)
+
+
+# ==================== ВОССТАНОВЛЕНИЕ ====================
+
+def _has_external_references(model, models):
+    """Ссылаются ли на модель таблицы, которые не восстанавливаются из этой копии."""
+    return any(
+        relation.related_model not in models
+        for relation in model._meta.related_objects
+    )
+
+
+def _clear_tables(models):
+    """
+    Очищает таблицы восстанавливаемых моделей.
+
+    Таблицы, на которые не ссылаются другие модели, очищаются одним SQL-запросом
+    (TRUNCATE в PostgreSQL, DELETE в SQLite) – без загрузки объектов и сигналов
+    post_delete на каждую строку. Если на модель ссылаются таблицы вне копии
+    (например, архив заказов при восстановлении из прежнего формата), она
+    удаляется через QuerySet.delete(), чтобы Django обработал on_delete.
+    """
+    fast = [model for model in models if not _has_external_references(model, models)]
+    if fast:
+        tables = [model._meta.db_table for model in fast]
+        connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables))
+
+    for model in reversed(models):
+        if model not in fast:
+            model._base_manager.all().delete()
+
+
+def _reset_sequences(models):
+    """Выставляет последовательности автоинкремента по максимальным id после загрузки."""
+    sql_list = connection.ops.sequence_reset_sql(no_style(), models)
+    if sql_list:
+        with connection.cursor() as cursor:
+            for sql in sql_list:
+                cursor.execute(sql)
+
+
+def _copy_supported():
+    """Доступна ли быстрая загрузка COPY FROM STDIN (PostgreSQL + psycopg2)."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        return hasattr(cursor.cursor, 'copy_expert')
+
+
+def _copy_value(value):
+    """Значение поля в текстовом формате COPY (экранирование, NULL как \\N)."""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, (dict, list)):
+        # JSONField: сериализатор Django хранит значение как есть
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (datetime, date, time)):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return (
+        value.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _copy_records(model, records):
+    """
+    Загружает пачку записей одной модели через COPY FROM STDIN.
+
+    Значения из резервной копии уже в текстовом виде (даты ISO 8601, Decimal
+    строкой), поэтому объекты моделей не создаются: строка COPY собирается
+    прямо из словаря записи. Поля, которых нет в копии (добавлены позже),
+    получают значение по умолчанию.
+    """
+    fields = model._meta.concrete_fields
+    defaults = {}
+    for field in fields:
+        if not field.primary_key:
+            defaults[field.name] = field.get_db_prep_save(_missing_value(field), connection)
+
+    buffer = io.StringIO()
+    for record in records:
+        values = record['fields']
+        row = []
+        for field in fields:
+            if field.primary_key:
+                value = record['pk']
+            else:
+                value = values.get(field.name, defaults[field.name])
+            row.append(_copy_value(value))
+        buffer.write('\t'.join(row))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN',
+            buffer,
+        )
+
+
+def _missing_value(field):
+    """
+    Значение поля, которого нет в копии (поле добавлено позже): значение по
+    умолчанию, а для дат auto_now/auto_now_add – текущий момент.
+    """
+    if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+        return timezone.now()
+    return field.get_default()
+
+
+def _insert_records(model, records, batch_size, upsert=False):
+    """
+    Загружает пачку записей одной модели через десериализатор Django.
+
+    Объекты вставляются как есть (raw, как в loaddata): pre_save полей не
+    вызывается, поэтому updated_at и created_at сохраняют значения из копии
+    и восстановленные строки не попадают в следующую инкрементную копию
+    как изменённые. bulk_create так не умеет – он всегда обновляет auto_now.
+
+    Аргументы:
+        model: модель
+        records: записи в формате сериализатора Django
+        batch_size: наибольшее количество строк в одном INSERT
+        upsert: обновлять существующие строки с тем же первичным ключом
+    """
+    fields = model._meta.concrete_fields
+    auto_fields = [
+        field for field in fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+
+    objects = []
+    for deserialized in serializers.deserialize('python', records):
+        obj = deserialized.object
+        for field in auto_fields:
+            if getattr(obj, field.attname) is None:
+                setattr(obj, field.attname, _missing_value(field))
+        objects.append(obj)
+
+    options = {}
+    if upsert:
+        options = {
+            'on_conflict': OnConflict.UPDATE,
+            'unique_fields': [model._meta.pk],
+            'update_fields': [field for field in fields if not field.primary_key],
+        }
+
+    # Ограничение на число параметров запроса (в SQLite) – как в bulk_create
+    size = max(1, min(batch_size, connection.ops.bulk_batch_size(fields, objects)))
+    for start in range(0, len(objects), size):
+        model._base_manager._insert(objects[start:start + size], fields=fields, raw=True, **options)
+
+
+def _iter_batches(records, models, batch_size, deleted=None):
+    """
+    Разбивает поток записей на пачки одной модели: выдаёт (метка модели, список записей).
+
+    Отметки об удалении собираются в deleted ({метка: [pk, ...]}); для полной
+    копии (deleted=None) они считаются ошибкой формата.
+    """
+    batch_label = None
+    batch = []
+    for record in records:
+        label = record.get('model', '').lower()
+        if label not in models:
+            raise BackupFormatError(f'Модель {label!r} не указана в заголовке резервной копии')
+
+        if record.get('type') == 'deleted':
+            if deleted is None:
+                raise BackupFormatError('Отметка об удалении в полной резервной копии')
+            deleted[label].append(record['pk'])
+            continue
+
+        if label != batch_label or len(batch) >= batch_size:
+            if batch:
+                yield batch_label, batch
+            batch_label = label
+            batch = []
+        batch.append(record)
+    if batch:
+        yield batch_label, batch
+
+
+def _check_counts(header, counts, deleted=None):
+    """Сверяет загруженное количество объектов (и удалений) с итогом копии."""
+    expected = header.get('counts')
+    if expected is not None and expected != counts:
+        raise BackupFormatError(
+            f'Количество объектов не совпадает с итогом резервной копии: {counts} != {expected}'
+        )
+    if deleted is not None:
+        deleted_counts = {label: len(pks) for label, pks in deleted.items()}
+        expected = header.get('deleted')
+        if expected is not None and expected != deleted_counts:
+            raise BackupFormatError(
+                f'Количество удалений не совпадает с итогом резервной копии: {deleted_counts} != {expected}'
+            )
+
+
+def header_datetime(header, key):
+    """Момент времени из заголовка копии ('since', 'watermark') или None."""
+    value = header.get(key)
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise BackupFormatError(f'Неверная дата {key!r} в заголовке резервной копии: {value}')
+    return parsed
+
+
+def _load_full(header, records, batch_size, progress):
+    """Заменяет данные моделей содержимым полной копии (внутри транзакции вызывающего)."""
+    if header.get('kind') != KIND_FULL:
+        raise BackupFormatError('Это инкрементная копия: сначала нужна полная (см. restore_backup_chain)')
+
+    models = {label: apps.get_model(label) for label in header['models']}
+    counts = dict.fromkeys(models, 0)
+    use_copy = _copy_supported()
+
+    # PostgreSQL создаёт внешние ключи Django как DEFERRABLE INITIALLY DEFERRED,
+    # в SQLite проверка отключается на время загрузки
+    with connection.constraint_checks_disabled():
+        _clear_tables(list(models.values()))
+
+        for label, batch in _iter_batches(records, models, batch_size):
+            if use_copy:
+                _copy_records(models[label], batch)
+            else:
+                _insert_records(models[label], batch, batch_size)
+            counts[label] += len(batch)
+            if progress is not None:
+                progress(label, counts[label])
+
+    # Проверяем ссылочную целостность загруженных таблиц
+    connection.check_constraints(table_names=[model._meta.db_table for model in models.values()])
+    _check_counts(header, counts)
+    _reset_sequences(list(models.values()))
+
+    # Загрузка не отправляет сигналы – снимок доски обновляем один раз
+    transaction.on_commit(bump_board_version)
+    return counts
+
+
+def _apply_increment(header, records, batch_size, progress):
+    """Применяет инкрементную копию: изменённые строки и удаления (внутри транзакции вызывающего)."""
+    models = {label: apps.get_model(label) for label in header['models']}
+    counts = dict.fromkeys(models, 0)
+    deleted = {label: [] for label in models}
+
+    with connection.constraint_checks_disabled():
+        for label, batch in _iter_batches(records, models, batch_size, deleted):
+            _insert_records(models[label], batch, batch_size, upsert=True)
+            counts[label] += len(batch)
+            if progress is not None:
+                progress(label, counts[label])
+
+    # Удаления – после вставок и в обратном порядке зависимостей;
+    # QuerySet.delete() выполняет on_delete (например, SET_NULL у заказов клиента)
+    for label in reversed(list(models)):
+        pks = deleted[label]
+        for start in range(0, len(pks), batch_size):
+            models[label]._base_manager.filter(pk__in=pks[start:start + batch_size]).delete()
+
+    connection.check_constraints(table_names=[model._meta.db_table for model in models.values()])
+    _check_counts(header, counts, deleted)
+    _reset_sequences(list(models.values()))
+
+    transaction.on_commit(bump_board_version)
+    return counts, {label: len(pks) for label, pks in deleted.items()}
+
+
+def restore_backup(fileobj, batch_size=RESTORE_BATCH_SIZE, progress=None):
+    """
+    Заменяет данные моделей из резервной копии содержимым файла.
+
+    Файл читается построчно (память не зависит от его размера), записи
+    загружаются пачками по batch_size: в PostgreSQL – через COPY FROM STDIN,
+    в остальных базах – многострочными INSERT. Всё выполняется в одной
+    транзакции: при любой ошибке база остаётся в прежнем состоянии.
+    Внешние ключи проверяются один раз в конце (как в loaddata), поэтому
+    порядок строк внутри файла не важен.
+
+    Аргументы:
+        fileobj: файл полной резервной копии, открытый в двоичном режиме
+        batch_size: сколько объектов загружать за один запрос
+        progress: функция progress(label, count), вызывается после каждой пачки
+
+    Возвращает:
+        dict: {метка модели: количество восстановленных объектов}
+
+    Исключения:
+        BackupFormatError – файл не является полной резервной копией или повреждён
+    """
+    header, records = read_backup(fileobj)
+    with transaction.atomic():
+        return _load_full(header, records, batch_size, progress)
+
+
+def restore_backup_chain(fileobjs, batch_size=RESTORE_BATCH_SIZE, progress=None):
+    """
+    Восстанавливает полную резервную копию и применяет к ней цепочку инкрементных.
+
+    Файлы идут в порядке создания: первый – полная копия, далее инкрементные.
+    Каждая инкрементная копия должна начинаться (since) не позже водяной
+    отметки предыдущей, иначе в цепочке пропуск и восстановление прерывается.
+    Вся цепочка применяется в одной транзакции.
+
+    Аргументы:
+        fileobjs: список файлов, открытых в двоичном режиме
+        batch_size: сколько объектов загружать за один запрос
+        progress: функция progress(label, count), вызывается после каждой пачки
+
+    Возвращает:
+        list: по словарю на файл – {'kind', 'watermark', 'counts', 'deleted'}
+
+    Исключения:
+        BackupFormatError – файл повреждён или цепочка копий нарушена
+    """
+    results = []
+    watermark = None
+
+    with transaction.atomic():
+        for index, fileobj in enumerate(fileobjs):
+            header, records = read_backup(fileobj)
+            kind = header.get('kind')
+
+            if index == 0:
+                counts = _load_full(header, records, batch_size, progress)
+                deleted = {}
+            else:
+                if kind != KIND_INCREMENTAL:
+                    raise BackupFormatError(f'Файл №{index + 1} цепочки не является инкрементной копией')
+                if watermark is None:
+                    raise BackupFormatError(
+                        'У предыдущей копии нет водяной отметки – к ней нельзя применить инкрементную'
+                    )
+                since = header_datetime(header, 'since')
+                if since is None or since > watermark:
+                    raise BackupFormatError(
+                        f'Пропуск в цепочке копий: файл №{index + 1} содержит изменения с {since}, '
+                        f'а предыдущая копия – по {watermark}'
+                    )
+                counts, deleted = _apply_increment(header, records, batch_size, progress)
+
+            watermark = header_datetime(header, 'watermark')
+            results.append({'kind': kind, 'watermark': watermark, 'counts': counts, 'deleted': deleted})
+
+    return results
@@ -0,0 +1,204 @@
+"""
+board_cache.py
+Версионированный кэш доски заказов (активные заказы, выданные заказы, клиенты).
+
+Каждое подключение браузера и каждое действие refresh_orders раньше заново
+читало все заказы и клиентов из БД и сериализовало их в JSON. Теперь доска
+сериализуется один раз и кладётся в кэш Django (settings.CACHES) под ключом,
+содержащим номер версии. Версия увеличивается при любой записи в Order или
+Client (см. counter/signals.py), поэтому устаревший снимок просто перестаёт
+запрашиваться и истекает по TTL.
+
+Если CACHES настроен на Redis (USE_REDIS_CACHE=True), один снимок
+используется всеми воркерами daphne.
+
+Снимок хранит уже готовые JSON-фрагменты, из которых сообщения для
+WebSocket собираются конкатенацией строк, без повторного json.dumps,
+и такие же двоичные фрагменты для подпротоколов orders.msgpack /
+orders.cbor (counter/board_codec.py).
+
+Функции:
+- get_board_version   – текущая версия доски
+- bump_board_version  – увеличить версию (вызывается сигналами)
+- get_board_snapshot  – снимок доски для текущей версии
+- build_board_message – текст WebSocket-сообщения из снимка
+"""
+
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Order, Client, ArchivedOrder
+from .board_codec import pack_board
+
+
+BOARD_VERSION_KEY = 'counter:board:version'
+# Суффикс формата снимка: при изменении структуры снимка старые записи
+# в общем кэше не читаются новыми воркерами
+BOARD_SNAPSHOT_KEY = 'counter:board:snapshot:{version}:3'
+BOARD_LOCK_KEY = 'counter:board:lock:{version}'
+
+# Сколько секунд живёт снимок. Помимо версии, ограничивает «возраст»
+# рабочих часов до готовности, которые зависят от текущего времени.
+BOARD_SNAPSHOT_TTL = getattr(settings, 'ORDER_BOARD_SNAPSHOT_TTL', 60)
+
+# Сколько последних выданных заказов передаётся по WebSocket
+BOARD_COMPLETED_LIMIT = getattr(settings, 'ORDER_BOARD_COMPLETED_LIMIT', 50)
+
+# Сколько ждать, пока снимок строит другой процесс, прежде чем строить самим
+BOARD_LOCK_TIMEOUT = 10
+BOARD_LOCK_WAIT = 2.0
+BOARD_LOCK_POLL = 0.05
+
+
+def get_board_version():
+    """Возвращает текущую версию доски (создаёт её при первом обращении)."""
+    version = cache.get(BOARD_VERSION_KEY)
+    if version is None:
+        # Начальное значение от времени: после очистки кэша версии
+        # не повторят уже выданные ранее номера
+        cache.add(BOARD_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(BOARD_VERSION_KEY)
+    return version
+
+
+def bump_board_version():
+    """Увеличивает версию доски после изменения заказов или клиентов."""
+    try:
+        return cache.incr(BOARD_VERSION_KEY)
+    except ValueError:
+        # Ключа ещё нет (или кэш был очищен)
+        get_board_version()
+        return cache.incr(BOARD_VERSION_KEY)
+
+
+def load_board_orders():
+    """
+    Читает заказы доски из БД.
+
+    Выданные заказы ограничены последними BOARD_COMPLETED_LIMIT по дате
+    выдачи (не по номеру: давний заказ, выданный только что, тоже должен
+    попасть на доску); более старые браузер подгружает через HTTP-поиск
+    (counter/archive.py).
+
+    Возвращает:
+        tuple: (активные, выданные, completed_has_more), где списки состоят
+        из пар (Order, Order.to_dict())
+    """
+    active = [
+        (order, order.to_dict())
+        for order in Order.objects.select_related('client').exclude(status=Order.STATUS_COMPLETED)
+    ]
+
+    completed = list(
+        Order.objects.select_related('client')
+        .filter(status=Order.STATUS_COMPLETED)
+        .order_by(F('completed_at').desc(nulls_last=True), '-order_number')[:BOARD_COMPLETED_LIMIT + 1]
+    )
+    completed_has_more = (
+        len(completed) > BOARD_COMPLETED_LIMIT
+        or ArchivedOrder.objects.exists()
+    )
+    completed = [(order, order.to_dict()) for order in completed[:BOARD_COMPLETED_LIMIT]]
+
+    return active, completed, completed_has_more
+
+
+def serialize_orders(active, completed, completed_has_more):
+    """
+    Возвращает JSON-фрагмент
+    '"active_orders": [...], "completed_orders": [...], "completed_has_more": bool'
+    для заказов из load_board_orders().
+    """
+    return (
+        '"active_orders": ' + json.dumps([data for _, data in active])
+        + ', "completed_orders": ' + json.dumps([data for _, data in completed])
+        + ', "completed_has_more": ' + json.dumps(completed_has_more)
+    )
+
+
+def serialize_clients(clients):
+    """Возвращает JSON-фрагмент '"clients": [...]'."""
+    return '"clients": ' + json.dumps([client.to_dict() for client in clients])
+
+
+def _build_snapshot(version):
+    """
+    Строит снимок доски для указанной версии: JSON-фрагменты и
+    двоичные фрагменты (counter/board_codec.py) из одного чтения БД.
+    """
+    active, completed, completed_has_more = load_board_orders()
+    clients = list(Client.objects.all().order_by('name'))
+    return {
+        'version': version,
+        # Время построения: снимок той же версии, построенный заново по
+        # истечении TTL, новее прежнего (рабочие часы пересчитаны)
+        'built_at': time.time(),
+        'orders': serialize_orders(active, completed, completed_has_more),
+        'clients': serialize_clients(clients),
+        'packed': pack_board(active, completed, completed_has_more, clients),
+    }
+
+
+def get_board_snapshot():
+    """
+    Возвращает снимок доски для текущей версии:
+        {'version': int, 'built_at': float,
+         'orders': '<JSON-фрагмент>', 'clients': '<JSON-фрагмент>',
+         'packed': {<формат>: {'orders': <фрагмент>, 'clients': <фрагмент>}}}
+
+    При промахе кэша снимок строит только один процесс (блокировка через
+    cache.add), остальные недолго ждут его появления. Блокировку снимает
+    только взявший её вызов.
+    """
+    version = get_board_version()
+    snapshot_key = BOARD_SNAPSHOT_KEY.format(version=version)
+
+    snapshot = cache.get(snapshot_key)
+    if snapshot is not None:
+        return snapshot
+
+    # Значение блокировки – токен этого вызова: снимаем только свою блокировку
+    lock_key = BOARD_LOCK_KEY.format(version=version)
+    lock_token = uuid.uuid4().hex
+    locked = cache.add(lock_key, lock_token, timeout=BOARD_LOCK_TIMEOUT)
+    if not locked:
+        # Снимок уже строит другой воркер – ждём его
+        deadline = time.monotonic() + BOARD_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(BOARD_LOCK_POLL)
+            snapshot = cache.get(snapshot_key)
+            if snapshot is not None:
+                return snapshot
+
+    try:
+        snapshot = _build_snapshot(version)
+        cache.set(snapshot_key, snapshot, timeout=BOARD_SNAPSHOT_TTL)
+    finally:
+        # Не ждали чужую блокировку и она не истекла (и не взята заново) за время построения
+        if locked and cache.get(lock_key) == lock_token:
+            cache.delete(lock_key)
+
+    return snapshot
+
+
+def build_board_message(message_type, snapshot, include_orders=True, include_clients=False):
+    """
+    Собирает текст WebSocket-сообщения из готовых JSON-фрагментов снимка.
+
+    Аргументы:
+        message_type: str, значение поля 'type' ('initial_load', 'order_update', ...)
+        snapshot: dict, снимок из get_board_snapshot()
+        include_orders: bool, добавить списки заказов
+        include_clients: bool, добавить список клиентов
+    """
+    parts = ['"type": ' + json.dumps(message_type)]
+    if include_orders:
+        parts.append(snapshot['orders'])
+    if include_clients:
+        parts.append(snapshot['clients'])
+    return '{' + ', '.join(parts) + '}'
@@ -0,0 +1,282 @@
+"""
+board_codec.py
+Компактное двоичное представление доски заказов для WebSocket (msgpack / CBOR).
+
+В JSON-сообщении доски каждый заказ повторяет вложенный словарь клиента,
+client_display, status_display, is_active и отформатированные даты. В
+двоичном формате:
+- клиенты заказов передаются один раз в таблице 'oc', заказ ссылается на
+  клиента индексом в этой таблице ('c');
+- статусы передаются таблицей 'st', заказ хранит индекс статуса ('s');
+- даты – целые секунды «локального» времени (московское время, записанное
+  как UTC), браузер форматирует их сам;
+- ключи полей однобуквенные, пустые значения не передаются;
+- client_display, status_display и is_active браузер вычисляет сам.
+
+Формат выбирается при подключении через подпротокол WebSocket
+(Sec-WebSocket-Protocol): 'orders.msgpack' или 'orders.cbor'. Клиенты,
+которые подпротокол не запросили, получают прежний JSON.
+
+Как и JSON-фрагменты в board_cache.py, двоичные фрагменты строятся один раз
+на версию доски и хранятся в снимке. Сообщение собирается конкатенацией:
+заголовок словаря (map) + готовые пары «ключ – значение». Расшифровка
+формата в браузере – counter/static/counter/js/board_codec.js.
+"""
+
+import struct
+
+import cbor2
+import msgpack
+from django.utils import timezone
+
+from .models import Order
+
+
+# Версия двоичного формата (поле 'v' каждого сообщения)
+BOARD_FORMAT_VERSION = 1
+
+# Статусы в порядке индексов 's'
+STATUS_CODES = [code for code, _ in Order.STATUS_CHOICES]
+STATUS_INDEX = {code: index for index, code in enumerate(STATUS_CODES)}
+
+
+# ==================== КОДЕКИ ====================
+
+def _msgpack_map_header(size):
+    """Заголовок словаря msgpack на size пар."""
+    if size < 16:
+        return bytes([0x80 | size])
+    if size < 0x10000:
+        return b'\xde' + struct.pack('>H', size)
+    return b'\xdf' + struct.pack('>I', size)
+
+
+def _cbor_map_header(size):
+    """Заголовок словаря CBOR (major type 5) на size пар."""
+    if size < 24:
+        return bytes([0xA0 | size])
+    if size < 0x100:
+        return bytes([0xB8, size])
+    if size < 0x10000:
+        return b'\xb9' + struct.pack('>H', size)
+    return b'\xba' + struct.pack('>I', size)
+
+
+class BoardCodec:
+    """
+    Двоичный формат сообщений доски.
+
+    Аргументы:
+        name: str, имя формата ('msgpack', 'cbor')
+        subprotocol: str, подпротокол WebSocket
+        dumps: функция объект -> bytes
+        loads: функция bytes -> объект
+        map_header: функция число пар -> заголовок словаря
+        decode_errors: tuple, исключения loads для некорректных данных
+    """
+
+    def __init__(self, name, subprotocol, dumps, loads, map_header, decode_errors):
+        self.name = name
+        self.subprotocol = subprotocol
+        self.dumps = dumps
+        self.loads = loads
+        self.map_header = map_header
+        self.decode_errors = decode_errors
+
+    def pack_pairs(self, pairs):
+        """
+        Кодирует пары словаря без заголовка (фрагмент для конкатенации).
+
+        Возвращает:
+            tuple: (количество пар, bytes)
+        """
+        return len(pairs), b''.join(self.dumps(key) + self.dumps(value) for key, value in pairs)
+
+    def build_map(self, fragments):
+        """Собирает словарь из фрагментов pack_pairs()."""
+        size = sum(count for count, _ in fragments)
+        return self.map_header(size) + b''.join(data for _, data in fragments)
+
+
+CODECS = {
+    'msgpack': BoardCodec(
+        'msgpack', 'orders.msgpack',
+        dumps=lambda value: msgpack.packb(value, use_bin_type=True),
+        loads=lambda data: msgpack.unpackb(data, raw=False),
+        map_header=_msgpack_map_header,
+        # FormatError, ExtraData и обрыв данных – подклассы ValueError
+        decode_errors=(ValueError,),
+    ),
+    'cbor': BoardCodec(
+        'cbor', 'orders.cbor',
+        dumps=cbor2.dumps,
+        loads=cbor2.loads,
+        map_header=_cbor_map_header,
+        # CBORDecodeError не всегда подкласс ValueError (например, CBORDecodeEOF)
+        decode_errors=(cbor2.CBORDecodeError, ValueError),
+    ),
+}
+
+SUBPROTOCOLS = {codec.subprotocol: codec for codec in CODECS.values()}
+
+
+def select_codec(subprotocols):
+    """
+    Выбирает формат по списку подпротоколов, запрошенных браузером
+    (в порядке предпочтения клиента).
+
+    Возвращает:
+        BoardCodec или None (JSON)
+    """
+    for subprotocol in subprotocols or []:
+        codec = SUBPROTOCOLS.get(subprotocol)
+        if codec is not None:
+            return codec
+    return None
+
+
+# ==================== КОМПАКТНОЕ ПРЕДСТАВЛЕНИЕ ====================
+
+def local_epoch(value, tz=None):
+    """
+    Секунды «локального» времени: московское время, записанное как UTC.
+
+    Аргументы:
+        value: datetime (aware) или None
+        tz: часовой пояс; по умолчанию текущий. Для больших списков
+            передаётся заранее – get_current_timezone() заметно дороже
+            самого пересчёта
+    """
+    if value is None:
+        return None
+    if tz is None:
+        tz = timezone.get_current_timezone()
+    return int(value.timestamp() + value.astimezone(tz).utcoffset().total_seconds())
+
+
+def compact_client(client, tz=None):
+    """Клиент в компактном виде (пустые поля не передаются)."""
+    item = {'i': client.id, 'n': client.name, 'a': local_epoch(client.created_at, tz)}
+    if client.phone:
+        item['p'] = client.phone
+    if client.email:
+        item['e'] = client.email
+    if client.uses_edo:
+        item['x'] = True
+    if client.notes:
+        item['no'] = client.notes
+    return item
+
+
+class _ClientTable:
+    """Таблица клиентов заказов: каждый клиент попадает в неё один раз."""
+
+    def __init__(self, tz):
+        self.tz = tz
+        self.items = []
+        self.index = {}
+
+    def ref(self, client):
+        position = self.index.get(client.id)
+        if position is None:
+            position = len(self.items)
+            self.index[client.id] = position
+            self.items.append(compact_client(client, self.tz))
+        return position
+
+
+def compact_order(order, hours, client_table):
+    """
+    Заказ в компактном виде.
+
+    Аргументы:
+        order: Order (с загруженным client)
+        hours: int, рабочие часы до готовности (уже посчитанные для JSON)
+        client_table: _ClientTable
+    """
+    item = {
+        'n': order.order_number,
+        'd': order.description,
+        'r': local_epoch(order.ready_datetime, client_table.tz),
+        'a': local_epoch(order.created_at, client_table.tz),
+        's': STATUS_INDEX.get(order.status, order.status),
+    }
+    if order.client is not None:
+        item['c'] = client_table.ref(order.client)
+    if order.customer_name:
+        item['cn'] = order.customer_name
+    if hours:
+        item['h'] = hours
+    return item
+
+
+def compact_board(active, completed, completed_has_more, clients):
+    """
+    Компактное представление доски (общее для всех двоичных форматов).
+
+    Аргументы:
+        active, completed: списки пар (Order, словарь Order.to_dict())
+        completed_has_more: bool
+        clients: список Client для полного списка клиентов
+
+    Возвращает:
+        tuple: (пары фрагмента заказов, пары фрагмента клиентов)
+    """
+    tz = timezone.get_current_timezone()
+    client_table = _ClientTable(tz)
+    active_rows = [
+        compact_order(order, data['working_hours_remaining'], client_table) for order, data in active
+    ]
+    completed_rows = [
+        compact_order(order, data['working_hours_remaining'], client_table) for order, data in completed
+    ]
+
+    orders_pairs = [
+        ('st', [list(choice) for choice in Order.STATUS_CHOICES]),
+        ('oc', client_table.items),
+        ('ao', active_rows),
+        ('co', completed_rows),
+        ('more', completed_has_more),
+    ]
+    clients_pairs = [('cl', [compact_client(client, tz) for client in clients])]
+    return orders_pairs, clients_pairs
+
+
+def pack_board(active, completed, completed_has_more, clients):
+    """
+    Строит двоичные фрагменты снимка доски для всех форматов
+    (аргументы – как у compact_board).
+
+    Возвращает:
+        dict: {имя формата: {'orders': фрагмент, 'clients': фрагмент}}
+    """
+    orders_pairs, clients_pairs = compact_board(active, completed, completed_has_more, clients)
+    return {
+        name: {
+            'orders': codec.pack_pairs(orders_pairs),
+            'clients': codec.pack_pairs(clients_pairs),
+        }
+        for name, codec in CODECS.items()
+    }
+
+
+def build_board_frame(codec, message_type, snapshot, include_orders=True, include_clients=False):
+    """
+    Собирает двоичное WebSocket-сообщение из готовых фрагментов снимка
+    (аналог board_cache.build_board_message).
+
+    Аргументы:
+        codec: BoardCodec
+        message_type: str, значение поля 't'
+        snapshot: dict, снимок из get_board_snapshot()
+        include_orders: bool, добавить заказы
+        include_clients: bool, добавить список клиентов
+    """
+    packed = snapshot['packed'][codec.name]
+    fragments = [codec.pack_pairs([('t', message_type), ('v', BOARD_FORMAT_VERSION)])]
+    if include_orders:
+        fragments.append(packed['orders'])
+    if include_clients:
+        fragments.append(packed['clients'])
+    return codec.build_map(fragments)
+
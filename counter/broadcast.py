@@ -0,0 +1,224 @@
+"""
+broadcast.py
+Объединение (coalescing) рассылок доски заказов и метрики WebSocket-очередей.
+
+Когда несколько операторов одновременно меняют статусы, каждое действие
+раньше вызывало свой group_send с полной доской. Теперь действие только
+«запрашивает» рассылку: запросы, пришедшие в течение короткого окна
+(WS_BROADCAST_COALESCE_WINDOW), объединяются в одну рассылку для группы.
+
+Каждое соединение OrderConsumer отправляет сообщения через ограниченную
+очередь (WS_SEND_QUEUE_SIZE). Если очередь переполнена (медленный клиент),
+накопленные сообщения отбрасываются и вместо них клиенту отправляется одна
+свежая полная доска (drop-to-resync): все сообщения доски самодостаточны,
+поэтому промежуточные состояния можно пропустить.
+
+Событие рассылки несёт только версию снимка доски и состав сообщения, а
+не готовые тексты во всех форматах. Каждый процесс один раз на версию
+получает снимок и собирает сообщение в нужном формате (JSON или двоичный,
+counter/board_codec.py) – BoardMessageCache; все соединения процесса с
+тем же форматом отправляют одни и те же байты.
+
+Метрики (get_broadcast_metrics) доступны по /counter/ws/metrics/.
+"""
+
+import asyncio
+import weakref
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from .board_cache import get_board_snapshot, build_board_message
+from .board_codec import build_board_frame
+
+
+# Окно объединения рассылок (секунды)
+COALESCE_WINDOW = getattr(settings, 'WS_BROADCAST_COALESCE_WINDOW', 0.05)
+
+# Максимальное число неотправленных сообщений на одно соединение
+SEND_QUEUE_SIZE = getattr(settings, 'WS_SEND_QUEUE_SIZE', 8)
+
+# Маркер в очереди отправки: «отправить свежую полную доску»
+RESYNC = object()
+
+
+# ==================== МЕТРИКИ ====================
+
+_metrics = {
+    'broadcast_requests': 0,     # сколько раз действия запросили рассылку
+    'broadcasts_sent': 0,        # сколько group_send реально выполнено
+    'coalesced_events': 0,       # сколько запросов было объединено с уже ожидающей рассылкой
+    'dropped_messages': 0,       # сколько сообщений отброшено из переполненных очередей
+    'resyncs': 0,                # сколько раз клиенту отправлялась полная доска после переполнения
+    'max_queue_depth': 0,        # максимальная глубина очереди за время работы процесса
+    'encoded_messages': 0,       # сколько сообщений доски собрано (один раз на версию и формат)
+}
+
+# Открытые очереди соединений (для текущей глубины очередей)
+_queues = weakref.WeakSet()
+
+
+class SendQueue:
+    """
+    Ограниченная очередь исходящих сообщений одного WebSocket-соединения.
+
+    put() никогда не ждёт: при переполнении очередь очищается и в неё
+    кладётся маркер RESYNC, по которому отправитель пошлёт свежую доску.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or SEND_QUEUE_SIZE
+        self._queue = asyncio.Queue()
+        _queues.add(self)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def put(self, item):
+        """Добавляет сообщение в очередь (с политикой drop-to-resync)."""
+        if self._queue.qsize() >= self.maxsize:
+            dropped = 0
+            while not self._queue.empty():
+                self._queue.get_nowait()
+                dropped += 1
+            _metrics['dropped_messages'] += dropped
+            _metrics['resyncs'] += 1
+            item = RESYNC
+
+        self._queue.put_nowait(item)
+        depth = self._queue.qsize()
+        if depth > _metrics['max_queue_depth']:
+            _metrics['max_queue_depth'] = depth
+
+    async def get(self):
+        return await self._queue.get()
+
+    def close(self):
+        """Исключает очередь из метрик (соединение закрыто)."""
+        _queues.discard(self)
+
+
+# ==================== СООБЩЕНИЯ ДОСКИ В ПРОЦЕССЕ ====================
+
+class BoardMessageCache:
+    """
+    Последний снимок доски в этом процессе и собранные из него сообщения.
+
+    Снимок заменяется более новым: следующей версии или той же версии,
+    построенным позже (по истечении TTL, с пересчитанными рабочими часами);
+    сообщения собираются один раз на формат и состав и сбрасываются вместе
+    со снимком.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+        self._messages = {}
+        self._lock = None
+        self._lock_loop = None
+
+    def update(self, snapshot):
+        """Запоминает снимок, если он новее текущего."""
+        if self.snapshot is None or (
+            (snapshot['version'], snapshot['built_at']) > (self.snapshot['version'], self.snapshot['built_at'])
+        ):
+            self.snapshot = snapshot
+            self._messages = {}
+
+    async def get_snapshot(self, version):
+        """
+        Снимок не старше version. Пока один запрос читает снимок из кэша,
+        остальные соединения процесса ждут его, а не читают сами.
+        """
+        if self.snapshot is None or self.snapshot['version'] < version:
+            # Блокировка привязана к циклу событий (в тестах их несколько)
+            loop = asyncio.get_running_loop()
+            if self._lock_loop is not loop:
+                self._lock, self._lock_loop = asyncio.Lock(), loop
+            async with self._lock:
+                if self.snapshot is None or self.snapshot['version'] < version:
+                    self.update(await database_sync_to_async(get_board_snapshot)())
+        return self.snapshot
+
+    def message(self, codec, message_type, include_orders=True, include_clients=False):
+        """
+        Сообщение из текущего снимка: bytes для двоичного формата codec,
+        str (JSON), если codec – None.
+        """
+        key = (codec.name if codec is not None else 'json', message_type, include_orders, include_clients)
+        message = self._messages.get(key)
+        if message is None:
+            if codec is not None:
+                message = build_board_frame(codec, message_type, self.snapshot, include_orders, include_clients)
+            else:
+                message = build_board_message(message_type, self.snapshot, include_orders, include_clients)
+            self._messages[key] = message
+            _metrics['encoded_messages'] += 1
+        return message
+
+
+# Один кэш сообщений на процесс
+board_messages = BoardMessageCache()
+
+
+# ==================== ОБЪЕДИНЕНИЕ РАССЫЛОК ====================
+
+class BroadcastCoalescer:
+    """
+    Объединяет запросы на рассылку доски для одной группы в пределах окна.
+
+    Первый запрос для группы планирует отложенную отправку; последующие
+    запросы в течение окна только дополняют её (заказы и/или клиенты).
+    """
+
+    def __init__(self, window=None):
+        self.window = COALESCE_WINDOW if window is None else window
+        self._pending = {}   # group -> {'orders': bool, 'clients': bool}
+        self._tasks = set()  # ссылки на запланированные задачи (чтобы их не собрал GC)
+
+    def request(self, channel_layer, group, orders=True, clients=False):
+        """Запрашивает рассылку доски группе group."""
+        _metrics['broadcast_requests'] += 1
+
+        pending = self._pending.get(group)
+        if pending is not None:
+            _metrics['coalesced_events'] += 1
+            pending['orders'] = pending['orders'] or orders
+            pending['clients'] = pending['clients'] or clients
+            return
+
+        self._pending[group] = {'orders': orders, 'clients': clients}
+        task = asyncio.ensure_future(self._flush_later(channel_layer, group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_later(self, channel_layer, group):
+        """Ждёт окно объединения и отправляет одну рассылку."""
+        await asyncio.sleep(self.window)
+        pending = self._pending.pop(group)
+
+        snapshot = await database_sync_to_async(get_board_snapshot)()
+        board_messages.update(snapshot)
+
+        # Только версия и состав: сообщение в своём формате соберёт каждый процесс
+        if pending['orders']:
+            event = {'type': 'order_update', 'orders': True, 'clients': pending['clients']}
+        else:
+            event = {'type': 'clients_update', 'orders': False, 'clients': True}
+        event['version'] = snapshot['version']
+
+        await channel_layer.group_send(group, event)
+        _metrics['broadcasts_sent'] += 1
+
+
+# Один объединитель на процесс
+coalescer = BroadcastCoalescer()
+
+
+def get_broadcast_metrics():
+    """Возвращает текущие метрики рассылок и очередей этого процесса."""
+    depths = [queue.qsize() for queue in list(_queues)]
+    metrics = dict(_metrics)
+    metrics['connections'] = len(depths)
+    metrics['queued_messages'] = sum(depths)
+    metrics['current_max_queue_depth'] = max(depths, default=0)
+    return metrics
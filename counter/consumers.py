@@ -3,12 +3,16 @@ consumers.py
 WebSocket обработчики для реального обновления данных в системе управления заказами типографии.
 """
 
+import asyncio
 import json
 from datetime import datetime  # Импортируем стандартный модуль datetime
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from .models import Order, Client
+from .board_cache import get_board_snapshot
+from .board_codec import select_codec
+from .broadcast import coalescer, board_messages, SendQueue, RESYNC
 from django.utils import timezone  # Используем timezone из Django
 
 
@@ -35,31 +39,67 @@ class OrderConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
         
-        await self.accept()
+        # Формат сообщений доски: двоичный (orders.msgpack / orders.cbor),
+        # если браузер запросил подпротокол, иначе JSON (counter/board_codec.py)
+        self.codec = select_codec(self.scope.get('subprotocols'))
         
-        # При подключении отправляем и заказы, и клиентов
-        active_orders, completed_orders = await self.get_orders_by_status()
-        clients = await self.get_all_clients()
+        if self.codec is not None:
+            await self.accept(subprotocol=self.codec.subprotocol)
+        else:
+            await self.accept()
         
-        await self.send(text_data=json.dumps({
-            'type': 'initial_load',
-            'active_orders': active_orders,
-            'completed_orders': completed_orders,
-            'clients': clients
-        }))
+        # При подключении отправляем и заказы, и клиентов.
+        # Доска берётся из общего версионированного кэша (counter/board_cache.py),
+        # поэтому массовое переподключение не пересчитывает её для каждого экрана.
+        snapshot = await self.get_board_snapshot()
+        
+        await self.send_board(snapshot, 'initial_load', include_clients=True)
+        
+        # Дальнейшие сообщения идут через ограниченную очередь (counter/broadcast.py):
+        # медленный клиент не накапливает в памяти устаревшие доски
+        self.send_queue = SendQueue()
+        self.sender_task = asyncio.ensure_future(self.sender_loop())
     
     async def disconnect(self, close_code):
         """Закрывает WebSocket соединение."""
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        sender_task = getattr(self, 'sender_task', None)
+        if sender_task is not None:
+            sender_task.cancel()
+            self.send_queue.close()
+        
+        # Группа не задана, если подключение было отклонено
+        if hasattr(self, 'room_group_name'):
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
         
         print(f"🔌 WebSocket: Отключение пользователя, код: {close_code}")
     
-    async def receive(self, text_data):
-        """Обрабатывает сообщения от клиента."""
-        data = json.loads(text_data)
+    async def receive(self, text_data=None, bytes_data=None):
+        """Обрабатывает сообщения от клиента (JSON или, при двоичном подпротоколе, msgpack/CBOR)."""
+        data = None
+        if bytes_data is not None:
+            # Двоичные сообщения принимаются только при согласованном двоичном подпротоколе
+            if self.codec is not None:
+                try:
+                    data = self.codec.loads(bytes_data)
+                except self.codec.decode_errors:
+                    pass
+        elif text_data is not None:
+            try:
+                data = json.loads(text_data)
+            except ValueError:
+                pass
+        
+        if not isinstance(data, dict):
+            print(f"❌ WebSocket: Сообщение не разобрано")
+            await self.send(text_data=json.dumps({
+                'type': 'error',
+                'message': 'Некорректное сообщение'
+            }))
+            return
+        
         action = data.get('action')
         
         # ===== ДОБАВЛЕНИЕ НОВОГО ЗАКАЗА =====
@@ -81,16 +121,7 @@ class OrderConsumer(AsyncWebsocketConsumer):
                 return  # Прерываем выполнение, так как клиент обязателен
             
             # Отправляем обновления всем
-            active_orders, completed_orders = await self.get_orders_by_status()
-            
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'order_update',
-                    'active_orders': active_orders,
-                    'completed_orders': completed_orders
-                }
-            )
+            self.request_broadcast()
         
         # ===== ДОБАВЛЕНИЕ НОВОГО КЛИЕНТА =====
         elif action == 'add_client':
@@ -105,15 +136,7 @@ class OrderConsumer(AsyncWebsocketConsumer):
             )
             
             # Отправляем обновленный список клиентов
-            clients = await self.get_all_clients()
-            
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'clients_update',
-                    'clients': clients
-                }
-            )
+            self.request_broadcast(orders=False, clients=True)
             
             print(f"✅ Добавлен клиент: {client_data['name']}")
         
@@ -122,16 +145,7 @@ class OrderConsumer(AsyncWebsocketConsumer):
             order_number = data.get('order_number')
             await self.delete_order(order_number)
             
-            active_orders, completed_orders = await self.get_orders_by_status()
-            
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'order_update',
-                    'active_orders': active_orders,
-                    'completed_orders': completed_orders
-                }
-            )
+            self.request_broadcast()
         
         # ===== ОБНОВЛЕНИЕ ЗАКАЗА =====
         elif action == 'update_order':
@@ -143,16 +157,7 @@ class OrderConsumer(AsyncWebsocketConsumer):
             # и не может быть изменен через редактирование заказа
             await self.update_order(order_number, description, ready_datetime_str)
             
-            active_orders, completed_orders = await self.get_orders_by_status()
-            
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'order_update',
-                    'active_orders': active_orders,
-                    'completed_orders': completed_orders
-                }
-            )
+            self.request_broadcast()
         
         # ===== ИЗМЕНЕНИЕ СТАТУСА ЗАКАЗА =====
         elif action == 'change_status':
@@ -161,48 +166,56 @@ class OrderConsumer(AsyncWebsocketConsumer):
             
             await self.change_order_status(order_number, new_status)
             
-            active_orders, completed_orders = await self.get_orders_by_status()
-            
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'order_update',
-                    'active_orders': active_orders,
-                    'completed_orders': completed_orders
-                }
-            )
+            self.request_broadcast()
         
         # ===== ОБНОВЛЕНИЕ СПИСКА ЗАКАЗОВ =====
         elif action == 'refresh_orders':
-            active_orders, completed_orders = await self.get_orders_by_status()
-            clients = await self.get_all_clients()
-            
-            await self.send(text_data=json.dumps({
-                'type': 'order_update',
-                'active_orders': active_orders,
-                'completed_orders': completed_orders,
-                'clients': clients
-            }))
+            # Полная доска – то же, что и после переполнения очереди
+            self.send_queue.put(RESYNC)
+    
+    def request_broadcast(self, orders=True, clients=False):
+        """
+        Запрашивает рассылку доски всем подключённым клиентам.
+        Запросы от всех соединений процесса в пределах короткого окна
+        объединяются в одну рассылку (counter/broadcast.py).
+        """
+        coalescer.request(self.channel_layer, self.room_group_name, orders=orders, clients=clients)
+    
+    async def sender_loop(self):
+        """Отправляет сообщения из очереди соединения по одному."""
+        while True:
+            item = await self.send_queue.get()
+            
+            if item is RESYNC:
+                # Промежуточные обновления были отброшены – отправляем актуальную доску целиком
+                snapshot = await self.get_board_snapshot()
+                await self.send_board(snapshot, 'order_update', include_clients=True)
+            elif isinstance(item, bytes):
+                await self.send(bytes_data=item)
+            else:
+                await self.send(text_data=item)
+    
+    async def send_board(self, snapshot, message_type, include_orders=True, include_clients=False):
+        """Отправляет сообщение доски в формате этого соединения."""
+        board_messages.update(snapshot)
+        message = board_messages.message(self.codec, message_type, include_orders, include_clients)
+        if isinstance(message, bytes):
+            await self.send(bytes_data=message)
+        else:
+            await self.send(text_data=message)
+    
+    async def board_event_message(self, event):
+        """Собирает сообщение рассылки в формате этого соединения (один раз на процесс)."""
+        await board_messages.get_snapshot(event['version'])
+        return board_messages.message(self.codec, event['type'], event['orders'], event['clients'])
     
     async def order_update(self, event):
-        """Отправляет обновление заказов клиенту."""
-        active_orders = event['active_orders']
-        completed_orders = event['completed_orders']
-        
-        await self.send(text_data=json.dumps({
-            'type': 'order_update',
-            'active_orders': active_orders,
-            'completed_orders': completed_orders
-        }))
+        """Ставит в очередь обновление заказов (сообщение из снимка доски версии события)."""
+        self.send_queue.put(await self.board_event_message(event))
     
     async def clients_update(self, event):
-        """Отправляет обновление списка клиентов."""
-        clients = event['clients']
-        
-        await self.send(text_data=json.dumps({
-            'type': 'clients_update',
-            'clients': clients
-        }))
+        """Ставит в очередь обновление списка клиентов (сообщение из снимка доски версии события)."""
+        self.send_queue.put(await self.board_event_message(event))
     
     # ===== ВСПОМОГАТЕЛЬНЫЕ МЕТОДЫ ДЛЯ РАБОТЫ С БАЗОЙ ДАННЫХ =====
     
@@ -321,25 +334,9 @@ class OrderConsumer(AsyncWebsocketConsumer):
             print(f"⚠️ Заказ №{order_number} не найден")
     
     @database_sync_to_async
-    def get_orders_by_status(self):
-        """Получает все заказы, разделенные на активные и выполненные."""
-        all_orders = Order.objects.all()
-        
-        active_orders = []
-        completed_orders = []
-        
-        for order in all_orders:
-            order_dict = order.to_dict()
-            
-            if order.status == Order.STATUS_COMPLETED:
-                completed_orders.append(order_dict)
-            else:
-                active_orders.append(order_dict)
-        
-        return active_orders, completed_orders
-    
-    @database_sync_to_async
-    def get_all_clients(self):
-        """Получает всех клиентов из БД."""
-        clients = Client.objects.all().order_by('name')
-        return [client.to_dict() for client in clients]
\ No newline at end of file
+    def get_board_snapshot(self):
+        """
+        Получает снимок доски (активные и выполненные заказы, клиенты)
+        из общего кэша; при смене версии снимок строится заново.
+        """
+        return get_board_snapshot()
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+excel_export.py
+Потоковая выгрузка заказов в Excel (.xlsx).
+
+Книга строится в режиме openpyxl write_only: строки пишутся на диск по мере
+чтения заказов из БД (QuerySet.iterator), поэтому память не растёт с
+количеством заказов. Оформление ячеек задаётся именованными стилями,
+которые хранятся в книге один раз, а не объектами стилей на каждую ячейку.
+
+В режиме write_only ширину колонок нужно задать до первой строки, поэтому
+она оценивается по заголовкам и первой пачке заказов (EXPORT_WIDTH_SAMPLE),
+прочитанной в том же проходе по QuerySet.
+
+Выданные заказы, перенесённые в архив (ArchivedOrder, counter/archive.py),
+тоже попадают в выгрузку: оба источника читаются по дате создания (новые
+сверху) и сливаются в один поток строк.
+
+Функции:
+- write_orders_workbook – записать книгу с заказами в файл
+- iter_file_chunks      – отдать файл блоками (для StreamingHttpResponse)
+"""
+
+import heapq
+from itertools import chain, islice
+
+from django.conf import settings
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
+
+from .models import Order, ArchivedOrder
+
+
+# Сколько заказов читается из БД за один запрос
+EXPORT_CHUNK_SIZE = getattr(settings, 'ORDER_EXPORT_CHUNK_SIZE', 2000)
+
+# По скольким первым строкам оценивается ширина колонок
+EXPORT_WIDTH_SAMPLE = EXPORT_CHUNK_SIZE
+
+# Максимальная ширина колонки (символов)
+EXPORT_MAX_COLUMN_WIDTH = 50
+
+# Размер блока при отдаче файла клиенту
+STREAM_BLOCK_SIZE = 64 * 1024
+
+HEADER_STYLE = 'orders_export_header'
+CELL_STYLE = 'orders_export_cell'
+
+ORDER_HEADERS = [
+    '№ заказа',
+    'Клиент',
+    'Описание',
+    'Дата готовности',
+    'Статус',
+    'Дата создания',
+    'Телефон',
+    'Email',
+    'ЭДО',
+]
+
+
+def _add_named_styles(wb):
+    """Регистрирует в книге стили заголовков и ячеек данных."""
+    # Границы ячеек: тонкая серая линия
+    thin_side = Side(style='thin', color='D0D0D0')
+    thin_border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
+
+    # Заголовки: жирный белый шрифт на фирменном зелёном, по центру
+    wb.add_named_style(NamedStyle(
+        name=HEADER_STYLE,
+        font=Font(name='Arial', size=12, bold=True, color='FFFFFF'),
+        fill=PatternFill(start_color='0B8661', end_color='0B8661', fill_type='solid'),
+        alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        border=thin_border,
+    ))
+
+    # Данные: по левому краю, с переносом текста
+    wb.add_named_style(NamedStyle(
+        name=CELL_STYLE,
+        alignment=Alignment(horizontal='left', vertical='center', wrap_text=True),
+        border=thin_border,
+    ))
+
+
+def iter_order_rows(orders):
+    """
+    Значения строк Excel для заказов (в порядке ORDER_HEADERS).
+
+    Аргументы:
+        orders: итерируемые заказы с загруженным client (select_related)
+    """
+    # Часовой пояс один на всю выгрузку (даты – в московском времени, как в интерфейсе)
+    tz = timezone.get_current_timezone()
+    status_names = dict(Order.STATUS_CHOICES)
+
+    for order in orders:
+        client = order.client
+        yield [
+            f"{order.order_number:04d}",
+            client.name if client else order.customer_name or "—",
+            order.description,
+            order.ready_datetime.astimezone(tz).strftime('%d.%m.%Y %H:%M'),
+            status_names.get(order.status, order.status),
+            order.created_at.astimezone(tz).strftime('%d.%m.%Y %H:%M'),
+            client.phone if client else "",
+            client.email if client else "",
+            "Да" if (client and client.uses_edo) else "Нет",
+        ]
+
+
+def _styled_row(ws, values, style):
+    """Строка из ячеек write_only с именованным стилем."""
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        cells.append(cell)
+    return cells
+
+
+def write_orders_workbook(fileobj, orders=None, include_archived=True):
+    """
+    Записывает книгу Excel с заказами в fileobj.
+
+    Аргументы:
+        fileobj: файл (или file-like объект с seek/tell), открытый на запись
+        orders: QuerySet заказов; по умолчанию все заказы, новые сверху
+        include_archived: добавить заказы из архива (только без orders)
+
+    Возвращает:
+        int: количество выгруженных заказов
+    """
+    if orders is None:
+        live = Order.objects.select_related('client').order_by('-created_at')
+        orders = live.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        if include_archived:
+            archived = ArchivedOrder.objects.select_related('client').order_by('-created_at')
+            orders = heapq.merge(
+                orders, archived.iterator(chunk_size=EXPORT_CHUNK_SIZE),
+                key=lambda order: order.created_at, reverse=True,
+            )
+    else:
+        orders = orders.select_related('client').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    wb = Workbook(write_only=True)
+    _add_named_styles(wb)
+    ws = wb.create_sheet(title="Заказы")
+
+    rows = iter_order_rows(orders)
+
+    # Ширина колонок по заголовкам и первой пачке строк (до записи первой строки)
+    sample = list(islice(rows, EXPORT_WIDTH_SAMPLE))
+    widths = [len(header) for header in ORDER_HEADERS]
+    for values in sample:
+        for index, value in enumerate(values):
+            if len(value) > widths[index]:
+                widths[index] = len(value)
+    for index, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(index)].width = min(width + 2, EXPORT_MAX_COLUMN_WIDTH)
+
+    ws.append(_styled_row(ws, ORDER_HEADERS, HEADER_STYLE))
+
+    count = 0
+    for values in chain(sample, rows):
+        ws.append(_styled_row(ws, values, CELL_STYLE))
+        count += 1
+
+    wb.save(fileobj)
+    return count
+
+
+def iter_file_chunks(fileobj, block_size=STREAM_BLOCK_SIZE):
+    """Отдаёт содержимое файла блоками и закрывает его в конце."""
+    try:
+        fileobj.seek(0)
+        while True:
+            block = fileobj.read(block_size)
+            if not block:
+                break
+            yield block
+    finally:
+        fileobj.close()
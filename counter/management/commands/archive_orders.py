@@ -0,0 +1,54 @@
+"""
+counter/management/commands/archive_orders.py
+Команда для переноса старых выданных заказов в архив.
+
+Пример (запускать по расписанию, например раз в сутки через cron/systemd timer):
+    python manage.py archive_orders
+    python manage.py archive_orders --days 30 --batch-size 500
+    python manage.py archive_orders --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+
+from counter.archive import archive_completed_orders, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Переносит выданные заказы старше заданного срока в архив (пачками)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=ARCHIVE_AFTER_DAYS,
+            help=f'Через сколько дней после выдачи заказ переносится в архив (по умолчанию {ARCHIVE_AFTER_DAYS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help=f'Сколько заказов переносить в одной транзакции (по умолчанию {ARCHIVE_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать количество заказов для архивации'
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        if dry_run:
+            count = archive_completed_orders(days=days, dry_run=True)
+            self.stdout.write(f"Найдено {count} выданных заказов старше {days} дн. для архивации")
+            return
+
+        def report(archived_total):
+            self.stdout.write(f"  перенесено: {archived_total}")
+
+        self.stdout.write(f"Архивация выданных заказов старше {days} дн. (пачки по {batch_size})...")
+        archived = archive_completed_orders(days=days, batch_size=batch_size, progress=report)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Перенесено в архив заказов: {archived}"))
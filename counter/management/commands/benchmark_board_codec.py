@@ -0,0 +1,182 @@
+"""
+counter/management/commands/benchmark_board_codec.py
+Бенчмарк форматов WebSocket-сообщений доски заказов.
+
+Сравнивает для одного сообщения initial_load (заказы и клиенты):
+- JSON (прежний формат, словари Order.to_dict());
+- msgpack тех же словарей (только смена кодирования);
+- компактный msgpack и CBOR из counter/board_codec.py.
+
+Показывает размер сообщения, время сериализации и время разбора.
+Заказы и клиенты создаются в памяти и в базу не сохраняются.
+
+Пример:
+    python manage.py benchmark_board_codec
+    python manage.py benchmark_board_codec --orders 1000 10000 --clients 300
+"""
+
+import json
+import random
+import time
+from datetime import timedelta
+
+import msgpack
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from counter.board_cache import serialize_orders, serialize_clients, build_board_message
+from counter.board_codec import CODECS, BOARD_FORMAT_VERSION, compact_board
+from counter.models import Client, Order
+
+
+def make_clients(count, rng, now):
+    """Синтетические клиенты (без сохранения в БД)."""
+    clients = []
+    for number in range(1, count + 1):
+        clients.append(Client(
+            id=number,
+            name=f'ООО «Клиент {number}»',
+            phone=f'+7 (9{rng.randint(10, 99)}) {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}',
+            email=f'client{number}@example.ru' if rng.random() < 0.7 else '',
+            uses_edo=rng.random() < 0.3,
+            notes='Постоянный клиент' if rng.random() < 0.2 else '',
+            created_at=now - timedelta(days=rng.randint(0, 1000)),
+        ))
+    return clients
+
+
+def make_orders(count, clients, rng, now):
+    """Синтетические заказы с клиентами из clients (без сохранения в БД)."""
+    statuses = [Order.STATUS_ACCEPTED, Order.STATUS_IN_PROGRESS, Order.STATUS_READY, Order.STATUS_COMPLETED]
+    orders = []
+    for number in range(1, count + 1):
+        order = Order(
+            order_number=number,
+            client=rng.choice(clients),
+            description=f'Визитки 90x50, 4+4, {rng.choice([100, 200, 500, 1000])} шт., ламинация',
+            ready_datetime=now + timedelta(minutes=rng.randint(-3 * 24 * 60, 30 * 24 * 60)),
+            status=rng.choice(statuses),
+        )
+        order.created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+        orders.append(order)
+    return orders
+
+
+def measure(function, repeat):
+    """Лучшее время из repeat запусков (секунды) и результат последнего."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает размер и скорость JSON и двоичных (msgpack/CBOR) сообщений доски заказов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            nargs='+',
+            default=[1000, 10000],
+            help='Количество заказов (можно несколько значений, по умолчанию 1000 10000)'
+        )
+        parser.add_argument(
+            '--clients',
+            type=int,
+            default=300,
+            help='Количество клиентов (по умолчанию 300)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Сколько раз повторять каждое измерение (берётся лучшее время)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Начальное значение генератора случайных чисел'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        clients = make_clients(options['clients'], rng, now)
+
+        for orders_count in options['orders']:
+            orders = make_orders(orders_count, clients, rng, now)
+            self.run_case(orders, clients, options['repeat'])
+
+        self.stdout.write(self.style.SUCCESS('✅ Бенчмарк завершён'))
+
+    def run_case(self, orders, clients, repeat):
+        # Словари заказов строятся один раз для всех форматов (как в снимке доски)
+        dicts_elapsed, pairs = measure(lambda: [(order, order.to_dict()) for order in orders], 1)
+        active = [pair for pair in pairs if pair[0].status != Order.STATUS_COMPLETED]
+        completed = [pair for pair in pairs if pair[0].status == Order.STATUS_COMPLETED]
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"Заказов: {len(orders)} (активных {len(active)}, выданных {len(completed)}), "
+            f"клиентов: {len(clients)}; Order.to_dict(): {dicts_elapsed * 1000:.1f} мс"
+        )
+
+        results = []
+
+        # JSON – прежний формат
+        def build_json():
+            snapshot = {
+                'orders': serialize_orders(active, completed, False),
+                'clients': serialize_clients(clients),
+            }
+            return build_board_message('initial_load', snapshot, include_clients=True).encode('utf-8')
+
+        encode_elapsed, payload = measure(build_json, repeat)
+        decode_elapsed, _ = measure(lambda: json.loads(payload), repeat)
+        results.append(('JSON', payload, encode_elapsed, decode_elapsed))
+
+        # msgpack тех же словарей – вклад только смены кодирования
+        def build_msgpack_dicts():
+            return msgpack.packb({
+                'type': 'initial_load',
+                'active_orders': [data for _, data in active],
+                'completed_orders': [data for _, data in completed],
+                'completed_has_more': False,
+                'clients': [client.to_dict() for client in clients],
+            }, use_bin_type=True)
+
+        encode_elapsed, payload = measure(build_msgpack_dicts, repeat)
+        decode_elapsed, _ = measure(lambda: msgpack.unpackb(payload, raw=False), repeat)
+        results.append(('msgpack (словари JSON)', payload, encode_elapsed, decode_elapsed))
+
+        # Компактные форматы: общее компактное представление + кодирование
+        compact_elapsed, (orders_pairs, clients_pairs) = measure(
+            lambda: compact_board(active, completed, False, clients), repeat
+        )
+
+        for name, codec in CODECS.items():
+            def build_frame(codec=codec):
+                return codec.build_map([
+                    codec.pack_pairs([('t', 'initial_load'), ('v', BOARD_FORMAT_VERSION)]),
+                    codec.pack_pairs(orders_pairs),
+                    codec.pack_pairs(clients_pairs),
+                ])
+
+            encode_elapsed, payload = measure(build_frame, repeat)
+            decode_elapsed, _ = measure(lambda codec=codec, payload=payload: codec.loads(payload), repeat)
+            results.append((f'{codec.subprotocol} (компактный)', payload,
+                            compact_elapsed + encode_elapsed, decode_elapsed))
+
+        json_size = len(results[0][1])
+        self.stdout.write(f"  {'Формат':<30} {'Байт':>11} {'% JSON':>7} {'Сериализация':>13} {'Разбор':>9}")
+        for title, payload, encode_elapsed, decode_elapsed in results:
+            self.stdout.write(
+                f"  {title:<30} {len(payload):>11,} {len(payload) / json_size * 100:>6.1f}% "
+                f"{encode_elapsed * 1000:>10.2f} мс {decode_elapsed * 1000:>6.2f} мс"
+            )
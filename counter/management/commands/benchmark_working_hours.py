@@ -0,0 +1,105 @@
+"""
+counter/management/commands/benchmark_working_hours.py
+Бенчмарк расчёта рабочих часов до готовности заказа.
+
+Сравнивает прежний пошаговый расчёт (по одному часу от текущего момента
+до срока готовности) с расчётом по формуле из counter/working_hours.py.
+Данные генерируются в памяти, база данных не используется.
+
+Пример:
+    python manage.py benchmark_working_hours --orders 1000 --max-days 60
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from counter.working_hours import build_working_calendar, working_hours_between
+
+
+def legacy_working_hours(now, ready_dt, calendar):
+    """Прежний алгоритм: перебор по одному часу (в локальном времени)."""
+    if now >= ready_dt:
+        return 0
+
+    total_hours = 0
+    current = timezone.localtime(now)
+    ready_local = timezone.localtime(ready_dt)
+
+    while current < ready_local:
+        window = calendar.window_for(current.date())
+        seconds = current.hour * 3600 + current.minute * 60 + current.second
+        if window is not None and window[0] <= seconds < window[1]:
+            total_hours += 1
+        current += timedelta(hours=1)
+
+    return total_hours
+
+
+class Command(BaseCommand):
+    help = 'Измеряет стоимость расчёта рабочих часов на один заказ (старый и новый алгоритмы)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=1000,
+            help='Количество синтетических заказов (по умолчанию 1000)'
+        )
+        parser.add_argument(
+            '--max-days',
+            type=int,
+            default=30,
+            help='Максимальный срок готовности в днях от текущего момента (по умолчанию 30)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Начальное значение генератора случайных чисел'
+        )
+
+    def handle(self, *args, **options):
+        orders_count = options['orders']
+        max_days = options['max_days']
+        rng = random.Random(options['seed'])
+
+        # Календарь без обращения к БД: стандартный график из настроек
+        calendar = build_working_calendar(calendar_days=[])
+
+        now = timezone.now()
+        deadlines = [
+            now + timedelta(minutes=rng.randint(0, max_days * 24 * 60))
+            for _ in range(orders_count)
+        ]
+
+        self.stdout.write(f"Заказов: {orders_count}, срок готовности до {max_days} дн.")
+
+        start = time.perf_counter()
+        legacy_results = [legacy_working_hours(now, deadline, calendar) for deadline in deadlines]
+        legacy_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_results = [working_hours_between(now, deadline, calendar) for deadline in deadlines]
+        new_elapsed = time.perf_counter() - start
+
+        # Пошаговый алгоритм считает начатые часовые интервалы, поэтому
+        # на границах рабочего окна значения могут отличаться на 1 час
+        max_diff = max(
+            (abs(a - b) for a, b in zip(legacy_results, new_results)),
+            default=0
+        )
+
+        legacy_per_order = legacy_elapsed / max(orders_count, 1) * 1_000_000
+        new_per_order = new_elapsed / max(orders_count, 1) * 1_000_000
+
+        self.stdout.write(f"Пошаговый расчёт: {legacy_elapsed:.4f} с ({legacy_per_order:.1f} мкс/заказ)")
+        self.stdout.write(f"Расчёт по формуле: {new_elapsed:.4f} с ({new_per_order:.1f} мкс/заказ)")
+        if new_elapsed > 0:
+            self.stdout.write(f"Ускорение: x{legacy_elapsed / new_elapsed:.1f}")
+        self.stdout.write(f"Максимальное расхождение: {max_diff} ч")
+
+        self.stdout.write(self.style.SUCCESS('✅ Бенчмарк завершён'))
@@ -0,0 +1,70 @@
+"""
+counter/management/commands/restore_backup.py
+Восстановление клиентов и заказов из файла резервной копии.
+
+Принимает оба формата: сжатый JSON Lines (printshop_backup_*.jsonl.gz)
+и прежний JSON. Данные моделей из копии полностью заменяются.
+После полной копии можно указать цепочку инкрементных (команда
+create_backup --incremental) – они применяются по порядку в той же транзакции.
+
+Пример:
+    python manage.py restore_backup printshop_backup_20250101_120000.jsonl.gz
+    python manage.py restore_backup backup.json --batch-size 5000
+    python manage.py restore_backup printshop_backup_full_20250105_020000.jsonl.gz \\
+        printshop_backup_incremental_20250106_020000.jsonl.gz \\
+        printshop_backup_incremental_20250107_020000.jsonl.gz
+"""
+
+import time
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from counter.backup import restore_backup_chain, BackupFormatError, RESTORE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Восстанавливает клиентов и заказы из полной резервной копии и цепочки инкрементных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='+',
+            help='Файлы резервных копий (.jsonl.gz или .json): сначала полная, затем инкрементные по порядку'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RESTORE_BATCH_SIZE,
+            help=f'Сколько объектов вставлять за один запрос (по умолчанию {RESTORE_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def report(label, count):
+            self.stdout.write(f"  {label}: {count} ({time.perf_counter() - started:.1f} с)")
+
+        try:
+            with ExitStack() as stack:
+                files = [stack.enter_context(open(path, 'rb')) for path in options['paths']]
+                results = restore_backup_chain(files, batch_size=options['batch_size'], progress=report)
+        except OSError as e:
+            raise CommandError(f"Не удалось открыть файл: {e}")
+        except BackupFormatError as e:
+            raise CommandError(str(e))
+
+        for path, result in zip(options['paths'], results):
+            summary = ', '.join(f"{label}: {count}" for label, count in result['counts'].items())
+            if result['deleted']:
+                summary += '; удалено: ' + ', '.join(
+                    f"{label}: {count}" for label, count in result['deleted'].items()
+                )
+            self.stdout.write(f"  {path}: {summary}")
+
+        watermark = results[-1]['watermark']
+        state = f", состояние на {timezone.localtime(watermark):%d.%m.%Y %H:%M:%S}" if watermark else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Восстановлено за {time.perf_counter() - started:.1f} с (файлов: {len(results)}{state})"
+        ))
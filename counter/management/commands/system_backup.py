@@ -0,0 +1,68 @@
+"""
+counter/management/commands/system_backup.py
+Резервная копия всей системы: данные всех приложений (counter/system_backup.py).
+
+Создаёт каталог system_backup_<дата>_<время> с файлом .jsonl.gz на каждую
+таблицу и manifest.json (количество строк и SHA-256). В PostgreSQL
+независимые таблицы выгружаются параллельно из одного снимка БД.
+Восстановление: python manage.py system_restore <каталог или .tar>
+
+Пример:
+    python manage.py system_backup
+    python manage.py system_backup --workers 8 --output-dir /var/backups/printshop
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from counter.system_backup import dump_system_backup, SYSTEM_BACKUP_WORKERS
+
+
+class Command(BaseCommand):
+    help = 'Создаёт резервную копию данных всех приложений (по сжатому файлу на таблицу + манифест)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir',
+            default=settings.BACKUP_DIR,
+            help=f'Каталог, в котором создаётся копия (по умолчанию {settings.BACKUP_DIR})'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=SYSTEM_BACKUP_WORKERS,
+            help=f'Сколько таблиц выгружать одновременно (по умолчанию {SYSTEM_BACKUP_WORKERS})'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        name = f"system_backup_{timezone.localtime().strftime('%Y%m%d_%H%M%S')}"
+        path = os.path.join(options['output_dir'], name)
+        if os.path.exists(path):
+            raise CommandError(f"Каталог {path} уже существует – повторите позже")
+
+        def report(label, entry):
+            self.stdout.write(
+                f"  {label}: {entry['rows']} строк, {entry['bytes'] / 1024:.1f} КБ "
+                f"({time.perf_counter() - started:.1f} с)"
+            )
+
+        # Копия собирается под временным именем: оборванная не выглядит готовой
+        partial_path = path + '.part'
+        try:
+            manifest = dump_system_backup(partial_path, workers=options['workers'], progress=report)
+            os.replace(partial_path, path)
+        except BaseException:
+            self.stderr.write(f"Копия не завершена, неполный каталог: {partial_path}")
+            raise
+
+        rows = sum(entry['rows'] for entry in manifest['tables'].values())
+        size = sum(entry['bytes'] for entry in manifest['tables'].values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {path}: таблиц {len(manifest['tables'])}, строк {rows}, {size / 1024:.1f} КБ "
+            f"за {time.perf_counter() - started:.1f} с"
+        ))
@@ -0,0 +1,90 @@
+"""
+counter/management/commands/system_restore.py
+Восстановление всей системы из копии, созданной system_backup
+(каталог с manifest.json или .tar, скачанный из административного раздела).
+
+ВНИМАНИЕ: данные всех таблиц из копии заменяются. Контрольные суммы
+проверяются до изменения БД, сама загрузка идёт в одной транзакции: при
+ошибке данные остаются прежними.
+
+Пример:
+    python manage.py system_restore /var/backups/printshop/system_backup_20250101_020000
+    python manage.py system_restore system_backup_20250101_020000.tar
+"""
+
+import os
+import tarfile
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from counter.backup import BackupFormatError, RESTORE_BATCH_SIZE
+from counter.system_backup import restore_system_backup, MANIFEST_NAME, SYSTEM_BACKUP_WORKERS
+
+
+class Command(BaseCommand):
+    help = 'Восстанавливает данные всех приложений из копии system_backup (каталог или .tar)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Каталог копии (с manifest.json) или tar-архив')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=SYSTEM_BACKUP_WORKERS,
+            help=f'Сколько файлов проверять одновременно (по умолчанию {SYSTEM_BACKUP_WORKERS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RESTORE_BATCH_SIZE,
+            help=f'Сколько объектов вставлять за один запрос (по умолчанию {RESTORE_BATCH_SIZE})'
+        )
+
+    def extract(self, archive_path, target):
+        """Распаковывает tar и возвращает каталог, в котором лежит manifest.json."""
+        with tarfile.open(archive_path) as archive:
+            members = [member for member in archive.getmembers() if member.isfile()]
+            for member in members:
+                # Только плоские имена «каталог/файл» – без абсолютных путей и '..'
+                parts = member.name.split('/')
+                if len(parts) != 2 or '..' in parts or not all(parts):
+                    raise CommandError(f"Недопустимый путь в архиве: {member.name}")
+            archive.extractall(target, members=members)
+
+        for root, _, files in os.walk(target):
+            if MANIFEST_NAME in files:
+                return root
+        raise CommandError("В архиве нет manifest.json")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        path = options['path']
+
+        def report(label, count):
+            self.stdout.write(f"  {label}: {count} ({time.perf_counter() - started:.1f} с)")
+
+        try:
+            with tempfile.TemporaryDirectory(prefix='printshop_restore_') as temp_dir:
+                if os.path.isdir(path):
+                    directory = path
+                elif tarfile.is_tarfile(path):
+                    directory = self.extract(path, temp_dir)
+                else:
+                    raise CommandError(f"{path} – не каталог копии и не tar-архив")
+
+                counts = restore_system_backup(
+                    directory,
+                    workers=options['workers'],
+                    batch_size=options['batch_size'],
+                    progress=report,
+                )
+        except OSError as e:
+            raise CommandError(f"Не удалось прочитать копию: {e}")
+        except BackupFormatError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Восстановлено таблиц: {len(counts)}, строк: {sum(counts.values())} "
+            f"за {time.perf_counter() - started:.1f} с"
+        ))
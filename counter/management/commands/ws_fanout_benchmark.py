@@ -0,0 +1,309 @@
+"""
+counter/management/commands/ws_fanout_benchmark.py
+Нагрузочный тест рассылки доски заказов по WebSocket.
+
+Подключает N симулированных браузеров к запущенному серверу (обычно
+deployment/run_workers.py с несколькими воркерами и Redis), затем один из
+них меняет статус тестового заказа, и измеряется время, за которое
+обновление доски дошло до каждого клиента (fan-out latency).
+
+Подготовка (локально):
+    redis-server &
+    export CHANNEL_LAYER_BACKEND=redis USE_REDIS_CACHE=True
+    python deployment/run_workers.py --workers 4 --port 8000 &
+
+Запуск:
+    python manage.py ws_fanout_benchmark --clients 500 --rounds 20 --username admin --create-test-order
+
+Тест пишет в рабочую базу: создаёт сессию для указанного пользователя и
+одноразовые клиента и заказ с пометкой BENCHMARK_MARKER (заказ попадает
+на доску всех подключённых пользователей). Поэтому без флага
+--create-test-order команда ничего не делает. Записи удаляются после
+теста, а оставшиеся от прерванного запуска – перед следующим.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import statistics
+import struct
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, HASH_SESSION_KEY, SESSION_KEY, BACKEND_SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from counter.models import Client, Order
+
+
+# Пометка одноразовых записей теста (имя клиента и описание заказа)
+BENCHMARK_MARKER = '[ws_fanout_benchmark]'
+BENCHMARK_CLIENT_NAME = f'{BENCHMARK_MARKER} Нагрузочный тест WebSocket – удалить'
+
+# Начало сообщения с обновлением доски (build_board_message в board_cache.py)
+ORDER_UPDATE_PREFIX = b'{"type": "order_update"'
+
+# Коды операций WebSocket (RFC 6455)
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+class FanoutClient:
+    """
+    Минимальный WebSocket-клиент на asyncio (симулированный браузер).
+
+    Свой клиент вместо autobahn: в процессе Django уже выбран Twisted
+    (приложение daphne в INSTALLED_APPS), а asyncio-часть autobahn
+    несовместима с ним в одном процессе.
+    """
+
+    def __init__(self, benchmark):
+        self.benchmark = benchmark
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host, port, path, cookie):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n"
+            f"Cookie: {cookie}\r\n"
+            "\r\n"
+        )
+        self.writer.write(request.encode('ascii'))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if b' 101 ' not in status_line:
+            raise ConnectionError(f"Сервер отказал в WebSocket-подключении: {status_line!r}")
+        while (await self.reader.readline()) not in (b'\r\n', b''):
+            pass
+
+    def send_frame(self, opcode, payload):
+        """Отправляет кадр (от клиента кадры обязательно маскируются)."""
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([0x80 | length])
+        elif length < 65536:
+            header += bytes([0x80 | 126]) + struct.pack('!H', length)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack('!Q', length)
+        mask = os.urandom(4)
+        masked = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+        self.writer.write(header + mask + masked)
+
+    def send_text(self, text):
+        self.send_frame(OPCODE_TEXT, text.encode('utf-8'))
+
+    async def read_frame(self):
+        first, second = await self.reader.readexactly(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+        payload = await self.reader.readexactly(length)
+        return opcode, payload
+
+    async def listen(self):
+        """Читает кадры и отмечает получение обновлений доски."""
+        try:
+            while True:
+                opcode, payload = await self.read_frame()
+                if opcode == OPCODE_TEXT and payload.startswith(ORDER_UPDATE_PREFIX):
+                    self.benchmark.on_update(self)
+                elif opcode == OPCODE_PING:
+                    self.send_frame(OPCODE_PONG, payload)
+                elif opcode == OPCODE_CLOSE:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def close(self):
+        if self.writer is not None:
+            self.send_frame(OPCODE_CLOSE, struct.pack('!H', 1000))
+            self.writer.close()
+
+
+class FanoutBenchmark:
+    """Состояние теста: текущий раунд и время получения обновления каждым клиентом."""
+
+    def __init__(self):
+        self.clients = []
+        self.round_started = None
+        self.round_received = {}
+        self.round_done = None
+
+    def on_update(self, client):
+        if self.round_started is None or client in self.round_received:
+            return
+        self.round_received[client] = time.perf_counter() - self.round_started
+        if len(self.round_received) >= len(self.clients) and not self.round_done.done():
+            self.round_done.set_result(True)
+
+
+def percentile(values, percent):
+    """Перцентиль по отсортированному списку (ближайший ранг)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, int(round(percent / 100 * len(values))) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Измеряет задержку рассылки доски заказов по WebSocket для N клиентов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500, help='Количество клиентов (по умолчанию 500)')
+        parser.add_argument('--rounds', type=int, default=10, help='Количество рассылок (по умолчанию 10)')
+        parser.add_argument('--host', default='127.0.0.1', help='Адрес сервера (по умолчанию 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=8000, help='Порт сервера (по умолчанию 8000)')
+        parser.add_argument('--username', required=True, help='Пользователь, от имени которого подключаются клиенты')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Таймаут одного раунда (секунды)')
+        parser.add_argument('--create-test-order', action='store_true',
+                            help=f'Создать в базе одноразовые клиента и заказ {BENCHMARK_MARKER} (обязательно)')
+        parser.add_argument('--pause', type=float, default=0.5, help='Пауза между раундами (секунды)')
+
+    def handle(self, *args, **options):
+        if not options['create_test_order']:
+            raise CommandError(
+                'Тест создаёт в рабочей базе временные клиента и заказ (они видны на доске заказов). '
+                'Запустите с --create-test-order, чтобы подтвердить.'
+            )
+
+        backend = settings.CHANNEL_LAYERS['default']['BACKEND']
+        if 'InMemoryChannelLayer' in backend:
+            self.stdout.write(self.style.WARNING(
+                '⚠️ Используется InMemoryChannelLayer: при нескольких воркерах рассылка не дойдёт до всех клиентов'
+            ))
+
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь {options['username']} не найден")
+
+        self.delete_leftovers()
+        session = self.create_session(user)
+        client = Client.objects.create(name=BENCHMARK_CLIENT_NAME)
+        order = Order.objects.create(
+            client=client,
+            description=f'{BENCHMARK_MARKER} Временный заказ нагрузочного теста – удалить',
+            ready_datetime=timezone.now() + timedelta(days=1),
+        )
+
+        try:
+            latencies, missed = asyncio.run(self.run_benchmark(options, session.session_key, order.order_number))
+        finally:
+            order.delete()
+            client.delete()
+            session.delete()
+
+        self.report(latencies, missed, options)
+
+    def delete_leftovers(self):
+        """Удаляет записи теста, оставшиеся от прерванного запуска."""
+        orders = Order.objects.filter(client__name=BENCHMARK_CLIENT_NAME)
+        deleted = orders.count()
+        for order in orders:
+            order.delete()
+        Client.objects.filter(name=BENCHMARK_CLIENT_NAME).delete()
+        if deleted:
+            self.stdout.write(self.style.WARNING(f'⚠️ Удалено заказов от прерванного теста: {deleted}'))
+
+    def create_session(self, user):
+        """Создаёт сессию Django, как после входа пользователя."""
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session
+
+    async def run_benchmark(self, options, session_key, order_number):
+        loop = asyncio.get_running_loop()
+        benchmark = FanoutBenchmark()
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session_key}'
+        host, port = options['host'], options['port']
+
+        self.stdout.write(f"Подключение {options['clients']} клиентов к ws://{host}:{port}/ws/order/...")
+        started = time.perf_counter()
+        for _ in range(options['clients']):
+            client = FanoutClient(benchmark)
+            await client.connect(host, port, '/ws/order/', cookie)
+            benchmark.clients.append(client)
+        listeners = [asyncio.ensure_future(client.listen()) for client in benchmark.clients]
+        self.stdout.write(f"Подключено за {time.perf_counter() - started:.2f} с")
+
+        # Даём серверу разослать initial_load и успокоиться
+        await asyncio.sleep(1.0)
+
+        latencies = []
+        missed = 0
+        statuses = [Order.STATUS_IN_PROGRESS, Order.STATUS_ACCEPTED]
+        sender = benchmark.clients[0]
+
+        for round_number in range(options['rounds']):
+            benchmark.round_received = {}
+            benchmark.round_done = loop.create_future()
+            benchmark.round_started = time.perf_counter()
+
+            sender.send_text(json.dumps({
+                'action': 'change_status',
+                'order_number': order_number,
+                'status': statuses[round_number % 2],
+            }))
+
+            try:
+                await asyncio.wait_for(benchmark.round_done, timeout=options['timeout'])
+            except asyncio.TimeoutError:
+                pass
+
+            round_latencies = list(benchmark.round_received.values())
+            latencies.extend(round_latencies)
+            missed += len(benchmark.clients) - len(round_latencies)
+            self.stdout.write(
+                f"  раунд {round_number + 1}: получили {len(round_latencies)}/{len(benchmark.clients)}, "
+                f"max {max(round_latencies, default=0) * 1000:.1f} мс"
+            )
+
+            benchmark.round_started = None
+            await asyncio.sleep(options['pause'])
+
+        for client in benchmark.clients:
+            client.close()
+        for listener in listeners:
+            listener.cancel()
+        await asyncio.sleep(0.5)
+
+        return latencies, missed
+
+    def report(self, latencies, missed, options):
+        self.stdout.write('')
+        self.stdout.write(f"Клиентов: {options['clients']}, раундов: {options['rounds']}")
+        if latencies:
+            in_ms = [value * 1000 for value in latencies]
+            self.stdout.write(f"Задержка рассылки, мс: среднее {statistics.mean(in_ms):.1f}, "
+                              f"p50 {percentile(in_ms, 50):.1f}, p95 {percentile(in_ms, 95):.1f}, "
+                              f"p99 {percentile(in_ms, 99):.1f}, max {max(in_ms):.1f}")
+        self.stdout.write(f"Не получено обновлений: {missed}")
+
+        if missed:
+            self.stdout.write(self.style.WARNING('⚠️ Часть клиентов не получила обновление'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Все клиенты получили все обновления'))
@@ -2,56 +2,158 @@
 counter/middleware.py
 Промежуточное ПО (middleware) для аутентификации WebSocket соединений.
 Использует стандартный механизм сессий Django.
+
+Пользователь определяется по ключу сессии из cookie и кэшируется в кэше
+Django (settings.CACHES) на WS_AUTH_CACHE_TTL секунд. При массовом
+переподключении экранов (перезапуск сервера, сбой сети) повторные
+подключения не обращаются к БД и не занимают пул потоков
+database_sync_to_async.
+
+Кэш сбрасывается (см. counter/signals.py):
+- при выходе пользователя (user_logged_out) – запись его сессии;
+- при любом сохранении или удалении пользователя (смена пароля,
+  блокировка) – все записи этого пользователя, через номер поколения.
 """
 
-from channels.middleware import BaseMiddleware
 from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, load_backend
 from django.contrib.auth.models import AnonymousUser
-from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+
+# Сколько секунд пользователь хранится в кэше после проверки сессии
+WS_AUTH_CACHE_TTL = getattr(settings, 'WS_AUTH_CACHE_TTL', 60)
+
+WS_AUTH_SESSION_KEY = 'counter:ws_auth:session:{session_key}'
+WS_AUTH_GENERATION_KEY = 'counter:ws_auth:generation:{user_id}'
+
+
+# ==================== КЭШ ПОЛЬЗОВАТЕЛЕЙ ====================
+
+def get_user_generation(user_id):
+    """Текущее поколение записей кэша пользователя (меняется при его сохранении)."""
+    return cache.get(WS_AUTH_GENERATION_KEY.format(user_id=user_id), 0)
+
+
+async def get_cached_user(session_key):
+    """
+    Возвращает пользователя из кэша по ключу сессии или None,
+    если записи нет или она устарела (пользователь изменён после кэширования).
+    """
+    entry = await cache.aget(WS_AUTH_SESSION_KEY.format(session_key=session_key))
+    if entry is None:
+        return None
+
+    user = entry['user']
+    generation = await cache.aget(WS_AUTH_GENERATION_KEY.format(user_id=user.pk), 0)
+    if entry['generation'] != generation:
+        return None
+    return user
+
+
+async def cache_user(session_key, user, generation):
+    """Кэширует пользователя для ключа сессии."""
+    await cache.aset(
+        WS_AUTH_SESSION_KEY.format(session_key=session_key),
+        {'user': user, 'generation': generation},
+        timeout=WS_AUTH_CACHE_TTL,
+    )
+
+
+def invalidate_session(session_key):
+    """Удаляет запись кэша для сессии (выход пользователя)."""
+    if session_key:
+        cache.delete(WS_AUTH_SESSION_KEY.format(session_key=session_key))
 
-User = get_user_model()
+
+def invalidate_user(user_id):
+    """Делает устаревшими все записи кэша пользователя (смена пароля, блокировка)."""
+    key = WS_AUTH_GENERATION_KEY.format(user_id=user_id)
+    # Поколение хранится дольше записей сессий, чтобы не вернуться к старому номеру
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ исчез между add и incr (кэш очищен) – достаточно отличаться от 0
+        cache.set(key, 1, timeout=None)
+
+
+def load_session_user(session_key):
+    """
+    Загружает пользователя из сессии Django так же, как django.contrib.auth.get_user:
+    проверяются backend и хэш пароля, сохранённый в сессии при входе.
+
+    Возвращает:
+        tuple: (пользователь или None, поколение кэша на момент загрузки)
+    """
+    session = import_string(settings.SESSION_ENGINE).SessionStore(session_key)
+
+    try:
+        user_id = session['_auth_user_id']
+        backend_path = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return None, None
+
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return None, None
+
+    # Поколение читается до загрузки пользователя: если он изменится
+    # в промежутке, запись сразу окажется устаревшей
+    generation = get_user_generation(user_id)
+
+    user = load_backend(backend_path).get_user(user_id)
+    if user is None:
+        return None, None
+
+    session_hash = session.get(HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(session_hash, user.get_session_auth_hash())):
+        return None, None
+
+    return user, generation
 
 
 class WebSocketAuthMiddleware(BaseMiddleware):
     """
     Middleware для аутентификации WebSocket соединений.
-    Извлекает пользователя из сессии Django.
+    Извлекает пользователя из сессии Django (через кэш).
+
+    Требует CookieMiddleware выше по стеку (см. clickcounter/asgi.py) и
+    заменяет собой SessionMiddleware + AuthMiddleware из channels.
     """
-    
+
     async def __call__(self, scope, receive, send):
         """
         Основной метод middleware. Вызывается для каждого WebSocket соединения.
         """
-        
-        # Получаем объект сессии из scope
-        session = scope.get('session', None)
-        
-        if session:
-            # Если сессия существует, асинхронно получаем пользователя из неё
-            user = await self.get_user_from_session(session)
-            scope['user'] = user
-        else:
-            # Если сессии нет, используем анонимного пользователя
-            scope['user'] = AnonymousUser()
-        
+        scope = dict(scope)
+        scope['user'] = await self.get_user(scope)
+
         # Передаём управление следующему middleware или consumer
         return await super().__call__(scope, receive, send)
-    
-    @database_sync_to_async
-    def get_user_from_session(self, session):
+
+    async def get_user(self, scope):
         """
-        Асинхронно получает пользователя из сессии Django.
+        Возвращает пользователя для ключа сессии из cookie.
+        Из БД пользователь загружается только при промахе кэша.
         """
-        try:
-            # Получаем ID пользователя из сессии (стандартный ключ Django)
-            user_id = session.get('_auth_user_id')
-            
-            if user_id:
-                # Находим пользователя в базе данных по ID
-                return User.objects.get(id=user_id)
-        except (User.DoesNotExist, KeyError, ValueError):
-            # Если пользователь не найден или произошла ошибка,
-            # возвращаем анонимного пользователя
-            pass
-        
-        return AnonymousUser()
\ No newline at end of file
+        session_key = scope.get('cookies', {}).get(settings.SESSION_COOKIE_NAME)
+        if not session_key:
+            return AnonymousUser()
+
+        # Асинхронный API кэша: запросы к Redis не блокируют цикл событий
+        # и остальные соединения воркера
+        user = await get_cached_user(session_key)
+        if user is not None:
+            return user
+
+        user, generation = await database_sync_to_async(load_session_user)(session_key)
+        if user is None:
+            # Анонимные подключения не кэшируются: ключ сессии приходит от клиента
+            return AnonymousUser()
+
+        await cache_user(session_key, user, generation)
+        return user
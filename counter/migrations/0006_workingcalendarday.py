@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('counter', '0005_alter_order_client'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkingCalendarDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Дата')),
+                ('day_type', models.CharField(choices=[('holiday', 'Выходной / праздник'), ('short', 'Сокращённый день'), ('working', 'Рабочий день (перенос)')], default='holiday', max_length=20, verbose_name='Тип дня')),
+                ('work_start', models.TimeField(blank=True, help_text='Оставьте пустым, чтобы использовать стандартное время', null=True, verbose_name='Начало работы')),
+                ('work_end', models.TimeField(blank=True, help_text='Оставьте пустым, чтобы использовать стандартное время', null=True, verbose_name='Окончание работы')),
+                ('description', models.CharField(blank=True, help_text='Например: Новогодние каникулы', max_length=200, verbose_name='Описание')),
+            ],
+            options={
+                'verbose_name': 'День производственного календаря',
+                'verbose_name_plural': 'Производственный календарь',
+                'ordering': ['date'],
+            },
+        ),
+    ]
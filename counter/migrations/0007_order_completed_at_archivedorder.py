@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('counter', '0006_workingcalendarday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('order_number', models.IntegerField(db_column='order_number', primary_key=True, serialize=False, verbose_name='Номер заказа')),
+                ('customer_name', models.CharField(blank=True, max_length=100, verbose_name='Имя клиента (ручной ввод)')),
+                ('description', models.TextField(verbose_name='Описание заказа')),
+                ('ready_datetime', models.DateTimeField(verbose_name='Дата готовности')),
+                ('status', models.CharField(choices=[('accepted', 'Принят'), ('in_progress', 'В работе'), ('ready', 'Готов'), ('completed', 'Выдан')], default='completed', max_length=20, verbose_name='Статус заказа')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата выдачи')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+            ],
+            options={
+                'verbose_name': 'Архивный заказ',
+                'verbose_name_plural': 'Архив заказов',
+                'ordering': ['-order_number'],
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата выдачи'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', '-order_number'], name='counter_ord_status_num_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'completed_at'], name='counter_ord_status_compl_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='client',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_orders', to='counter.client', verbose_name='Клиент'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['completed_at'], name='counter_arch_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['client', '-order_number'], name='counter_arch_client_num_idx'),
+        ),
+    ]
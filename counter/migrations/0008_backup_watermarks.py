@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:26
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('counter', '0007_order_completed_at_archivedorder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackupRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('full', 'Полная'), ('incremental', 'Инкрементная')], max_length=20, verbose_name='Тип копии')),
+                ('since', models.DateTimeField(blank=True, null=True, verbose_name='Изменения начиная с')),
+                ('watermark', models.DateTimeField(db_index=True, verbose_name='Водяная отметка')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Файл')),
+                ('summary', models.JSONField(default=dict, verbose_name='Итог')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Резервная копия',
+                'verbose_name_plural': 'Резервные копии',
+                'ordering': ['-watermark'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BackupTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100, verbose_name='Модель')),
+                ('object_pk', models.CharField(max_length=64, verbose_name='Первичный ключ')),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'Отметка об удалении',
+                'verbose_name_plural': 'Отметки об удалении',
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата обновления'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата обновления'),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата обновления'),
+        ),
+    ]
@@ -6,7 +6,8 @@ models.py
 
 from django.db import models
 from django.utils import timezone  # Импортируем timezone из Django
-from datetime import timedelta
+
+from .working_hours import working_hours_between
 
 
 class Client(models.Model):
@@ -59,9 +60,10 @@ class Client(models.Model):
         verbose_name='Дата создания'
     )
     
-    # Дата последнего обновления
+    # Дата последнего обновления (по ней отбираются строки инкрементной резервной копии)
     updated_at = models.DateTimeField(
         auto_now=True,
+        db_index=True,
         verbose_name='Дата обновления'
     )
     
@@ -165,10 +167,40 @@ class Order(models.Model):
         verbose_name='Дата создания'
     )
     
+    # Когда заказ был выдан (заполняется автоматически при смене статуса на «Выдан»).
+    # По этой дате выданные заказы переносятся в архив (см. ArchivedOrder).
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата выдачи'
+    )
+    
+    # Дата последнего изменения (по ней отбираются строки инкрементной резервной копии)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Дата обновления'
+    )
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
+        indexes = [
+            # Последние выданные заказы для доски и поиска (status + номер по убыванию)
+            models.Index(fields=['status', '-order_number'], name='counter_ord_status_num_idx'),
+            # Отбор выданных заказов для архивации по дате выдачи
+            models.Index(fields=['status', 'completed_at'], name='counter_ord_status_compl_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        """Проставляет дату выдачи при переводе заказа в статус «Выдан»."""
+        if self.status == self.STATUS_COMPLETED:
+            if self.completed_at is None:
+                self.completed_at = timezone.now()
+        else:
+            self.completed_at = None
+        super().save(*args, **kwargs)
     
     def __str__(self):
         """Строковое представление заказа."""
@@ -190,27 +222,15 @@ class Order(models.Model):
         # Для обратной совместимости со старыми заказами
         return self.customer_name
     
-    def get_working_hours_remaining(self):
-        """Рассчитывает количество рабочих часов до готовности заказа."""
-        now = timezone.now()
-        ready_dt = self.ready_datetime
-        
-        if now >= ready_dt:
-            return 0
-        
-        total_hours = 0
-        current = now
-        
-        while current < ready_dt:
-            day_of_week = current.weekday()
-            hour = current.hour
-            
-            if day_of_week < 5 and 10 <= hour < 18:
-                total_hours += 1
-            
-            current += timedelta(hours=1)
-        
-        return total_hours
+    def get_working_hours_remaining(self, now=None):
+        """
+        Рассчитывает количество рабочих часов до готовности заказа.
+        Считается по формуле (см. counter/working_hours.py) с учётом
+        рабочего окна из настроек и производственного календаря.
+        """
+        if now is None:
+            now = timezone.now()
+        return working_hours_between(now, self.ready_datetime)
     
     def is_active(self):
         """Проверяет, является ли заказ активным (не выполненным)."""
@@ -248,4 +268,317 @@ class Order(models.Model):
             'status': self.status,
             'status_display': self.get_status_display_name(),
             'is_active': self.is_active(),
-        }
\ No newline at end of file
+        }
+
+
+class ArchivedOrder(models.Model):
+    """
+    Архив выданных заказов.
+    Выданные заказы старше ORDER_ARCHIVE_AFTER_DAYS переносятся сюда пачками
+    командой archive_orders, чтобы основная таблица и доска заказов
+    не росли бесконечно. Номер заказа сохраняется.
+    Поиск по архиву – через HTTP (counter/views.py: completed_orders_search).
+    """
+    
+    order_number = models.IntegerField(
+        primary_key=True,
+        db_column='order_number',
+        verbose_name='Номер заказа'
+    )
+    
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_orders',
+        verbose_name='Клиент'
+    )
+    
+    customer_name = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Имя клиента (ручной ввод)'
+    )
+    
+    description = models.TextField(
+        verbose_name='Описание заказа'
+    )
+    
+    ready_datetime = models.DateTimeField(
+        verbose_name='Дата готовности'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Order.STATUS_CHOICES,
+        default=Order.STATUS_COMPLETED,
+        verbose_name='Статус заказа'
+    )
+    
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания'
+    )
+    
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата выдачи'
+    )
+    
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата архивации'
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Дата обновления'
+    )
+    
+    class Meta:
+        ordering = ['-order_number']
+        verbose_name = 'Архивный заказ'
+        verbose_name_plural = 'Архив заказов'
+        indexes = [
+            models.Index(fields=['completed_at'], name='counter_arch_completed_idx'),
+            models.Index(fields=['client', '-order_number'], name='counter_arch_client_num_idx'),
+        ]
+    
+    def __str__(self):
+        """Строковое представление архивного заказа."""
+        return f"#{self.order_number:04d} - {self.get_client_display() or 'Без клиента'} (архив)"
+    
+    @classmethod
+    def from_order(cls, order):
+        """Создаёт (не сохраняя) архивную запись из выданного заказа."""
+        return cls(
+            order_number=order.order_number,
+            client_id=order.client_id,
+            customer_name=order.customer_name,
+            description=order.description,
+            ready_datetime=order.ready_datetime,
+            status=order.status,
+            created_at=order.created_at,
+            completed_at=order.completed_at,
+        )
+    
+    def get_client_display(self):
+        """Возвращает отображаемое имя клиента."""
+        if self.client:
+            return self.client.name
+        return self.customer_name
+    
+    def get_status_display_name(self):
+        """Возвращает читаемое название статуса на русском языке."""
+        return dict(Order.STATUS_CHOICES).get(self.status, self.status)
+    
+    def to_dict(self):
+        """Преобразует архивный заказ в словарь того же вида, что и Order.to_dict()."""
+        client_data = self.client.to_dict() if self.client else None
+        moscow_ready_datetime = timezone.localtime(self.ready_datetime)
+        moscow_created_at = timezone.localtime(self.created_at)
+        
+        return {
+            'order_number': f'{self.order_number:04d}',
+            'client': client_data,
+            'customer_name': self.customer_name,
+            'client_display': self.get_client_display(),
+            'description': self.description,
+            'ready_datetime': moscow_ready_datetime.strftime('%d.%m.%Y %H:%M'),
+            'working_hours_remaining': 0,
+            'created_at': moscow_created_at.strftime('%d.%m.%Y %H:%M:%S'),
+            'status': self.status,
+            'status_display': self.get_status_display_name(),
+            'is_active': False,
+            'is_archived': True,
+        }
+
+class WorkingCalendarDay(models.Model):
+    """
+    Производственный календарь типографии: исключения из стандартного
+    рабочего графика (праздники, сокращённые предпраздничные дни и
+    перенесённые рабочие дни). Используется при расчёте рабочих часов
+    до готовности заказа.
+    """
+    
+    # ===== ТИПЫ ДНЕЙ =====
+    DAY_HOLIDAY = 'holiday'
+    DAY_SHORT = 'short'
+    DAY_WORKING = 'working'
+    
+    DAY_TYPE_CHOICES = [
+        (DAY_HOLIDAY, 'Выходной / праздник'),
+        (DAY_SHORT, 'Сокращённый день'),
+        (DAY_WORKING, 'Рабочий день (перенос)'),
+    ]
+    
+    # На сколько часов сокращается предпраздничный день, если время окончания не указано
+    SHORT_DAY_REDUCTION_HOURS = 1
+    
+    date = models.DateField(
+        unique=True,
+        verbose_name='Дата'
+    )
+    
+    day_type = models.CharField(
+        max_length=20,
+        choices=DAY_TYPE_CHOICES,
+        default=DAY_HOLIDAY,
+        verbose_name='Тип дня'
+    )
+    
+    # Необязательное время работы: если не указано, используется стандартное окно
+    # из настроек (для сокращённого дня – на час короче)
+    work_start = models.TimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начало работы',
+        help_text='Оставьте пустым, чтобы использовать стандартное время'
+    )
+    
+    work_end = models.TimeField(
+        null=True,
+        blank=True,
+        verbose_name='Окончание работы',
+        help_text='Оставьте пустым, чтобы использовать стандартное время'
+    )
+    
+    description = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Описание',
+        help_text='Например: Новогодние каникулы'
+    )
+    
+    class Meta:
+        ordering = ['date']
+        verbose_name = 'День производственного календаря'
+        verbose_name_plural = 'Производственный календарь'
+    
+    def __str__(self):
+        """Строковое представление дня календаря."""
+        day_type_display = dict(self.DAY_TYPE_CHOICES).get(self.day_type, self.day_type)
+        return f"{self.date.strftime('%d.%m.%Y')} – {day_type_display}"
+    
+    def get_window(self, default_start, default_end):
+        """
+        Возвращает рабочее окно дня (начало, конец) в секундах от полуночи
+        или None, если день нерабочий.
+        
+        Аргументы:
+            default_start: int, стандартное начало рабочего дня (секунды)
+            default_end: int, стандартное окончание рабочего дня (секунды)
+        """
+        if self.day_type == self.DAY_HOLIDAY:
+            return None
+        
+        start = default_start
+        end = default_end
+        if self.day_type == self.DAY_SHORT:
+            end = default_end - self.SHORT_DAY_REDUCTION_HOURS * 3600
+        
+        if self.work_start is not None:
+            start = self.work_start.hour * 3600 + self.work_start.minute * 60
+        if self.work_end is not None:
+            end = self.work_end.hour * 3600 + self.work_end.minute * 60
+        
+        return start, max(start, end)
+
+
+class BackupTombstone(models.Model):
+    """
+    Отметка об удалении объекта для инкрементных резервных копий.
+    Создаётся сигналом post_delete для моделей из копии (counter/backup.py):
+    по ней инкрементная копия передаёт удаление, а не только изменённые строки.
+    Старые отметки удаляются командой create_backup (BACKUP_TOMBSTONE_RETENTION_DAYS).
+    """
+    
+    # Метка модели в формате сериализатора Django, например 'counter.order'
+    model_label = models.CharField(
+        max_length=100,
+        verbose_name='Модель'
+    )
+    
+    # Первичный ключ удалённого объекта (строкой – подходит для любого типа ключа)
+    object_pk = models.CharField(
+        max_length=64,
+        verbose_name='Первичный ключ'
+    )
+    
+    deleted_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='Дата удаления'
+    )
+    
+    class Meta:
+        ordering = ['deleted_at']
+        verbose_name = 'Отметка об удалении'
+        verbose_name_plural = 'Отметки об удалении'
+    
+    def __str__(self):
+        """Строковое представление отметки."""
+        return f"{self.model_label} #{self.object_pk} ({self.deleted_at:%d.%m.%Y %H:%M})"
+
+
+class BackupRun(models.Model):
+    """
+    Журнал резервных копий, созданных командой create_backup.
+    Водяная отметка (watermark) последней копии – момент, с которого
+    следующая инкрементная копия отбирает изменённые строки и удаления.
+    """
+    
+    KIND_FULL = 'full'
+    KIND_INCREMENTAL = 'incremental'
+    
+    KIND_CHOICES = [
+        (KIND_FULL, 'Полная'),
+        (KIND_INCREMENTAL, 'Инкрементная'),
+    ]
+    
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        verbose_name='Тип копии'
+    )
+    
+    # Для инкрементной копии – водяная отметка предыдущей копии в цепочке
+    since = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Изменения начиная с'
+    )
+    
+    # Момент начала выгрузки: все изменения до него вошли в копию
+    watermark = models.DateTimeField(
+        db_index=True,
+        verbose_name='Водяная отметка'
+    )
+    
+    file_name = models.CharField(
+        max_length=255,
+        verbose_name='Файл'
+    )
+    
+    # Количество объектов и удалений по моделям: {"counts": {...}, "deleted": {...}}
+    summary = models.JSONField(
+        default=dict,
+        verbose_name='Итог'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    
+    class Meta:
+        ordering = ['-watermark']
+        verbose_name = 'Резервная копия'
+        verbose_name_plural = 'Резервные копии'
+    
+    def __str__(self):
+        """Строковое представление записи журнала."""
+        kind_display = dict(self.KIND_CHOICES).get(self.kind, self.kind)
+        return f"{kind_display} копия {self.watermark:%d.%m.%Y %H:%M} ({self.file_name})"
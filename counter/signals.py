@@ -0,0 +1,73 @@
+"""
+signals.py
+Сигналы приложения counter.
+"""
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .backup import record_tombstone
+from .board_cache import bump_board_version
+from .middleware import invalidate_session, invalidate_user
+from .models import Client, Order, ArchivedOrder, WorkingCalendarDay
+from .working_hours import invalidate_working_calendar
+
+
+@receiver(post_save, sender=WorkingCalendarDay)
+@receiver(post_delete, sender=WorkingCalendarDay)
+def working_calendar_changed(sender, instance, **kwargs):
+    """
+    При изменении производственного календаря сбрасываем кэш,
+    чтобы расчёт рабочих часов сразу учёл новые праздники и переносы.
+    Рабочие часы входят в снимок доски, поэтому его версия тоже меняется.
+    """
+    invalidate_working_calendar()
+    transaction.on_commit(bump_board_version)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def order_board_changed(sender, instance, **kwargs):
+    """
+    Любая запись в заказы или клиентов делает снимок доски устаревшим.
+    Версия увеличивается после коммита транзакции, чтобы новый снимок
+    не был построен по ещё не зафиксированным данным.
+    """
+    transaction.on_commit(bump_board_version)
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=ArchivedOrder)
+def backup_object_deleted(sender, instance, **kwargs):
+    """
+    Удаление объекта из резервной копии записывается отметкой (BackupTombstone),
+    чтобы инкрементная копия передала его вместе с изменёнными строками
+    (см. counter/backup.py). Отметка создаётся в той же транзакции, что и удаление.
+    """
+    record_tombstone(instance)
+
+
+@receiver(user_logged_out)
+def websocket_user_logged_out(sender, request, user, **kwargs):
+    """
+    При выходе удаляем пользователя сессии из кэша аутентификации WebSocket
+    (counter/middleware.py), чтобы новые подключения с этой cookie
+    больше не принимались.
+    """
+    invalidate_session(request.session.session_key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def websocket_user_changed(sender, instance, **kwargs):
+    """
+    Смена пароля, блокировка или удаление пользователя делают устаревшими
+    все его записи в кэше аутентификации WebSocket.
+    """
+    invalidate_user(instance.pk)
@@ -0,0 +1,172 @@
+/**
+ * board_codec.js
+ * Расшифровка двоичных сообщений доски заказов (подпротокол orders.msgpack).
+ *
+ * Сервер (counter/board_codec.py) передаёт доску в компактном виде:
+ * клиенты заказов – одной таблицей, статусы – индексами, даты – секундами
+ * московского времени, ключи – однобуквенные. Здесь сообщение раскрывается
+ * обратно в тот же вид, что и JSON-сообщение, поэтому остальной код index.js
+ * не зависит от формата.
+ */
+
+// Подпротокол, который запрашивает браузер (JSON остаётся запасным вариантом)
+const BOARD_SUBPROTOCOL = 'orders.msgpack';
+
+// ===== РАСШИФРОВКА MSGPACK =====
+const utf8Decoder = new TextDecoder('utf-8');
+
+/**
+ * Декодирует msgpack из ArrayBuffer (поддерживаются все типы, кроме ext).
+ * @param {ArrayBuffer} buffer - данные двоичного WebSocket-сообщения
+ * @returns {*} расшифрованное значение
+ */
+function decodeMsgpack(buffer) {
+    const view = new DataView(buffer);
+    const bytes = new Uint8Array(buffer);
+    let offset = 0;
+
+    function readString(length) {
+        const value = utf8Decoder.decode(bytes.subarray(offset, offset + length));
+        offset += length;
+        return value;
+    }
+
+    function readArray(length) {
+        const value = new Array(length);
+        for (let i = 0; i < length; i++) value[i] = read();
+        return value;
+    }
+
+    function readMap(length) {
+        const value = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            value[key] = read();
+        }
+        return value;
+    }
+
+    function read() {
+        const type = view.getUint8(offset++);
+        let value;
+
+        if (type <= 0x7f) return type;                           // positive fixint
+        if (type >= 0xe0) return type - 0x100;                   // negative fixint
+        if ((type & 0xf0) === 0x80) return readMap(type & 0x0f); // fixmap
+        if ((type & 0xf0) === 0x90) return readArray(type & 0x0f); // fixarray
+        if ((type & 0xe0) === 0xa0) return readString(type & 0x1f); // fixstr
+
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: value = view.getUint8(offset); offset += 1; break;   // bin 8
+            case 0xc5: value = view.getUint16(offset); offset += 2; break;  // bin 16
+            case 0xc6: value = view.getUint32(offset); offset += 4; break;  // bin 32
+            case 0xca: value = view.getFloat32(offset); offset += 4; return value;
+            case 0xcb: value = view.getFloat64(offset); offset += 8; return value;
+            case 0xcc: value = view.getUint8(offset); offset += 1; return value;
+            case 0xcd: value = view.getUint16(offset); offset += 2; return value;
+            case 0xce: value = view.getUint32(offset); offset += 4; return value;
+            case 0xcf: value = Number(view.getBigUint64(offset)); offset += 8; return value;
+            case 0xd0: value = view.getInt8(offset); offset += 1; return value;
+            case 0xd1: value = view.getInt16(offset); offset += 2; return value;
+            case 0xd2: value = view.getInt32(offset); offset += 4; return value;
+            case 0xd3: value = Number(view.getBigInt64(offset)); offset += 8; return value;
+            case 0xd9: value = view.getUint8(offset); offset += 1; return readString(value);
+            case 0xda: value = view.getUint16(offset); offset += 2; return readString(value);
+            case 0xdb: value = view.getUint32(offset); offset += 4; return readString(value);
+            case 0xdc: value = view.getUint16(offset); offset += 2; return readArray(value);
+            case 0xdd: value = view.getUint32(offset); offset += 4; return readArray(value);
+            case 0xde: value = view.getUint16(offset); offset += 2; return readMap(value);
+            case 0xdf: value = view.getUint32(offset); offset += 4; return readMap(value);
+            default:
+                throw new Error(`msgpack: неподдерживаемый тип 0x${type.toString(16)}`);
+        }
+
+        // bin 8/16/32 – длина прочитана выше
+        const data = bytes.slice(offset, offset + value);
+        offset += value;
+        return data;
+    }
+
+    return read();
+}
+
+// ===== РАСКРЫТИЕ КОМПАКТНОГО ФОРМАТА =====
+
+/**
+ * Форматирует секунды московского времени как 'дд.мм.гггг чч:мм[:сс]'.
+ * Сервер уже прибавил смещение часового пояса, поэтому используются UTC-методы.
+ */
+function formatLocalEpoch(seconds, withSeconds) {
+    if (seconds === null || seconds === undefined) return '';
+    const date = new Date(seconds * 1000);
+    const pad = (value) => String(value).padStart(2, '0');
+    let text = `${pad(date.getUTCDate())}.${pad(date.getUTCMonth() + 1)}.${date.getUTCFullYear()} `
+        + `${pad(date.getUTCHours())}:${pad(date.getUTCMinutes())}`;
+    if (withSeconds) text += `:${pad(date.getUTCSeconds())}`;
+    return text;
+}
+
+/**
+ * Клиент из компактного вида в вид Client.to_dict().
+ */
+function expandClient(item) {
+    return {
+        id: item.i,
+        name: item.n,
+        phone: item.p || '',
+        email: item.e || '',
+        uses_edo: Boolean(item.x),
+        notes: item.no || '',
+        created_at: formatLocalEpoch(item.a, false),
+    };
+}
+
+/**
+ * Заказ из компактного вида в вид Order.to_dict().
+ * @param {Object} item - компактный заказ
+ * @param {Array} clients - раскрытая таблица клиентов заказов
+ * @param {Array} statuses - таблица статусов [[код, название], ...]
+ */
+function expandOrder(item, clients, statuses) {
+    const status = typeof item.s === 'number' ? statuses[item.s] : [item.s, item.s];
+    const client = item.c !== undefined ? clients[item.c] : null;
+    const customerName = item.cn || '';
+    return {
+        order_number: String(item.n).padStart(4, '0'),
+        client: client,
+        customer_name: customerName,
+        client_display: client ? client.name : customerName,
+        description: item.d,
+        ready_datetime: formatLocalEpoch(item.r, false),
+        working_hours_remaining: item.h || 0,
+        created_at: formatLocalEpoch(item.a, true),
+        status: status[0],
+        status_display: status[1],
+        is_active: status[0] !== 'completed',
+    };
+}
+
+/**
+ * Раскрывает двоичное сообщение доски в вид JSON-сообщения
+ * ({type, active_orders, completed_orders, completed_has_more, clients}).
+ * @param {ArrayBuffer} buffer - данные WebSocket-сообщения
+ * @returns {Object}
+ */
+function decodeBoardMessage(buffer) {
+    const packed = decodeMsgpack(buffer);
+    const data = { type: packed.t };
+
+    if (packed.ao !== undefined) {
+        const orderClients = packed.oc.map(expandClient);
+        data.active_orders = packed.ao.map(item => expandOrder(item, orderClients, packed.st));
+        data.completed_orders = packed.co.map(item => expandOrder(item, orderClients, packed.st));
+        data.completed_has_more = packed.more;
+    }
+    if (packed.cl !== undefined) {
+        data.clients = packed.cl.map(expandClient);
+    }
+    return data;
+}
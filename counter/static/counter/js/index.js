@@ -80,6 +80,15 @@ let completedDisplayLimit = 10; // сколько выполненных зак
 let totalCompletedOrders = 0;   // общее количество выполненных заказов (для проверки наличия)
 const loadMoreBtn = document.getElementById('load-more-completed-btn'); // кнопка "Далее"
 
+// --- Старые выполненные заказы (подгружаются по HTTP) ---
+// По WebSocket приходят только последние выданные заказы; более старые
+// (в том числе архивные) запрашиваются постранично у /counter/orders/completed/search/
+const COMPLETED_SEARCH_URL = '/counter/orders/completed/search/';
+let completedHasMore = false;   // есть ли на сервере более старые выданные заказы
+let olderCompletedOrders = [];  // подгруженные по HTTP старые выданные заказы
+let olderCompletedCursor = null;// курсор (номер заказа) для следующей страницы
+let olderCompletedLoading = false; // идёт ли сейчас загрузка
+
 // ===== WEB SOCKET ФУНКЦИИ =====
 /**
  * Устанавливает WebSocket-соединение с сервером.
@@ -88,7 +97,10 @@ const loadMoreBtn = document.getElementById('load-more-completed-btn'); // кн
  */
 function connect() {
     console.log('Попытка подключения к WebSocket:', wsUrl);
-    socket = new WebSocket(wsUrl); // создаём новый WebSocket
+    // Запрашиваем компактный двоичный формат доски (board_codec.js);
+    // если сервер его не поддерживает, сообщения придут в JSON
+    socket = new WebSocket(wsUrl, [BOARD_SUBPROTOCOL]); // создаём новый WebSocket
+    socket.binaryType = 'arraybuffer';
 
     // Обработчик открытия соединения
     socket.onopen = function(e) {
@@ -103,12 +115,15 @@ function connect() {
 
     // Обработчик получения сообщения от сервера
     socket.onmessage = function(event) {
-        console.log('Получено сообщение от сервера:', event.data);
-        const data = JSON.parse(event.data);                // парсим JSON-строку
+        // Двоичные сообщения – доска в формате orders.msgpack, текстовые – JSON
+        const data = event.data instanceof ArrayBuffer
+            ? decodeBoardMessage(event.data)
+            : JSON.parse(event.data);                       // парсим JSON-строку
+        console.log('Получено сообщение от сервера:', data);
 
         // Если пришли данные с типом 'initial_load' или 'order_update'
         if (data.type === 'initial_load' || data.type === 'order_update') {
-            updateOrdersLists(data.active_orders, data.completed_orders); // обновляем списки заказов
+            updateOrdersLists(data.active_orders, data.completed_orders, data.completed_has_more); // обновляем списки заказов
             if (data.clients) {
                 updateClientsList(data.clients);            // обновляем список клиентов
             }
@@ -394,14 +409,18 @@ function createFullView(order, isReady = false, isCompleted = false) {
 /**
  * Обновляет списки заказов в интерфейсе на основе данных от сервера.
  * @param {Array} activeOrders - массив активных заказов
- * @param {Array} completedOrders - массив выполненных заказов
+ * @param {Array} completedOrders - массив последних выполненных заказов
+ * @param {boolean} hasMore - есть ли на сервере более старые выполненные заказы
  */
-function updateOrdersLists(activeOrders, completedOrders) {
+function updateOrdersLists(activeOrders, completedOrders, hasMore = false) {
     console.log('Обновление списков заказов:', { activeOrders, completedOrders });
     currentActiveOrders = activeOrders;          // сохраняем
     currentCompletedOrders = completedOrders;    // сохраняем
     totalCompletedOrders = completedOrders.length;
     completedDisplayLimit = 10;                 // сбрасываем пагинацию на 10
+    completedHasMore = Boolean(hasMore);        // старые заказы подгрузим по кнопке "Далее"
+    olderCompletedOrders = [];                  // сбрасываем подгруженные старые заказы
+    olderCompletedCursor = null;
     renderActiveOrders();                       // отрисовываем активные
     renderCompletedOrders();                   // отрисовываем выполненные
 }
@@ -553,9 +572,14 @@ function createOrderListItem(order, isReady) {
 function renderCompletedOrders() {
     completedOrdersList.innerHTML = ''; // очищаем список
 
-    if (currentCompletedOrders.length === 0) {
+    if (currentCompletedOrders.length === 0 && olderCompletedOrders.length === 0) {
         completedOrdersList.innerHTML = '<li class="empty-message">Нет выполненных заказов</li>';
-        if (loadMoreBtn) loadMoreBtn.style.display = 'none'; // скрываем кнопку "Далее"
+        if (loadMoreBtn) {
+            // Кнопку оставляем, если на сервере есть архивные заказы
+            loadMoreBtn.style.display = completedHasMore ? 'inline-block' : 'none';
+            loadMoreBtn.disabled = false;
+            loadMoreBtn.textContent = '⬇️ Далее';
+        }
         return;
     }
 
@@ -570,6 +594,9 @@ function renderCompletedOrders() {
         return dateObjB - dateObjA; // обратный порядок (новые сверху)
     });
 
+    // Старые заказы, подгруженные по HTTP, идут после последних (уже отсортированы сервером)
+    sortedCompleted.push(...olderCompletedOrders);
+
     // Берём только первые completedDisplayLimit элементов
     const displayOrders = sortedCompleted.slice(0, completedDisplayLimit);
 
@@ -607,7 +634,7 @@ function renderCompletedOrders() {
 
     // Управление кнопкой "Далее"
     if (loadMoreBtn) {
-        if (completedDisplayLimit < sortedCompleted.length) {
+        if (completedDisplayLimit < sortedCompleted.length || completedHasMore) {
             loadMoreBtn.style.display = 'inline-block'; // показываем кнопку
             loadMoreBtn.disabled = false;
             loadMoreBtn.textContent = '⬇️ Далее';
@@ -619,14 +646,58 @@ function renderCompletedOrders() {
 
 /**
  * Загружает следующую порцию выполненных заказов (увеличивает лимит на 10).
+ * Если локальные заказы закончились, запрашивает следующую страницу у сервера.
  */
 function loadMoreCompleted() {
-    if (completedDisplayLimit < currentCompletedOrders.length) {
+    const loadedCount = currentCompletedOrders.length + olderCompletedOrders.length;
+    if (completedDisplayLimit < loadedCount) {
         completedDisplayLimit += 10; // увеличиваем лимит
         renderCompletedOrders();     // перерисовываем
+    } else if (completedHasMore) {
+        fetchOlderCompletedOrders();
     }
 }
 
+/**
+ * Запрашивает следующую страницу старых выполненных заказов (включая архив).
+ * Курсор – номер самого старого из уже загруженных заказов.
+ */
+function fetchOlderCompletedOrders() {
+    if (olderCompletedLoading) return;
+
+    // Первый запрос начинаем с самого маленького номера среди последних заказов
+    let cursor = olderCompletedCursor;
+    if (cursor === null && currentCompletedOrders.length > 0) {
+        cursor = Math.min(...currentCompletedOrders.map(order => parseInt(order.order_number, 10)));
+    }
+
+    const params = new URLSearchParams({ limit: 10 });
+    if (cursor !== null) params.set('before', cursor);
+
+    olderCompletedLoading = true;
+    if (loadMoreBtn) {
+        loadMoreBtn.disabled = true;
+        loadMoreBtn.textContent = '⏳ Загрузка...';
+    }
+
+    fetch(`${COMPLETED_SEARCH_URL}?${params.toString()}`, { credentials: 'same-origin' })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) throw new Error(data.error || 'Ошибка загрузки');
+            olderCompletedOrders.push(...data.orders);   // добавляем новую страницу
+            olderCompletedCursor = data.next_before;      // курсор следующей страницы
+            completedHasMore = data.next_before !== null; // есть ли ещё
+            completedDisplayLimit += 10;
+        })
+        .catch(error => {
+            console.error('Ошибка загрузки выполненных заказов:', error);
+        })
+        .finally(() => {
+            olderCompletedLoading = false;
+            renderCompletedOrders();
+        });
+}
+
 // Привязываем обработчик к кнопке "Далее", если она существует
 if (loadMoreBtn) {
     loadMoreBtn.addEventListener('click', loadMoreCompleted);
@@ -702,7 +773,7 @@ function exportOrdersToExcel() {
 }
 
 /**
- * Инициирует скачивание резервной копии БД (JSON).
+ * Инициирует скачивание резервной копии БД (сжатый JSON Lines, .jsonl.gz).
  * Перенаправляет на URL /backup/download/.
  */
 function downloadBackup() {
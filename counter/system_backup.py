@@ -0,0 +1,465 @@
+"""
+system_backup.py
+Резервная копия всей системы: данные всех приложений проекта.
+
+В отличие от counter/backup.py (клиенты и заказы доски), сюда входят
+просчёты, компоненты, работы, ламинация, вычисления листов, прайсы,
+устройства, форматы листов, дерево категорий и материалы склада,
+база клиентов и справочник дополнительных работ.
+
+Копия – каталог:
+- по файлу на таблицу: <метка модели>.jsonl.gz – объекты в формате
+  сериализатора Django, по одному на строку, сжатые gzip на лету;
+- manifest.json – формат, уровни зависимостей, количество строк,
+  размер и SHA-256 каждого файла. Манифест пишется последним:
+  каталог без него – оборванная копия.
+
+Модели разбиваются на уровни зависимостей (dependency_levels): на уровне 0 –
+таблицы без внешних ключей, на уровне N – ссылающиеся только на уровни < N.
+Выгрузка ставит таблицы в пул потоков в порядке уровней; в PostgreSQL
+все потоки читают один снимок БД (pg_export_snapshot), поэтому копия
+согласована, как у pg_dump -j. В других базах общего снимка нет, и таблицы
+читаются по очереди в одной транзакции.
+
+Восстановление проверяет контрольные суммы до изменения БД, затем в одной
+транзакции очищает все таблицы и загружает уровни по порядку: при любой
+ошибке (повреждённая строка, разрыв соединения) БД остаётся прежней.
+Параллельной загрузки нет – таблицы в разных транзакциях нельзя откатить
+вместе, и сбой оставил бы базу очищенной или загруженной наполовину.
+
+Пользователи (auth.User) в копию не входят: ссылки на них (например,
+StockMovement.user) после восстановления сохраняются, только если такой
+пользователь есть в базе, иначе обнуляются (_clear_missing_references).
+
+Функции:
+- get_system_models        – модели, входящие в копию
+- dependency_levels        – разбиение моделей на уровни зависимостей
+- dump_system_backup       – выгрузка копии в каталог
+- iter_tar_stream          – каталог копии одним потоком tar (для скачивания)
+- read_manifest            – чтение и проверка манифеста
+- restore_system_backup    – восстановление из каталога копии
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+
+from .backup import (
+    iter_model_records, gzip_stream, BackupFormatError,
+    _dump, _clear_tables, _reset_sequences, _copy_supported, _copy_records, _insert_records,
+    BACKUP_CHUNK_SIZE, RESTORE_BATCH_SIZE,
+)
+from .board_cache import bump_board_version
+
+
+SYSTEM_BACKUP_FORMAT = 'printshop-system-backup'
+SYSTEM_BACKUP_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+
+# Приложения проекта, данные которых входят в копию
+SYSTEM_BACKUP_APPS = getattr(settings, 'SYSTEM_BACKUP_APPS', [
+    'counter',
+    'calculator',
+    'product_templates',
+    'directories',
+    'devices',
+    'sheet_formats',
+    'sklad',
+    'print_price',
+    'baza_klientov',
+    'vichisliniya_listov',
+    'spravochnik_dopolnitelnyh_rabot',
+])
+
+# Служебные модели, которые не переносятся между базами
+SYSTEM_BACKUP_EXCLUDE = ['counter.backuptombstone', 'counter.backuprun']
+
+# Сколько потоков выгружают и загружают таблицы одновременно
+SYSTEM_BACKUP_WORKERS = getattr(settings, 'SYSTEM_BACKUP_WORKERS', 4)
+
+# Блок чтения файлов при подсчёте контрольной суммы и отдаче tar
+FILE_BLOCK_SIZE = 64 * 1024
+
+
+# ==================== СОСТАВ И ПОРЯДОК ====================
+
+def get_system_models():
+    """Модели приложений SYSTEM_BACKUP_APPS (включая промежуточные таблицы ManyToMany)."""
+    models = []
+    for app_label in SYSTEM_BACKUP_APPS:
+        for model in apps.get_app_config(app_label).get_models(include_auto_created=True):
+            if model._meta.proxy or not model._meta.managed:
+                continue
+            if model._meta.label_lower in SYSTEM_BACKUP_EXCLUDE:
+                continue
+            models.append(model)
+    return models
+
+
+def _dependencies(model):
+    """Модели, на которые ссылаются внешние ключи модели (кроме ссылок на себя)."""
+    return {
+        field.related_model
+        for field in model._meta.concrete_fields
+        if field.is_relation and field.related_model is not None and field.related_model is not model
+    }
+
+
+def dependency_levels(models):
+    """
+    Разбивает модели на уровни: каждая модель ссылается только на модели
+    предыдущих уровней (или на модели вне списка). Таблицы одного уровня
+    независимы и могут выгружаться и загружаться одновременно.
+
+    Возвращает:
+        list: список уровней, каждый – список моделей
+
+    Исключения:
+        ValueError – циклическая зависимость между моделями
+    """
+    included = set(models)
+    remaining = list(models)
+    done = set()
+    levels = []
+
+    while remaining:
+        level = [
+            model for model in remaining
+            if all(dependency in done or dependency not in included for dependency in _dependencies(model))
+        ]
+        if not level:
+            labels = ', '.join(model._meta.label_lower for model in remaining)
+            raise ValueError(f'Циклическая зависимость между моделями: {labels}')
+        levels.append(level)
+        done.update(level)
+        remaining = [model for model in remaining if model not in done]
+
+    return levels
+
+
+# ==================== ВЫГРУЗКА ====================
+
+def _table_file_name(model):
+    return f'{model._meta.label_lower}.jsonl.gz'
+
+
+def _dump_table(model, directory, chunk_size):
+    """
+    Записывает таблицу в сжатый файл, считая строки и SHA-256 по мере записи.
+
+    Возвращает:
+        dict: запись манифеста {'file', 'rows', 'bytes', 'sha256'}
+    """
+    file_name = _table_file_name(model)
+    digest = hashlib.sha256()
+    size = 0
+    rows = 0
+
+    def lines():
+        nonlocal rows
+        for record in iter_model_records(model, chunk_size):
+            rows += 1
+            yield _dump(record) + '\n'
+
+    with open(os.path.join(directory, file_name), 'wb') as table_file:
+        for block in gzip_stream(lines()):
+            table_file.write(block)
+            digest.update(block)
+            size += len(block)
+
+    return {'file': file_name, 'rows': rows, 'bytes': size, 'sha256': digest.hexdigest()}
+
+
+def _dump_table_in_thread(model, directory, chunk_size, snapshot):
+    """Выгрузка таблицы в потоке пула: своё соединение, общий снимок БД."""
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+                cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot])
+            return _dump_table(model, directory, chunk_size)
+    finally:
+        # Соединение принадлежит потоку пула – закрываем, чтобы не оставлять его открытым
+        connection.close()
+
+
+@contextmanager
+def _exported_snapshot():
+    """
+    Транзакция с экспортированным снимком БД (PostgreSQL): выдаёт его
+    идентификатор, пока транзакция открыта. Для других баз – None.
+    """
+    if connection.vendor != 'postgresql':
+        yield None
+        return
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+            cursor.execute('SELECT pg_export_snapshot()')
+            yield cursor.fetchone()[0]
+
+
+def dump_system_backup(directory, workers=SYSTEM_BACKUP_WORKERS, chunk_size=BACKUP_CHUNK_SIZE, progress=None):
+    """
+    Выгружает все таблицы системы в каталог directory (создаётся при необходимости).
+
+    Аргументы:
+        directory: путь к пустому каталогу копии
+        workers: сколько таблиц выгружать одновременно (только PostgreSQL)
+        chunk_size: сколько объектов читать из БД за один запрос
+        progress: функция progress(label, entry), вызывается после каждой таблицы
+
+    Возвращает:
+        dict: манифест копии (он же записан в manifest.json)
+    """
+    os.makedirs(directory, exist_ok=True)
+    levels = dependency_levels(get_system_models())
+    tables = {}
+
+    def done(model, entry):
+        tables[model._meta.label_lower] = entry
+        if progress is not None:
+            progress(model._meta.label_lower, entry)
+
+    with _exported_snapshot() as snapshot:
+        if snapshot is not None and workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='system-backup') as pool:
+                # Таблицы ставятся в очередь в порядке уровней зависимостей
+                futures = [
+                    (model, pool.submit(_dump_table_in_thread, model, directory, chunk_size, snapshot))
+                    for level in levels for model in level
+                ]
+                for model, future in futures:
+                    done(model, future.result())
+        else:
+            # Без общего снимка согласованность даёт только одна транзакция
+            with transaction.atomic():
+                for level in levels:
+                    for model in level:
+                        done(model, _dump_table(model, directory, chunk_size))
+
+    manifest = {
+        'format': SYSTEM_BACKUP_FORMAT,
+        'version': SYSTEM_BACKUP_VERSION,
+        'export_date': datetime.now().isoformat(),
+        'django_version': django.get_version(),
+        'levels': [[model._meta.label_lower for model in level] for level in levels],
+        'tables': {model._meta.label_lower: tables[model._meta.label_lower] for level in levels for model in level},
+    }
+    with open(os.path.join(directory, MANIFEST_NAME), 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, ensure_ascii=False, indent=2)
+
+    return manifest
+
+
+def iter_tar_stream(directory, arcname, cleanup=False):
+    """
+    Отдаёт каталог копии одним несжатым tar-архивом по мере чтения файлов
+    (файлы таблиц уже сжаты). manifest.json идёт последним.
+
+    Аргументы:
+        directory: каталог копии
+        arcname: имя каталога внутри архива
+        cleanup: удалить каталог после отдачи
+    """
+    try:
+        names = sorted(name for name in os.listdir(directory) if name != MANIFEST_NAME)
+        written = 0
+        for name in names + [MANIFEST_NAME]:
+            path = os.path.join(directory, name)
+            info = tarfile.TarInfo(f'{arcname}/{name}')
+            info.size = os.path.getsize(path)
+            info.mtime = int(os.path.getmtime(path))
+            info.mode = 0o644
+
+            header = info.tobuf(format=tarfile.PAX_FORMAT)
+            yield header
+            written += len(header)
+
+            with open(path, 'rb') as source:
+                while True:
+                    block = source.read(FILE_BLOCK_SIZE)
+                    if not block:
+                        break
+                    yield block
+            # Содержимое файла дополняется нулями до границы блока tar
+            padding = -info.size % tarfile.BLOCKSIZE
+            yield tarfile.NUL * padding
+            written += info.size + padding
+
+        # Конец архива – два пустых блока, весь архив кратен размеру записи tar
+        end = 2 * tarfile.BLOCKSIZE
+        end += -(written + end) % tarfile.RECORDSIZE
+        yield tarfile.NUL * end
+    finally:
+        if cleanup:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+# ==================== ВОССТАНОВЛЕНИЕ ====================
+
+def read_manifest(directory):
+    """
+    Читает manifest.json каталога копии и проверяет формат и модели.
+
+    Возвращает:
+        tuple: (манифест, список уровней – списков моделей)
+
+    Исключения:
+        BackupFormatError – нет манифеста, неизвестный формат или модель
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+    except OSError as e:
+        raise BackupFormatError(f'Нет манифеста копии (копия не завершена?): {e}')
+    except ValueError as e:
+        raise BackupFormatError(f'Манифест копии повреждён: {e}')
+
+    if manifest.get('format') != SYSTEM_BACKUP_FORMAT:
+        raise BackupFormatError('Каталог не является резервной копией системы')
+    if manifest.get('version', 0) > SYSTEM_BACKUP_VERSION:
+        raise BackupFormatError(f"Версия копии {manifest['version']} не поддерживается")
+
+    try:
+        levels = [[apps.get_model(label) for label in level] for level in manifest['levels']]
+    except (KeyError, LookupError, ValueError) as e:
+        raise BackupFormatError(f'Модель из копии не найдена в проекте: {e}')
+
+    return manifest, levels
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        while True:
+            block = source.read(FILE_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def verify_checksums(directory, manifest, workers=SYSTEM_BACKUP_WORKERS):
+    """Сверяет SHA-256 всех файлов таблиц с манифестом (файлы читаются параллельно)."""
+    entries = list(manifest['tables'].items())
+    paths = [os.path.join(directory, entry['file']) for _, entry in entries]
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            digests = list(pool.map(_file_sha256, paths))
+    except OSError as e:
+        raise BackupFormatError(f'Файл таблицы не найден: {e}')
+
+    for (label, entry), digest in zip(entries, digests):
+        if digest != entry['sha256']:
+            raise BackupFormatError(f'Контрольная сумма файла {entry["file"]} ({label}) не совпадает')
+
+
+def _load_table(model, directory, entry, batch_size, progress):
+    """Загружает файл таблицы пачками (COPY или INSERT) и сверяет количество строк."""
+    use_copy = _copy_supported()
+    label = model._meta.label_lower
+    count = 0
+
+    def flush(batch):
+        nonlocal count
+        if use_copy:
+            _copy_records(model, batch)
+        else:
+            _insert_records(model, batch, batch_size)
+        count += len(batch)
+        if progress is not None:
+            progress(label, count)
+
+    batch = []
+    with open(os.path.join(directory, entry['file']), 'rb') as table_file:
+        try:
+            for line in gzip.open(table_file, 'rt', encoding='utf-8'):
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+        except (OSError, EOFError, ValueError) as e:
+            raise BackupFormatError(f'Файл {entry["file"]} повреждён: {e}')
+    if batch:
+        flush(batch)
+
+    if count != entry['rows']:
+        raise BackupFormatError(f'{label}: загружено {count} строк, в манифесте {entry["rows"]}')
+    return count
+
+
+def _clear_missing_references(models):
+    """
+    Обнуляет ссылки восстановленных таблиц на объекты вне копии (например,
+    StockMovement.user -> auth.User), если в базе таких объектов нет.
+    Обязательные ссылки не меняются – их проверит check_constraints.
+    """
+    included = set(models)
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if not field.is_relation or not field.null or field.related_model in included:
+                continue
+            related = field.related_model._base_manager.values(field.target_field.attname)
+            (
+                model._base_manager
+                .filter(**{f'{field.attname}__isnull': False})
+                .exclude(**{f'{field.attname}__in': related})
+                .update(**{field.attname: None})
+            )
+
+
+def restore_system_backup(directory, workers=SYSTEM_BACKUP_WORKERS, batch_size=RESTORE_BATCH_SIZE, progress=None):
+    """
+    Заменяет данные всех таблиц системы содержимым каталога копии.
+
+    Сначала проверяются манифест и контрольные суммы (БД ещё не изменена),
+    затем таблицы очищаются и загружаются в одной транзакции – при ошибке
+    БД остаётся прежней.
+
+    Аргументы:
+        directory: каталог копии (с manifest.json)
+        workers: сколько файлов читать одновременно при проверке контрольных сумм
+        batch_size: сколько объектов загружать за один запрос
+        progress: функция progress(label, count), вызывается после каждой пачки
+
+    Возвращает:
+        dict: {метка модели: количество восстановленных строк}
+
+    Исключения:
+        BackupFormatError – копия неполная, повреждена или не подходит к проекту
+    """
+    manifest, levels = read_manifest(directory)
+    verify_checksums(directory, manifest, workers)
+
+    models = [model for level in levels for model in level]
+    tables = manifest['tables']
+    counts = {}
+
+    with transaction.atomic():
+        with connection.constraint_checks_disabled():
+            _clear_tables(models)
+            for model in models:
+                label = model._meta.label_lower
+                counts[label] = _load_table(model, directory, tables[label], batch_size, progress)
+            _clear_missing_references(models)
+
+        connection.check_constraints(table_names=[model._meta.db_table for model in models])
+        _reset_sequences(models)
+        transaction.on_commit(bump_board_version)
+
+    return counts
@@ -1,3 +1,730 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.sessions import CookieMiddleware
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client as HttpClient
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from counter import board_cache, consumers, routing
+from counter.archive import _archive_batch, archive_completed_orders, get_archivable_orders
+from counter.board_cache import get_board_snapshot, get_board_version, build_board_message, load_board_orders
+from counter.board_codec import CODECS, BOARD_FORMAT_VERSION, STATUS_CODES, build_board_frame, local_epoch
+from counter.broadcast import RESYNC, BoardMessageCache, BroadcastCoalescer, SendQueue, get_broadcast_metrics
+from counter.excel_export import write_orders_workbook
+from counter.backup import (
+    BackupFormatError, gzip_stream, iter_backup_lines, read_backup, restore_backup, restore_backup_chain,
+)
+from counter.management.commands.benchmark_working_hours import legacy_working_hours
+from counter.middleware import WebSocketAuthMiddleware
+from counter.models import ArchivedOrder, BackupTombstone, Client, Order, WorkingCalendarDay
+from counter.working_hours import (
+    WorkingCalendar, build_working_calendar, invalidate_working_calendar, working_hours_between,
+)
+from counter.system_backup import dump_system_backup, read_manifest, restore_system_backup
+from sklad.models import Category, Material, StockMovement
+
+
+class WebSocketAuthQueriesTest(TransactionTestCase):
+    """Количество запросов к БД при WebSocket-подключении (counter/middleware.py)."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='operator', password='secret-123')
+        self.http = HttpClient()
+        self.http.force_login(self.user)
+        self.session_key = self.http.cookies[settings.SESSION_COOKIE_NAME].value
+        self.application = CookieMiddleware(WebSocketAuthMiddleware(URLRouter(routing.websocket_urlpatterns)))
+
+    @async_to_sync
+    async def connect(self):
+        """Подключается к доске заказов и сразу отключается; возвращает, принято ли подключение."""
+        communicator = WebsocketCommunicator(
+            self.application,
+            '/ws/order/',
+            headers=[(b'cookie', f'{settings.SESSION_COOKIE_NAME}={self.session_key}'.encode())],
+        )
+        connected, _ = await communicator.connect()
+        if connected:
+            await communicator.receive_output()
+        await communicator.disconnect()
+        return connected
+
+    def resolve_user(self):
+        """Определяет пользователя слоем аутентификации; возвращает (user, число запросов)."""
+        scope = {'type': 'websocket', 'cookies': {settings.SESSION_COOKIE_NAME: self.session_key}}
+        with CaptureQueriesContext(connection) as context:
+            user = async_to_sync(WebSocketAuthMiddleware(None).get_user)(scope)
+        return user, len(context.captured_queries)
+
+    def test_user_is_loaded_from_db_once(self):
+        user, queries = self.resolve_user()
+        self.assertEqual(user.pk, self.user.pk)
+        # Сессия и пользователь
+        self.assertEqual(queries, 2)
+
+        user, queries = self.resolve_user()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(queries, 0)
+
+    def test_reconnect_makes_no_queries(self):
+        self.assertTrue(self.connect())
+
+        # Пользователь и доска заказов уже в кэше
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(self.connect())
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_password_change_invalidates_cache(self):
+        self.resolve_user()
+
+        self.user.set_password('new-secret-456')
+        self.user.save()
+
+        # Хэш пароля в сессии больше не совпадает – подключение анонимное
+        user, queries = self.resolve_user()
+        self.assertFalse(user.is_authenticated)
+        self.assertGreater(queries, 0)
+
+    def test_logout_invalidates_cache(self):
+        self.resolve_user()
+
+        self.http.post('/logout/')
+
+        user, _ = self.resolve_user()
+        self.assertFalse(user.is_authenticated)
+
+
+class OrderConsumerReceiveTest(TransactionTestCase):
+    """Некорректные сообщения от браузера (OrderConsumer.receive) не закрывают соединение."""
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username='operator', password='secret-123')
+        http = HttpClient()
+        http.force_login(user)
+        self.session_key = http.cookies[settings.SESSION_COOKIE_NAME].value
+        self.application = CookieMiddleware(WebSocketAuthMiddleware(URLRouter(routing.websocket_urlpatterns)))
+
+    @async_to_sync
+    async def exchange(self, frame, subprotocols=None):
+        """
+        Отправляет кадр (str или bytes), затем refresh_orders.
+        Возвращает (ответ на кадр, тип ответа на refresh_orders).
+        """
+        communicator = WebsocketCommunicator(
+            self.application,
+            '/ws/order/',
+            headers=[(b'cookie', f'{settings.SESSION_COOKIE_NAME}={self.session_key}'.encode())],
+            subprotocols=subprotocols,
+        )
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_output()
+
+        if isinstance(frame, bytes):
+            await communicator.send_to(bytes_data=frame)
+        else:
+            await communicator.send_to(text_data=frame)
+        reply = json.loads(await communicator.receive_from())
+
+        await communicator.send_to(text_data=json.dumps({'action': 'refresh_orders'}))
+        refresh = await communicator.receive_output()
+        await communicator.disconnect()
+
+        if refresh.get('bytes') is not None:
+            return reply, CODECS[subprotocols[0].split('.')[1]].loads(refresh['bytes'])['t']
+        return reply, json.loads(refresh['text'])['type']
+
+    def test_binary_frame_without_subprotocol(self):
+        reply, refresh = self.exchange(CODECS['msgpack'].dumps({'action': 'refresh_orders'}))
+        self.assertEqual(reply['type'], 'error')
+        self.assertEqual(refresh, 'order_update')
+
+    def test_malformed_frames(self):
+        cases = [
+            ('not json', None),
+            ('[1, 2]', None),
+            (b'\xc1', ['orders.msgpack']),
+            (b'\x92\x01', ['orders.msgpack']),
+            (b'\xff', ['orders.cbor']),
+            (b'\x82\x01', ['orders.cbor']),
+        ]
+        for frame, subprotocols in cases:
+            with self.subTest(frame=frame, subprotocols=subprotocols):
+                reply, refresh = self.exchange(frame, subprotocols)
+                self.assertEqual(reply['type'], 'error')
+                self.assertEqual(refresh, 'order_update')
+
+
+class SystemBackupTest(TestCase):
+    """Копия всей системы: манифест, контрольные суммы, восстановление (counter/system_backup.py)."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='system_backup_test_')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+        self.user = get_user_model().objects.create_user(username='storekeeper', password='secret-123')
+        client = Client.objects.create(name='ООО Ромашка', phone='+70000000000')
+        Order.objects.create(
+            client=client, customer_name=client.name, description='Визитки', ready_datetime=timezone.now(),
+        )
+        category = Category.objects.create(name='Меловка', type='paper')
+        material = Material.objects.create(name='Меловка 130', category=category, type='paper', quantity=10)
+        StockMovement.objects.create(
+            material=material, kind=StockMovement.KIND_RECEIPT, quantity_change=10,
+            quantity_after=10, reserved_after=0, user=self.user,
+        )
+        self.manifest = dump_system_backup(self.directory, workers=1)
+
+    def test_manifest_lists_tables_by_dependency_level(self):
+        manifest, levels = read_manifest(self.directory)
+        labels = [[model._meta.label_lower for model in level] for level in levels]
+        position = {label: index for index, level in enumerate(labels) for label in level}
+        self.assertLess(position['counter.client'], position['counter.order'])
+        self.assertLess(position['sklad.material'], position['sklad.stockmovement'])
+        self.assertEqual(manifest['tables']['counter.order']['rows'], 1)
+        self.assertNotIn('counter.backuptombstone', manifest['tables'])
+
+    def test_round_trip_restores_data(self):
+        Order.objects.all().delete()
+        Client.objects.create(name='Лишний клиент')
+
+        counts = restore_system_backup(self.directory, workers=1)
+
+        self.assertEqual(counts['counter.order'], 1)
+        self.assertEqual(list(Client.objects.values_list('name', flat=True)), ['ООО Ромашка'])
+        self.assertEqual(Order.objects.get().description, 'Визитки')
+        # Пользователь есть в базе – ссылка на него сохраняется
+        self.assertEqual(StockMovement.objects.get().user_id, self.user.pk)
+
+    def test_missing_user_reference_is_cleared(self):
+        # Восстановление в базу, где нет пользователя из копии
+        get_user_model().objects.filter(pk=self.user.pk).delete()
+
+        restore_system_backup(self.directory, workers=1)
+
+        self.assertIsNone(StockMovement.objects.get().user_id)
+
+    def test_corrupted_file_leaves_database_unchanged(self):
+        entry = self.manifest['tables']['counter.client']
+        with open(os.path.join(self.directory, entry['file']), 'ab') as table_file:
+            table_file.write(b'garbage')
+        Client.objects.create(name='Новый клиент')
+
+        with self.assertRaises(BackupFormatError):
+            restore_system_backup(self.directory, workers=1)
+        self.assertEqual(Client.objects.count(), 2)
+
+    def test_failed_load_rolls_back(self):
+        # Файлы целы, но строк меньше, чем в манифесте: ошибка после очистки таблиц
+        self.manifest['tables']['counter.order']['rows'] += 1
+        with open(os.path.join(self.directory, 'manifest.json'), 'w', encoding='utf-8') as manifest_file:
+            json.dump(self.manifest, manifest_file)
+        Client.objects.create(name='Новый клиент')
+
+        with self.assertRaises(BackupFormatError):
+            restore_system_backup(self.directory, workers=1)
+        self.assertEqual(Client.objects.count(), 2)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class ArchiveOrdersTest(TestCase):
+    """Перенос старых выданных заказов в архив и выданные заказы на доске."""
+
+    def setUp(self):
+        self.client_record = Client.objects.create(name='ООО Ромашка')
+
+    def create_order(self, description, status=Order.STATUS_COMPLETED, completed_days_ago=None):
+        order = Order.objects.create(
+            client=self.client_record, description=description, status=status, ready_datetime=timezone.now(),
+        )
+        if completed_days_ago is not None:
+            Order.objects.filter(pk=order.pk).update(completed_at=timezone.now() - timedelta(days=completed_days_ago))
+        return order
+
+    def test_old_completed_orders_are_archived(self):
+        old = self.create_order('Старый', completed_days_ago=200)
+        recent = self.create_order('Недавний', completed_days_ago=1)
+        active = self.create_order('В работе', status=Order.STATUS_IN_PROGRESS)
+
+        self.assertEqual(archive_completed_orders(days=90, batch_size=1), 1)
+
+        self.assertEqual(ArchivedOrder.objects.get().order_number, old.order_number)
+        self.assertEqual(
+            set(Order.objects.values_list('order_number', flat=True)), {recent.order_number, active.order_number}
+        )
+
+    def test_existing_archive_record_is_updated(self):
+        order = self.create_order('Актуальное описание', completed_days_ago=200)
+        ArchivedOrder.objects.create(
+            order_number=order.order_number, description='Устаревшее описание',
+            ready_datetime=order.ready_datetime, created_at=order.created_at,
+        )
+
+        self.assertEqual(archive_completed_orders(days=90), 1)
+
+        self.assertFalse(Order.objects.filter(pk=order.pk).exists())
+        self.assertEqual(ArchivedOrder.objects.get().description, 'Актуальное описание')
+
+    def test_reopened_order_is_not_archived(self):
+        order = self.create_order('Вернули в работу', completed_days_ago=200)
+        queryset = get_archivable_orders(90)
+        numbers = list(queryset.values_list('order_number', flat=True))
+
+        # Заказ вернули в работу между выбором пачки и переносом
+        order.status = Order.STATUS_IN_PROGRESS
+        order.save()
+
+        self.assertEqual(_archive_batch(queryset, numbers), 0)
+        self.assertTrue(Order.objects.filter(pk=order.pk).exists())
+        self.assertFalse(ArchivedOrder.objects.exists())
+
+    def test_board_shows_recently_completed_orders(self):
+        old_order = self.create_order('Давний заказ', status=Order.STATUS_IN_PROGRESS)
+        self.create_order('Выдан неделю назад', completed_days_ago=7)
+
+        # Заказ с меньшим номером выдан последним
+        old_order.status = Order.STATUS_COMPLETED
+        old_order.save()
+
+        with mock.patch('counter.board_cache.BOARD_COMPLETED_LIMIT', 1):
+            _, completed, has_more = load_board_orders()
+        self.assertEqual([order.pk for order, _ in completed], [old_order.pk])
+        self.assertTrue(has_more)
+
+
+class OrdersExcelExportTest(TestCase):
+    """Выгрузка заказов в Excel вместе с архивом (counter/excel_export.py)."""
+
+    def test_archived_orders_are_exported(self):
+        from openpyxl import load_workbook
+
+        client = Client.objects.create(name='ООО Ромашка')
+        old = Order.objects.create(
+            client=client, description='Старый заказ', status=Order.STATUS_COMPLETED, ready_datetime=timezone.now(),
+        )
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=200))
+        archive_completed_orders(days=0)
+        new = Order.objects.create(client=client, description='Новый заказ', ready_datetime=timezone.now())
+
+        exported = io.BytesIO()
+        self.assertEqual(write_orders_workbook(exported), 2)
+        exported.seek(0)
+        rows = list(load_workbook(exported).active.iter_rows(min_row=2, values_only=True))
+        # Новые сверху, архивный заказ – после текущих
+        self.assertEqual([row[0] for row in rows], [f'{new.order_number:04d}', f'{old.order_number:04d}'])
+        self.assertEqual(rows[1][2], 'Старый заказ')
+
+        self.assertEqual(write_orders_workbook(io.BytesIO(), include_archived=False), 1)
+
+
+class FanoutBenchmarkCommandTest(TestCase):
+    """ws_fanout_benchmark пишет в базу только с явным --create-test-order."""
+
+    def test_refuses_without_flag(self):
+        get_user_model().objects.create_user(username='manager', password='secret-123')
+
+        with self.assertRaises(CommandError):
+            call_command('ws_fanout_benchmark', username='manager', clients=1, rounds=1)
+
+        self.assertFalse(Client.objects.exists())
+        self.assertFalse(Order.objects.exists())
+
+
+class BoardCodecTest(TestCase):
+    """Двоичные форматы доски (counter/board_codec.py) и сообщения рассылки (counter/broadcast.py)."""
+
+    def setUp(self):
+        cache.clear()
+        self.acme = Client.objects.create(name='Акме', phone='+7 900 000-00-00', uses_edo=True)
+        self.zenit = Client.objects.create(name='Зенит', email='zenit@example.com')
+        now = timezone.now()
+        Order.objects.create(client=self.acme, description='Визитки', ready_datetime=now + timedelta(days=2))
+        Order.objects.create(client=self.acme, description='Буклеты', ready_datetime=now + timedelta(days=3),
+                             status=Order.STATUS_IN_PROGRESS)
+        Order.objects.create(customer_name='Разовый', description='Листовки', ready_datetime=now - timedelta(hours=1))
+        Order.objects.create(client=self.zenit, description='Плакаты', ready_datetime=now,
+                             status=Order.STATUS_COMPLETED)
+        self.snapshot = get_board_snapshot()
+
+    def decode(self, name, message_type='initial_load'):
+        codec = CODECS[name]
+        return codec.loads(build_board_frame(codec, message_type, self.snapshot, include_clients=True))
+
+    def test_round_trip(self):
+        for name in CODECS:
+            with self.subTest(codec=name):
+                board = self.decode(name)
+                self.assertEqual((board['t'], board['v']), ('initial_load', BOARD_FORMAT_VERSION))
+                self.assertEqual(len(board['ao']), 3)
+                self.assertEqual(len(board['co']), 1)
+                self.assertEqual([client['n'] for client in board['cl']], ['Акме', 'Зенит'])
+                edo = {client['n']: client.get('x', False) for client in board['oc']}
+                self.assertEqual(edo, {'Акме': True, 'Зенит': False})
+
+    def test_formats_carry_same_values(self):
+        message = json.loads(build_board_message('initial_load', self.snapshot, include_clients=True))
+        msgpack_board, cbor_board = self.decode('msgpack'), self.decode('cbor')
+        self.assertEqual(msgpack_board, cbor_board)
+
+        for compact, full in zip(msgpack_board['ao'] + msgpack_board['co'],
+                                 message['active_orders'] + message['completed_orders']):
+            self.assertEqual(compact['n'], int(full['order_number']))
+            self.assertEqual(compact['d'], full['description'])
+            self.assertEqual(STATUS_CODES[compact['s']], full['status'])
+            self.assertEqual(compact.get('h', 0), full['working_hours_remaining'])
+            self.assertEqual(compact.get('cn', ''), full['customer_name'] or '')
+            self.assertEqual(
+                datetime.fromtimestamp(compact['r'], dt_timezone.utc).strftime('%d.%m.%Y %H:%M'),
+                full['ready_datetime'],
+            )
+            client = msgpack_board['oc'][compact['c']] if 'c' in compact else None
+            self.assertEqual(client and client['n'], full['client'] and full['client']['name'])
+        self.assertEqual(msgpack_board['more'], message['completed_has_more'])
+        self.assertEqual([client['i'] for client in msgpack_board['cl']],
+                         [client['id'] for client in message['clients']])
+
+    def test_local_epoch_uses_offset_of_the_instant(self):
+        # Переход на летнее время в Берлине: 31.03.2024 01:00 UTC (02:00 CET -> 03:00 CEST)
+        value = datetime(2024, 3, 31, 1, 30, tzinfo=dt_timezone.utc)
+        local = datetime.fromtimestamp(local_epoch(value, ZoneInfo('Europe/Berlin')), dt_timezone.utc)
+        self.assertEqual(local.strftime('%H:%M'), '03:30')
+
+    def test_broadcast_message_encoded_once_per_version(self):
+        messages = BoardMessageCache()
+        messages.update(self.snapshot)
+        encoded = get_broadcast_metrics()['encoded_messages']
+
+        for _ in range(3):
+            frame = messages.message(CODECS['cbor'], 'order_update', include_clients=True)
+            text = messages.message(None, 'order_update', include_clients=True)
+
+        self.assertEqual(get_broadcast_metrics()['encoded_messages'], encoded + 2)
+        self.assertEqual(CODECS['cbor'].loads(frame)['t'], 'order_update')
+        self.assertEqual(json.loads(text)['type'], 'order_update')
+
+        # Более старый снимок не заменяет текущий
+        messages.update(dict(self.snapshot, version=self.snapshot['version'] - 1))
+        self.assertIs(messages.message(None, 'order_update', include_clients=True), text)
+
+    @mock.patch.object(consumers, 'board_messages', new_callable=BoardMessageCache)
+    def test_rebuilt_snapshot_of_same_version_is_sent(self, messages):
+        consumer = consumers.OrderConsumer()
+        consumer.codec = None
+        sent = []
+
+        async def send(text_data=None, bytes_data=None):
+            sent.append(json.loads(text_data))
+
+        consumer.send = send
+
+        def hours():
+            async_to_sync(consumer.send_board)(get_board_snapshot(), 'initial_load')
+            return [order['working_hours_remaining'] for order in sent[-1]['active_orders']]
+
+        # Снимок из setUp
+        self.assertNotEqual(hours(), [4, 4, 4])
+
+        # TTL снимка истёк – снимок той же версии строится заново с новыми рабочими часами
+        cache.delete(board_cache.BOARD_SNAPSHOT_KEY.format(version=self.snapshot['version']))
+        with mock.patch.object(Order, 'get_working_hours_remaining', return_value=4):
+            self.assertEqual(hours(), [4, 4, 4])
+        self.assertEqual(messages.snapshot['version'], self.snapshot['version'])
+
+
+class WorkingHoursTest(TestCase):
+    """Рабочие часы до готовности (counter/working_hours.py) против прежнего пошагового расчёта."""
+
+    def setUp(self):
+        invalidate_working_calendar()
+        # 03.06.2024 – понедельник
+        self.calendar = WorkingCalendar(10 * 3600, 18 * 3600, range(5), {
+            date(2024, 6, 12): (10 * 3600, 17 * 3600),   # сокращённый день
+            date(2024, 6, 15): (10 * 3600, 18 * 3600),   # рабочая суббота
+            date(2024, 6, 17): None,                     # праздник в понедельник
+        })
+
+    def tearDown(self):
+        invalidate_working_calendar()
+
+    def at(self, day, hour, minute=0):
+        return timezone.make_aware(datetime(2024, 6, day, hour, minute))
+
+    def hours(self, start, end):
+        return working_hours_between(start, end, self.calendar)
+
+    def test_matches_legacy_loop(self):
+        # Прежний расчёт проверял начало каждого часа, поэтому совпадает с
+        # формулой при старте в начале часа
+        rng = random.Random(7)
+        for _ in range(300):
+            now = self.at(3, 0) + timedelta(hours=rng.randint(0, 24 * 14))
+            ready = now + timedelta(minutes=rng.randint(-120, 20 * 24 * 60))
+            with self.subTest(now=now, ready=ready):
+                self.assertEqual(self.hours(now, ready), legacy_working_hours(now, ready, self.calendar))
+
+    def test_weekend_and_holiday(self):
+        # Пятница 16:00 -> понедельник 12:00: 2 + 2 часа
+        self.assertEqual(self.hours(self.at(7, 16), self.at(10, 12)), 4)
+        # Пятница 16:00 -> понедельник 12:00 через рабочую субботу, понедельник – праздник
+        self.assertEqual(self.hours(self.at(14, 16), self.at(17, 12)), 2 + 8)
+        # Сокращённая среда: до 17:00
+        self.assertEqual(self.hours(self.at(12, 9), self.at(12, 20)), 7)
+
+    def test_start_and_end_outside_working_hours(self):
+        self.assertEqual(self.hours(self.at(3, 7), self.at(3, 20)), 8)
+        self.assertEqual(self.hours(self.at(3, 19), self.at(4, 9)), 0)
+        self.assertEqual(self.hours(self.at(8, 12), self.at(9, 23)), 0)
+
+    def test_same_day_rounds_up(self):
+        self.assertEqual(self.hours(self.at(3, 11, 15), self.at(3, 13, 45)), 3)
+        self.assertEqual(self.hours(self.at(3, 11), self.at(3, 11, 1)), 1)
+
+    def test_past_deadline(self):
+        self.assertEqual(self.hours(self.at(4, 12), self.at(3, 12)), 0)
+        self.assertEqual(self.hours(self.at(3, 12), self.at(3, 12)), 0)
+
+    def test_order_uses_calendar_table(self):
+        order = Order(description='Визитки', ready_datetime=self.at(17, 12))
+        self.assertEqual(order.get_working_hours_remaining(now=self.at(14, 16)), 2 + 2)
+
+        WorkingCalendarDay.objects.create(date=date(2024, 6, 15), day_type=WorkingCalendarDay.DAY_WORKING)
+        WorkingCalendarDay.objects.create(date=date(2024, 6, 17), day_type=WorkingCalendarDay.DAY_HOLIDAY)
+
+        # Кэш календаря сброшен сигналами
+        self.assertEqual(order.get_working_hours_remaining(now=self.at(14, 16)), 2 + 8)
+        self.assertEqual(order.get_working_hours_remaining(now=self.at(18, 12)), 0)
+        self.assertEqual(
+            build_working_calendar().window_for(date(2024, 6, 15)), (10 * 3600, 18 * 3600)
+        )
+
+
+class FakeChannelLayer:
+    """Слой каналов, который только запоминает рассылки."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, event):
+        self.sent.append((group, event))
+
+
+class BroadcastTest(TransactionTestCase):
+    """
+    Очередь отправки и объединение рассылок (counter/broadcast.py).
+    Рассылка читает снимок доски в отдельном потоке, поэтому без общей транзакции теста.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def metrics_delta(self, before):
+        after = get_broadcast_metrics()
+        return {key: after[key] - before[key] for key in before if key in after}
+
+    def test_overflow_replaces_queue_with_resync(self):
+        before = get_broadcast_metrics()
+
+        async def fill():
+            queue = SendQueue(maxsize=3)
+            for number in range(5):
+                queue.put(f'message {number}')
+            items = [await queue.get() for _ in range(queue.qsize())]
+            queue.close()
+            return items
+
+        # Три сообщения заполнили очередь, четвёртое вызвало resync, пятое – после него
+        self.assertEqual(asyncio.run(fill()), [RESYNC, 'message 4'])
+        delta = self.metrics_delta(before)
+        self.assertEqual(delta['dropped_messages'], 3)
+        self.assertEqual(delta['resyncs'], 1)
+        self.assertGreaterEqual(get_broadcast_metrics()['max_queue_depth'], 3)
+
+    def test_burst_is_coalesced_into_one_send(self):
+        layer = FakeChannelLayer()
+        before = get_broadcast_metrics()
+        Order.objects.create(description='Визитки', ready_datetime=timezone.now())
+
+        async def burst():
+            coalescer = BroadcastCoalescer(window=0.2)
+            coalescer.request(layer, 'orders')
+            coalescer.request(layer, 'orders', clients=True)
+            # Доска меняется внутри окна – рассылка должна взять новую версию
+            await database_sync_to_async(Order.objects.create)(
+                description='Буклеты', ready_datetime=timezone.now()
+            )
+            coalescer.request(layer, 'orders')
+            await asyncio.gather(*coalescer._tasks)
+
+        version_before = get_board_version()
+        asyncio.run(burst())
+
+        self.assertEqual(len(layer.sent), 1)
+        group, event = layer.sent[0]
+        self.assertEqual(group, 'orders')
+        self.assertEqual(
+            (event['type'], event['orders'], event['clients']), ('order_update', True, True)
+        )
+        # Рассылка несёт последнюю версию доски
+        self.assertGreater(event['version'], version_before)
+        self.assertEqual(event['version'], get_board_version())
+
+        delta = self.metrics_delta(before)
+        self.assertEqual(delta['broadcast_requests'], 3)
+        self.assertEqual(delta['coalesced_events'], 2)
+        self.assertEqual(delta['broadcasts_sent'], 1)
+
+    def test_clients_only_broadcast(self):
+        layer = FakeChannelLayer()
+
+        async def request():
+            coalescer = BroadcastCoalescer(window=0)
+            coalescer.request(layer, 'orders', orders=False, clients=True)
+            await asyncio.gather(*coalescer._tasks)
+
+        asyncio.run(request())
+
+        self.assertEqual(layer.sent[0][1]['type'], 'clients_update')
+
+
+class BackupTest(TestCase):
+    """Резервные копии клиентов и заказов (counter/backup.py): полные и инкрементные."""
+
+    def setUp(self):
+        self.acme = Client.objects.create(name='Акме')
+        self.zenit = Client.objects.create(name='Зенит')
+        now = timezone.now()
+        self.cards = Order.objects.create(client=self.acme, description='Визитки', ready_datetime=now)
+        self.posters = Order.objects.create(client=self.zenit, description='Плакаты', ready_datetime=now)
+
+    def backup(self, **kwargs):
+        """Резервная копия в памяти (как при скачивании)."""
+        return io.BytesIO(b''.join(gzip_stream(iter_backup_lines(**kwargs))))
+
+    def state(self):
+        return (
+            sorted(Client.objects.values_list('id', 'name')),
+            sorted(Order.objects.values_list('order_number', 'client_id', 'description')),
+        )
+
+    def test_full_dump(self):
+        header, records = read_backup(self.backup())
+        records = list(records)
+
+        self.assertEqual(header['kind'], 'full')
+        self.assertIsNotNone(header['watermark'])
+        self.assertEqual(
+            [record['model'] for record in records],
+            ['counter.client', 'counter.client', 'counter.order', 'counter.order'],
+        )
+        # Итог копии доступен после чтения объектов
+        self.assertEqual(header['counts'], {'counter.client': 2, 'counter.order': 2, 'counter.archivedorder': 0})
+
+    def test_restore_replaces_data(self):
+        expected = self.state()
+        backup = self.backup()
+
+        self.cards.delete()
+        self.zenit.name = 'Переименован'
+        self.zenit.save()
+        Client.objects.create(name='Лишний')
+
+        counts = restore_backup(backup)
+
+        self.assertEqual(counts['counter.order'], 2)
+        self.assertEqual(self.state(), expected)
+
+    def test_incremental_chain(self):
+        watermark = timezone.now()
+        full = self.backup(watermark=watermark)
+
+        self.acme.name = 'Акме Принт'
+        self.acme.save()
+        booklets = Order.objects.create(client=self.acme, description='Буклеты', ready_datetime=timezone.now())
+        self.posters.delete()
+        expected = self.state()
+
+        increment = self.backup(since=watermark)
+        header, records = read_backup(increment)
+        list(records)
+        self.assertEqual(header['kind'], 'incremental')
+        self.assertEqual(header['deleted']['counter.order'], 1)
+        self.assertTrue(BackupTombstone.objects.filter(model_label='counter.order').exists())
+        increment.seek(0)
+
+        # Состояние после полной копии, поверх которого применяется цепочка
+        Order.objects.all().delete()
+        Client.objects.all().delete()
+
+        results = restore_backup_chain([full, increment])
+
+        self.assertEqual([result['kind'] for result in results], ['full', 'incremental'])
+        self.assertEqual(results[1]['deleted']['counter.order'], 1)
+        self.assertEqual(self.state(), expected)
+        self.assertTrue(Order.objects.filter(pk=booklets.pk, description='Буклеты').exists())
+        self.assertFalse(Order.objects.filter(pk=self.posters.pk).exists())
+
+    def test_gap_in_chain_is_rejected(self):
+        watermark = timezone.now()
+        full = self.backup(watermark=watermark)
+        increment = self.backup(since=watermark + timedelta(hours=1))
+        Client.objects.create(name='Добавлен после копии')
+        expected = self.state()
+
+        with self.assertRaisesRegex(BackupFormatError, 'Пропуск в цепочке'):
+            restore_backup_chain([full, increment])
+
+        # Цепочка применяется в одной транзакции – данные не изменились
+        self.assertEqual(self.state(), expected)
+
+
+class BoardSnapshotLockTest(TestCase):
+    """Блокировка построения снимка доски (get_board_snapshot) снимается только владельцем."""
+
+    def setUp(self):
+        cache.clear()
+        self.lock_key = board_cache.BOARD_LOCK_KEY.format(version=get_board_version())
+
+    def test_own_lock_is_released(self):
+        get_board_snapshot()
+        self.assertIsNone(cache.get(self.lock_key))
+
+    @mock.patch.object(board_cache, 'BOARD_LOCK_WAIT', 0)
+    def test_foreign_lock_is_kept(self):
+        # Другой воркер строит снимок дольше, чем мы готовы ждать
+        cache.add(self.lock_key, 'other-worker')
+        snapshot = get_board_snapshot()
+
+        self.assertEqual(snapshot['version'], get_board_version())
+        self.assertEqual(cache.get(self.lock_key), 'other-worker')
+
+    def test_lock_taken_over_after_expiry_is_kept(self):
+        build = board_cache._build_snapshot
+
+        def slow_build(version):
+            # Наша блокировка истекла, её взял другой воркер
+            cache.set(self.lock_key, 'other-worker')
+            return build(version)
+
+        with mock.patch.object(board_cache, '_build_snapshot', side_effect=slow_build):
+            get_board_snapshot()
+
+        self.assertEqual(cache.get(self.lock_key), 'other-worker')
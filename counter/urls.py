@@ -16,9 +16,18 @@ urlpatterns = [
     # Экспорт заказов в Excel
     path('orders/export/excel/', views.export_orders_excel, name='export_orders_excel'),
     
+    # Постраничный поиск выданных и архивных заказов (JSON)
+    path('orders/completed/search/', views.completed_orders_search, name='completed_orders_search'),
+    
+    # Метрики WebSocket-рассылок (объединение, очереди, отброшенные сообщения)
+    path('ws/metrics/', views.websocket_metrics, name='websocket_metrics'),
+    
     # Скачать резервную копию БД (JSON)
     path('backup/download/', views.backup_download, name='backup_download'),
     
+    # Скачать резервную копию всей системы (все приложения, tar) – только персонал
+    path('backup/system/', views.system_backup_download, name='system_backup_download'),
+    
     # Загрузить резервную копию и восстановить БД (POST)
     path('backup/upload/', views.backup_upload, name='backup_upload'),
 ]
\ No newline at end of file
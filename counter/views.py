@@ -16,19 +16,26 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import Order, Client
 from .forms import LoginForm
+from .archive import search_completed_orders, SEARCH_PAGE_SIZE
+from .broadcast import get_broadcast_metrics
 
 # ===== НОВЫЕ ИМПОРТЫ (ДЛЯ ЭКСПОРТА И РЕЗЕРВИРОВАНИЯ) =====
 import json
 import django                                # для получения версии Django
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.core import serializers
-from django.db import connection, transaction
 from django.utils import timezone           # для работы с часовыми поясами
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 from datetime import datetime
 import os
+import shutil
+import tempfile
+from .excel_export import write_orders_workbook, iter_file_chunks
+from .backup import iter_backup_lines, gzip_stream, restore_backup, BackupFormatError
+from .system_backup import dump_system_backup, iter_tar_stream
+from django.contrib.admin.views.decorators import staff_member_required
+
+# Выгрузка Excel до этого размера собирается в памяти, больше – во временном файле на диске
+EXCEL_SPOOL_MAX_SIZE = 16 * 1024 * 1024
 
 
 def login_view(request):
@@ -92,131 +99,118 @@ def index(request):
 # ========== НОВЫЕ ФУНКЦИИ ==========
 
 @login_required
-def export_orders_excel(request):
+def websocket_metrics(request):
     """
-    Экспорт всех заказов в файл Excel (.xlsx).
-    Доступно только авторизованным пользователям.
+    Метрики рассылок доски заказов этого процесса (JSON):
+    объединённые события, отброшенные сообщения, глубина очередей соединений.
     """
-    # 1. Получаем все заказы из базы данных, сортируем по дате создания (новые сверху)
-    orders = Order.objects.all().order_by('-created_at')
-    
-    # 2. Создаем новую книгу Excel
-    wb = Workbook()
-    
-    # 3. Выбираем активный лист (по умолчанию создаётся один лист)
-    ws = wb.active
-    
-    # 4. Устанавливаем название листа
-    ws.title = "Заказы"
-    
-    # --- Определяем стили для оформления ---
-    # Шрифт заголовков: жирный, размер 12, белый
-    header_font = Font(name='Arial', size=12, bold=True, color='FFFFFF')
-    
-    # Заливка заголовков: фирменный зелёный цвет
-    header_fill = PatternFill(start_color='0B8661', end_color='0B8661', fill_type='solid')
-    
-    # Выравнивание: по центру по горизонтали и вертикали, перенос текста
-    center_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    
-    # Границы ячеек: тонкая серая линия
-    thin_border = Border(
-        left=Side(style='thin', color='D0D0D0'),
-        right=Side(style='thin', color='D0D0D0'),
-        top=Side(style='thin', color='D0D0D0'),
-        bottom=Side(style='thin', color='D0D0D0')
-    )
+    return JsonResponse({'success': True, 'metrics': get_broadcast_metrics()})
+
+
+@login_required
+def completed_orders_search(request):
+    """
+    Постраничный поиск выданных заказов (основная таблица + архив).
     
-    # 5. Заголовки колонок (будет первая строка)
-    headers = [
-        '№ заказа',
-        'Клиент',
-        'Описание',
-        'Дата готовности',
-        'Статус',
-        'Дата создания',
-        'Телефон',
-        'Email',
-        'ЭДО'
-    ]
+    GET-параметры:
+        q      – строка поиска (номер заказа, клиент или описание), необязательно
+        before – курсор: номер заказа, после которого продолжить (из next_before)
+        limit  – размер страницы (по умолчанию 20, максимум 100)
     
-    # 6. Записываем заголовки в первую строку (столбцы A, B, C, ...)
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_alignment
-        cell.border = thin_border
+    Ответ: {'success': True, 'orders': [...], 'next_before': int | None}
+    """
+    query = request.GET.get('q', '')
     
-    # 7. Заполняем данными (начиная со второй строки)
-    for row_num, order in enumerate(orders, 2):
-        # Получаем информацию о клиенте (если есть)
-        client = order.client
-        client_name = client.name if client else order.customer_name or "—"
-        phone = client.phone if client else ""
-        email = client.email if client else ""
-        uses_edo = "Да" if (client and client.uses_edo) else "Нет"
-        
-        # Форматируем даты в московском времени (как в интерфейсе)
-        # ready_datetime уже хранится в UTC, но timezone.localtime() конвертирует в текущий часовой пояс.
-        ready_dt_local = timezone.localtime(order.ready_datetime)
-        created_dt_local = timezone.localtime(order.created_at)
-        
-        ready_str = ready_dt_local.strftime('%d.%m.%Y %H:%M')
-        created_str = created_dt_local.strftime('%d.%m.%Y %H:%M')
-        
-        # Значения ячеек в том же порядке, что и заголовки
-        row_data = [
-            f"{order.order_number:04d}",
-            client_name,
-            order.description,
-            ready_str,
-            order.get_status_display_name(),
-            created_str,
-            phone,
-            email,
-            uses_edo
-        ]
-        
-        # Записываем данные в строку
-        for col_num, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_num, column=col_num)
-            cell.value = value
-            cell.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
-            cell.border = thin_border
+    try:
+        before = request.GET.get('before')
+        before = int(before) if before else None
+        limit = int(request.GET.get('limit', SEARCH_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Некорректные параметры пагинации'}, status=400)
     
-    # 8. Автоматическая настройка ширины колонок
-    for col in ws.columns:
-        max_length = 0
-        col_letter = get_column_letter(col[0].column)  # буква колонки (A, B, C...)
-        for cell in col:
-            try:
-                if cell.value and len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        # Устанавливаем ширину = максимальная длина + 2 (некоторый запас)
-        adjusted_width = min(max_length + 2, 50)  # но не более 50 символов
-        ws.column_dimensions[col_letter].width = adjusted_width
+    orders, next_before = search_completed_orders(query, before=before, limit=limit)
     
-    # 9. Формируем HTTP-ответ с Excel-файлом
-    response = HttpResponse(
+    return JsonResponse({
+        'success': True,
+        'orders': orders,
+        'next_before': next_before,
+    })
+
+
+@login_required
+def export_orders_excel(request):
+    """
+    Экспорт всех заказов в файл Excel (.xlsx), включая архив выданных
+    заказов (?archived=0 – без архива).
+    Доступно только авторизованным пользователям.
+
+    Книга пишется потоково (counter/excel_export.py) во временный файл,
+    который держится в памяти до EXCEL_SPOOL_MAX_SIZE и затем переносится
+    на диск, и отдаётся клиенту блоками.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=EXCEL_SPOOL_MAX_SIZE)
+    try:
+        write_orders_workbook(spooled, include_archived=request.GET.get('archived') != '0')
+    except Exception:
+        spooled.close()
+        raise
+    size = spooled.tell()
+
+    response = StreamingHttpResponse(
+        iter_file_chunks(spooled),
         content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
+    response['Content-Length'] = size
     # Заголовок Content-Disposition указывает браузеру, что это вложение и нужно скачать
     response['Content-Disposition'] = f'attachment; filename=orders_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-    
-    # 10. Сохраняем книгу в response (wb.save принимает file-like объект)
-    wb.save(response)
-    
+
     return response
 
 
 @login_required
 def backup_download(request):
     """
-    Скачать резервную копию базы данных (все клиенты и все заказы) в формате JSON.
+    Скачать резервную копию базы данных (клиенты, заказы, архив заказов).
+
+    По умолчанию – сжатый JSON Lines (counter/backup.py): файл формируется
+    и сжимается по мере чтения из БД, память не зависит от размера таблиц.
+    ?format=json – прежний формат (один JSON-документ с клиентами и заказами).
+    """
+    if request.GET.get('format') == 'json':
+        return backup_download_legacy_json()
+
+    response = StreamingHttpResponse(gzip_stream(iter_backup_lines()), content_type='application/gzip')
+    response['Content-Disposition'] = f'attachment; filename=printshop_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.jsonl.gz'
+    
+    return response
+
+
+@staff_member_required
+def system_backup_download(request):
+    """
+    Скачать резервную копию всей системы (данные всех приложений) – только для персонала.
+
+    Таблицы выгружаются во временный каталог (counter/system_backup.py:
+    по сжатому файлу на таблицу, в PostgreSQL – параллельно из одного
+    снимка БД), затем каталог отдаётся одним tar-архивом по мере чтения
+    и удаляется. Восстановление: python manage.py system_restore <архив>.
+    """
+    name = f"system_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    directory = tempfile.mkdtemp(prefix='printshop_system_backup_')
+    try:
+        dump_system_backup(directory)
+    except Exception:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    response = StreamingHttpResponse(iter_tar_stream(directory, name, cleanup=True), content_type='application/x-tar')
+    response['Content-Disposition'] = f'attachment; filename={name}.tar'
+    return response
+
+
+def backup_download_legacy_json():
+    """
+    Резервная копия в прежнем формате JSON (все клиенты и все заказы).
     Используется встроенная сериализация Django.
     """
     # 1. Получаем все объекты моделей Client и Order
@@ -248,11 +242,15 @@ def backup_download(request):
 
 
 @login_required
-@transaction.atomic  # Все операции внутри одной транзакции: либо всё выполнится, либо ничего
 def backup_upload(request):
     """
-    Восстановление базы данных из загруженного JSON-файла.
+    Восстановление базы данных из загруженного файла резервной копии
+    (сжатый JSON Lines или прежний JSON, см. counter/backup.py).
     Ожидается POST-запрос с полем 'backup_file', содержащим файл резервной копии.
+
+    Файл читается построчно и загружается пачками в одной транзакции:
+    либо восстановится всё, либо ничего. Инкрементные копии здесь не
+    принимаются – цепочка восстанавливается командой restore_backup.
     """
     if request.method != 'POST':
         # Если метод не POST, возвращаем ошибку 405 (Method Not Allowed)
@@ -264,60 +262,21 @@ def backup_upload(request):
     
     backup_file = request.FILES['backup_file']
     
-    # 2. Читаем содержимое файла и декодируем из JSON
-    try:
-        file_content = backup_file.read().decode('utf-8')
-        backup_data = json.loads(file_content)
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': f'Ошибка чтения JSON: {str(e)}'}, status=400)
-    
-    # 3. Проверяем структуру файла: должны присутствовать ключи 'clients' и 'orders'
-    if 'clients' not in backup_data or 'orders' not in backup_data:
-        return JsonResponse({'success': False, 'error': 'Неверный формат резервной копии (отсутствуют clients или orders)'}, status=400)
+    def report(label, count):
+        print(f"♻️ Восстановление {label}: {count}")
     
+    # 2. Восстанавливаем данные (транзакция внутри restore_backup)
     try:
-        # 4. Очищаем существующие данные в правильном порядке:
-        #    сначала удаляем заказы (т.к. они ссылаются на клиентов),
-        #    потом удаляем клиентов.
-        Order.objects.all().delete()
-        Client.objects.all().delete()
-        
-        # 5. Сбрасываем последовательности автоинкремента для обеих таблиц,
-        #    чтобы новые записи не конфликтовали со старыми ID, которые мы сейчас вставим.
-        #    Для PostgreSQL используем raw SQL.
-        with connection.cursor() as cursor:
-            # Сброс последовательности для таблицы counter_client (поле id)
-            cursor.execute("SELECT setval(pg_get_serial_sequence('counter_client','id'), COALESCE((SELECT MAX(id) FROM counter_client), 1), false);")
-            # Сброс последовательности для таблицы counter_order (поле order_number)
-            cursor.execute("SELECT setval(pg_get_serial_sequence('counter_order','order_number'), COALESCE((SELECT MAX(order_number) FROM counter_order), 1), false);")
-        
-        # 6. Десериализуем и сохраняем клиентов
-        #    backup_data['clients'] - это список объектов в формате, который возвращает serializers.serialize
-        #    deserialize() возвращает генератор объектов DeserializedObject,
-        #    у каждого вызываем .save() для сохранения в БД.
-        client_objects = []
-        for client_obj in serializers.deserialize('json', json.dumps(backup_data['clients'])):
-            client_objects.append(client_obj)
-            client_obj.save()  # сохраняем с теми же primary key, что были в дампе
-        
-        # 7. Десериализуем и сохраняем заказы
-        order_objects = []
-        for order_obj in serializers.deserialize('json', json.dumps(backup_data['orders'])):
-            order_objects.append(order_obj)
-            order_obj.save()
-        
-        # 8. Ещё раз сбрасываем последовательности, чтобы они учитывали максимальные значения
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT setval(pg_get_serial_sequence('counter_client','id'), COALESCE((SELECT MAX(id) FROM counter_client), 1), true);")
-            cursor.execute("SELECT setval(pg_get_serial_sequence('counter_order','order_number'), COALESCE((SELECT MAX(order_number) FROM counter_order), 1), true);")
-        
-        # 9. Возвращаем успешный JSON-ответ
-        #    Фронтенд может перезагрузить страницу после этого ответа.
-        return JsonResponse({
-            'success': True,
-            'message': f'База данных успешно восстановлена. Загружено клиентов: {len(client_objects)}, заказов: {len(order_objects)}.'
-        })
-        
+        counts = restore_backup(backup_file, progress=report)
+    except BackupFormatError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except Exception as e:
-        # В случае любой ошибки транзакция будет откачена автоматически (благодаря @transaction.atomic)
-        return JsonResponse({'success': False, 'error': f'Ошибка при восстановлении: {str(e)}'}, status=500)
\ No newline at end of file
+        return JsonResponse({'success': False, 'error': f'Ошибка при восстановлении: {str(e)}'}, status=500)
+    
+    # 3. Возвращаем успешный JSON-ответ
+    #    Фронтенд может перезагрузить страницу после этого ответа.
+    return JsonResponse({
+        'success': True,
+        'message': f'База данных успешно восстановлена. Загружено клиентов: {counts.get("counter.client", 0)}, '
+                   f'заказов: {counts.get("counter.order", 0)}, архивных заказов: {counts.get("counter.archivedorder", 0)}.'
+    })
@@ -0,0 +1,253 @@
+"""
+working_hours.py
+Расчёт рабочего времени типографии (бизнес-часы) без пошагового перебора.
+
+Раньше Order.get_working_hours_remaining шагал от текущего момента до срока
+готовности по одному часу, поэтому заказ со сроком через месяц стоил сотни
+итераций на каждую рассылку по WebSocket. Здесь то же значение вычисляется
+по формуле:
+    1. неполный первый день (от момента начала до конца рабочего окна);
+    2. целые недели между днями (недели * рабочих дней в неделе * длина дня);
+    3. остаток дней внутри последней неполной недели (не больше 6 дней);
+    4. поправки из производственного календаря (праздники, сокращённые и
+       перенесённые рабочие дни) – через префиксные суммы и bisect;
+    5. неполный последний день.
+
+Рабочее окно задаётся в settings.py:
+    WORKING_HOURS_START = 10          # начало рабочего дня (час)
+    WORKING_HOURS_END = 18            # конец рабочего дня (час)
+    WORKING_WEEKDAYS = (0, 1, 2, 3, 4) # рабочие дни недели (0 – понедельник)
+
+Исключения хранятся в таблице WorkingCalendarDay (редактируется в админке).
+Календарь загружается один раз и кэшируется в памяти процесса; кэш
+сбрасывается сигналами при изменении таблицы (см. counter/signals.py).
+
+Функции:
+- working_seconds_between – количество рабочих секунд между двумя моментами
+- working_hours_between   – то же в часах (округление вверх, как в старом коде)
+- get_working_calendar    – кэшированный календарь
+- invalidate_working_calendar – сброс кэша календаря
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Время жизни кэша календаря в памяти процесса (секунды).
+# Сигналы сбрасывают кэш только в том процессе, где произошло изменение,
+# поэтому остальные воркеры подхватят изменения не позже, чем через TTL.
+CALENDAR_CACHE_TTL = 300
+
+
+def _seconds_of_day(value):
+    """Переводит datetime/time в количество секунд от начала суток."""
+    return value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1_000_000
+
+
+class WorkingCalendar:
+    """
+    Производственный календарь: стандартное рабочее окно + исключения по датам.
+
+    Аргументы конструктора:
+        work_start: int, начало рабочего дня в секундах от полуночи
+        work_end: int, конец рабочего дня в секундах от полуночи
+        weekdays: iterable[int], рабочие дни недели (0 – понедельник)
+        exceptions: dict[date, tuple | None] – для даты либо рабочее окно
+            (start_seconds, end_seconds), либо None (нерабочий день)
+    """
+
+    def __init__(self, work_start, work_end, weekdays, exceptions=None):
+        self.work_start = work_start
+        self.work_end = max(work_start, work_end)
+        self.day_length = self.work_end - self.work_start
+        self.weekdays = frozenset(weekdays)
+        self.exceptions = dict(exceptions or {})
+
+        # Отсортированные даты исключений и префиксные суммы поправок:
+        # _prefix[i] – сумма (фактическое окно - стандартное окно) для первых i дат.
+        self._dates = sorted(self.exceptions)
+        self._prefix = [0]
+        for day in self._dates:
+            delta = self._window_length(self.exceptions[day]) - self._default_length(day)
+            self._prefix.append(self._prefix[-1] + delta)
+
+    # ----- Рабочее окно конкретного дня -----
+
+    def _default_length(self, day):
+        """Длина стандартного рабочего окна для дня (без учёта календаря)."""
+        return self.day_length if day.weekday() in self.weekdays else 0
+
+    @staticmethod
+    def _window_length(window):
+        """Длина окна (start, end) в секундах; None – нерабочий день."""
+        if window is None:
+            return 0
+        return max(0, window[1] - window[0])
+
+    def window_for(self, day):
+        """
+        Возвращает рабочее окно (start_seconds, end_seconds) для даты
+        или None, если день нерабочий.
+        """
+        if day in self.exceptions:
+            return self.exceptions[day]
+        if day.weekday() in self.weekdays:
+            return self.work_start, self.work_end
+        return None
+
+    def seconds_in_day(self, day, from_seconds=0, to_seconds=SECONDS_PER_DAY):
+        """Рабочие секунды дня day в интервале [from_seconds, to_seconds)."""
+        window = self.window_for(day)
+        if window is None:
+            return 0
+        return max(0, min(to_seconds, window[1]) - max(from_seconds, window[0]))
+
+    # ----- Целые дни -----
+
+    def seconds_in_days(self, first_day, last_day):
+        """
+        Рабочие секунды в целых днях диапазона [first_day, last_day).
+        Стоимость не зависит от длины диапазона: O(1) + O(log n) по календарю.
+        """
+        days = (last_day - first_day).days
+        if days <= 0:
+            return 0
+
+        # Целые недели: в каждой одинаковое число рабочих дней
+        weeks, remainder = divmod(days, 7)
+        working_days = weeks * len(self.weekdays)
+
+        # Хвост неполной недели – не больше 6 дней
+        start_weekday = first_day.weekday()
+        for offset in range(remainder):
+            if (start_weekday + offset) % 7 in self.weekdays:
+                working_days += 1
+
+        total = working_days * self.day_length
+
+        # Поправки производственного календаря внутри диапазона
+        if self._dates:
+            lo = bisect_left(self._dates, first_day)
+            hi = bisect_left(self._dates, last_day)
+            total += self._prefix[hi] - self._prefix[lo]
+
+        return total
+
+    # ----- Произвольный интервал -----
+
+    def seconds_between(self, start, end):
+        """
+        Рабочие секунды между двумя datetime в локальном часовом поясе проекта.
+        Если end <= start, возвращает 0.
+        """
+        if end <= start:
+            return 0
+
+        current_tz = timezone.get_current_timezone()
+        if timezone.is_aware(start):
+            start = timezone.localtime(start, current_tz)
+        if timezone.is_aware(end):
+            end = timezone.localtime(end, current_tz)
+
+        start_day = start.date()
+        end_day = end.date()
+
+        # Оба момента в одном дне
+        if start_day == end_day:
+            return self.seconds_in_day(start_day, _seconds_of_day(start), _seconds_of_day(end))
+
+        total = self.seconds_in_day(start_day, from_seconds=_seconds_of_day(start))
+        total += self.seconds_in_days(start_day + timedelta(days=1), end_day)
+        total += self.seconds_in_day(end_day, to_seconds=_seconds_of_day(end))
+        return total
+
+
+# ==================== КЭШ КАЛЕНДАРЯ ====================
+
+_calendar_lock = threading.Lock()
+_calendar_cache = {'calendar': None, 'loaded_at': 0.0}
+
+
+def _default_schedule():
+    """Читает стандартное рабочее окно из settings (с значениями по умолчанию)."""
+    start_hour = getattr(settings, 'WORKING_HOURS_START', 10)
+    end_hour = getattr(settings, 'WORKING_HOURS_END', 18)
+    weekdays = getattr(settings, 'WORKING_WEEKDAYS', (0, 1, 2, 3, 4))
+    return int(start_hour * 3600), int(end_hour * 3600), tuple(weekdays)
+
+
+def build_working_calendar(calendar_days=None):
+    """
+    Собирает WorkingCalendar из настроек и записей WorkingCalendarDay.
+
+    Аргументы:
+        calendar_days: iterable[WorkingCalendarDay] или None (загрузить из БД)
+    """
+    work_start, work_end, weekdays = _default_schedule()
+
+    if calendar_days is None:
+        from .models import WorkingCalendarDay  # локальный импорт: models импортирует этот модуль
+        calendar_days = WorkingCalendarDay.objects.all()
+
+    exceptions = {}
+    for calendar_day in calendar_days:
+        exceptions[calendar_day.date] = calendar_day.get_window(work_start, work_end)
+
+    return WorkingCalendar(work_start, work_end, weekdays, exceptions)
+
+
+def get_working_calendar():
+    """Возвращает кэшированный календарь, при необходимости перечитывая его из БД."""
+    calendar = _calendar_cache['calendar']
+    if calendar is not None and time.monotonic() - _calendar_cache['loaded_at'] < CALENDAR_CACHE_TTL:
+        return calendar
+
+    with _calendar_lock:
+        calendar = _calendar_cache['calendar']
+        if calendar is None or time.monotonic() - _calendar_cache['loaded_at'] >= CALENDAR_CACHE_TTL:
+            calendar = build_working_calendar()
+            _calendar_cache['calendar'] = calendar
+            _calendar_cache['loaded_at'] = time.monotonic()
+    return calendar
+
+
+def invalidate_working_calendar():
+    """Сбрасывает кэш календаря (вызывается сигналами WorkingCalendarDay)."""
+    with _calendar_lock:
+        _calendar_cache['calendar'] = None
+        _calendar_cache['loaded_at'] = 0.0
+
+
+# ==================== ПУБЛИЧНЫЕ ФУНКЦИИ ====================
+
+def working_seconds_between(start, end, calendar=None):
+    """
+    Количество рабочих секунд между start и end.
+
+    Аргументы:
+        start, end: datetime (aware или naive в локальном времени)
+        calendar: WorkingCalendar или None (используется кэшированный)
+
+    Возвращает:
+        float: рабочие секунды (0, если end <= start)
+    """
+    if calendar is None:
+        calendar = get_working_calendar()
+    return calendar.seconds_between(start, end)
+
+
+def working_hours_between(start, end, calendar=None):
+    """
+    Количество рабочих часов между start и end, округлённое вверх
+    (начатый рабочий час считается целым, как в прежнем пошаговом расчёте).
+    """
+    seconds = working_seconds_between(start, end, calendar)
+    return int(math.ceil(seconds / 3600)) if seconds > 0 else 0
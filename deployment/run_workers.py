@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""
+deployment/run_workers.py
+Запуск нескольких воркеров Daphne на одном порту.
+
+Launcher сам открывает слушающий TCP-сокет и передаёт его дескриптор каждому
+воркеру (daphne --fd). Все воркеры принимают соединения из одного сокета,
+ядро распределяет входящие подключения между ними. Nginx по-прежнему
+проксирует на один адрес (127.0.0.1:8000).
+
+ВАЖНО: при --workers > 1 рассылки WebSocket должны идти через Redis,
+иначе клиент увидит только изменения, сделанные в его собственном процессе.
+В .env нужно указать:
+    CHANNEL_LAYER_BACKEND=redis        (или redis_pubsub)
+    USE_REDIS_CACHE=True               (общий снимок доски заказов)
+
+Без USE_REDIS_CACHE launcher не запускает больше одного воркера: у каждого
+процесса был бы свой локальный кэш (версия доски, блокировки, дерево
+категорий) и воркеры расходились бы. Флаг --allow-local-cache снимает
+запрет (например, для отладки на одной машине).
+
+Примеры:
+    python deployment/run_workers.py --workers 4
+    python deployment/run_workers.py --workers 4 --bind 127.0.0.1 --port 8000
+
+Если воркер завершился аварийно, launcher перезапускает его.
+SIGTERM/SIGINT завершают все воркеры.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+# Корень проекта (где manage.py) – рабочая директория воркеров
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Минимальная пауза между перезапусками упавшего воркера (секунды)
+RESTART_DELAY = 1.0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Запуск N воркеров Daphne на одном порту')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='Количество процессов Daphne (по умолчанию – число ядер)')
+    parser.add_argument('--bind', default='127.0.0.1', help='Адрес (по умолчанию 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Порт (по умолчанию 8000)')
+    parser.add_argument('--backlog', type=int, default=2048, help='Длина очереди входящих соединений')
+    parser.add_argument('--application', default='clickcounter.asgi:application',
+                        help='ASGI-приложение (по умолчанию clickcounter.asgi:application)')
+    parser.add_argument('--allow-local-cache', action='store_true',
+                        help='Разрешить --workers > 1 без USE_REDIS_CACHE (локальный кэш в каждом воркере)')
+    parser.add_argument('--daphne-arg', action='append', default=[],
+                        help='Дополнительный аргумент для daphne (можно несколько раз), '
+                             'например --daphne-arg=--proxy-headers')
+    return parser.parse_args()
+
+
+def check_channel_layer(workers, allow_local_cache=False):
+    """
+    Проверяет настройки Redis для нескольких воркеров.
+
+    Без Redis-слоя каналов только предупреждает. Без USE_REDIS_CACHE
+    завершает launcher, если не передан --allow-local-cache.
+    """
+    backend = os.environ.get('CHANNEL_LAYER_BACKEND', 'memory')
+    if workers > 1 and backend not in ('redis', 'redis_pubsub'):
+        print(
+            f"⚠️ CHANNEL_LAYER_BACKEND={backend}: при {workers} воркерах рассылки WebSocket "
+            f"не будут доходить до клиентов других процессов. Укажите redis или redis_pubsub.",
+            file=sys.stderr,
+        )
+    if workers > 1 and os.environ.get('USE_REDIS_CACHE', 'False') != 'True':
+        if not allow_local_cache:
+            print(
+                f"❌ USE_REDIS_CACHE не включён: {workers} воркеров получили бы каждый свой локальный кэш "
+                f"(версия доски заказов, блокировки). Включите USE_REDIS_CACHE=True, запустите один воркер "
+                f"или передайте --allow-local-cache.",
+                file=sys.stderr,
+            )
+            sys.exit(2)
+        print("⚠️ USE_REDIS_CACHE не включён (--allow-local-cache): кэш у каждого воркера свой.",
+              file=sys.stderr)
+
+
+def open_listen_socket(host, port, backlog):
+    """Создаёт слушающий сокет, который наследуют все воркеры."""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def start_worker(sock, args, number):
+    """Запускает один процесс Daphne на унаследованном дескрипторе."""
+    command = [
+        sys.executable, '-m', 'daphne',
+        '--fd', str(sock.fileno()),
+        *args.daphne_arg,
+        args.application,
+    ]
+    process = subprocess.Popen(command, cwd=BASE_DIR, pass_fds=(sock.fileno(),))
+    print(f"🚀 Воркер #{number} запущен (pid {process.pid})")
+    return process
+
+
+def main():
+    args = parse_args()
+
+    # Те же переменные окружения, что увидит Django в воркерах
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(BASE_DIR / '.env')
+    except ImportError:
+        pass
+
+    check_channel_layer(args.workers, args.allow_local_cache)
+
+    sock = open_listen_socket(args.bind, args.port, args.backlog)
+    print(f"Слушаем {args.bind}:{args.port}, воркеров: {args.workers}")
+
+    workers = {number: start_worker(sock, args, number) for number in range(1, args.workers + 1)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    try:
+        while not stopping:
+            time.sleep(RESTART_DELAY)
+            for number, process in list(workers.items()):
+                code = process.poll()
+                if code is not None and not stopping:
+                    print(f"❌ Воркер #{number} (pid {process.pid}) завершился с кодом {code}, перезапуск")
+                    workers[number] = start_worker(sock, args, number)
+    finally:
+        print("🔌 Остановка воркеров...")
+        for process in workers.values():
+            if process.poll() is None:
+                process.terminate()
+        for process in workers.values():
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        sock.close()
+
+
+if __name__ == '__main__':
+    main()
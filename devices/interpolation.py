@@ -0,0 +1,144 @@
+"""
+interpolation.py для приложения devices
+Монотонная кубическая интерполяция цены (PCHIP, Fritsch–Carlson)
+
+Линейная и логарифмическая интерполяция дают излом кривой цены в каждой
+опорной точке. Монотонный кубический сплайн гладкий (непрерывна первая
+производная) и, в отличие от обычного кубического сплайна, не даёт
+«горбов»: между опорными точками цена не выходит за значения соседних
+точек, а где цены точек убывают с тиражом – кривая тоже только убывает.
+
+Коэффициенты сплайна считаются один раз при сохранении опорных точек
+(build_monotone_cubic) и хранятся вместе с кривой в JSON устройства или
+работы; расчёт цены – поиск интервала делением пополам (O(log n)) и
+многочлен третьей степени, без чтения опорных точек из БД.
+
+Кривая – словарь:
+    x – количества в опорных точках (по возрастанию);
+    y – цены в опорных точках;
+    b, c, d – коэффициенты на интервале k:
+        p(x) = y[k] + b[k]·t + c[k]·t² + d[k]·t³, t = x - x[k].
+Вне диапазона опорных точек цена равна цене крайней точки (как у
+остальных методов).
+
+Функции:
+- build_monotone_cubic: коэффициенты сплайна по опорным точкам
+- evaluate: цена в одной точке
+- evaluate_many: цены для нескольких количеств
+"""
+
+from bisect import bisect_right
+
+
+# Значение поля «метод интерполяции» для монотонного кубического сплайна
+MONOTONE_CUBIC = 'monotone_cubic'
+
+
+def _end_slope(h0, h1, delta0, delta1):
+    """Наклон в крайней точке (трёхточечная формула с ограничением монотонности)."""
+    slope = ((2 * h0 + h1) * delta0 - h0 * delta1) / (h0 + h1)
+    if slope * delta0 <= 0:
+        return 0.0
+    if delta0 * delta1 < 0 and abs(slope) > abs(3 * delta0):
+        return 3 * delta0
+    return slope
+
+
+def build_monotone_cubic(points):
+    """
+    Коэффициенты монотонного кубического сплайна.
+
+    Аргументы:
+        points: пары (количество, цена) по возрастанию количества,
+                количества различны
+
+    Возвращает:
+        dict: кривая (x, y, b, c, d); без точек – пустые списки
+    """
+    xs = [float(x) for x, _ in points]
+    ys = [float(y) for _, y in points]
+    n = len(xs)
+    curve = {'x': xs, 'y': ys, 'b': [], 'c': [], 'd': []}
+    if n < 2:
+        return curve
+
+    h = [xs[k + 1] - xs[k] for k in range(n - 1)]
+    delta = [(ys[k + 1] - ys[k]) / h[k] for k in range(n - 1)]
+
+    # Наклоны в опорных точках
+    if n == 2:
+        slopes = [delta[0], delta[0]]
+    else:
+        slopes = [_end_slope(h[0], h[1], delta[0], delta[1])]
+        for k in range(1, n - 1):
+            if delta[k - 1] * delta[k] <= 0:
+                # Локальный экстремум или ровный участок – касательная горизонтальна
+                slopes.append(0.0)
+            else:
+                # Взвешенное гармоническое среднее соседних наклонов
+                w1 = 2 * h[k] + h[k - 1]
+                w2 = h[k] + 2 * h[k - 1]
+                slopes.append((w1 + w2) / (w1 / delta[k - 1] + w2 / delta[k]))
+        slopes.append(_end_slope(h[-1], h[-2], delta[-1], delta[-2]))
+
+    # Форма Эрмита -> коэффициенты многочлена на каждом интервале
+    for k in range(n - 1):
+        curve['b'].append(slopes[k])
+        curve['c'].append((3 * delta[k] - 2 * slopes[k] - slopes[k + 1]) / h[k])
+        curve['d'].append((slopes[k] + slopes[k + 1] - 2 * delta[k]) / (h[k] * h[k]))
+    return curve
+
+
+def evaluate(curve, value):
+    """
+    Цена по кривой для количества value.
+
+    Аргументы:
+        curve: кривая из build_monotone_cubic
+        value: количество (листов, копий, тираж)
+
+    Возвращает:
+        float или None, если в кривой нет опорных точек
+    """
+    xs = curve.get('x')
+    if not xs:
+        return None
+    ys = curve['y']
+    value = float(value)
+    if value <= xs[0]:
+        return ys[0]
+    if value >= xs[-1]:
+        return ys[-1]
+    k = bisect_right(xs, value) - 1
+    t = value - xs[k]
+    return ys[k] + t * (curve['b'][k] + t * (curve['c'][k] + t * curve['d'][k]))
+
+
+def evaluate_many(curve, values):
+    """
+    Цены по кривой для нескольких количеств (пакетный расчёт).
+
+    Аргументы:
+        curve: кривая из build_monotone_cubic
+        values: количества
+
+    Возвращает:
+        list: цены (float) в порядке values; без опорных точек – None
+    """
+    xs = curve.get('x')
+    if not xs:
+        return [None] * len(values)
+    ys, bs, cs, ds = curve['y'], curve['b'], curve['c'], curve['d']
+    first, last = xs[0], xs[-1]
+    result = []
+    for value in values:
+        value = float(value)
+        if value <= first:
+            result.append(ys[0])
+        elif value >= last:
+            result.append(ys[-1])
+        else:
+            k = bisect_right(xs, value) - 1
+            t = value - xs[k]
+            result.append(ys[k] + t * (bs[k] + t * (cs[k] + t * ds[k])))
+    return result
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0003_alter_printer_devices_interpolation_method_laminator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laminator',
+            name='laminator_price_curves',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Кривые цен'),
+        ),
+        migrations.AddField(
+            model_name='printer',
+            name='devices_price_curves',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Кривые цен'),
+        ),
+        migrations.AlterField(
+            model_name='laminator',
+            name='laminator_interpolation_method',
+            field=models.CharField(choices=[('linear', 'Линейная интерполяция'), ('logarithmic', 'Логарифмическая интерполяция'), ('monotone_cubic', 'Монотонная кубическая интерполяция')], default='linear', help_text='Выберите метод интерполяции для расчёта стоимости при произвольном тираже', max_length=20, verbose_name='Метод интерполяции'),
+        ),
+        migrations.AlterField(
+            model_name='printer',
+            name='devices_interpolation_method',
+            field=models.CharField(choices=[('linear', 'Линейная интерполяция'), ('logarithmic', 'Логарифмическая интерполяция'), ('monotone_cubic', 'Монотонная кубическая интерполяция')], default='linear', help_text='Выберите метод интерполяции для расчёта стоимости при произвольном тираже', max_length=20, verbose_name='Метод интерполяции'),
+        ),
+    ]
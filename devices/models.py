@@ -22,6 +22,8 @@ from sheet_formats.models import SheetFormat  # Связанная модель
 from decimal import Decimal, ROUND_HALF_UP  # Для точных денежных расчётов
 import math  # Для логарифмической интерполяции
 
+from .interpolation import MONOTONE_CUBIC, build_monotone_cubic, evaluate
+
 
 class Printer(models.Model):
     """
@@ -40,9 +42,11 @@ class Printer(models.Model):
     # Префикс devices_ добавлен, чтобы избежать конфликтов имён с другими приложениями.
     INTERPOLATION_LINEAR = 'linear'          # Линейная интерполяция
     INTERPOLATION_LOGARITHMIC = 'logarithmic' # Логарифмическая интерполяция
+    INTERPOLATION_MONOTONE_CUBIC = MONOTONE_CUBIC  # Монотонный кубический сплайн (devices/interpolation.py)
     INTERPOLATION_CHOICES = [
         (INTERPOLATION_LINEAR, 'Линейная интерполяция'),
         (INTERPOLATION_LOGARITHMIC, 'Логарифмическая интерполяция'),
+        (INTERPOLATION_MONOTONE_CUBIC, 'Монотонная кубическая интерполяция'),
     ]
 
     # ---------- Поля модели ----------
@@ -100,6 +104,16 @@ class Printer(models.Model):
         help_text='Выберите метод интерполяции для расчёта стоимости при произвольном тираже',
     )
 
+    # Коэффициенты монотонного кубического сплайна по опорным точкам цен
+    # (себестоимость, наценка, цена за лист). Пересчитываются при сохранении
+    # и удалении цен печати (print_price/signals.py), вручную не редактируются.
+    devices_price_curves = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Кривые цен',
+    )
+
     # Дата и время создания записи (автоматически проставляется один раз при создании)
     created_at = models.DateTimeField(
         auto_now_add=True,   # Устанавливается автоматически при первом сохранении
@@ -173,10 +187,12 @@ class Printer(models.Model):
     def get_interpolation_method_display_short(self):
         """
         Возвращает краткое название метода интерполяции для отображения в таблице.
-        "Линейная" или "Логарифмическая" (без слова "интерполяция").
+        "Линейная", "Логарифмическая" или "Монотонная кубическая" (без слова "интерполяция").
         """
         if self.devices_interpolation_method == self.INTERPOLATION_LINEAR:
             return "Линейная"
+        elif self.devices_interpolation_method == self.INTERPOLATION_MONOTONE_CUBIC:
+            return "Монотонная кубическая"
         else:
             return "Логарифмическая"
 
@@ -240,6 +256,14 @@ class Printer(models.Model):
             if len(price_points) == 1:
                 return price_points[0].price_per_sheet
 
+            # Монотонный сплайн: коэффициенты уже посчитаны, вне диапазона – цена крайней точки
+            if self.devices_interpolation_method == self.INTERPOLATION_MONOTONE_CUBIC:
+                curve = self.devices_price_curves.get('price_per_sheet')
+                if curve is None:
+                    curve = build_monotone_cubic([(p.copies, p.price_per_sheet) for p in price_points])
+                result = Decimal(str(evaluate(curve, copies)))
+                return result.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
             # Преобразуем QuerySet в список кортежей (copies, price)
             points = [(p.copies, p.price_per_sheet) for p in price_points]
 
@@ -308,6 +332,14 @@ class Printer(models.Model):
         if self.duplex_coefficient < 1.0:
             raise ValueError("Коэффициент не может быть меньше 1.0")
 
+        # Кривые цен пишут только сигналы опорных точек: сохранение не должно
+        # перезаписывать их значением, прочитанным до изменения точек
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'devices_price_curves'
+            ]
+
         # Вызов оригинального метода save
         super().save(*args, **kwargs)
 
@@ -329,9 +361,11 @@ class Laminator(models.Model):
     # Константы для метода интерполяции (префикс laminator_ для уникальности)
     LAMINATOR_INTERPOLATION_LINEAR = 'linear'
     LAMINATOR_INTERPOLATION_LOGARITHMIC = 'logarithmic'
+    LAMINATOR_INTERPOLATION_MONOTONE_CUBIC = MONOTONE_CUBIC
     LAMINATOR_INTERPOLATION_CHOICES = [
         (LAMINATOR_INTERPOLATION_LINEAR, 'Линейная интерполяция'),
         (LAMINATOR_INTERPOLATION_LOGARITHMIC, 'Логарифмическая интерполяция'),
+        (LAMINATOR_INTERPOLATION_MONOTONE_CUBIC, 'Монотонная кубическая интерполяция'),
     ]
 
     # Название ламинатора (уникальное)
@@ -376,6 +410,14 @@ class Laminator(models.Model):
         help_text='Выберите метод интерполяции для расчёта стоимости при произвольном тираже',
     )
 
+    # Коэффициенты монотонного кубического сплайна (как devices_price_curves у принтера)
+    laminator_price_curves = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Кривые цен',
+    )
+
     # Даты создания и обновления
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
@@ -409,7 +451,11 @@ class Laminator(models.Model):
         return f"{self.duplex_coefficient:.1f}"
 
     def get_interpolation_method_display_short(self):
-        return "Линейная" if self.laminator_interpolation_method == self.LAMINATOR_INTERPOLATION_LINEAR else "Логарифмическая"
+        if self.laminator_interpolation_method == self.LAMINATOR_INTERPOLATION_LINEAR:
+            return "Линейная"
+        if self.laminator_interpolation_method == self.LAMINATOR_INTERPOLATION_MONOTONE_CUBIC:
+            return "Монотонная кубическая"
+        return "Логарифмическая"
 
     def to_dict(self):
         sheet_format_info = {
@@ -447,4 +493,11 @@ class Laminator(models.Model):
             raise ValueError("Поля не могут быть отрицательными")
         if self.duplex_coefficient < 1.0:
             raise ValueError("Коэффициент не может быть меньше 1.0")
+        # Кривые цен пишут только сигналы опорных точек: сохранение не должно
+        # перезаписывать их значением, прочитанным до изменения точек
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'laminator_price_curves'
+            ]
         super().save(*args, **kwargs)
\ No newline at end of file
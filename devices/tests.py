@@ -1,3 +1,72 @@
-from django.test import TestCase
+import random
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from devices.interpolation import build_monotone_cubic, evaluate, evaluate_many
+
+
+def random_points(rng, count, direction):
+    """Опорные точки со случайными шагами; direction: 1 – цены растут, -1 – убывают, 0 – как угодно."""
+    xs = sorted(rng.sample(range(1, 100000), count))
+    price = rng.uniform(1, 500)
+    points = []
+    for x in xs:
+        points.append((x, round(price, 2)))
+        step = rng.choice([0, rng.uniform(0, 50), rng.uniform(0, 0.5)])
+        price = price + step * (direction or rng.choice([1, -1]))
+        price = max(price, 0)
+    return points
+
+
+class MonotoneCubicPropertyTest(SimpleTestCase):
+    """Свойства монотонного кубического сплайна (devices/interpolation.py) на случайных кривых."""
+
+    CURVES = 300
+
+    def sample_values(self, rng, points):
+        first, last = points[0][0], points[-1][0]
+        return sorted(rng.uniform(first - 10, last + 10) for _ in range(200)) + [x for x, _ in points]
+
+    def test_agrees_with_breakpoints(self):
+        rng = random.Random(1)
+        for _ in range(self.CURVES):
+            points = random_points(rng, rng.randint(1, 12), 0)
+            curve = build_monotone_cubic(points)
+            for x, y in points:
+                self.assertAlmostEqual(evaluate(curve, x), float(y), places=9)
+            # Вне диапазона – цена крайней точки
+            self.assertEqual(evaluate(curve, points[0][0] - 1), float(points[0][1]))
+            self.assertEqual(evaluate(curve, points[-1][0] + 1), float(points[-1][1]))
+
+    def test_monotone_data_gives_monotone_curve(self):
+        rng = random.Random(2)
+        for direction in (1, -1):
+            for _ in range(self.CURVES):
+                points = random_points(rng, rng.randint(2, 12), direction)
+                curve = build_monotone_cubic(points)
+                values = evaluate_many(curve, sorted(self.sample_values(rng, points)))
+                for previous, current in zip(values, values[1:]):
+                    self.assertGreaterEqual((current - previous) * direction, -1e-9)
+
+    def test_stays_between_neighbour_breakpoints(self):
+        rng = random.Random(3)
+        for _ in range(self.CURVES):
+            points = random_points(rng, rng.randint(2, 12), 0)
+            curve = build_monotone_cubic(points)
+            for (x1, y1), (x2, y2) in zip(points, points[1:]):
+                low, high = min(y1, y2), max(y1, y2)
+                for value in evaluate_many(curve, [rng.uniform(x1, x2) for _ in range(20)]):
+                    self.assertTrue(low - 1e-9 <= value <= high + 1e-9)
+
+    def test_batch_matches_scalar(self):
+        rng = random.Random(4)
+        points = random_points(rng, 8, 0)
+        curve = build_monotone_cubic(points)
+        values = self.sample_values(rng, points)
+        self.assertEqual(evaluate_many(curve, values), [evaluate(curve, value) for value in values])
+
+    def test_empty_curve(self):
+        curve = build_monotone_cubic([])
+        self.assertIsNone(evaluate(curve, 10))
+        self.assertEqual(evaluate_many(curve, [1, 2]), [None, None])
+        self.assertEqual(evaluate(build_monotone_cubic([(100, 5)]), 1), 5.0)
@@ -20,7 +20,6 @@ class PrintPriceConfig(AppConfig):
     def ready(self):
         """
         Метод вызывается при готовности приложения
-        Можно использовать для регистрации сигналов и т.д.
+        Регистрирует сигналы (пересчёт кривых цен при изменении опорных точек)
         """
-        # Пока ничего не делаем, но можно добавить сигналы
-        pass
\ No newline at end of file
+        import print_price.signals
\ No newline at end of file
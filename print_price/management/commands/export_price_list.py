@@ -0,0 +1,56 @@
+"""
+print_price/management/commands/export_price_list.py
+Выгрузка прайс-листа целиком в CSV или XLSX: цены печати принтеров,
+ламинаторов, цены работ справочника по листам или по тиражу.
+
+Выгруженный файл можно поправить и загрузить обратно командой
+import_price_list (формат по расширению или --format).
+
+Пример:
+    python manage.py export_price_list printer --output prices.xlsx
+    python manage.py export_price_list laminator --owner 2 --output laminator.csv
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from print_price.price_lists import PRICE_TABLES, iter_csv_lines, write_price_list_workbook
+
+
+class Command(BaseCommand):
+    help = 'Выгружает прайс-лист (цены принтеров, ламинаторов или работ) в файл CSV или XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=list(PRICE_TABLES), help='Таблица цен')
+        parser.add_argument('--output', required=True, help='Файл для выгрузки (.csv или .xlsx)')
+        parser.add_argument(
+            '--owner',
+            type=int,
+            help='id принтера, ламинатора или работы (по умолчанию – все)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'xlsx'],
+            help='Формат файла, если его нельзя определить по расширению'
+        )
+
+    def handle(self, *args, **options):
+        table = options['table']
+        output = options['output']
+        owner = options['owner']
+
+        export_format = options['format'] or os.path.splitext(output)[1].lstrip('.').lower()
+        if export_format == 'csv':
+            with open(output, 'w', encoding='utf-8', newline='') as fileobj:
+                count = -1  # строка заголовков
+                for line in iter_csv_lines(table, owner):
+                    fileobj.write(line)
+                    count += 1
+        elif export_format == 'xlsx':
+            with open(output, 'wb') as fileobj:
+                count = write_price_list_workbook(fileobj, table, owner)
+        else:
+            raise CommandError('Укажите файл .csv или .xlsx (или --format)')
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Строк прайс-листа: {count}, файл: {output}"))
@@ -0,0 +1,75 @@
+"""
+print_price/management/commands/import_price_list.py
+Загрузка прайс-листа целиком из CSV или XLSX: цены печати принтеров,
+ламинаторов, цены работ справочника по листам или по тиражу.
+
+Файл проверяется целиком; при ошибках цены не меняются, а ошибки
+записываются в отчёт (CSV: строка, поле, ошибка). Точки записываются одной
+транзакцией, кривые цен пересчитываются один раз на владельца. Формат
+столбцов – в print_price/price_lists.py (тот же, что у export_price_list).
+
+Пример:
+    python manage.py import_price_list printer prices.xlsx
+    python manage.py import_price_list printer supplier.csv --owner 3
+    python manage.py import_price_list work_circulation works.csv --dry-run
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from print_price.price_lists import (
+    PRICE_TABLES, iter_rows, import_price_list, write_error_report, ImportFormatError,
+)
+
+
+class Command(BaseCommand):
+    help = 'Загружает прайс-лист (цены принтеров, ламинаторов или работ) из файла CSV или XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=list(PRICE_TABLES), help='Таблица цен')
+        parser.add_argument('path', help='Файл .csv или .xlsx (первая строка – заголовки)')
+        parser.add_argument(
+            '--owner',
+            type=int,
+            help='id принтера, ламинатора или работы – все строки файла относятся к нему'
+        )
+        parser.add_argument(
+            '--report',
+            help='Куда записать отчёт об ошибках (CSV); по умолчанию <файл>.errors.csv'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только проверить файл, ничего не сохраняя'
+        )
+
+    def handle(self, *args, **options):
+        table = options['table']
+        path = options['path']
+        owner = options['owner']
+        if owner is not None and not PRICE_TABLES[table]['owner_model'].objects.filter(pk=owner).exists():
+            raise CommandError(f"Не найден владелец с id {owner}")
+
+        try:
+            with open(path, 'rb') as import_file:
+                result = import_price_list(
+                    iter_rows(import_file, path, table), table, owner=owner, dry_run=options['dry_run'],
+                )
+        except OSError as e:
+            raise CommandError(f"Не удалось открыть файл: {e}")
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+
+        if result['errors']:
+            report_path = options['report'] or f"{path}.errors.csv"
+            with open(report_path, 'w', encoding='utf-8', newline='') as report_file:
+                write_error_report(result, report_file)
+            raise CommandError(
+                f"❌ Прайс-лист не загружен: ошибок {len(result['errors'])}, отчёт: {report_path}"
+            )
+
+        action = 'Проверено' if options['dry_run'] else 'Загружено'
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {action}: создано {result['created']}, обновлено {result['updated']}, "
+            f"без изменений {result['unchanged']} из {result['rows']} строк "
+            f"(владельцев с изменёнными ценами: {result['owners']})"
+        ))
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:20
+
+from django.db import migrations
+
+from devices.interpolation import build_monotone_cubic
+
+CURVE_FIELDS = ('cost', 'markup_percent', 'price_per_sheet')
+
+
+def build_curves(rows):
+    """Кривые по строкам (copies, cost, markup_percent, price_per_sheet), как print_price.utils.build_price_curves."""
+    rows = list(rows)
+    return {
+        field: build_monotone_cubic([(row[0], row[index]) for row in rows])
+        for index, field in enumerate(CURVE_FIELDS, start=1)
+    }
+
+
+def build_existing_curves(apps, schema_editor):
+    """Коэффициенты сплайна для цен, заведённых до появления метода monotone_cubic."""
+    Printer = apps.get_model('devices', 'Printer')
+    Laminator = apps.get_model('devices', 'Laminator')
+    PrintPrice = apps.get_model('print_price', 'PrintPrice')
+    LaminatorPrice = apps.get_model('print_price', 'LaminatorPrice')
+
+    for printer_id in Printer.objects.values_list('id', flat=True):
+        rows = PrintPrice.objects.filter(printer_id=printer_id).order_by('copies').values_list('copies', *CURVE_FIELDS)
+        Printer.objects.filter(pk=printer_id).update(devices_price_curves=build_curves(rows))
+    for laminator_id in Laminator.objects.values_list('id', flat=True):
+        rows = (
+            LaminatorPrice.objects.filter(laminator_id=laminator_id)
+            .order_by('copies').values_list('copies', *CURVE_FIELDS)
+        )
+        Laminator.objects.filter(pk=laminator_id).update(laminator_price_curves=build_curves(rows))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devices', '0004_price_curves'),
+        ('print_price', '0005_alter_printprice_options_laminatorprice'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_existing_curves, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,519 @@
+"""
+price_lists.py для приложения print_price
+Импорт и экспорт прайс-листов целиком (CSV/XLSX): цены печати принтеров,
+цены ламинаторов, цены работ справочника по листам и по тиражу
+
+Раньше опорные точки цен правились по одной: каждая правка – отдельный
+запрос с проверкой уникальности и сохранением одной строки, а сигнал
+после каждой строки заново строил кривые цен владельца. Замена прайса
+принтера после смены поставщика – десятки запросов.
+
+Импорт прайс-листа:
+- файл читается целиком и проверяется в памяти: типы и ограничения полей
+  (как у полей модели), владельцы (принтер, ламинатор, работа) – одним
+  запросом, повторы пары (владелец, количество) в файле;
+- если есть ошибки, ничего не записывается – прайс-лист не применяется
+  частично (ключ 'errors' итога: строка файла, поле, сообщение);
+- существующие точки владельцев из файла читаются одним запросом, точки
+  без изменений не записываются;
+- новые и изменённые точки записываются одним bulk_create(update_conflicts=True)
+  по уникальной паре (владелец, количество), в одной транзакции;
+- bulk_create не вызывает save() и сигналы: цена за лист считается
+  calculate_price() модели, а кривые цен (коэффициенты сплайна, см.
+  devices/interpolation.py) пересчитываются ровно один раз на каждого
+  изменённого владельца. Для работ справочника после коммита один раз
+  пересчитываются дополнительные работы просчётов (resync.py).
+Импорт только добавляет и обновляет точки – точки, которых нет в файле,
+не удаляются.
+
+Формат файла: первая строка – заголовки, имена полей или русские названия
+из TABLE_COLUMNS (как в экспорте, поэтому выгруженный файл можно поправить
+и загрузить обратно). Владелец строки – столбец id (printer_id, …) или
+название (printer, …); если владелец задан при импорте (owner), столбцы
+владельца не читаются – так прайс одного принтера можно загрузить другому.
+Вычисляемые столбцы (цена за лист) при импорте не читаются.
+
+Функции:
+- iter_rows: чтение строк CSV/XLSX
+- import_price_list: проверка и загрузка прайс-листа
+- iter_price_rows: строки прайс-листа для экспорта
+- iter_csv_lines: экспорт в CSV построчно
+- write_price_list_workbook: экспорт в книгу Excel
+"""
+
+import codecs
+import csv
+import io
+from itertools import chain
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from devices.models import Printer, Laminator
+from spravochnik_dopolnitelnyh_rabot.models import Work, WorkPrice, WorkCirculationPrice
+from spravochnik_dopolnitelnyh_rabot.resync import schedule_resync
+from spravochnik_dopolnitelnyh_rabot.utils import rebuild_work_curves
+from .models import PrintPrice, LaminatorPrice
+from .utils import rebuild_printer_curves, rebuild_laminator_curves
+
+
+# Сколько строк записывать одним bulk_create
+PRICE_LIST_BATCH_SIZE = getattr(settings, 'PRINT_PRICE_LIST_BATCH_SIZE', 500)
+
+# Таблицы цен: модель опорной точки, владелец, количество, поля цены.
+# computed – поля, которые модель считает сама (calculate_price), только экспорт;
+# rebuild_curves – пересчёт кривых владельца; after_import – что ещё сделать
+# для каждого изменённого владельца.
+PRICE_TABLES = {
+    'printer': {
+        'title': 'Цены печати',
+        'model': PrintPrice,
+        'owner_model': Printer,
+        'owner_field': 'printer',
+        'quantity_field': 'copies',
+        'value_fields': ('cost', 'markup_percent'),
+        'computed': ('price_per_sheet',),
+        'rebuild_curves': rebuild_printer_curves,
+        'after_import': None,
+    },
+    'laminator': {
+        'title': 'Цены ламинирования',
+        'model': LaminatorPrice,
+        'owner_model': Laminator,
+        'owner_field': 'laminator',
+        'quantity_field': 'copies',
+        'value_fields': ('cost', 'markup_percent'),
+        'computed': ('price_per_sheet',),
+        'rebuild_curves': rebuild_laminator_curves,
+        'after_import': None,
+    },
+    'work_sheets': {
+        'title': 'Цены работ по листам',
+        'model': WorkPrice,
+        'owner_model': Work,
+        'owner_field': 'work',
+        'quantity_field': 'sheets',
+        'value_fields': ('price',),
+        'computed': (),
+        'rebuild_curves': rebuild_work_curves,
+        'after_import': schedule_resync,
+    },
+    'work_circulation': {
+        'title': 'Цены работ по тиражу',
+        'model': WorkCirculationPrice,
+        'owner_model': Work,
+        'owner_field': 'work',
+        'quantity_field': 'circulation',
+        'value_fields': ('price',),
+        'computed': (),
+        'rebuild_curves': rebuild_work_curves,
+        'after_import': schedule_resync,
+    },
+}
+
+# Столбцы файла (порядок экспорта): имя поля → заголовок
+TABLE_COLUMNS = {
+    'printer': (
+        ('printer_id', 'ID принтера'),
+        ('printer', 'Принтер'),
+        ('copies', 'Тираж'),
+        ('cost', 'Себестоимость'),
+        ('markup_percent', 'Наценка (%)'),
+        ('price_per_sheet', 'Цена за лист'),
+    ),
+    'laminator': (
+        ('laminator_id', 'ID ламинатора'),
+        ('laminator', 'Ламинатор'),
+        ('copies', 'Тираж'),
+        ('cost', 'Себестоимость'),
+        ('markup_percent', 'Наценка (%)'),
+        ('price_per_sheet', 'Цена за лист'),
+    ),
+    'work_sheets': (
+        ('work_id', 'ID работы'),
+        ('work', 'Работа'),
+        ('sheets', 'Листов'),
+        ('price', 'Цена'),
+    ),
+    'work_circulation': (
+        ('work_id', 'ID работы'),
+        ('work', 'Работа'),
+        ('circulation', 'Тираж'),
+        ('price', 'Цена'),
+    ),
+}
+
+
+class ImportFormatError(Exception):
+    """Файл нельзя прочитать как прайс-лист."""
+
+
+# ========== ЧТЕНИЕ ФАЙЛА ==========
+
+def _cell_text(value):
+    """Значение ячейки как строка (числа Excel без «.0» и без хвоста двоичной дроби)."""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        return str(round(value, 6))
+    return str(value).strip()
+
+
+def _iter_csv(fileobj):
+    """
+    Строки CSV: кодировка UTF-8 (с BOM или без), разделитель «;», табуляция
+    или «,». Разделитель определяется по строке заголовков: в ценах бывает
+    десятичная запятая, и по строкам данных его не угадать.
+    """
+    text = codecs.getreader('utf-8-sig')(fileobj)
+
+    header = next(text, '')
+    delimiter = next((char for char in ';\t,' if char in header), ',')
+    yield from csv.reader(chain([header], text), delimiter=delimiter)
+
+
+def _iter_xlsx(fileobj):
+    """Строки первого листа XLSX."""
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Не удалось открыть файл Excel: {e}")
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename, table):
+    """
+    Читает строки прайс-листа.
+
+    Аргументы:
+        fileobj: двоичный файловый объект
+        filename: имя файла – по расширению выбирается формат (.csv или .xlsx)
+        table: ключ PRICE_TABLES
+
+    Возвращает (генератор):
+        tuple: (номер строки в файле, словарь {поле: текст})
+
+    Исключения:
+        ImportFormatError: неизвестный формат или нет столбца количества
+    """
+    name = filename.lower()
+    if name.endswith('.xlsx'):
+        rows = _iter_xlsx(fileobj)
+    elif name.endswith('.csv'):
+        rows = _iter_csv(fileobj)
+    else:
+        raise ImportFormatError('Поддерживаются файлы .csv и .xlsx')
+
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFormatError('Файл пуст')
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFormatError(f"Не удалось прочитать CSV: {e}")
+
+    aliases = {}
+    for field, title in TABLE_COLUMNS[table]:
+        aliases[field] = aliases[title.lower()] = field
+    columns = [aliases.get(str(cell or '').strip().lower()) for cell in header]
+
+    quantity_field = PRICE_TABLES[table]['quantity_field']
+    if quantity_field not in columns:
+        title = dict(TABLE_COLUMNS[table])[quantity_field]
+        raise ImportFormatError(f"В первой строке нет столбца «{quantity_field}» (или «{title}»)")
+
+    try:
+        for row_number, row in enumerate(rows, start=2):
+            values = {column: _cell_text(value) for column, value in zip(columns, row) if column}
+            if any(values.values()):
+                yield row_number, values
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFormatError(f"Не удалось прочитать CSV: {e}")
+
+
+# ========== ИМПОРТ ==========
+
+def _clean_value(model, field_name, text):
+    """Значение поля модели из текста ячейки (десятичная запятая допускается)."""
+    field = model._meta.get_field(field_name)
+    if not text:
+        raise ValidationError('Обязательное поле')
+    if field.get_internal_type() == 'DecimalField':
+        text = text.replace(' ', '').replace(',', '.')
+    return field.clean(text, None)
+
+
+def _resolve_owners(spec, entries, errors):
+    """
+    Находит владельцев строк одним запросом: по id, иначе по названию.
+    Строки с ненайденным или неоднозначным владельцем попадают в errors.
+    """
+    owner_field = spec['owner_field']
+    ids = set()
+    names = set()
+    for entry in entries:
+        if entry['owner_id'] is not None:
+            ids.add(entry['owner_id'])
+        else:
+            names.add(entry['owner_name'])
+
+    by_id = set()
+    by_name = {}
+    if ids or names:
+        owners = spec['owner_model'].objects.filter(Q(pk__in=ids) | Q(name__in=names)).values_list('pk', 'name')
+        for pk, name in owners:
+            by_id.add(pk)
+            by_name.setdefault(name, []).append(pk)
+
+    resolved = []
+    for entry in entries:
+        if entry['owner_id'] is not None:
+            if entry['owner_id'] not in by_id:
+                errors.append((entry['row'], f'{owner_field}_id', f"Не найден: {entry['owner_id']}"))
+                continue
+        else:
+            found = by_name.get(entry['owner_name'], [])
+            if not found:
+                errors.append((entry['row'], owner_field, f"Не найден: «{entry['owner_name']}»"))
+                continue
+            if len(found) > 1:
+                errors.append((
+                    entry['row'], owner_field,
+                    f"Несколько записей с названием «{entry['owner_name']}» – укажите {owner_field}_id",
+                ))
+                continue
+            entry['owner_id'] = found[0]
+        resolved.append(entry)
+    return resolved
+
+
+def import_price_list(rows, table, owner=None, dry_run=False):
+    """
+    Проверяет прайс-лист в памяти и загружает его одной транзакцией.
+    При ошибках в файле ничего не записывается.
+
+    Аргументы:
+        rows: строки из iter_rows – (номер строки, {поле: текст})
+        table: ключ PRICE_TABLES
+        owner: владелец всех строк (объект или id); None – владелец из файла
+        dry_run: только проверить, ничего не сохраняя
+
+    Возвращает:
+        dict: rows – строк в файле; created, updated, unchanged – точек;
+              owners – владельцев с изменёнными ценами;
+              errors – список (строка, поле, сообщение)
+    """
+    spec = PRICE_TABLES[table]
+    model = spec['model']
+    owner_field = spec['owner_field']
+    quantity_field = spec['quantity_field']
+    value_fields = spec['value_fields']
+    owner_id = getattr(owner, 'pk', owner)
+
+    result = {'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'owners': 0, 'errors': []}
+    errors = result['errors']
+
+    # --- Проверка строк ---
+    entries = []
+    for row_number, values in rows:
+        result['rows'] += 1
+        entry = {'row': row_number, 'owner_id': owner_id, 'owner_name': None, 'values': {}}
+        row_ok = True
+
+        if owner_id is None:
+            id_text = values.get(f'{owner_field}_id', '')
+            if id_text:
+                try:
+                    entry['owner_id'] = int(id_text)
+                except ValueError:
+                    errors.append((row_number, f'{owner_field}_id', f"Ожидается число: «{id_text}»"))
+                    row_ok = False
+            elif values.get(owner_field):
+                entry['owner_name'] = values[owner_field]
+            else:
+                errors.append((row_number, owner_field, 'Не указан'))
+                row_ok = False
+
+        for field_name in (quantity_field, *value_fields):
+            try:
+                entry['values'][field_name] = _clean_value(model, field_name, values.get(field_name, ''))
+            except ValidationError as e:
+                errors.append((row_number, field_name, '; '.join(e.messages)))
+                row_ok = False
+
+        if row_ok:
+            entries.append(entry)
+
+    if owner_id is None:
+        entries = _resolve_owners(spec, entries, errors)
+    elif not spec['owner_model'].objects.filter(pk=owner_id).exists():
+        errors.append((0, owner_field, f"Не найден: {owner_id}"))
+        entries = []
+
+    seen = {}
+    for entry in entries:
+        key = (entry['owner_id'], entry['values'][quantity_field])
+        if key in seen:
+            errors.append((
+                entry['row'], quantity_field,
+                f"Повтор: {key[1]} уже задан в строке {seen[key]}",
+            ))
+        else:
+            seen[key] = entry['row']
+
+    if errors:
+        errors.sort(key=lambda error: error[0])
+        return result
+
+    # --- Сравнение с сохранёнными точками ---
+    owner_ids = {entry['owner_id'] for entry in entries}
+    existing = {
+        (values[0], values[1]): values[2:]
+        for values in model.objects.filter(**{f'{owner_field}_id__in': owner_ids})
+        .values_list(f'{owner_field}_id', quantity_field, *value_fields)
+    }
+
+    objects = []
+    changed_owners = set()
+    for entry in entries:
+        key = (entry['owner_id'], entry['values'][quantity_field])
+        new_values = tuple(entry['values'][name] for name in value_fields)
+        if key not in existing:
+            result['created'] += 1
+        elif existing[key] != new_values:
+            result['updated'] += 1
+        else:
+            result['unchanged'] += 1
+            continue
+        obj = model(**{f'{owner_field}_id': entry['owner_id']}, **entry['values'])
+        if spec['computed']:
+            # bulk_create не вызывает save() – цену за лист считаем здесь
+            obj.calculate_price()
+        objects.append(obj)
+        changed_owners.add(entry['owner_id'])
+
+    result['owners'] = len(changed_owners)
+    if dry_run or not objects:
+        return result
+
+    # --- Запись ---
+    with transaction.atomic():
+        model.objects.bulk_create(
+            objects,
+            batch_size=PRICE_LIST_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=[owner_field, quantity_field],
+            update_fields=[*value_fields, *spec['computed'], 'updated_at'],
+        )
+        # Сигналы не вызывались: кривые пересчитываются один раз на владельца
+        for changed_owner_id in sorted(changed_owners):
+            spec['rebuild_curves'](changed_owner_id)
+            if spec['after_import']:
+                spec['after_import'](changed_owner_id)
+    return result
+
+
+def write_error_report(result, fileobj):
+    """
+    Записывает отчёт об ошибках импорта в CSV (разделитель «;», UTF-8 с BOM).
+
+    Аргументы:
+        result: итог import_price_list
+        fileobj: текстовый файловый объект
+    """
+    fileobj.write('﻿')
+    writer = csv.writer(fileobj, delimiter=';')
+    writer.writerow(['Строка', 'Поле', 'Ошибка'])
+    writer.writerows(result['errors'])
+
+
+# ========== ЭКСПОРТ ==========
+
+def iter_price_rows(table, owner=None):
+    """
+    Строки прайс-листа в порядке столбцов TABLE_COLUMNS: по названию
+    владельца и количеству.
+
+    Аргументы:
+        table: ключ PRICE_TABLES
+        owner: только точки этого владельца (объект или id); None – все
+
+    Возвращает (генератор):
+        tuple: значения строки (числа – Decimal и int)
+    """
+    spec = PRICE_TABLES[table]
+    owner_field = spec['owner_field']
+    prices = spec['model'].objects.all()
+    if owner is not None:
+        prices = prices.filter(**{f'{owner_field}_id': getattr(owner, 'pk', owner)})
+    yield from (
+        prices.order_by(f'{owner_field}__name', f'{owner_field}_id', spec['quantity_field'])
+        .values_list(
+            f'{owner_field}_id', f'{owner_field}__name', spec['quantity_field'],
+            *spec['value_fields'], *spec['computed'],
+        )
+        .iterator()
+    )
+
+
+def iter_csv_lines(table, owner=None):
+    """Прайс-лист в CSV построчно (разделитель «;», UTF-8 с BOM – открывается в Excel)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+
+    def take():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow([title for _, title in TABLE_COLUMNS[table]])
+    yield '﻿' + take()
+    for values in iter_price_rows(table, owner):
+        writer.writerow(values)
+        yield take()
+
+
+def write_price_list_workbook(fileobj, table, owner=None):
+    """
+    Записывает прайс-лист в книгу Excel.
+
+    Аргументы:
+        fileobj: файл (или file-like объект), открытый на запись
+        table: ключ PRICE_TABLES
+        owner: только точки этого владельца; None – все
+
+    Возвращает:
+        int: количество строк прайс-листа
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=PRICE_TABLES[table]['title'])
+    ws.column_dimensions['B'].width = 40
+    ws.freeze_panes = 'A2'
+
+    header = []
+    for _, title in TABLE_COLUMNS[table]:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+
+    count = 0
+    for values in iter_price_rows(table, owner):
+        ws.append(list(values))
+        count += 1
+    wb.save(fileobj)
+    return count
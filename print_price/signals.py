@@ -0,0 +1,28 @@
+"""
+signals.py для приложения print_price
+
+Коэффициенты монотонного кубического сплайна (devices/interpolation.py)
+хранятся у принтера и ламинатора и пересчитываются здесь – при каждом
+сохранении или удалении опорной точки цены. Расчёт цены методом
+monotone_cubic поэтому не читает опорные точки.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import LaminatorPrice, PrintPrice
+from .utils import rebuild_laminator_curves, rebuild_printer_curves
+
+
+@receiver(post_save, sender=PrintPrice)
+@receiver(post_delete, sender=PrintPrice)
+def print_price_changed(sender, instance, **kwargs):
+    """Пересчитывает кривые цен принтера после изменения его цены печати."""
+    rebuild_printer_curves(instance.printer_id)
+
+
+@receiver(post_save, sender=LaminatorPrice)
+@receiver(post_delete, sender=LaminatorPrice)
+def laminator_price_changed(sender, instance, **kwargs):
+    """Пересчитывает кривые цен ламинатора после изменения его цены ламинирования."""
+    rebuild_laminator_curves(instance.laminator_id)
@@ -1,3 +1,134 @@
+import io
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from devices.models import Printer
+from print_price.models import PrintPrice
+from print_price.price_lists import (
+    PRICE_TABLES, import_price_list, iter_csv_lines, iter_rows, write_price_list_workbook,
+)
+from print_price.utils import get_cost_and_markup_for_printer_and_copies
+from sheet_formats.models import SheetFormat
+from spravochnik_dopolnitelnyh_rabot.models import Work, WorkPrice
+
+
+class MonotoneCubicPriceTest(TestCase):
+    """Цены принтера методом monotone_cubic по сохранённым коэффициентам сплайна."""
+
+    def setUp(self):
+        sheet_format = SheetFormat.objects.create(name='A3', width_mm=297, height_mm=420)
+        self.printer = Printer.objects.create(
+            name='Тестовый принтер', sheet_format=sheet_format,
+            devices_interpolation_method=Printer.INTERPOLATION_MONOTONE_CUBIC,
+        )
+        for copies, cost in ((1, '20.00'), (100, '10.00'), (1000, '5.00')):
+            PrintPrice.objects.create(
+                printer=self.printer, copies=copies, cost=Decimal(cost), markup_percent=Decimal('50.00')
+            )
+
+    def test_curves_rebuilt_on_save_and_delete(self):
+        self.printer.refresh_from_db()
+        self.assertEqual(self.printer.devices_price_curves['cost']['x'], [1.0, 100.0, 1000.0])
+
+        PrintPrice.objects.get(copies=1000).delete()
+        self.printer.refresh_from_db()
+        self.assertEqual(self.printer.devices_price_curves['price_per_sheet']['y'], [30.0, 15.0])
+
+    def test_interpolation_reads_no_price_points(self):
+        self.printer.refresh_from_db()
+        with self.assertNumQueries(0):
+            cost, markup = get_cost_and_markup_for_printer_and_copies(self.printer, 100)
+            between, _ = get_cost_and_markup_for_printer_and_copies(self.printer, 500)
+        self.assertEqual((cost, markup), (Decimal('10.00'), Decimal('50.00')))
+        self.assertTrue(Decimal('5.00') < between < Decimal('10.00'))
+        self.assertEqual(self.printer.calculate_price_for_arbitrary_copies_devices(100), Decimal('15.00'))
+
+
+class PriceListImportTest(TestCase):
+    """Загрузка и выгрузка прайс-листа принтеров целиком."""
+
+    def setUp(self):
+        sheet_format = SheetFormat.objects.create(name='A3', width_mm=297, height_mm=420)
+        self.printer = Printer.objects.create(name='Принтер 1', sheet_format=sheet_format)
+        self.other = Printer.objects.create(name='Принтер 2', sheet_format=sheet_format)
+        PrintPrice.objects.create(printer=self.printer, copies=1, cost=Decimal('20.00'), markup_percent=Decimal('50.00'))
+        PrintPrice.objects.create(printer=self.printer, copies=100, cost=Decimal('10.00'), markup_percent=Decimal('50.00'))
+
+    def _rows(self, text, filename='prices.csv'):
+        return iter_rows(io.BytesIO(text.encode('utf-8')), filename, 'printer')
+
+    def test_export_then_import_round_trip(self):
+        exported = ''.join(iter_csv_lines('printer'))
+        self.assertIn('Принтер 1;1;20.00;50.00;30.00', exported)
+
+        # Та же выгрузка с изменённой ценой и новой точкой
+        text = exported.replace(';100;10.00;', ';100;12,50;') + f'{self.printer.pk};Принтер 1;1000;5;50\n'
+        result = import_price_list(self._rows(text), 'printer')
+        self.assertEqual(result['errors'], [])
+        self.assertEqual((result['created'], result['updated'], result['unchanged']), (1, 1, 1))
+
+        price = PrintPrice.objects.get(printer=self.printer, copies=100)
+        self.assertEqual(price.price_per_sheet, Decimal('18.75'))
+        self.printer.refresh_from_db()
+        self.assertEqual(self.printer.devices_price_curves['cost']['x'], [1.0, 100.0, 1000.0])
+
+    def test_errors_leave_prices_unchanged(self):
+        text = (
+            'Принтер;Тираж;Себестоимость;Наценка (%)\n'
+            'Принтер 1;100;11;50\n'
+            'Нет такого;10;1;0\n'
+            'Принтер 1;500;abc;0\n'
+            'Принтер 1;100;12;50\n'
+        )
+        result = import_price_list(self._rows(text), 'printer')
+        self.assertEqual([(row, field) for row, field, _ in result['errors']],
+                         [(3, 'printer'), (4, 'cost'), (5, 'copies')])
+        self.assertEqual(PrintPrice.objects.get(printer=self.printer, copies=100).cost, Decimal('10.00'))
+        self.assertEqual(PrintPrice.objects.count(), 2)
+
+    def test_curves_rebuilt_once_per_owner(self):
+        text = 'Тираж;Себестоимость;Наценка (%)\n' + ''.join(f'{copies};{copies};0\n' for copies in range(1, 51))
+        rebuild = mock.Mock()
+        with mock.patch.dict(PRICE_TABLES['printer'], rebuild_curves=rebuild):
+            # Прайс первого принтера загружается второму: столбцы владельца не нужны
+            result = import_price_list(self._rows(text), 'printer', owner=self.other)
+        self.assertEqual(result['created'], 50)
+        rebuild.assert_called_once_with(self.other.pk)
+        self.assertEqual(PrintPrice.objects.filter(printer=self.other).count(), 50)
+
+        # Повторная загрузка ничего не меняет и кривые не пересчитывает
+        rebuild.reset_mock()
+        with mock.patch.dict(PRICE_TABLES['printer'], rebuild_curves=rebuild):
+            result = import_price_list(self._rows(text), 'printer', owner=self.other)
+        self.assertEqual(result['unchanged'], 50)
+        rebuild.assert_not_called()
+
+    def test_work_prices_xlsx_round_trip(self):
+        from openpyxl import load_workbook
+
+        work = Work.objects.create(
+            name='Биговка', cost=Decimal('1.00'), markup_percent=Decimal('0.00'), formula_type=4,
+            interpolation_method='monotone_cubic',
+        )
+        WorkPrice.objects.create(work=work, sheets=1, price=Decimal('5.00'))
+        exported = io.BytesIO()
+        self.assertEqual(write_price_list_workbook(exported, 'work_sheets', work), 1)
+
+        exported.seek(0)
+        workbook = load_workbook(exported)
+        workbook.active.append([work.pk, 'Биговка', 100, 2.35])
+        workbook.active.append([None, 'Биговка', 1000, 1.1])
+        edited = io.BytesIO()
+        workbook.save(edited)
+        edited.seek(0)
+
+        result = import_price_list(iter_rows(edited, 'works.xlsx', 'work_sheets'), 'work_sheets')
+        self.assertEqual((result['created'], result['unchanged'], result['errors']), (2, 1, []))
+        self.assertEqual(
+            list(WorkPrice.objects.filter(work=work).values_list('sheets', 'price')),
+            [(1, Decimal('5.00')), (100, Decimal('2.35')), (1000, Decimal('1.10'))],
+        )
+        work.refresh_from_db()
+        self.assertEqual(work.price_curves['sheets']['x'], [1.0, 100.0, 1000.0])
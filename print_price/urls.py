@@ -26,4 +26,8 @@ urlpatterns = [
     path('laminators/api/calculate_arbitrary_price/<int:laminator_id>/', views.calculate_arbitrary_laminator_price, name='calculate_arbitrary_laminator_price'),
     # Список ламинаторов для выпадающего списка в калькуляторе
     path('laminators/api/get_laminators/', views.get_laminators_list, name='get_laminators_list'),
+
+    # --- Прайс-листы целиком (printer, laminator, work_sheets, work_circulation) ---
+    path('api/price-list/<str:table>/export/', views.export_price_list, name='export_price_list'),
+    path('api/price-list/<str:table>/import/', views.import_price_list_upload, name='import_price_list'),
 ]
\ No newline at end of file
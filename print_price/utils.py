@@ -6,14 +6,74 @@ utils.py для приложения print_price
 - get_cost_and_markup_for_laminator_and_copies
 - calculate_price_for_printer_and_copies (используется в сигналах calculator)
 - get_price_info_for_printer_and_copies (для получения полной информации)
+- build_price_curves, rebuild_printer_curves, rebuild_laminator_curves
+  (коэффициенты монотонного кубического сплайна, см. devices/interpolation.py)
 """
 
 from decimal import Decimal
 import math
 from .models import PrintPrice, LaminatorPrice
+from devices.interpolation import MONOTONE_CUBIC, build_monotone_cubic, evaluate
 from devices.models import Printer, Laminator
 
 
+# Поля опорных точек, для которых хранятся коэффициенты сплайна
+CURVE_FIELDS = ('cost', 'markup_percent', 'price_per_sheet')
+
+
+# ==================== КРИВЫЕ ЦЕН (МОНОТОННЫЙ СПЛАЙН) ====================
+
+def build_price_curves(rows):
+    """
+    Коэффициенты монотонного сплайна по опорным точкам для каждого поля CURVE_FIELDS.
+
+    Аргументы:
+        rows: строки (copies, cost, markup_percent, price_per_sheet) по возрастанию тиража
+
+    Возвращает:
+        dict: {поле: кривая} – хранится в Printer.devices_price_curves / Laminator.laminator_price_curves
+    """
+    rows = list(rows)
+    return {
+        field: build_monotone_cubic([(row[0], row[index]) for row in rows])
+        for index, field in enumerate(CURVE_FIELDS, start=1)
+    }
+
+
+def rebuild_printer_curves(printer_id):
+    """Пересчитывает и сохраняет кривые цен принтера (после изменения его цен печати)."""
+    rows = PrintPrice.objects.filter(printer_id=printer_id).order_by('copies').values_list('copies', *CURVE_FIELDS)
+    Printer.objects.filter(pk=printer_id).update(devices_price_curves=build_price_curves(rows))
+
+
+def rebuild_laminator_curves(laminator_id):
+    """Пересчитывает и сохраняет кривые цен ламинатора (после изменения его цен ламинирования)."""
+    rows = (
+        LaminatorPrice.objects.filter(laminator_id=laminator_id)
+        .order_by('copies').values_list('copies', *CURVE_FIELDS)
+    )
+    Laminator.objects.filter(pk=laminator_id).update(laminator_price_curves=build_price_curves(rows))
+
+
+def _curve_value(curves, field, copies):
+    """Значение поля по кривой, округлённое до копеек; без опорных точек – 0."""
+    value = evaluate(curves[field], copies)
+    if value is None:
+        return Decimal('0.00')
+    return Decimal(str(round(value, 2)))
+
+
+def _curve_cost_and_markup(curves, price_points, copies):
+    """
+    Себестоимость и наценка по сохранённым коэффициентам сплайна. Если кривые
+    ещё не построены (цены заведены до появления метода), они строятся по
+    опорным точкам price_points.
+    """
+    if not curves:
+        curves = build_price_curves(price_points.order_by('copies').values_list('copies', *CURVE_FIELDS))
+    return _curve_value(curves, 'cost', copies), _curve_value(curves, 'markup_percent', copies)
+
+
 # ==================== ПРИНТЕРЫ ====================
 
 def get_cost_and_markup_for_printer_and_copies(printer, copies):
@@ -34,14 +94,21 @@ def get_cost_and_markup_for_printer_and_copies(printer, copies):
         except Printer.DoesNotExist:
             return Decimal('0.00'), Decimal('0.00')
 
+    # Получаем метод интерполяции принтера (по умолчанию линейный)
+    interpolation_method = getattr(printer, 'devices_interpolation_method', 'linear')
+
+    # Монотонный сплайн: коэффициенты сохранены у принтера, опорные точки не читаются
+    if interpolation_method == MONOTONE_CUBIC:
+        return _curve_cost_and_markup(
+            printer.devices_price_curves, PrintPrice.objects.filter(printer=printer), int(copies)
+        )
+
     # Получаем все сохранённые опорные точки для этого принтера, отсортированные по тиражу
     price_points = PrintPrice.objects.filter(printer=printer).order_by('copies')
     if not price_points.exists():
         return Decimal('0.00'), Decimal('0.00')
 
     copies_int = int(copies)
-    # Получаем метод интерполяции принтера (по умолчанию линейный)
-    interpolation_method = getattr(printer, 'devices_interpolation_method', 'linear')
 
     # Минимальная и максимальная точки
     min_point = price_points.first()
@@ -118,12 +185,17 @@ def get_cost_and_markup_for_laminator_and_copies(laminator, copies):
         except Laminator.DoesNotExist:
             return Decimal('0.00'), Decimal('0.00')
 
+    interpolation_method = getattr(laminator, 'laminator_interpolation_method', 'linear')
+    if interpolation_method == MONOTONE_CUBIC:
+        return _curve_cost_and_markup(
+            laminator.laminator_price_curves, LaminatorPrice.objects.filter(laminator=laminator), int(copies)
+        )
+
     price_points = LaminatorPrice.objects.filter(laminator=laminator).order_by('copies')
     if not price_points.exists():
         return Decimal('0.00'), Decimal('0.00')
 
     copies_int = int(copies)
-    interpolation_method = getattr(laminator, 'laminator_interpolation_method', 'linear')
 
     min_point = price_points.first()
     max_point = price_points.last()
@@ -4,13 +4,15 @@ views.py для приложения print_price
 """
 
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.views.decorators.http import require_POST, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.cache import never_cache
 from decimal import Decimal
+from datetime import datetime
+import io
 
 from devices.models import Printer, Laminator
 from .models import PrintPrice, LaminatorPrice
@@ -19,6 +21,13 @@ from .utils import (
     get_cost_and_markup_for_printer_and_copies,
     get_cost_and_markup_for_laminator_and_copies,
 )
+from .price_lists import (
+    PRICE_TABLES, iter_rows, import_price_list, iter_csv_lines, write_price_list_workbook, ImportFormatError,
+)
+
+
+# Сколько ошибок импорта прайс-листа возвращать в ответе
+PRICE_LIST_ERRORS_IN_RESPONSE = 500
 
 
 # ==================== ПРИНТЕРЫ (существующий код, слегка изменён) ====================
@@ -126,7 +135,7 @@ def update_printer_interpolation_method(request, printer_id):
     """Обновление метода интерполяции для принтера."""
     printer = get_object_or_404(Printer, id=printer_id)
     new_method = request.POST.get('interpolation_method')
-    if new_method not in ['linear', 'logarithmic']:
+    if new_method not in dict(Printer.INTERPOLATION_CHOICES):
         return JsonResponse({'success': False, 'error': 'Недопустимый метод'}, status=400)
     printer.devices_interpolation_method = new_method
     printer.save()
@@ -162,7 +171,7 @@ def calculate_arbitrary_copies_price(request, printer_id):
 
     cost, markup = get_cost_and_markup_for_printer_and_copies(printer, copies_int)
     price = cost + (cost * markup / Decimal('100'))
-    method_display = 'Линейная' if printer.devices_interpolation_method == 'linear' else 'Логарифмическая'
+    method_display = printer.get_interpolation_method_display_short()
 
     return JsonResponse({
         'success': True,
@@ -279,7 +288,7 @@ def update_laminator_interpolation_method(request, laminator_id):
     """Обновление метода интерполяции для ламинатора."""
     laminator = get_object_or_404(Laminator, id=laminator_id)
     new_method = request.POST.get('interpolation_method')
-    if new_method not in ['linear', 'logarithmic']:
+    if new_method not in dict(Laminator.LAMINATOR_INTERPOLATION_CHOICES):
         return JsonResponse({'success': False, 'error': 'Недопустимый метод'}, status=400)
     laminator.laminator_interpolation_method = new_method
     laminator.save()
@@ -315,7 +324,7 @@ def calculate_arbitrary_laminator_price(request, laminator_id):
 
     cost, markup = get_cost_and_markup_for_laminator_and_copies(laminator, copies_int)
     price = cost + (cost * markup / Decimal('100'))
-    method_display = 'Линейная' if laminator.laminator_interpolation_method == 'linear' else 'Логарифмическая'
+    method_display = laminator.get_interpolation_method_display_short()
 
     return JsonResponse({
         'success': True,
@@ -335,4 +344,87 @@ def get_laminators_list(request):
     from devices.models import Laminator
     laminators = Laminator.objects.all().order_by('name')
     data = [{'id': l.id, 'name': l.name} for l in laminators]
-    return JsonResponse({'success': True, 'laminators': data})
\ No newline at end of file
+    return JsonResponse({'success': True, 'laminators': data})
+
+
+# ==================== ПРАЙС-ЛИСТЫ (ИМПОРТ И ЭКСПОРТ) ====================
+
+def _price_list_owner(table, owner_id):
+    """Владелец прайс-листа по id из запроса (None – все владельцы)."""
+    if not owner_id:
+        return None
+    return get_object_or_404(PRICE_TABLES[table]['owner_model'], id=owner_id)
+
+
+@login_required(login_url='/login/')
+def export_price_list(request, table):
+    """
+    Выгрузка прайс-листа целиком.
+    table: printer, laminator, work_sheets или work_circulation.
+    GET-параметры: owner (id принтера, ламинатора или работы; по умолчанию все),
+    format (csv/xlsx, по умолчанию xlsx).
+    """
+    if table not in PRICE_TABLES:
+        return JsonResponse({'success': False, 'error': 'Неизвестная таблица цен.'}, status=400)
+    owner = _price_list_owner(table, request.GET.get('owner'))
+
+    export_format = request.GET.get('format', 'xlsx')
+    filename = f'prices_{table}_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+
+    if export_format == 'csv':
+        response = StreamingHttpResponse(iter_csv_lines(table, owner), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename={filename}.csv'
+        return response
+
+    if export_format != 'xlsx':
+        return JsonResponse({'success': False, 'error': 'Формат должен быть csv или xlsx.'}, status=400)
+
+    # Прайс-лист небольшой – книга собирается в памяти
+    buffer = io.BytesIO()
+    write_price_list_workbook(buffer, table, owner)
+    response = HttpResponse(
+        buffer.getvalue(),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = f'attachment; filename={filename}.xlsx'
+    return response
+
+
+@login_required(login_url='/login/')
+@require_POST
+def import_price_list_upload(request, table):
+    """
+    Загрузка прайс-листа из файла CSV или XLSX.
+    POST: файл в поле 'import_file', owner – id владельца всех строк
+    (необязательно), dry_run – только проверить файл.
+    При ошибках в файле цены не меняются, ошибки возвращаются в ответе.
+    """
+    if table not in PRICE_TABLES:
+        return JsonResponse({'success': False, 'error': 'Неизвестная таблица цен.'}, status=400)
+    import_file = request.FILES.get('import_file')
+    if not import_file:
+        return JsonResponse({'success': False, 'error': 'Файл не выбран'}, status=400)
+    owner = _price_list_owner(table, request.POST.get('owner'))
+
+    try:
+        result = import_price_list(
+            iter_rows(import_file, import_file.name, table), table,
+            owner=owner, dry_run=bool(request.POST.get('dry_run')),
+        )
+    except ImportFormatError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': not result['errors'],
+        'error': 'Прайс-лист не загружен: в файле есть ошибки' if result['errors'] else None,
+        'rows': result['rows'],
+        'created': result['created'],
+        'updated': result['updated'],
+        'unchanged': result['unchanged'],
+        'owners': result['owners'],
+        'errors_count': len(result['errors']),
+        'errors': [
+            {'row': row_number, 'field': name, 'message': message}
+            for row_number, name, message in result['errors'][:PRICE_LIST_ERRORS_IN_RESPONSE]
+        ],
+    })
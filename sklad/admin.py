@@ -2,12 +2,15 @@
 admin.py для приложения sklad
 Настройка панели администратора для моделей Category и Material.
 Добавлены поля density и paper_thickness в секцию бумаги.
+Журнал движения и резервы (StockMovement, StockReservation) – только просмотр:
+остатки меняются через sklad/stock.py. Задания пересчёта просчётов по ценам
+материалов (RepricingJob) – только просмотр.
 """
 
 from django.contrib import admin
 from django.utils.html import format_html
 from mptt.admin import DraggableMPTTAdmin
-from .models import Category, Material
+from .models import Category, Material, RepricingJob, StockMovement, StockReservation
 
 
 @admin.register(Category)
@@ -75,7 +78,8 @@ class MaterialAdmin(admin.ModelAdmin):
             'classes': ('collapse',),
         }),
         ('Складской учёт', {
-            'fields': ('quantity', 'min_quantity'),
+            'fields': ('quantity', 'reserved_quantity', 'min_quantity'),
+            'description': 'Остаток меняется приходом и корректировкой (журнал движения материала).',
         }),
         ('Дополнительно', {
             'fields': ('characteristics', 'notes', 'is_active'),
@@ -86,7 +90,17 @@ class MaterialAdmin(admin.ModelAdmin):
             'classes': ('collapse',),
         }),
     )
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('quantity', 'reserved_quantity', 'created_at', 'updated_at')
+
+    def save_model(self, request, obj, form, change):
+        """Остатки не перезаписываются из формы: их меняет только журнал движения."""
+        if change:
+            obj.save(update_fields=[
+                field.name for field in obj._meta.concrete_fields
+                if field.name not in ('id', 'quantity', 'reserved_quantity', 'created_at')
+            ])
+        else:
+            super().save_model(request, obj, form, change)
 
     def price_display(self, obj):
         """Отображает цену с единицей измерения (использует вычисляемую цену)."""
@@ -110,4 +124,57 @@ class MaterialAdmin(admin.ModelAdmin):
         return format_html('<span style="color: {}; font-weight: bold;">{}</span>', color, text)
 
     quantity_status.short_description = 'Статус'
-    quantity_status.admin_order_field = 'quantity'
\ No newline at end of file
+    quantity_status.admin_order_field = 'quantity'
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    """Журнал движения материалов (только просмотр)."""
+
+    list_display = (
+        'created_at', 'material', 'kind', 'quantity_change', 'reserved_change',
+        'quantity_after', 'reserved_after', 'print_component', 'user', 'note'
+    )
+    list_filter = ('kind', 'created_at')
+    search_fields = ('material__name', 'note')
+    list_select_related = ('material', 'print_component', 'user')
+    list_per_page = 100
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    """Резервы материалов под печатные компоненты (только просмотр)."""
+
+    list_display = ('material', 'usage', 'quantity', 'print_component', 'consumed_at', 'updated_at')
+    list_filter = ('usage', 'consumed_at')
+    search_fields = ('material__name', 'print_component__number')
+    list_select_related = ('material', 'print_component')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RepricingJob)
+class RepricingJobAdmin(admin.ModelAdmin):
+    """Задания пересчёта просчётов по ценам материалов (только просмотр)."""
+
+    list_display = (
+        'id', 'status', 'material_ids', 'components_updated', 'laminates_updated',
+        'created_at', 'started_at', 'finished_at'
+    )
+    list_filter = ('status', 'created_at')
+    list_per_page = 100
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
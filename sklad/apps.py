@@ -23,7 +23,6 @@ class SkladConfig(AppConfig):
     def ready(self):
         """
         Вызывается при загрузке приложения
-        Можно добавить сигналы или выполнить инициализацию
+        Регистрирует сигналы сброса кэша дерева категорий
         """
-        # import sklad.signals  # Раскомментируйте если добавите сигналы
-        pass
\ No newline at end of file
+        import sklad.signals
\ No newline at end of file
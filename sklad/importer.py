@@ -0,0 +1,527 @@
+"""
+importer.py для приложения sklad
+Массовый импорт материалов и категорий из CSV или XLSX (каталог поставщика)
+
+Файл читается потоково (CSV – csv.reader, XLSX – openpyxl read_only) и
+обрабатывается пачками. На пачку:
+- недостающие категории создаются через bulk_create по уровням пути
+  (сначала корни, затем их дети и т.д.) – по одному INSERT на уровень;
+- существующие материалы пачки читаются одним запросом (с блокировкой
+  строк), новые вставляются bulk_create, изменённые – bulk_update.
+Материал определяется парой (категория, название): повторный импорт того
+же каталога обновляет материалы, а не создаёт копии.
+
+Категории вставляются в обход MPTTModel.save(), поэтому lft/rght не
+пересчитываются на каждой вставке (как при create_category, где каждая
+новая категория сдвигает интервалы всего дерева). Новые категории получают
+временные значения, а дерево пересчитывается один раз – Category.objects.rebuild()
+в конце импорта, в той же транзакции.
+
+Остатки меняются, как везде на складе, с записью в журнал движения
+(sklad/stock.py): начальный остаток нового материала – приход,
+изменение остатка существующего – корректировка. Изменение цены
+существующих материалов ставит в очередь пересчёт открытых просчётов
+(sklad/repricing.py).
+
+Формат файла: первая строка – заголовки. Заголовки – имена полей или их
+русские названия (см. COLUMN_ALIASES):
+    category / Категория – путь от корня: «Бумага / Меловка / Глянцевая»
+        (разделитель «/» или «>»), обязательный столбец;
+    type / Тип – paper/film (Бумага/Плёнка), по умолчанию – тип импорта;
+    name / Материал – если пусто, строка только создаёт категории;
+    price / Цена, unit / Ед. изм., density / Плотность,
+    paper_thickness / Толщина бумаги, cost / Себестоимость,
+    markup_percent / Наценка, thickness / Толщина, quantity / Количество,
+    min_quantity / Минимум, notes / Примечание, is_active / Активен.
+Пустая ячейка у существующего материала оставляет значение без изменений.
+
+Строки с ошибками не импортируются и попадают в отчёт (ключ 'errors' итога):
+номер строки файла, поле и сообщение. Весь импорт идёт в одной транзакции.
+
+Функции:
+- iter_rows: потоковое чтение строк CSV/XLSX
+- import_materials: создание категорий и материалов, обновление существующих
+- write_error_report: отчёт об ошибках в CSV
+"""
+
+import codecs
+import csv
+import re
+import time
+from itertools import chain, islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .models import Category, Material, StockMovement, MATERIAL_TYPES
+from .repricing import PRICE_FIELDS, enqueue_repricing
+from .tree_cache import bump_tree_version
+
+
+# Сколько строк обрабатывать за один раз
+IMPORT_CHUNK_SIZE = getattr(settings, 'SKLAD_IMPORT_CHUNK_SIZE', 1000)
+
+# Сколько первых строк CSV использовать для определения разделителя
+CSV_SNIFF_LINES = 20
+
+# Разделитель уровней в пути категории
+PATH_SEPARATOR = re.compile(r'\s*[/>]\s*')
+
+# Заголовки столбцов: русское название → имя поля
+COLUMN_ALIASES = {
+    'категория': 'category',
+    'путь': 'category',
+    'тип': 'type',
+    'материал': 'name',
+    'название': 'name',
+    'наименование': 'name',
+    'цена': 'price',
+    'ед. изм.': 'unit',
+    'единица': 'unit',
+    'единица измерения': 'unit',
+    'плотность': 'density',
+    'плотность (г/кв.м)': 'density',
+    'толщина бумаги': 'paper_thickness',
+    'толщина бумаги (мм)': 'paper_thickness',
+    'себестоимость': 'cost',
+    'наценка': 'markup_percent',
+    'наценка (%)': 'markup_percent',
+    'толщина': 'thickness',
+    'толщина (мкм)': 'thickness',
+    'количество': 'quantity',
+    'на складе': 'quantity',
+    'минимум': 'min_quantity',
+    'минимальный остаток': 'min_quantity',
+    'примечание': 'notes',
+    'активен': 'is_active',
+}
+
+# Поля материала, которые можно задать в файле
+MATERIAL_COLUMNS = (
+    'price', 'unit', 'density', 'paper_thickness', 'cost', 'markup_percent',
+    'thickness', 'quantity', 'min_quantity', 'notes', 'is_active',
+)
+KNOWN_COLUMNS = {'category', 'type', 'name'} | set(MATERIAL_COLUMNS)
+
+# Обязательные поля нового материала (как в форме create_material)
+REQUIRED_FIELDS = {
+    'paper': ('price',),
+    'film': ('cost', 'markup_percent', 'thickness'),
+}
+
+# Значения столбца type
+TYPE_ALIASES = {
+    'paper': 'paper',
+    'бумага': 'paper',
+    'film': 'film',
+    'плёнка': 'film',
+    'пленка': 'film',
+}
+
+# Значения логических полей, которые считаются «да»
+TRUE_VALUES = {'1', 'true', 'yes', 'on', 'да', 'д', '+', 'x'}
+
+
+class ImportFormatError(Exception):
+    """Файл нельзя прочитать как каталог материалов."""
+
+
+# ========== ЧТЕНИЕ ФАЙЛА ==========
+
+def _column_name(header):
+    """Имя поля для заголовка столбца (None – столбец не импортируется)."""
+    header = str(header or '').strip().lower()
+    header = COLUMN_ALIASES.get(header, header)
+    return header if header in KNOWN_COLUMNS else None
+
+
+def _cell_text(value):
+    """Значение ячейки как строка (числа Excel без «.0»)."""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'да' if value else 'нет'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _iter_csv(fileobj):
+    """Строки CSV: кодировка UTF-8 (с BOM или без), разделитель «;», «,» или табуляция."""
+    text = codecs.getreader('utf-8-sig')(fileobj)
+
+    # Разделитель определяется по первым строкам, остальные читаются потоком
+    sample = [line for line in islice(text, CSV_SNIFF_LINES)]
+    try:
+        dialect = csv.Sniffer().sniff(''.join(sample), delimiters=';,\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(chain(sample, text), dialect)
+
+
+def _iter_xlsx(fileobj):
+    """Строки первого листа XLSX (openpyxl read_only – без загрузки книги в память)."""
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Не удалось открыть файл Excel: {e}")
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    """
+    Потоково читает строки файла импорта.
+
+    Args:
+        fileobj: двоичный файловый объект
+        filename: имя файла – по расширению выбирается формат (.csv или .xlsx)
+
+    Yields:
+        tuple: (номер строки в файле, словарь {поле: текст})
+
+    Raises:
+        ImportFormatError: неизвестный формат или нет столбца category
+    """
+    name = filename.lower()
+    if name.endswith('.xlsx'):
+        rows = _iter_xlsx(fileobj)
+    elif name.endswith('.csv'):
+        rows = _iter_csv(fileobj)
+    else:
+        raise ImportFormatError('Поддерживаются файлы .csv и .xlsx')
+
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFormatError('Файл пуст')
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFormatError(f"Не удалось прочитать CSV: {e}")
+
+    columns = [_column_name(cell) for cell in header]
+    if 'category' not in columns:
+        raise ImportFormatError('В первой строке нет столбца «category» (или «Категория»)')
+
+    try:
+        for row_number, row in enumerate(rows, start=2):
+            values = {column: _cell_text(value) for column, value in zip(columns, row) if column}
+            if any(values.values()):
+                yield row_number, values
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFormatError(f"Не удалось прочитать CSV: {e}")
+
+
+# ========== ПРОВЕРКА СТРОК ==========
+
+def _parse_row(values, default_type):
+    """
+    Проверяет строку файла и приводит значения к типам полей Material.
+
+    Returns:
+        tuple: (тип, путь категории – кортеж названий, название материала,
+                словарь полей, список ошибок (поле, сообщение))
+    """
+    errors = []
+
+    type_text = values.get('type', '').lower()
+    material_type = TYPE_ALIASES.get(type_text) if type_text else default_type
+    if material_type is None:
+        errors.append(('type', f'Неизвестный тип «{values["type"]}» (paper или film)'))
+
+    path = tuple(part for part in PATH_SEPARATOR.split(values.get('category', '')) if part)
+    if not path:
+        errors.append(('category', 'Не указана категория'))
+    for part in path:
+        if not 2 <= len(part) <= 100:
+            errors.append(('category', f'Название категории «{part}» должно содержать от 2 до 100 символов'))
+
+    name = values.get('name', '')
+    if len(name) > 100:
+        errors.append(('name', 'Название материала длиннее 100 символов'))
+
+    fields = {}
+    if name:
+        for column in MATERIAL_COLUMNS:
+            text = values.get(column, '')
+            if not text:
+                continue
+            if column == 'is_active':
+                fields[column] = text.lower() in TRUE_VALUES
+                continue
+            field = Material._meta.get_field(column)
+            if isinstance(field, models.DecimalField):
+                text = text.replace(',', '.')  # десятичная запятая
+            try:
+                fields[column] = field.clean(text, None)
+            except ValidationError as e:
+                errors.extend((column, message) for message in e.messages)
+
+    return material_type, path, name, fields, errors
+
+
+# ========== КАТЕГОРИИ ==========
+
+class _CategoryIndex:
+    """
+    Категории по ключу (тип, id родителя, название): существующие читаются
+    одним запросом, недостающие создаются bulk_create по уровням пути.
+    """
+
+    def __init__(self):
+        self.ids = {
+            (category_type, parent_id, name): category_id
+            for category_id, category_type, parent_id, name
+            in Category.objects.order_by().values_list('id', 'type', 'parent_id', 'name').iterator()
+        }
+        self.created = 0
+
+    def resolve(self, paths):
+        """
+        Id категорий для путей (недостающие категории создаются).
+
+        Args:
+            paths: множество (тип, путь)
+
+        Returns:
+            dict: {(тип, путь): id последней категории пути}
+        """
+        resolved = {}
+        depth = max((len(path) for _, path in paths), default=0)
+        for level in range(depth):
+            # Префиксы пути длины level + 1 – категории этого уровня
+            prefixes = {(category_type, path[:level + 1]) for category_type, path in paths if len(path) > level}
+            keys = {}
+            missing = {}
+            for category_type, prefix in prefixes:
+                parent_id = resolved[(category_type, prefix[:-1])] if level else None
+                key = (category_type, parent_id, prefix[-1])
+                keys[(category_type, prefix)] = key
+                if key not in self.ids and key not in missing:
+                    # lft/rght/tree_id временные – дерево пересчитывается rebuild() в конце импорта
+                    missing[key] = Category(
+                        name=prefix[-1], type=category_type, parent_id=parent_id,
+                        lft=1, rght=2, tree_id=0, level=level,
+                    )
+
+            if missing:
+                Category.objects.bulk_create(missing.values())
+                for key, category in missing.items():
+                    self.ids[key] = category.pk
+                self.created += len(missing)
+
+            for prefix, key in keys.items():
+                resolved[prefix] = self.ids[key]
+        return resolved
+
+
+def _lock_categories_table():
+    """
+    PostgreSQL: блокирует изменение категорий другими сеансами до конца
+    транзакции (чтение не блокируется) – rebuild() пересчитывает всё дерево.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {connection.ops.quote_name(Category._meta.db_table)} IN EXCLUSIVE MODE')
+
+
+# ========== МАТЕРИАЛЫ ==========
+
+def _upsert_materials(entries, result, user=None):
+    """
+    Создаёт и обновляет материалы пачки.
+
+    Args:
+        entries: {(id категории, название): (номер строки, тип, поля)} – одна
+                 запись на материал (последняя строка файла с этим ключом)
+        result: итог импорта (счётчики и errors дополняются)
+        user: пользователь для журнала движения
+    """
+    category_ids = {category_id for category_id, _ in entries}
+    names = {name for _, name in entries}
+    existing = {
+        (material.category_id, material.name): material
+        for material in Material.objects.select_for_update().filter(category_id__in=category_ids, name__in=names).order_by()
+    }
+
+    now = timezone.now()
+    new_materials, changed, changed_fields = [], [], {'updated_at'}
+    repriced = []
+    movements = []
+    for (category_id, name), (row_number, material_type, fields) in entries.items():
+        material = existing.get((category_id, name))
+
+        if material is None:
+            missing = [field for field in REQUIRED_FIELDS[material_type] if field not in fields]
+            if missing:
+                result['errors'].extend(
+                    (row_number, field, 'Обязательное поле для нового материала') for field in missing
+                )
+                continue
+            new_materials.append(Material(name=name, category_id=category_id, type=material_type, **fields))
+            continue
+
+        # Записываются только изменившиеся поля: bulk_update строит выражение
+        # CASE на каждое поле каждого материала, повторный импорт того же
+        # каталога не должен переписывать таблицу
+        updated = {field: value for field, value in fields.items() if getattr(material, field) != value}
+        if not updated:
+            result['unchanged'] += 1
+            continue
+
+        if 'quantity' in updated:
+            movements.append(StockMovement(
+                material_id=material.pk,
+                kind=StockMovement.KIND_ADJUST,
+                quantity_change=updated['quantity'] - material.quantity,
+                quantity_after=updated['quantity'],
+                reserved_after=material.reserved_quantity,
+                user=user,
+                note='Импорт каталога',
+            ))
+        for field, value in updated.items():
+            setattr(material, field, value)
+        # bulk_update не вызывает auto_now; от updated_at зависит кэш строк таблицы
+        material.updated_at = now
+        changed_fields.update(updated)
+        changed.append(material)
+        if updated.keys() & set(PRICE_FIELDS):
+            repriced.append(material.pk)
+
+    if new_materials:
+        # bulk_create заполняет id материалов, приходы берут material_id из них
+        Material.objects.bulk_create(new_materials)
+        movements.extend(
+            StockMovement(
+                material_id=material.pk,
+                kind=StockMovement.KIND_RECEIPT,
+                quantity_change=material.quantity,
+                quantity_after=material.quantity,
+                reserved_after=0,
+                user=user,
+                note='Начальный остаток (импорт каталога)',
+            )
+            for material in new_materials if material.quantity
+        )
+    if changed:
+        Material.objects.bulk_update(changed, sorted(changed_fields))
+    if movements:
+        StockMovement.objects.bulk_create(movements)
+    if repriced:
+        # bulk_update не отправляет сигналы – пересчёт просчётов ставим в очередь явно
+        result['repricing_jobs'].append(enqueue_repricing(repriced).pk)
+
+    result['created'] += len(new_materials)
+    result['updated'] += len(changed)
+
+
+def import_materials(rows, material_type='paper', chunk_size=IMPORT_CHUNK_SIZE, dry_run=False,
+                     user=None, progress=None):
+    """
+    Импортирует категории и материалы.
+
+    Args:
+        rows: итератор (номер строки, словарь полей) – см. iter_rows
+        material_type: тип строк без столбца type (paper/film)
+        chunk_size: сколько строк обрабатывать за раз
+        dry_run: проверить и выполнить импорт, затем откатить транзакцию
+        user: пользователь для журнала движения
+        progress: функция progress(обработано строк, создано материалов, обновлено материалов)
+
+    Returns:
+        dict: {'rows', 'categories', 'created', 'updated', 'unchanged' – найдены без изменений,
+               'repricing_jobs' – id заданий пересчёта просчётов по новым ценам,
+               'errors' – список (номер строки, поле, сообщение),
+               'timings' – секунды по этапам: read, categories, materials, rebuild, total}
+    """
+    if material_type not in dict(MATERIAL_TYPES):
+        raise ValueError(f'Неизвестный тип материала: {material_type}')
+
+    result = {
+        'rows': 0,
+        'categories': 0,
+        'created': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'repricing_jobs': [],
+        'errors': [],
+        'timings': dict.fromkeys(('read', 'categories', 'materials', 'rebuild', 'total'), 0.0),
+    }
+    timings = result['timings']
+    started = time.perf_counter()
+    rows = iter(rows)
+
+    with transaction.atomic():
+        _lock_categories_table()
+        categories = _CategoryIndex()
+
+        while True:
+            mark = time.perf_counter()
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            parsed = []
+            for row_number, values in chunk:
+                row_type, path, name, fields, errors = _parse_row(values, material_type)
+                if errors:
+                    result['errors'].extend((row_number, field, message) for field, message in errors)
+                else:
+                    parsed.append((row_number, row_type, path, name, fields))
+            result['rows'] += len(chunk)
+            timings['read'] += time.perf_counter() - mark
+
+            mark = time.perf_counter()
+            category_ids = categories.resolve({(row_type, path) for _, row_type, path, _, _ in parsed})
+            timings['categories'] += time.perf_counter() - mark
+
+            mark = time.perf_counter()
+            entries = {}
+            for row_number, row_type, path, name, fields in parsed:
+                if name:
+                    entries[(category_ids[(row_type, path)], name)] = (row_number, row_type, fields)
+            if entries:
+                _upsert_materials(entries, result, user=user)
+            timings['materials'] += time.perf_counter() - mark
+
+            if progress:
+                progress(result['rows'], result['created'], result['updated'])
+
+        result['categories'] = categories.created
+        if categories.created and not dry_run:
+            # Один пересчёт lft/rght/level/tree_id на весь импорт
+            mark = time.perf_counter()
+            Category.objects.rebuild()
+            timings['rebuild'] = time.perf_counter() - mark
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    # bulk_create/bulk_update не отправляют post_save – кэш дерева сбрасываем явно
+    # (после коммита, если импорт вызван внутри внешней транзакции)
+    if (result['categories'] or result['created'] or result['updated']) and not dry_run:
+        transaction.on_commit(bump_tree_version)
+
+    timings['total'] = time.perf_counter() - started
+    return result
+
+
+def write_error_report(result, fileobj):
+    """
+    Записывает отчёт об ошибках импорта в CSV (разделитель «;», UTF-8 с BOM –
+    открывается в Excel).
+
+    Args:
+        result: итог import_materials
+        fileobj: текстовый файловый объект
+    """
+    fileobj.write('﻿')
+    writer = csv.writer(fileobj, delimiter=';')
+    writer.writerow(['Строка', 'Поле', 'Ошибка'])
+    writer.writerows(result['errors'])
@@ -0,0 +1,264 @@
+"""
+low_stock.py для приложения sklad
+Отчёт о заканчивающихся материалах и количестве к дозаказу
+
+Материал заканчивается, когда его свободный остаток (на складе минус
+резерв под открытые просчёты) не больше минимального:
+    quantity - reserved_quantity <= min_quantity.
+Резерв – это уже посчитанный прогноз расхода по открытым просчётам
+(Material.reserved_quantity ведётся журналом sklad/stock.py), поэтому
+отчёт не обходит просчёты и компоненты, а выбирает материалы одним
+запросом по частичному индексу sklad_material_low_stock_idx (в индекс
+попадают только активные материалы с этим условием – обычно малая часть
+склада).
+
+Итоги по категориям считаются одним запросом: для каждой категории
+коррелированный подзапрос по интервалу MPTT (tree_id, lft, rght)
+суммирует заканчивающиеся материалы всего её поддерева.
+
+Выгрузка: CSV – построчно (для StreamingHttpResponse), XLSX – книга
+openpyxl write_only в файл (отдаётся блоками, см. counter/excel_export.py).
+
+Функции:
+- low_stock_q: условие «материал заканчивается»
+- get_low_stock_materials: заканчивающиеся материалы с количеством к дозаказу
+- get_category_rollup: итоги по поддеревьям категорий одним запросом
+- get_low_stock_report: отчёт целиком (материалы, категории, итоги)
+- iter_report_rows: строки отчёта для CSV/XLSX
+- iter_csv_lines: отчёт в CSV построчно
+- write_report_workbook: отчёт в книгу Excel
+"""
+
+import csv
+import io
+
+from django.conf import settings
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+
+from .models import Category, Material, MATERIAL_TYPES
+
+
+# Сколько материалов читается из БД за один запрос при выгрузке
+REPORT_CHUNK_SIZE = getattr(settings, 'SKLAD_REPORT_CHUNK_SIZE', 2000)
+
+REPORT_HEADERS = [
+    'Категория',
+    'Материал',
+    'Тип',
+    'Ед. изм.',
+    'На складе',
+    'В резерве',
+    'Свободно',
+    'Минимум',
+    'К дозаказу',
+]
+
+
+def low_stock_q():
+    """
+    Условие «материал заканчивается»: активный материал, свободный остаток
+    которого не больше минимального. То же условие – у частичного индекса
+    sklad_material_low_stock_idx (Material.Meta.indexes).
+
+    Returns:
+        Q: фильтр для QuerySet материалов
+    """
+    return Q(is_active=True, quantity__lte=F('min_quantity') + F('reserved_quantity'))
+
+
+def _low_stock_materials(material_type=None):
+    """QuerySet заканчивающихся материалов (без сортировки)."""
+    materials = Material.objects.filter(low_stock_q())
+    if material_type:
+        materials = materials.filter(type=material_type)
+    return materials
+
+
+def get_low_stock_materials(material_type=None):
+    """
+    Заканчивающиеся материалы в порядке дерева категорий, затем по имени.
+    Свободный остаток и количество к дозаказу (до минимального свободного
+    остатка) считаются в том же запросе.
+
+    Args:
+        material_type: тип материала (paper/film); None – все
+
+    Returns:
+        QuerySet: Material с select_related('category') и полями
+                  available (свободно) и reorder_quantity (к дозаказу)
+    """
+    return (
+        _low_stock_materials(material_type)
+        .select_related('category')
+        .annotate(
+            available=F('quantity') - F('reserved_quantity'),
+            reorder_quantity=F('min_quantity') - F('quantity') + F('reserved_quantity'),
+        )
+        .order_by('category__tree_id', 'category__lft', 'name', 'id')
+    )
+
+
+def get_category_rollup(material_type=None):
+    """
+    Итоги по категориям: сколько материалов заканчивается в категории
+    с подкатегориями и сколько нужно дозаказать. Один запрос – для каждой
+    категории коррелированный подзапрос по её интервалу MPTT.
+
+    Args:
+        material_type: тип материала (paper/film); None – все
+
+    Returns:
+        list: словари id, name, level, low_stock_count, reorder_total
+              в порядке дерева; категории без таких материалов не включаются
+    """
+    subtree = (
+        _low_stock_materials(material_type)
+        .filter(
+            category__tree_id=OuterRef('tree_id'),
+            category__lft__gte=OuterRef('lft'),
+            category__rght__lte=OuterRef('rght'),
+        )
+        .order_by()
+        # Все строки подзапроса из одного дерева – одна группа на категорию
+        .values('category__tree_id')
+    )
+    low_count = subtree.annotate(value=Count('id')).values('value')
+    reorder_total = subtree.annotate(
+        value=Sum(F('min_quantity') - F('quantity') + F('reserved_quantity'))
+    ).values('value')
+
+    categories = Category.objects.all()
+    if material_type:
+        categories = categories.filter(type=material_type)
+    return list(
+        categories
+        .annotate(
+            low_stock_count=Coalesce(Subquery(low_count, output_field=IntegerField()), Value(0)),
+            reorder_total=Coalesce(Subquery(reorder_total, output_field=IntegerField()), Value(0)),
+        )
+        .filter(low_stock_count__gt=0)
+        .order_by('tree_id', 'lft')
+        .values('id', 'name', 'level', 'low_stock_count', 'reorder_total')
+    )
+
+
+def material_row(material):
+    """Словарь строки отчёта для материала из get_low_stock_materials."""
+    return {
+        'id': material.id,
+        'name': material.name,
+        'category_id': material.category_id,
+        'category_name': material.category.name,
+        'type': material.type,
+        'unit': material.unit,
+        'quantity': material.quantity,
+        'reserved_quantity': material.reserved_quantity,
+        'available_quantity': material.available,
+        'min_quantity': material.min_quantity,
+        'reorder_quantity': material.reorder_quantity,
+    }
+
+
+def get_low_stock_report(material_type=None):
+    """
+    Отчёт для JSON-ответа: материалы, итоги по категориям и общие итоги.
+
+    Args:
+        material_type: тип материала (paper/film); None – все
+
+    Returns:
+        dict: materials, categories, totals (materials_count, out_of_stock_count, reorder_total)
+    """
+    materials = [material_row(material) for material in get_low_stock_materials(material_type)]
+    return {
+        'materials': materials,
+        'categories': get_category_rollup(material_type),
+        'totals': {
+            'materials_count': len(materials),
+            'out_of_stock_count': sum(1 for row in materials if row['available_quantity'] <= 0),
+            'reorder_total': sum(row['reorder_quantity'] for row in materials),
+        },
+    }
+
+
+# ========== ВЫГРУЗКА CSV / XLSX ==========
+
+def iter_report_rows(material_type=None):
+    """Значения строк выгрузки (в порядке REPORT_HEADERS), материалы читаются пачками."""
+    type_names = dict(MATERIAL_TYPES)
+    materials = get_low_stock_materials(material_type).iterator(chunk_size=REPORT_CHUNK_SIZE)
+    for material in materials:
+        yield [
+            material.category.name,
+            material.name,
+            type_names.get(material.type, material.type),
+            material.unit,
+            material.quantity,
+            material.reserved_quantity,
+            material.available,
+            material.min_quantity,
+            material.reorder_quantity,
+        ]
+
+
+def iter_csv_lines(material_type=None):
+    """
+    Отчёт в CSV построчно (разделитель «;», UTF-8 с BOM – открывается в Excel).
+    Каждая строка формируется по мере чтения материалов из БД.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+
+    def take():
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(REPORT_HEADERS)
+    yield '﻿' + take()
+    for values in iter_report_rows(material_type):
+        writer.writerow(values)
+        yield take()
+
+
+def write_report_workbook(fileobj, material_type=None):
+    """
+    Записывает отчёт в книгу Excel (write_only – строки сразу уходят в файл).
+
+    Args:
+        fileobj: файл (или file-like объект с seek/tell), открытый на запись
+        material_type: тип материала (paper/film); None – все
+
+    Returns:
+        int: количество материалов в отчёте
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title='Заканчиваются')
+    for letter, width in zip('ABCDEFGHI', (30, 40, 10, 10, 12, 12, 12, 12, 12)):
+        ws.column_dimensions[letter].width = width
+    ws.freeze_panes = 'A2'
+
+    header_font = Font(bold=True, color='FFFFFF')
+    header_fill = PatternFill(start_color='0B8661', end_color='0B8661', fill_type='solid')
+    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    header = []
+    for title in REPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header.append(cell)
+    ws.append(header)
+
+    count = 0
+    for values in iter_report_rows(material_type):
+        ws.append(values)
+        count += 1
+
+    wb.save(fileobj)
+    return count
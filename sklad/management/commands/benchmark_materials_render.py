@@ -0,0 +1,226 @@
+"""
+sklad/management/commands/benchmark_materials_render.py
+Бенчмарк отрисовки таблицы материалов склада.
+
+Сравнивает для одной таблицы из N материалов:
+- прежнюю сборку строк f-строками Python (как в generate_materials_html);
+- шаблон sklad/partials/material_row.html без кэша (первый показ);
+- тот же шаблон с кэшем строк (повторный показ, sklad/materials_render.py);
+- ответ format=json (Material.to_dict() и сериализация).
+
+Материалы создаются в памяти и в базу не сохраняются; ключи кэша,
+созданные бенчмарком, удаляются в конце.
+
+Пример:
+    python manage.py benchmark_materials_render
+    python manage.py benchmark_materials_render --materials 1000 5000 --repeat 3
+"""
+
+import json
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sklad.materials_render import render_material_rows, row_cache_key
+from sklad.models import Category, Material
+
+
+# id синтетических материалов начинаются отсюда, чтобы не пересекаться с ключами кэша реальных
+FIRST_MATERIAL_ID = 10 ** 9
+
+
+def make_materials(count, rng, now):
+    """Синтетические материалы (бумага и плёнка) без сохранения в БД."""
+    categories = [
+        Category(id=FIRST_MATERIAL_ID + number, name=f'Категория {number}', updated_at=now)
+        for number in range(20)
+    ]
+    materials = []
+    for number in range(count):
+        material = Material(
+            id=FIRST_MATERIAL_ID + number,
+            name=f'Материал {number} "Премиум"',
+            category=rng.choice(categories),
+            type='film' if rng.random() < 0.3 else 'paper',
+            unit='лист',
+            quantity=rng.randint(0, 500),
+            min_quantity=10,
+        )
+        if material.type == 'paper':
+            material.price = Decimal(rng.randint(100, 10000)) / 100
+            material.density = rng.choice([80, 115, 130, 170, 300])
+            material.paper_thickness = Decimal('0.100')
+        else:
+            material.cost = Decimal(rng.randint(100, 5000)) / 100
+            material.markup_percent = Decimal('30.00')
+            material.thickness = rng.choice([25, 32, 75, 125])
+        material.created_at = now - timedelta(days=rng.randint(0, 365))
+        material.updated_at = now
+        materials.append(material)
+    return materials
+
+
+def legacy_material_rows(materials_data):
+    """Прежний алгоритм: строки таблицы f-строками из словарей to_dict()."""
+    rows = ''
+    for material in materials_data:
+        quantity_class = ''
+        if material['quantity'] <= 0:
+            quantity_class = 'quantity-zero'
+        elif material['min_quantity'] and material['quantity'] <= material['min_quantity']:
+            quantity_class = 'quantity-low'
+
+        if material['type'] == 'film':
+            params = [('cost', 'fa-ruble-sign', ' руб.'), ('markup_percent', 'fa-percent', '%'),
+                      ('thickness', 'fa-ruler', ' мкм')]
+        else:
+            params = [('density', 'fa-weight-hanging', ' г/м²'), ('paper_thickness', 'fa-ruler', ' мм')]
+
+        extra_info = ''
+        for field, icon, suffix in params:
+            display = material[field] if material[field] is not None else '—'
+            value = material[field] if material[field] is not None else ''
+            extra_info += f'''
+                <div class="material-extra">
+                    <span class="param editable-field"
+                          data-editable="true"
+                          data-field="{field}"
+                          data-material-id="{material['id']}"
+                          data-original-value="{value}"
+                          ondblclick="startInlineEdit(this)">
+                        <i class="fas {icon}"></i> {display}{suffix}
+                    </span>
+                </div>
+                '''
+
+        material_name = material['name'].replace("'", "\\'").replace('"', '&quot;')
+        price_attrs = ''
+        price_class = 'price-badge'
+        if material['type'] == 'paper':
+            price_attrs = f'data-editable="true" data-field="price" data-original-value="{material["price"]}"'
+            price_class += ' editable-field'
+
+        rows += f'''
+            <div class="table-row" data-material-id="{material['id']}" data-material-type="{material['type']}">
+                <div class="col-name">
+                    <div class="material-name editable-field"
+                         data-editable="true"
+                         data-field="name"
+                         data-material-id="{material['id']}"
+                         data-original-value="{material_name}">
+                        {material['name']}
+                    </div>
+                    <div class="material-category">
+                        <i class="fas fa-folder"></i>
+                        {material['category_name']}
+                    </div>
+                    <div class="material-extra">
+                        {extra_info}
+                    </div>
+                </div>
+                <div class="col-price">
+                    <span class="{price_class}" {price_attrs}>
+                        {material['price_display']}
+                    </span>
+                </div>
+                <div class="col-quantity">
+                    <span class="quantity-badge {quantity_class} editable-field" data-editable="true"
+                          data-field="quantity" data-original-value="{material['quantity']}"
+                          data-min-quantity="{material['min_quantity']}" data-material-id="{material['id']}">
+                        {material['quantity']} {material['unit']}
+                    </span>
+                </div>
+                <div class="col-actions">
+                    <button type="button"
+                            class="btn-action btn-delete"
+                            data-material-id="{material['id']}"
+                            data-material-name="{material['name']}">
+                        Удалить
+                    </button>
+                </div>
+            </div>
+            '''
+    return rows
+
+
+def measure(function, repeat, before=None):
+    """Лучшее время из repeat запусков (секунды) и результат последнего; before() – перед каждым запуском."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время отрисовки таблицы материалов: f-строки, шаблон без кэша и с кэшем строк, JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--materials',
+            type=int,
+            nargs='+',
+            default=[5000],
+            help='Количество материалов в таблице (можно несколько значений, по умолчанию 5000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Сколько раз повторять каждое измерение (берётся лучшее время)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Начальное значение генератора случайных чисел'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+
+        for count in options['materials']:
+            materials = make_materials(count, rng, now)
+            keys = [row_cache_key(material) for material in materials]
+            try:
+                self.run_case(materials, keys, options['repeat'])
+            finally:
+                cache.delete_many(keys)
+
+        self.stdout.write(self.style.SUCCESS('✅ Бенчмарк завершён'))
+
+    def run_case(self, materials, keys, repeat):
+        clear_rows = lambda: cache.delete_many(keys)
+
+        results = [
+            ('f-строки (прежний код)',) + measure(
+                lambda: legacy_material_rows([m.to_dict() for m in materials]), repeat
+            ),
+            ('шаблон, без кэша',) + measure(lambda: render_material_rows(materials), repeat, before=clear_rows),
+            ('шаблон, строки из кэша',) + measure(lambda: render_material_rows(materials), repeat),
+            ('format=json',) + measure(
+                lambda: json.dumps([m.to_dict() for m in materials], ensure_ascii=False), repeat
+            ),
+        ]
+
+        cached = len(cache.get_many(keys))
+        self.stdout.write('')
+        self.stdout.write(f"Материалов: {len(materials)} (строк в кэше после прогона: {cached})")
+        self.stdout.write(f"  {'Способ':<26} {'Время':>10} {'Символов':>12}")
+        for title, elapsed, output in results:
+            self.stdout.write(f"  {title:<26} {elapsed * 1000:>7.1f} мс {len(output):>12,}")
+        if cached < len(materials):
+            self.stdout.write(self.style.WARNING(
+                '  Не все строки поместились в кэш – увеличьте MAX_ENTRIES кэша (settings.CACHES)'
+            ))
@@ -0,0 +1,95 @@
+"""
+sklad/management/commands/import_materials.py
+Массовый импорт материалов и категорий склада из CSV или XLSX (каталог поставщика).
+
+Категории создаются по пути из столбца category, материалы создаются или
+обновляются по паре (категория, название); дерево категорий пересчитывается
+один раз в конце. Строки с ошибками пропускаются и попадают в отчёт
+(CSV: строка, поле, ошибка). Формат столбцов – в sklad/importer.py.
+В конце выводится время по этапам импорта.
+
+Пример:
+    python manage.py import_materials catalog.xlsx
+    python manage.py import_materials films.csv --type film --report errors.csv
+    python manage.py import_materials catalog.csv --dry-run
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sklad.importer import (
+    iter_rows, import_materials, write_error_report, ImportFormatError, IMPORT_CHUNK_SIZE,
+)
+from sklad.models import MATERIAL_TYPES
+
+
+class Command(BaseCommand):
+    help = 'Импортирует материалы и категории склада из файла CSV или XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .csv или .xlsx (первая строка – заголовки)')
+        parser.add_argument(
+            '--type',
+            choices=[value for value, _ in MATERIAL_TYPES],
+            default='paper',
+            help='Тип материалов для строк без столбца type (по умолчанию paper)'
+        )
+        parser.add_argument(
+            '--report',
+            help='Куда записать отчёт об ошибках (CSV); по умолчанию <файл>.errors.csv'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help=f'Сколько строк обрабатывать за раз (по умолчанию {IMPORT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только проверить файл, ничего не сохраняя'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        path = options['path']
+
+        def report(rows, created, updated):
+            self.stdout.write(
+                f"  строк: {rows}, создано: {created}, обновлено: {updated} "
+                f"({time.perf_counter() - started:.1f} с)"
+            )
+
+        try:
+            with open(path, 'rb') as import_file:
+                result = import_materials(
+                    iter_rows(import_file, path),
+                    material_type=options['type'],
+                    chunk_size=options['chunk_size'],
+                    dry_run=options['dry_run'],
+                    progress=report,
+                )
+        except OSError as e:
+            raise CommandError(f"Не удалось открыть файл: {e}")
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+
+        if result['errors']:
+            report_path = options['report'] or f"{path}.errors.csv"
+            with open(report_path, 'w', encoding='utf-8', newline='') as report_file:
+                write_error_report(result, report_file)
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Ошибок: {len(result['errors'])}, отчёт: {report_path}"
+            ))
+
+        timings = result['timings']
+        self.stdout.write(
+            f"  время: чтение и проверка {timings['read']:.2f} с, категории {timings['categories']:.2f} с, "
+            f"материалы {timings['materials']:.2f} с, пересчёт дерева {timings['rebuild']:.2f} с"
+        )
+        action = 'Проверено' if options['dry_run'] else 'Импортировано'
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {action}: категорий создано {result['categories']}, материалов создано {result['created']}, "
+            f"обновлено {result['updated']}, без изменений {result['unchanged']} из {result['rows']} строк за {timings['total']:.1f} с"
+        ))
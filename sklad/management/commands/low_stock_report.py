@@ -0,0 +1,90 @@
+"""
+sklad/management/commands/low_stock_report.py
+Отчёт о заканчивающихся материалах и количестве к дозаказу.
+
+Материал попадает в отчёт, если его свободный остаток (на складе минус
+резерв под открытые просчёты) не больше минимального – см. sklad/low_stock.py.
+Без --output отчёт выводится в консоль: итоги по категориям и список
+материалов; с --output записывается в файл CSV или XLSX (по расширению
+или --format).
+
+Пример:
+    python manage.py low_stock_report
+    python manage.py low_stock_report --type paper
+    python manage.py low_stock_report --output reorder.xlsx
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sklad.low_stock import get_category_rollup, get_low_stock_materials, iter_csv_lines, write_report_workbook
+from sklad.models import MATERIAL_TYPES
+
+
+class Command(BaseCommand):
+    help = 'Показывает заканчивающиеся материалы и количество к дозаказу (или выгружает в CSV/XLSX)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            choices=[value for value, _ in MATERIAL_TYPES],
+            help='Тип материала (по умолчанию – все)'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки (.csv или .xlsx); по умолчанию – вывод в консоль'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'xlsx'],
+            help='Формат файла, если его нельзя определить по расширению'
+        )
+
+    def handle(self, *args, **options):
+        material_type = options['type']
+        output = options['output']
+
+        if not output:
+            self.print_report(material_type)
+            return
+
+        export_format = options['format'] or os.path.splitext(output)[1].lstrip('.').lower()
+        if export_format == 'csv':
+            with open(output, 'w', encoding='utf-8', newline='') as fileobj:
+                count = -1  # строка заголовков
+                for line in iter_csv_lines(material_type):
+                    fileobj.write(line)
+                    count += 1
+        elif export_format == 'xlsx':
+            with open(output, 'wb') as fileobj:
+                count = write_report_workbook(fileobj, material_type)
+        else:
+            raise CommandError('Укажите файл .csv или .xlsx (или --format)')
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Материалов в отчёте: {count}, файл: {output}"))
+
+    def print_report(self, material_type):
+        categories = get_category_rollup(material_type)
+        if not categories:
+            self.stdout.write(self.style.SUCCESS('✅ Заканчивающихся материалов нет'))
+            return
+
+        self.stdout.write('Категории (с подкатегориями):')
+        for category in categories:
+            indent = '  ' * (category['level'] + 1)
+            self.stdout.write(
+                f"{indent}{category['name']}: материалов {category['low_stock_count']}, "
+                f"к дозаказу {category['reorder_total']}"
+            )
+
+        self.stdout.write('')
+        self.stdout.write(f"  {'Материал':<40} {'Склад':>8} {'Резерв':>8} {'Свободно':>9} {'Минимум':>8} {'Дозаказ':>8}")
+        count = 0
+        for material in get_low_stock_materials(material_type):
+            self.stdout.write(
+                f"  {material.name[:40]:<40} {material.quantity:>8} {material.reserved_quantity:>8} "
+                f"{material.available:>9} {material.min_quantity:>8} {material.reorder_quantity:>8}"
+            )
+            count += 1
+        self.stdout.write(self.style.WARNING(f"Заканчивается материалов: {count}"))
@@ -0,0 +1,77 @@
+"""
+sklad/management/commands/reprice_materials.py
+Пересчёт итогов открытых просчётов по текущим ценам материалов.
+
+Задания пересчёта создаются при изменении цены материала и выполняются
+в фоновом потоке (sklad/repricing.py). Команда выполняет задания,
+оставшиеся в очереди (например, процесс был перезапущен до их
+выполнения), а с --retry – и прерванные или завершившиеся ошибкой.
+С --material пересчитываются просчёты с указанными материалами – после
+изменения цен в обход сигналов (queryset.update в админке).
+
+Пример:
+    python manage.py reprice_materials
+    python manage.py reprice_materials --retry
+    python manage.py reprice_materials --material 12 15
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sklad.models import Material, RepricingJob
+from sklad.repricing import run_job
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает итоги открытых просчётов по текущим ценам материалов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--material',
+            type=int,
+            nargs='+',
+            help='id материалов для пересчёта (по умолчанию – задания из очереди)'
+        )
+        parser.add_argument(
+            '--retry',
+            action='store_true',
+            help='Повторить также прерванные и завершившиеся ошибкой задания'
+        )
+
+    def handle(self, *args, **options):
+        if options['material']:
+            material_ids = sorted(set(options['material']))
+            found = set(Material.objects.filter(pk__in=material_ids).values_list('pk', flat=True))
+            missing = [str(material_id) for material_id in material_ids if material_id not in found]
+            if missing:
+                raise CommandError(f"Материалы не найдены: {', '.join(missing)}")
+            job_ids = [RepricingJob.objects.create(material_ids=material_ids).pk]
+        else:
+            if options['retry']:
+                RepricingJob.objects.filter(
+                    status__in=[RepricingJob.STATUS_RUNNING, RepricingJob.STATUS_FAILED]
+                ).update(status=RepricingJob.STATUS_PENDING, error='')
+            job_ids = list(
+                RepricingJob.objects.filter(status=RepricingJob.STATUS_PENDING)
+                .order_by('id').values_list('id', flat=True)
+            )
+
+        if not job_ids:
+            self.stdout.write(self.style.SUCCESS('✅ Заданий в очереди нет'))
+            return
+
+        components = laminates = failed = 0
+        for job_id in job_ids:
+            job = run_job(job_id)
+            if job is None:
+                continue  # задание уже выполняет фоновый поток
+            if job.status == RepricingJob.STATUS_FAILED:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"❌ Задание {job.id}: {job.error}"))
+            components += job.components_updated
+            laminates += job.laminates_updated
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Заданий: {len(job_ids)}, пересчитано компонентов: {components}, ламинаций: {laminates}"
+        ))
+        if failed:
+            raise CommandError(f"Заданий с ошибкой: {failed}")
@@ -0,0 +1,55 @@
+"""
+sklad/management/commands/sync_stock_reservations.py
+Пересчёт резервов материалов под все действующие печатные компоненты.
+
+Резервы поддерживаются автоматически сигналами (sklad/signals.py); команда
+нужна один раз после включения складского учёта – для просчётов, созданных
+раньше, – и после массовых изменений в обход сигналов (queryset.update в
+админке). Пересчёт идемпотентен: резерв меняется только на разницу.
+
+Пример:
+    python manage.py sync_stock_reservations
+    python manage.py sync_stock_reservations --proschet 125
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator.models_list_proschet import PrintComponent, Proschet
+from sklad.models import StockReservation
+from sklad.stock import sync_component_reservations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает резервы бумаги и плёнки под печатные компоненты просчётов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--proschet',
+            type=int,
+            help='id просчёта (по умолчанию – все просчёты)'
+        )
+
+    def handle(self, *args, **options):
+        components = PrintComponent.objects.all()
+        reservations = StockReservation.objects.filter(consumed_at__isnull=True)
+        if options['proschet']:
+            if not Proschet.objects.filter(pk=options['proschet']).exists():
+                raise CommandError(f"Просчёт {options['proschet']} не найден")
+            components = components.filter(proschet_id=options['proschet'])
+            reservations = reservations.filter(print_component__proschet_id=options['proschet'])
+
+        # Действующие компоненты и те, у которых остались резервы (удалённые мягко)
+        component_ids = set(
+            components.filter(is_deleted=False, proschet__is_deleted=False).values_list('id', flat=True)
+        )
+        component_ids.update(reservations.values_list('print_component_id', flat=True))
+
+        for number, component_id in enumerate(sorted(component_ids), start=1):
+            sync_component_reservations(component_id)
+            if number % 500 == 0:
+                self.stdout.write(f"  компонентов: {number} из {len(component_ids)}")
+
+        active = StockReservation.objects.filter(consumed_at__isnull=True, quantity__gt=0).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Пересчитано компонентов: {len(component_ids)}, активных резервов: {active}"
+        ))
@@ -0,0 +1,110 @@
+"""
+material_list.py для приложения sklad
+Выборка материалов категории и статистика склада для правой колонки
+
+Материалы категории и всех её подкатегорий отбираются одним JOIN с
+интервалом MPTT (tree_id, lft, rght) – без промежуточного списка id
+потомков в Python. Вся статистика (всего, активных, в выбранной
+категории) считается одним запросом с условными агрегатами, количество
+категорий берётся из кэша дерева (sklad/tree_cache.py). Сериализуется
+только запрошенная страница материалов.
+
+Клик по категории: категория + статистика + страница материалов –
+три запроса независимо от размера дерева.
+
+Функции:
+- subtree_q: условие «материал в категории или её подкатегориях»
+- get_material_stats: статистика одним агрегатом
+- get_materials_page: страница материалов и данные для переключателя страниц
+"""
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import Material
+from . import tree_cache
+
+
+# Сколько материалов показывать на одной странице таблицы
+MATERIALS_PAGE_SIZE = getattr(settings, 'SKLAD_MATERIALS_PAGE_SIZE', 200)
+
+
+def subtree_q(category):
+    """
+    Условие на материалы категории и всех её потомков по интервалу MPTT.
+
+    Args:
+        category: Category (нужны tree_id, lft, rght)
+
+    Returns:
+        Q: фильтр для QuerySet материалов
+    """
+    return Q(
+        category__tree_id=category.tree_id,
+        category__lft__gte=category.lft,
+        category__rght__lte=category.rght,
+    )
+
+
+def get_descendants_count(category):
+    """Количество потомков категории – из интервала MPTT, без запроса."""
+    return (category.rght - category.lft - 1) // 2
+
+
+def get_material_stats(material_type, category=None):
+    """
+    Статистика склада для типа материала одним запросом.
+
+    Args:
+        material_type: тип материала (paper/film)
+        category: выбранная категория или None
+
+    Returns:
+        dict: categories_count, materials_count, active_materials_count,
+              current_materials_count (в выбранной категории с подкатегориями)
+    """
+    aggregates = {
+        'materials_count': Count('id'),
+        'active_materials_count': Count('id', filter=Q(is_active=True)),
+    }
+    if category is not None:
+        aggregates['current_materials_count'] = Count('id', filter=subtree_q(category))
+
+    stats = Material.objects.filter(type=material_type).aggregate(**aggregates)
+    if category is None:
+        stats['current_materials_count'] = stats['materials_count']
+    stats['categories_count'] = tree_cache.get_category_count(material_type)
+    return stats
+
+
+def get_materials_page(material_type, category=None, page=1, total=None, page_size=MATERIALS_PAGE_SIZE):
+    """
+    Страница материалов типа material_type (по имени).
+
+    Args:
+        material_type: тип материала (paper/film)
+        category: категория – материалы её поддерева; None – все материалы
+        page: номер страницы, с 1 (за пределами – ближайшая существующая)
+        total: сколько всего материалов в выборке (из get_material_stats)
+        page_size: размер страницы
+
+    Returns:
+        tuple: (список Material, {'page', 'pages', 'page_size', 'total'})
+    """
+    materials = Material.objects.select_related('category').filter(type=material_type)
+    if category is not None:
+        materials = materials.filter(subtree_q(category))
+    if total is None:
+        total = materials.count()
+
+    pages = max(1, -(-total // page_size))
+    page = min(max(1, page), pages)
+    offset = (page - 1) * page_size
+
+    page_materials = list(materials.order_by('name', 'id')[offset:offset + page_size])
+    return page_materials, {
+        'page': page,
+        'pages': pages,
+        'page_size': page_size,
+        'total': total,
+    }
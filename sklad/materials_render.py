@@ -0,0 +1,108 @@
+"""
+materials_render.py для приложения sklad
+HTML правой колонки склада из шаблонов с кэшем строк таблицы
+
+Правая колонка (заголовок, статистика, форма добавления материала, таблица,
+переключатель страниц) – шаблон sklad/partials/materials_panel.html, одна
+строка таблицы – sklad/partials/material_row.html. Шаблоны компилируются
+один раз (кэширующий загрузчик Django), а не собираются из строк Python
+при каждом клике по категории.
+
+Готовый HTML каждой строки хранится в кэше Django под ключом из id
+материала, Material.updated_at и Category.updated_at (в строке выводится
+название категории). Любое сохранение материала или категории меняет
+ключ, поэтому устаревшая строка просто перестаёт запрашиваться и истекает
+по TTL. Строки страницы читаются из кэша одним get_many; to_dict() и
+отрисовка шаблона нужны только для изменившихся материалов.
+
+Функции:
+- row_cache_key: ключ кэша строки материала
+- render_material_rows: HTML строк таблицы (из кэша или шаблона)
+- render_materials_panel: HTML всей правой колонки
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import Context
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+
+ROW_TEMPLATE = 'sklad/partials/material_row.html'
+PANEL_TEMPLATE = 'sklad/partials/materials_panel.html'
+
+ROW_CACHE_KEY = 'sklad:row:{material_id}:{material_updated}:{category_updated}'
+
+# Сколько секунд хранится HTML строки материала (ключ и так меняется при изменении)
+ROW_CACHE_TTL = getattr(settings, 'SKLAD_ROW_CACHE_TTL', 3600)
+
+UPDATED_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def row_cache_key(material):
+    """Ключ кэша строки: меняется при сохранении материала или его категории."""
+    return ROW_CACHE_KEY.format(
+        material_id=material.id,
+        material_updated=material.updated_at.strftime(UPDATED_FORMAT),
+        category_updated=material.category.updated_at.strftime(UPDATED_FORMAT),
+    )
+
+
+def render_material_rows(materials):
+    """
+    HTML строк таблицы материалов.
+
+    Args:
+        materials: список Material (с select_related('category'))
+
+    Returns:
+        str: строки таблицы в порядке materials
+    """
+    keys = [row_cache_key(material) for material in materials]
+    cached = cache.get_many(keys)
+
+    missing = {}
+    if len(cached) < len(keys):
+        # Один контекст на все строки: создание Context на каждую строку
+        # заметно дороже самой отрисовки небольшого шаблона
+        template = get_template(ROW_TEMPLATE).template
+        context = Context()
+        for key, material in zip(keys, materials):
+            if key not in cached:
+                with context.push(m=material.to_dict()):
+                    missing[key] = template.render(context)
+        cache.set_many(missing, ROW_CACHE_TTL)
+
+    return ''.join(cached.get(key) or missing[key] for key in keys)
+
+
+def render_materials_panel(request, materials, selected_category, descendants_count, stats, pagination=None):
+    """
+    HTML правой колонки склада. Всегда включает форму добавления и кнопку,
+    даже если материалов нет.
+
+    Args:
+        request: HttpRequest (CSRF-токен формы добавления)
+        materials: список Material текущей страницы
+        selected_category: словарь с id и name выбранной категории (или None)
+        descendants_count: количество подкатегорий (для заголовка)
+        stats: статистика из get_material_stats
+        pagination: словарь page/pages/page_size/total (переключатель, если страниц больше одной)
+
+    Returns:
+        str: HTML
+    """
+    context = {
+        'rows': mark_safe(render_material_rows(materials)),
+        'selected_category': selected_category,
+        'descendants_count': descendants_count,
+        'stats': stats,
+        'pagination': pagination,
+        # Кнопки переключателя вызывают loadCategoryMaterials из sklad_ajax.js
+        'category_arg': selected_category['id'] if selected_category else 'null',
+    }
+    if pagination:
+        first_shown = (pagination['page'] - 1) * pagination['page_size'] + 1
+        context['first_shown'] = first_shown
+        context['last_shown'] = first_shown + len(materials) - 1
+    return render_to_string(PANEL_TEMPLATE, context, request=request)
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0036_laminate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('sklad', '0006_material_paper_thickness_alter_material_density'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='reserved_quantity',
+            field=models.IntegerField(default=0, editable=False, help_text='Сумма активных резервов под просчёты', verbose_name='В резерве'),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usage', models.CharField(choices=[('paper', 'Бумага'), ('film', 'Плёнка (ламинация)')], max_length=10, verbose_name='Назначение')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+                ('consumed_at', models.DateTimeField(blank=True, null=True, verbose_name='Списан')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='sklad.material', verbose_name='Материал')),
+                ('print_component', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='calculator.printcomponent', verbose_name='Печатный компонент')),
+            ],
+            options={
+                'verbose_name': 'Резерв материала',
+                'verbose_name_plural': 'Резервы материалов',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receipt', 'Приход'), ('reserve', 'Резерв'), ('release', 'Снятие резерва'), ('consume', 'Списание'), ('adjust', 'Корректировка')], max_length=10, verbose_name='Вид движения')),
+                ('quantity_change', models.IntegerField(default=0, verbose_name='Изменение остатка')),
+                ('reserved_change', models.IntegerField(default=0, verbose_name='Изменение резерва')),
+                ('quantity_after', models.IntegerField(verbose_name='Остаток после')),
+                ('reserved_after', models.IntegerField(verbose_name='Резерв после')),
+                ('note', models.CharField(blank=True, default='', max_length=255, verbose_name='Комментарий')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='sklad.material', verbose_name='Материал')),
+                ('print_component', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='calculator.printcomponent', verbose_name='Печатный компонент')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Движение материала',
+                'verbose_name_plural': 'Движение материалов',
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockreservation',
+            constraint=models.UniqueConstraint(fields=('print_component', 'usage'), name='sklad_reservation_component_usage_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['material', '-created_at'], name='sklad_stock_materia_352bcd_idx'),
+        ),
+    ]
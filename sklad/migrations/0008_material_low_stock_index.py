@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:00
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklad', '0007_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(condition=models.Q(('is_active', True), ('quantity__lte', django.db.models.expressions.CombinedExpression(models.F('min_quantity'), '+', models.F('reserved_quantity')))), fields=['type', 'category'], name='sklad_material_low_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sklad', '0008_material_low_stock_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepricingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('material_ids', models.JSONField(default=list, help_text='id материалов, цена которых изменилась', verbose_name='Материалы')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнено'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Состояние')),
+                ('components_updated', models.IntegerField(default=0, verbose_name='Пересчитано компонентов')),
+                ('laminates_updated', models.IntegerField(default=0, verbose_name='Пересчитано ламинаций')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начато')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+            ],
+            options={
+                'verbose_name': 'Пересчёт по ценам материалов',
+                'verbose_name_plural': 'Пересчёты по ценам материалов',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['status'], name='sklad_repri_status_b417a6_idx')],
+            },
+        ),
+    ]
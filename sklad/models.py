@@ -4,9 +4,13 @@ models.py для приложения sklad
 Содержит:
 - Category (категория с MPTT)
 - Material (материал с полями для бумаги и плёнки)
+- StockReservation (резерв материала под печатный компонент просчёта)
+- StockMovement (журнал движения остатков: приход, резерв, списание, корректировка)
+- RepricingJob (задание пересчёта стоимости просчётов после изменения цены материала)
 """
 
 # Импортируем необходимые модули Django
+from django.conf import settings                     # AUTH_USER_MODEL для автора движения
 from django.db import models                         # Базовые классы моделей
 from django.core.validators import MinValueValidator # Валидатор минимального значения
 from mptt.models import MPTTModel, TreeForeignKey    # Поддержка деревьев (MPTT)
@@ -202,12 +206,21 @@ class Material(models.Model):
     )
 
     # --- Складские поля (общие) ---
+    # Остатки меняются только через журнал движения (sklad/stock.py) – одним
+    # UPDATE с F(), поэтому оба поля всегда согласованы с StockMovement
     quantity = models.IntegerField(
         verbose_name='Количество на складе',
         default=0,
         validators=[MinValueValidator(0)],
     )
 
+    reserved_quantity = models.IntegerField(
+        verbose_name='В резерве',
+        default=0,
+        editable=False,
+        help_text='Сумма активных резервов под просчёты',
+    )
+
     min_quantity = models.IntegerField(
         verbose_name='Минимальный остаток',
         default=10,
@@ -253,6 +266,13 @@ class Material(models.Model):
             models.Index(fields=['price']),
             models.Index(fields=['is_active']),
             models.Index(fields=['type']),
+            # Частичный индекс отчёта о заканчивающихся материалах (sklad/low_stock.py):
+            # только активные материалы, свободный остаток которых не больше минимального
+            models.Index(
+                fields=['type', 'category'],
+                condition=models.Q(is_active=True, quantity__lte=models.F('min_quantity') + models.F('reserved_quantity')),
+                name='sklad_material_low_stock_idx',
+            ),
         ]
 
     def __str__(self):
@@ -286,17 +306,26 @@ class Material(models.Model):
         """Полное имя: 'Категория - Название'."""
         return f"{self.category.name} - {self.name}"
 
+    @property
+    def available_quantity(self):
+        """Свободный остаток: на складе минус резерв под просчёты."""
+        return self.quantity - self.reserved_quantity
+
     def get_quantity_status(self):
         """
-        Возвращает статус остатка: ('danger', 'Нет в наличии'), ('warning', 'Мало'), ('success', 'В наличии').
-        Используется для цветовой индикации.
+        Возвращает статус свободного остатка: ('danger', 'Нет в наличии'), ('warning', 'Мало'),
+        ('success', 'В наличии'). Используется для цветовой индикации.
+        Считается по полям модели – без запросов к журналу и резервам.
         """
+        available = self.available_quantity
         if self.quantity <= 0:
             return 'danger', 'Нет в наличии'
-        elif self.quantity <= self.min_quantity:
-            return 'warning', f'Мало ({self.quantity})'
+        elif available <= 0:
+            return 'danger', f'Всё в резерве ({self.reserved_quantity})'
+        elif available <= self.min_quantity:
+            return 'warning', f'Мало ({available})'
         else:
-            return 'success', f'В наличии ({self.quantity})'
+            return 'success', f'В наличии ({available})'
 
     def to_dict(self):
         """
@@ -306,7 +335,7 @@ class Material(models.Model):
         return {
             'id': self.id,
             'name': self.name,
-            'category_id': self.category.id,
+            'category_id': self.category_id,
             'category_name': self.category.name,
             'type': self.type,
             'price': float(self.get_price()),
@@ -315,6 +344,8 @@ class Material(models.Model):
             'density': self.density,                     # плотность бумаги
             'paper_thickness': float(self.paper_thickness) if self.paper_thickness else None,
             'quantity': self.quantity,
+            'reserved_quantity': self.reserved_quantity,
+            'available_quantity': self.available_quantity,
             'min_quantity': self.min_quantity,
             'quantity_status': self.get_quantity_status(),
             'is_active': self.is_active,
@@ -325,4 +356,277 @@ class Material(models.Model):
             'thickness': self.thickness,
             'created_at': self.created_at.strftime('%d.%m.%Y %H:%M'),
             'updated_at': self.updated_at.strftime('%d.%m.%Y %M:%S'),
-        }
\ No newline at end of file
+        }
+
+class StockReservation(models.Model):
+    """
+    Резерв материала под печатный компонент просчёта.
+    Создаётся и пересчитывается автоматически (sklad/stock.py):
+    - бумага – по количеству листов компонента;
+    - плёнка – по листам компонента, если включена ламинация.
+    На один компонент – не больше одного резерва каждого вида.
+    """
+
+    USAGE_CHOICES = (
+        ('paper', 'Бумага'),
+        ('film', 'Плёнка (ламинация)'),
+    )
+
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.CASCADE,
+        verbose_name='Материал',
+        related_name='reservations',
+    )
+
+    print_component = models.ForeignKey(
+        'calculator.PrintComponent',
+        on_delete=models.CASCADE,
+        verbose_name='Печатный компонент',
+        related_name='stock_reservations',
+    )
+
+    usage = models.CharField(
+        max_length=10,
+        choices=USAGE_CHOICES,
+        verbose_name='Назначение',
+    )
+
+    quantity = models.PositiveIntegerField(
+        verbose_name='Количество',
+        default=0,
+    )
+
+    # Списанный резерв больше не пересчитывается (материал уже израсходован)
+    consumed_at = models.DateTimeField(
+        verbose_name='Списан',
+        null=True,
+        blank=True,
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата обновления',
+    )
+
+    class Meta:
+        verbose_name = 'Резерв материала'
+        verbose_name_plural = 'Резервы материалов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['print_component', 'usage'],
+                name='sklad_reservation_component_usage_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.material_id}: {self.quantity} ({self.get_usage_display()}, компонент {self.print_component_id})"
+
+
+class StockMovement(models.Model):
+    """
+    Запись журнала движения материала. Каждое изменение остатков
+    (sklad/stock.py) добавляет одну запись с изменением и остатками после него.
+    """
+
+    KIND_RECEIPT = 'receipt'
+    KIND_RESERVE = 'reserve'
+    KIND_RELEASE = 'release'
+    KIND_CONSUME = 'consume'
+    KIND_ADJUST = 'adjust'
+
+    KIND_CHOICES = (
+        (KIND_RECEIPT, 'Приход'),
+        (KIND_RESERVE, 'Резерв'),
+        (KIND_RELEASE, 'Снятие резерва'),
+        (KIND_CONSUME, 'Списание'),
+        (KIND_ADJUST, 'Корректировка'),
+    )
+
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.CASCADE,
+        verbose_name='Материал',
+        related_name='movements',
+    )
+
+    kind = models.CharField(
+        max_length=10,
+        choices=KIND_CHOICES,
+        verbose_name='Вид движения',
+    )
+
+    # Изменения остатков (со знаком)
+    quantity_change = models.IntegerField(
+        verbose_name='Изменение остатка',
+        default=0,
+    )
+
+    reserved_change = models.IntegerField(
+        verbose_name='Изменение резерва',
+        default=0,
+    )
+
+    # Остатки материала сразу после движения
+    quantity_after = models.IntegerField(
+        verbose_name='Остаток после',
+    )
+
+    reserved_after = models.IntegerField(
+        verbose_name='Резерв после',
+    )
+
+    print_component = models.ForeignKey(
+        'calculator.PrintComponent',
+        on_delete=models.SET_NULL,
+        verbose_name='Печатный компонент',
+        related_name='stock_movements',
+        null=True,
+        blank=True,
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        verbose_name='Пользователь',
+        related_name='+',
+        null=True,
+        blank=True,
+    )
+
+    note = models.CharField(
+        max_length=255,
+        verbose_name='Комментарий',
+        blank=True,
+        default='',
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата',
+    )
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name = 'Движение материала'
+        verbose_name_plural = 'Движение материалов'
+        indexes = [
+            models.Index(fields=['material', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.material_id} ({self.quantity_change:+d} / {self.reserved_change:+d})"
+
+    def to_dict(self):
+        """Словарь для JSON-ответов (журнал движения материала)."""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'kind_display': self.get_kind_display(),
+            'quantity_change': self.quantity_change,
+            'reserved_change': self.reserved_change,
+            'quantity_after': self.quantity_after,
+            'reserved_after': self.reserved_after,
+            'print_component_id': self.print_component_id,
+            'user': self.user.username if self.user_id else '',
+            'note': self.note,
+            'created_at': self.created_at.strftime('%d.%m.%Y %H:%M'),
+        }
+
+
+class RepricingJob(models.Model):
+    """
+    Задание пересчёта стоимости открытых просчётов после изменения цены
+    материалов (sklad/repricing.py). Создаётся при сохранении цены,
+    выполняется в фоне после коммита; по нему интерфейс узнаёт, когда
+    итоги компонентов и ламинаций обновлены.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_DONE, 'Выполнено'),
+        (STATUS_FAILED, 'Ошибка'),
+    )
+
+    material_ids = models.JSONField(
+        verbose_name='Материалы',
+        default=list,
+        help_text='id материалов, цена которых изменилась',
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name='Состояние',
+    )
+
+    components_updated = models.IntegerField(
+        verbose_name='Пересчитано компонентов',
+        default=0,
+    )
+
+    laminates_updated = models.IntegerField(
+        verbose_name='Пересчитано ламинаций',
+        default=0,
+    )
+
+    error = models.TextField(
+        verbose_name='Ошибка',
+        blank=True,
+        default='',
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано',
+    )
+
+    started_at = models.DateTimeField(
+        verbose_name='Начато',
+        null=True,
+        blank=True,
+    )
+
+    finished_at = models.DateTimeField(
+        verbose_name='Завершено',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name = 'Пересчёт по ценам материалов'
+        verbose_name_plural = 'Пересчёты по ценам материалов'
+        indexes = [
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self):
+        return f"Пересчёт {self.id}: {self.get_status_display()}"
+
+    def to_dict(self):
+        """Словарь для JSON-ответов (состояние задания)."""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'status_display': self.get_status_display(),
+            'material_ids': self.material_ids,
+            'components_updated': self.components_updated,
+            'laminates_updated': self.laminates_updated,
+            'error': self.error,
+            'created_at': self.created_at.strftime('%d.%m.%Y %H:%M:%S'),
+            'started_at': self.started_at.strftime('%d.%m.%Y %H:%M:%S') if self.started_at else None,
+            'finished_at': self.finished_at.strftime('%d.%m.%Y %H:%M:%S') if self.finished_at else None,
+        }
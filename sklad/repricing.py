@@ -0,0 +1,218 @@
+"""
+repricing.py для приложения sklad
+Пересчёт стоимости открытых просчётов после изменения цены материала
+
+Цена бумаги (Material.price) и плёнки (cost и markup_percent) входит в
+сохранённые итоги: PrintComponent.total_circulation_price и
+Laminate.film_price/total_price. Раньше после правки цены на складе эти
+итоги оставались прежними, пока компонент не сохранят заново.
+
+Теперь изменение цены (sklad/signals.py, импорт каталога) создаёт задание
+RepricingJob, которое после коммита выполняется в фоновом потоке:
+- компоненты открытых просчётов с этой бумагой читаются одним запросом
+  (цена бумаги и количество листов – в том же запросе), итог считается
+  формулой PrintComponent.compute_total_price;
+- включённые ламинации с этой плёнкой – так же одним запросом, цена плёнки
+  и итог – формулами Laminate.compute_film_price / compute_total_price;
+- записываются только изменившиеся строки, через bulk_update.
+Цены печати и ламинатора не меняются – пересчитывается только материал.
+
+Потоки: один рабочий поток на процесс, задания выполняются по очереди.
+Если процесс остановился до выполнения, задание остаётся в очереди –
+команда reprice_materials выполнит его. SKLAD_REPRICING_IN_BACKGROUND =
+False – задание выполняется сразу после коммита в том же потоке.
+
+Функции:
+- enqueue_repricing: создать задание и запустить его после коммита
+- run_job: выполнить задание
+- reprice_materials: пересчитать компоненты и ламинации с материалами
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import RepricingJob
+
+
+# Выполнять задания в фоновом потоке (False – сразу после коммита, в том же потоке)
+REPRICING_IN_BACKGROUND = getattr(settings, 'SKLAD_REPRICING_IN_BACKGROUND', True)
+
+# Сколько строк записывать одним bulk_update
+REPRICING_BATCH_SIZE = getattr(settings, 'SKLAD_REPRICING_BATCH_SIZE', 500)
+
+# Поля материала, от которых зависят итоги просчётов
+PRICE_FIELDS = ('price', 'cost', 'markup_percent')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Пул из одного потока: задания пересчёта выполняются по очереди."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sklad-repricing')
+        return _executor
+
+
+# ========== ЗАДАНИЯ ==========
+
+def enqueue_repricing(material_ids):
+    """
+    Создаёт задание пересчёта; выполняется оно после коммита текущей
+    транзакции (пересчёт должен видеть уже сохранённые цены).
+
+    Args:
+        material_ids: id материалов с изменившейся ценой
+
+    Returns:
+        RepricingJob
+    """
+    job = RepricingJob.objects.create(material_ids=sorted(set(material_ids)))
+    transaction.on_commit(lambda: _start(job.pk))
+    return job
+
+
+def _start(job_id):
+    if REPRICING_IN_BACKGROUND:
+        _get_executor().submit(_run_in_thread, job_id)
+    else:
+        run_job(job_id)
+
+
+def _run_in_thread(job_id):
+    """Выполнение задания в потоке пула: своё соединение с БД."""
+    try:
+        run_job(job_id)
+    finally:
+        # Соединение принадлежит потоку пула – закрываем, чтобы не оставлять его открытым
+        connection.close()
+
+
+def run_job(job_id):
+    """
+    Выполняет задание, если оно ещё в очереди (одно задание не выполняется
+    дважды, даже если его запустили команда и фоновый поток одновременно).
+
+    Returns:
+        RepricingJob или None, если задание уже взято
+    """
+    taken = RepricingJob.objects.filter(pk=job_id, status=RepricingJob.STATUS_PENDING).update(
+        status=RepricingJob.STATUS_RUNNING, started_at=timezone.now(),
+    )
+    if not taken:
+        return None
+
+    job = RepricingJob.objects.get(pk=job_id)
+    try:
+        result = reprice_materials(job.material_ids)
+    except Exception as e:
+        print(f"⚠️ Ошибка пересчёта по ценам материалов (задание {job_id}): {e}")
+        job.status = RepricingJob.STATUS_FAILED
+        job.error = str(e)
+    else:
+        job.status = RepricingJob.STATUS_DONE
+        job.components_updated = result['components']
+        job.laminates_updated = result['laminates']
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'components_updated', 'laminates_updated', 'error', 'finished_at'])
+    return job
+
+
+# ========== ПЕРЕСЧЁТ ==========
+
+def _sheet_count_subquery(component_ref):
+    """Количество листов компонента (из вычислений листов) как подзапрос."""
+    from vichisliniya_listov.models import VichisliniyaListovModel
+
+    return Subquery(
+        VichisliniyaListovModel.objects
+        .filter(vichisliniya_listov_print_component_id=OuterRef(component_ref))
+        .values('vichisliniya_listov_list_count')[:1]
+    )
+
+
+def _reprice_components(material_ids):
+    """Итоги компонентов открытых просчётов с бумагой из material_ids."""
+    from calculator.models_list_proschet import PrintComponent
+
+    # Строки компонентов блокируются до конца транзакции: одновременное
+    # сохранение компонента не перезапишется устаревшим итогом
+    components = (
+        PrintComponent.objects.select_for_update(of=('self',))
+        .filter(paper_id__in=material_ids, is_deleted=False, proschet__is_deleted=False)
+        .annotate(paper_price=F('paper__price'), list_count=_sheet_count_subquery('pk'))
+        .only('id', 'price_per_sheet', 'printing_mode', 'total_circulation_price')
+        .order_by()
+    )
+    changed = []
+    for component in components:
+        total = PrintComponent.compute_total_price(
+            component.price_per_sheet, component.paper_price,
+            component.list_count or Decimal('0.00'), component.printing_mode,
+        )
+        if total != component.total_circulation_price:
+            component.total_circulation_price = total
+            changed.append(component)
+
+    PrintComponent.objects.bulk_update(changed, ['total_circulation_price'], batch_size=REPRICING_BATCH_SIZE)
+    return len(changed)
+
+
+def _reprice_laminates(material_ids):
+    """Цена плёнки и итог включённых ламинаций с плёнкой из material_ids."""
+    from calculator.models_lamination import Laminate
+
+    laminates = (
+        Laminate.objects.select_for_update(of=('self',))
+        .filter(
+            film_id__in=material_ids, is_enabled=True,
+            print_component__is_deleted=False, print_component__proschet__is_deleted=False,
+        )
+        .select_related('film')
+        .annotate(list_count=_sheet_count_subquery('print_component_id'))
+        .only('id', 'laminator_price', 'film_price', 'total_price', 'film')
+        .order_by()
+    )
+    now = timezone.now()
+    changed = []
+    for laminate in laminates:
+        # Формулы Laminate.recalculate_price; цена ламинатора не меняется
+        film_price = Laminate.compute_film_price(laminate.film)
+        total = Laminate.compute_total_price(laminate.laminator_price, film_price, laminate.list_count)
+        if (film_price, total) != (laminate.film_price, laminate.total_price):
+            laminate.film_price = film_price
+            laminate.total_price = total
+            # bulk_update не вызывает auto_now
+            laminate.updated_at = now
+            changed.append(laminate)
+
+    Laminate.objects.bulk_update(
+        changed, ['film_price', 'total_price', 'updated_at'], batch_size=REPRICING_BATCH_SIZE
+    )
+    return len(changed)
+
+
+def reprice_materials(material_ids):
+    """
+    Пересчитывает итоги компонентов и ламинаций открытых просчётов,
+    в которых используются материалы (одна транзакция).
+
+    Args:
+        material_ids: id материалов
+
+    Returns:
+        dict: {'components': пересчитано компонентов, 'laminates': пересчитано ламинаций}
+    """
+    with transaction.atomic():
+        return {
+            'components': _reprice_components(material_ids),
+            'laminates': _reprice_laminates(material_ids),
+        }
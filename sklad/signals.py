@@ -0,0 +1,140 @@
+"""
+signals.py для приложения sklad
+Сигналы для сброса кэша дерева категорий и пересчёта резервов материалов
+
+Функции:
+- category_tree_changed: после коммита увеличивает версию дерева
+  (sklad/tree_cache.py) при создании, изменении или удалении категории
+  или материала
+- print_component_saved / lamination_saved / list_count_saved: пересчитывают
+  резервы бумаги и плёнки печатного компонента (sklad/stock.py)
+- print_component_deleting: снимает резервы удаляемого компонента
+- proschet_saving / proschet_saved: снимают резервы компонентов удалённого
+  (мягко) просчёта и создают их заново, когда просчёт восстановлен
+- material_price_saving / material_price_saved: при изменении цены материала
+  ставят в очередь пересчёт итогов открытых просчётов (sklad/repricing.py)
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from calculator.models_lamination import Laminate
+from calculator.models_list_proschet import Proschet, PrintComponent
+from vichisliniya_listov.models import VichisliniyaListovModel
+
+from .models import Category, Material, StockReservation
+from .tree_cache import bump_tree_version
+from . import stock
+from .repricing import PRICE_FIELDS, enqueue_repricing
+
+
+# Поля компонента, от которых зависит резерв (сохранение только цены резерв не трогает)
+RESERVATION_FIELDS = {'paper', 'is_deleted', 'proschet'}
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Material)
+@receiver(post_delete, sender=Material)
+def category_tree_changed(sender, **kwargs):
+    """
+    Категория или материал изменены – закэшированное дерево устарело:
+    меняются структура, названия или количество материалов в узлах.
+    Версия увеличивается после коммита транзакции: иначе параллельный
+    запрос мог бы построить дерево по ещё не зафиксированным данным и
+    закэшировать его под новой версией.
+    """
+    transaction.on_commit(bump_tree_version)
+
+
+# ========== РЕЗЕРВЫ ПОД ПРОСЧЁТЫ ==========
+
+@receiver(post_save, sender=PrintComponent)
+def print_component_saved(sender, instance, update_fields=None, **kwargs):
+    """Бумага компонента выбрана, изменена или компонент удалён мягко (is_deleted)."""
+    if update_fields is not None and not RESERVATION_FIELDS & set(update_fields):
+        return
+    stock.sync_component_reservations(instance.pk)
+
+
+@receiver(post_save, sender=Laminate)
+def lamination_saved(sender, instance, **kwargs):
+    """Ламинация включена/выключена или выбрана другая плёнка."""
+    stock.sync_component_reservations(instance.print_component_id)
+
+
+@receiver(post_save, sender=VichisliniyaListovModel)
+def list_count_saved(sender, instance, **kwargs):
+    """Изменилось количество листов компонента (тираж, формат, раскладка)."""
+    if instance.vichisliniya_listov_print_component_id:
+        stock.sync_component_reservations(instance.vichisliniya_listov_print_component_id)
+
+
+@receiver(pre_delete, sender=PrintComponent)
+def print_component_deleting(sender, instance, **kwargs):
+    """
+    Компонент удаляется из БД (сам или вместе с просчётом) – резервы снимаются
+    до удаления. Ламинация и листы удаляются каскадом, их сигналы не нужны.
+    """
+    stock.release_component_reservations(instance.pk, instance.number)
+
+
+@receiver(pre_save, sender=Proschet)
+def proschet_saving(sender, instance, update_fields=None, **kwargs):
+    """Запоминает, восстанавливается ли мягко удалённый просчёт (is_deleted: True -> False)."""
+    instance._restored = False
+    if instance.pk is None or instance.is_deleted:
+        return
+    if update_fields is not None and 'is_deleted' not in update_fields:
+        return
+    instance._restored = bool(
+        Proschet.objects.filter(pk=instance.pk).values_list('is_deleted', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Proschet)
+def proschet_saved(sender, instance, **kwargs):
+    """
+    Просчёт удалён мягко – резервы его компонентов больше не нужны;
+    просчёт восстановлен – резервы его компонентов создаются заново.
+    """
+    if instance.is_deleted:
+        component_ids = (
+            StockReservation.objects
+            .filter(print_component__proschet=instance, consumed_at__isnull=True)
+            .values_list('print_component_id', flat=True)
+            .distinct()
+        )
+    elif getattr(instance, '_restored', False):
+        instance._restored = False
+        component_ids = PrintComponent.objects.filter(proschet=instance, is_deleted=False).values_list('pk', flat=True)
+    else:
+        return
+    for component_id in list(component_ids):
+        stock.sync_component_reservations(component_id)
+
+
+# ========== ПЕРЕСЧЁТ ПРОСЧЁТОВ ПО ЦЕНАМ МАТЕРИАЛОВ ==========
+
+@receiver(pre_save, sender=Material)
+def material_price_saving(sender, instance, update_fields=None, **kwargs):
+    """Запоминает, изменились ли цена, себестоимость или наценка материала."""
+    instance._price_changed = False
+    if instance.pk is None or (update_fields is not None and not set(PRICE_FIELDS) & set(update_fields)):
+        return
+    old_prices = Material.objects.filter(pk=instance.pk).values_list(*PRICE_FIELDS).first()
+    if old_prices is not None:
+        instance._price_changed = old_prices != tuple(getattr(instance, field) for field in PRICE_FIELDS)
+
+
+@receiver(post_save, sender=Material)
+def material_price_saved(sender, instance, **kwargs):
+    """
+    Цена материала изменилась – итоги компонентов и ламинаций открытых
+    просчётов пересчитываются в фоне. Задание доступно как
+    instance.repricing_job (его id возвращает update_material).
+    """
+    if getattr(instance, '_price_changed', False):
+        instance._price_changed = False
+        instance.repricing_job = enqueue_repricing([instance.pk])
@@ -63,9 +63,11 @@ function updateUrlWithoutCategoryFilter() {
 /**
  * Загружает материалы для выбранной категории (или все) через AJAX.
  * Принимает ID категории или null для загрузки всех материалов.
+ * Сервер отдаёт материалы постранично (кнопки переключения страниц – в HTML ответа).
  * @param {string|null} categoryId - ID категории или null
+ * @param {number} page - Номер страницы таблицы материалов (по умолчанию 1)
  */
-function loadCategoryMaterials(categoryId) {
+function loadCategoryMaterials(categoryId, page = 1) {
     // Определяем текущий тип материала (бумага/плёнка) с помощью вспомогательной функции
     const type = getCurrentType();
     
@@ -73,8 +75,8 @@ function loadCategoryMaterials(categoryId) {
     // Если categoryId передан – используем API для конкретной категории,
     // иначе – API для всех материалов
     let url = categoryId 
-        ? `/sklad/api/category/${categoryId}/?type=${type}` 
-        : `/sklad/api/category/all/?type=${type}`;
+        ? `/sklad/api/category/${categoryId}/?type=${type}&page=${page}` 
+        : `/sklad/api/category/all/?type=${type}&page=${page}`;
     
     console.log(`[SKLAD-AJAX] Загрузка материалов для категории ID: ${categoryId}, тип: ${type}`);
     
@@ -123,7 +125,7 @@ function loadCategoryMaterials(categoryId) {
         }
         console.error('[SKLAD-AJAX] Ошибка загрузки материалов:', error);
         // Можно показать уведомление об ошибке, но не обязательно, так как функция
-        // generate_materials_html в views.py уже возвращает HTML с сообщением об ошибке.
+        // get_category_data в views.py уже возвращает HTML с сообщением об ошибке.
     })
     .finally(() => {
         // Освобождаем контроллер, чтобы следующий запрос мог создать новый
@@ -353,7 +355,7 @@ function createMaterialForm() {
     // Получаем CSRF-токен из cookie (наиболее надёжный способ)
     const csrfToken = getCsrfToken();
     
-    // HTML-код формы (полностью соответствует тому, что генерирует generate_materials_html)
+    // HTML-код формы (полностью соответствует шаблону sklad/partials/materials_panel.html)
     // Добавлены поля density и paper_thickness
     const formHTML = `
     <div class="form-section" id="material-form-section" style="display: block;">
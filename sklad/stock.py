@@ -0,0 +1,303 @@
+"""
+stock.py для приложения sklad
+Складской учёт: журнал движения материалов и резервы под просчёты
+
+Остатки материала хранятся в самой модели (Material.quantity – на складе,
+Material.reserved_quantity – в резерве), поэтому индикаторы остатка
+(get_quantity_status) не требуют запросов. Меняются они только здесь:
+одним UPDATE с выражениями F() (без чтения-изменения-записи в Python) и
+с записью StockMovement в той же транзакции. UPDATE блокирует строку
+материала до конца транзакции, поэтому одновременные приходы и резервы
+не теряют изменений друг друга.
+
+Резервы пересчитываются автоматически (sklad/signals.py) при изменении
+печатного компонента, количества листов (VichisliniyaListovModel) или
+ламинации:
+- бумага компонента – количество листов (с округлением вверх);
+- плёнка ламинации – столько же листов, если ламинация включена.
+Пересчёт одного компонента сериализуется блокировкой его строки
+(select_for_update), резерв меняется только на разницу.
+
+Функции:
+- receive: приход материала на склад
+- adjust: корректировка остатка по факту (инвентаризация, ручная правка)
+- sync_component_reservations: пересчёт резервов печатного компонента
+- release_component_reservations: снятие резервов компонента
+- consume_proschet: списание резервов просчёта со склада
+- get_movements: последние записи журнала материала
+"""
+
+import math
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Material, StockMovement, StockReservation
+
+
+# Сколько записей журнала отдавать по умолчанию
+MOVEMENTS_LIMIT = 100
+
+
+class StockError(Exception):
+    """Операция со складом невозможна (некорректное количество и т.п.)."""
+
+
+# ========== ИЗМЕНЕНИЕ ОСТАТКОВ ==========
+
+def _apply(material_id, kind, quantity_change=0, reserved_change=0,
+           print_component_id=None, user=None, note=''):
+    """
+    Меняет остатки материала одним UPDATE с F() и записывает движение.
+    Вызывается внутри transaction.atomic().
+
+    Returns:
+        StockMovement: созданная запись журнала
+    """
+    Material.objects.filter(pk=material_id).update(
+        quantity=F('quantity') + quantity_change,
+        reserved_quantity=F('reserved_quantity') + reserved_change,
+        # auto_now не срабатывает при update(); от updated_at зависит кэш строк таблицы
+        updated_at=timezone.now(),
+    )
+    # Строка заблокирована нашим UPDATE – прочитанные остатки точно после него
+    quantity_after, reserved_after = (
+        Material.objects.filter(pk=material_id)
+        .values_list('quantity', 'reserved_quantity')
+        .get()
+    )
+    return StockMovement.objects.create(
+        material_id=material_id,
+        kind=kind,
+        quantity_change=quantity_change,
+        reserved_change=reserved_change,
+        quantity_after=quantity_after,
+        reserved_after=reserved_after,
+        print_component_id=print_component_id,
+        user=user,
+        note=note[:255],
+    )
+
+
+def receive(material, quantity, user=None, note=''):
+    """
+    Приход материала на склад.
+
+    Args:
+        material: Material или его id
+        quantity: количество (целое, больше нуля)
+        user: пользователь, оформивший приход
+        note: комментарий (номер накладной и т.п.)
+
+    Returns:
+        StockMovement
+
+    Raises:
+        StockError: количество не положительное
+    """
+    if quantity <= 0:
+        raise StockError('Количество прихода должно быть больше нуля')
+    material_id = getattr(material, 'pk', material)
+    with transaction.atomic():
+        return _apply(material_id, StockMovement.KIND_RECEIPT, quantity_change=quantity, user=user, note=note)
+
+
+def adjust(material, new_quantity, user=None, note=''):
+    """
+    Устанавливает фактический остаток на складе (инвентаризация, ручная правка).
+    Записывается корректировка на разницу с текущим остатком.
+
+    Args:
+        material: Material или его id
+        new_quantity: фактическое количество (не меньше нуля)
+        user: пользователь
+        note: комментарий
+
+    Returns:
+        StockMovement или None, если остаток не изменился
+
+    Raises:
+        StockError: отрицательное количество
+    """
+    if new_quantity < 0:
+        raise StockError('Количество не может быть отрицательным')
+    material_id = getattr(material, 'pk', material)
+    with transaction.atomic():
+        # Текущий остаток читается под блокировкой: разница не устареет
+        # из-за одновременного прихода или списания
+        current = (
+            Material.objects.select_for_update()
+            .filter(pk=material_id)
+            .values_list('quantity', flat=True)
+            .get()
+        )
+        if new_quantity == current:
+            return None
+        return _apply(
+            material_id, StockMovement.KIND_ADJUST,
+            quantity_change=new_quantity - current, user=user, note=note,
+        )
+
+
+# ========== РЕЗЕРВЫ ПОД ПРОСЧЁТЫ ==========
+
+def _required_materials(component_id):
+    """
+    Какие материалы и в каком количестве нужны печатному компоненту.
+    Компонент читается с блокировкой строки (select_for_update).
+
+    Returns:
+        dict: {usage: (id материала, количество)}; пустой, если компонент
+              удалён (в том числе мягко) или его просчёт удалён
+    """
+    from calculator.models_lamination import Laminate
+    from calculator.models_list_proschet import PrintComponent
+    from vichisliniya_listov.models import VichisliniyaListovModel
+
+    component = (
+        PrintComponent.objects.select_for_update()
+        .filter(pk=component_id, is_deleted=False, proschet__is_deleted=False)
+        .values('paper_id')
+        .first()
+    )
+    if component is None:
+        return {}
+
+    # Количество листов – то же, что в расчёте стоимости компонента
+    list_count = (
+        VichisliniyaListovModel.objects
+        .filter(vichisliniya_listov_print_component_id=component_id)
+        .values_list('vichisliniya_listov_list_count', flat=True)
+        .first()
+    )
+    sheets = math.ceil(list_count) if list_count else 0
+    if sheets <= 0:
+        return {}
+
+    required = {}
+    if component['paper_id']:
+        required['paper'] = (component['paper_id'], sheets)
+
+    film_id = (
+        Laminate.objects
+        .filter(print_component_id=component_id, is_enabled=True, film__isnull=False)
+        .values_list('film_id', flat=True)
+        .first()
+    )
+    if film_id:
+        required['film'] = (film_id, sheets)
+    return required
+
+
+def _set_reservations(component_id, required, user=None, deleted_number=None):
+    """
+    Приводит резервы компонента к required, меняя остатки только на разницу.
+
+    deleted_number – номер компонента, который сейчас удаляется из БД: движения
+    тогда не ссылаются на него (удаление не должно зависеть от новых строк
+    журнала), а номер записывается в комментарий.
+    """
+    if deleted_number is None:
+        movement_component_id, note = component_id, ''
+    else:
+        movement_component_id, note = None, f'Компонент {deleted_number} удалён'
+    reservations = {
+        reservation.usage: reservation
+        for reservation in StockReservation.objects.select_for_update().filter(print_component_id=component_id)
+    }
+
+    for usage, _ in StockReservation.USAGE_CHOICES:
+        reservation = reservations.get(usage)
+        if reservation is not None and reservation.consumed_at:
+            continue
+        material_id, quantity = required.get(usage, (None, 0))
+
+        # Сменился материал или резерв больше не нужен – снимаем его полностью
+        if reservation is not None and reservation.material_id != material_id:
+            _apply(
+                reservation.material_id, StockMovement.KIND_RELEASE,
+                reserved_change=-reservation.quantity,
+                print_component_id=movement_component_id, user=user, note=note,
+            )
+            reservation.delete()
+            reservation = None
+
+        if material_id is None:
+            continue
+
+        change = quantity - (reservation.quantity if reservation else 0)
+        if not change:
+            continue
+        _apply(
+            material_id,
+            StockMovement.KIND_RESERVE if change > 0 else StockMovement.KIND_RELEASE,
+            reserved_change=change, print_component_id=movement_component_id, user=user, note=note,
+        )
+        if reservation is None:
+            StockReservation.objects.create(
+                material_id=material_id, print_component_id=component_id, usage=usage, quantity=quantity,
+            )
+        else:
+            reservation.quantity = quantity
+            reservation.save(update_fields=['quantity', 'updated_at'])
+
+
+def sync_component_reservations(component_id, user=None):
+    """
+    Пересчитывает резервы печатного компонента по его бумаге, количеству
+    листов и ламинации. Списанные резервы не меняются.
+
+    Args:
+        component_id: id PrintComponent
+        user: пользователь (для журнала)
+    """
+    with transaction.atomic():
+        _set_reservations(component_id, _required_materials(component_id), user)
+
+
+def release_component_reservations(component_id, number='', user=None):
+    """Снимает все несписанные резервы компонента перед его удалением из БД."""
+    with transaction.atomic():
+        _set_reservations(component_id, {}, user, deleted_number=number or component_id)
+
+
+def consume_proschet(proschet_id, user=None, note=''):
+    """
+    Списывает со склада материалы, зарезервированные под просчёт:
+    остаток и резерв уменьшаются на количество резерва.
+
+    Args:
+        proschet_id: id просчёта
+        user: пользователь
+        note: комментарий
+
+    Returns:
+        int: количество списанных резервов
+    """
+    with transaction.atomic():
+        reservations = list(
+            StockReservation.objects.select_for_update()
+            .filter(print_component__proschet_id=proschet_id, consumed_at__isnull=True, quantity__gt=0)
+            .order_by('material_id', 'id')
+        )
+        now = timezone.now()
+        for reservation in reservations:
+            _apply(
+                reservation.material_id, StockMovement.KIND_CONSUME,
+                quantity_change=-reservation.quantity, reserved_change=-reservation.quantity,
+                print_component_id=reservation.print_component_id, user=user, note=note,
+            )
+            reservation.consumed_at = now
+            reservation.save(update_fields=['consumed_at', 'updated_at'])
+        return len(reservations)
+
+
+def get_movements(material, limit=MOVEMENTS_LIMIT):
+    """Последние записи журнала движения материала (новые сверху)."""
+    material_id = getattr(material, 'pk', material)
+    return list(
+        StockMovement.objects.filter(material_id=material_id)
+        .select_related('user')
+        .order_by('-created_at', '-id')[:limit]
+    )
@@ -1,3 +1,427 @@
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from calculator.models_lamination import Laminate
+from calculator.models_list_proschet import PrintComponent, Proschet
+from devices.models import Laminator
+from print_price.models import LaminatorPrice
+from sheet_formats.models import SheetFormat
+from sklad import low_stock, repricing, stock, tree_cache
+from sklad.importer import import_materials, iter_rows
+from sklad.material_list import get_descendants_count, get_material_stats, get_materials_page
+from sklad.materials_render import render_material_rows, row_cache_key
+from sklad.models import Category, Material, RepricingJob, StockMovement, StockReservation
+from vichisliniya_listov.models import VichisliniyaListovModel
+
+
+class CategoryTreeTest(TestCase):
+    """Дерево категорий за один проход и его кэш (sklad/tree_cache.py)."""
+
+    def setUp(self):
+        cache.clear()
+        self.paper = Category.objects.create(name='Бумага', type='paper')
+        self.coated = Category.objects.create(name='Меловка', parent=self.paper, type='paper')
+        self.glossy = Category.objects.create(name='Глянцевая', parent=self.coated, type='paper')
+        self.offset = Category.objects.create(name='Офсетная', parent=self.paper, type='paper')
+        Material.objects.create(name='Меловка 130', category=self.coated, type='paper')
+        Material.objects.create(name='Глянец 150', category=self.glossy, type='paper')
+        Material.objects.create(name='Глянец 200', category=self.glossy, type='paper')
+        Material.objects.create(name='Офсет 80', category=self.offset, type='paper')
+
+    def test_tree_structure_and_subtree_totals(self):
+        with self.assertNumQueries(2):
+            (root,) = tree_cache.build_category_tree('paper')
+
+        self.assertEqual((root['materials_count'], root['total_materials_count']), (0, 4))
+        coated, offset = root['children']
+        self.assertEqual(coated['name'], 'Меловка')
+        self.assertEqual((coated['materials_count'], coated['total_materials_count']), (1, 3))
+        self.assertEqual(coated['children'][0]['total_materials_count'], 2)
+        self.assertEqual(offset['total_materials_count'], 1)
+
+    def test_subcategories_in_tree_order(self):
+        node, descendants = tree_cache.get_subcategories(self.paper, 'paper')
+
+        self.assertEqual(node['total_materials_count'], 4)
+        self.assertEqual(
+            [(item['name'], item['level'], item['materials_count']) for item in descendants],
+            [('Меловка', 0, 1), ('Глянцевая', 1, 2), ('Офсетная', 0, 1)],
+        )
+
+    def test_cache_is_reset_by_writes(self):
+        tree_cache.get_category_tree('paper')
+        with self.assertNumQueries(0):
+            tree_cache.get_category_tree('paper')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Material.objects.create(name='Офсет 120', category=self.offset, type='paper')
+            # До коммита версия прежняя: дерево не строится по незафиксированным данным
+            (root,) = tree_cache.get_category_tree('paper')
+            self.assertEqual(root['total_materials_count'], 4)
+
+        (root,) = tree_cache.get_category_tree('paper')
+        self.assertEqual(root['total_materials_count'], 5)
+
+
+class MaterialListTest(TestCase):
+    """Материалы поддерева и статистика одним агрегатом (sklad/material_list.py)."""
+
+    def setUp(self):
+        cache.clear()
+        self.paper = Category.objects.create(name='Бумага', type='paper')
+        self.coated = Category.objects.create(name='Меловка', parent=self.paper, type='paper')
+        self.other = Category.objects.create(name='Картон', type='paper')
+        for index in range(5):
+            Material.objects.create(name=f'Меловка {index}', category=self.coated, type='paper', is_active=index != 0)
+        Material.objects.create(name='Картон 300', category=self.other, type='paper')
+
+    def test_stats_in_one_query(self):
+        tree_cache.get_category_count('paper')
+
+        with self.assertNumQueries(1):
+            stats = get_material_stats('paper', self.paper)
+
+        self.assertEqual(stats, {
+            'materials_count': 6,
+            'active_materials_count': 5,
+            'current_materials_count': 5,
+            'categories_count': 3,
+        })
+        self.assertEqual(get_descendants_count(self.paper), 1)
+
+    def test_page_of_subtree(self):
+        materials, pagination = get_materials_page('paper', self.paper, page=2, page_size=2)
+
+        self.assertEqual([material.name for material in materials], ['Меловка 2', 'Меловка 3'])
+        self.assertEqual(pagination, {'page': 2, 'pages': 3, 'page_size': 2, 'total': 5})
+
+
+class MaterialsRenderTest(TestCase):
+    """Таблица материалов из шаблонов с кэшем строк (sklad/materials_render.py)."""
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user(username='sklad', password='secret-123'))
+        self.category = Category.objects.create(name='Меловка', type='paper')
+        self.material = Material.objects.create(
+            name='Меловка "130"', category=self.category, type='paper', price=12, density=130
+        )
+
+    def test_html_or_json_response(self):
+        url = reverse('sklad:get_category_data', args=[self.category.id])
+
+        data = self.client.get(url, {'type': 'paper'}).json()
+        self.assertNotIn('materials', data)
+        self.assertIn('data-original-value="Меловка &quot;130&quot;"', data['html'])
+        self.assertIn('csrfmiddlewaretoken', data['html'])
+
+        data = self.client.get(url, {'type': 'paper', 'format': 'json'}).json()
+        self.assertNotIn('html', data)
+        self.assertEqual([material['name'] for material in data['materials']], ['Меловка "130"'])
+
+    def test_row_cache_follows_updates(self):
+        materials = list(Material.objects.select_related('category'))
+        html = render_material_rows(materials)
+        self.assertIn('130 г/м²', html)
+        self.assertEqual(cache.get(row_cache_key(materials[0])), html)
+
+        self.material.density = 170
+        self.material.save()
+        self.assertIn('170 г/м²', render_material_rows(list(Material.objects.select_related('category'))))
+
+        # Название категории выводится в строке – переименование тоже меняет ключ
+        self.category.name = 'Мелованная'
+        self.category.save()
+        self.assertIn('Мелованная', render_material_rows(list(Material.objects.select_related('category'))))
+
+
+class StockLedgerTest(TestCase):
+    """Журнал движения и резервы под просчёты (sklad/stock.py)."""
+
+    def setUp(self):
+        cache.clear()
+        paper_category = Category.objects.create(name='Бумага', type='paper')
+        film_category = Category.objects.create(name='Плёнка', type='film')
+        self.paper = Material.objects.create(name='Меловка 130', category=paper_category, type='paper', price=10)
+        self.film = Material.objects.create(name='Глянец 32', category=film_category, type='film', cost=2, markup_percent=50)
+        stock.receive(self.paper, 1000)
+        stock.receive(self.film, 500)
+
+        self.proschet = Proschet.objects.create(title='Визитки', circulation=1000)
+        self.component = PrintComponent.objects.create(proschet=self.proschet, paper=self.paper)
+        # 1000 экземпляров по 8 на листе – 125 листов
+        VichisliniyaListovModel.objects.create(
+            vichisliniya_listov_print_component=self.component, vichisliniya_listov_fit_total=8
+        )
+
+    def balances(self, material):
+        material.refresh_from_db()
+        return material.quantity, material.reserved_quantity
+
+    def test_reservations_follow_component(self):
+        self.assertEqual(self.balances(self.paper), (1000, 125))
+
+        Laminate.objects.create(print_component=self.component, is_enabled=True, film=self.film)
+        self.assertEqual(self.balances(self.film), (500, 125))
+
+        # Тираж вырос – резервы увеличиваются на разницу
+        self.proschet.circulation = 1600
+        self.proschet.save()
+        VichisliniyaListovModel.objects.get().save()  # как при пересчёте листов в калькуляторе
+        self.assertEqual(self.balances(self.paper), (1000, 200))
+        self.assertEqual(self.balances(self.film), (500, 200))
+
+        # Мягкое удаление компонента снимает резервы
+        self.component.is_deleted = True
+        self.component.save()
+        self.assertEqual(self.balances(self.paper), (1000, 0))
+        self.assertEqual(self.balances(self.film), (500, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+        kinds = list(StockMovement.objects.filter(material=self.paper).order_by('id').values_list('kind', 'reserved_change'))
+        self.assertEqual(kinds, [('receipt', 0), ('reserve', 125), ('reserve', 75), ('release', -200)])
+
+    def test_consume_and_status_without_queries(self):
+        self.assertEqual(stock.consume_proschet(self.proschet.id), 1)
+        self.assertEqual(self.balances(self.paper), (875, 0))
+
+        # Списанный резерв не пересчитывается и не снимается
+        self.component.save()
+        self.assertEqual(self.balances(self.paper), (875, 0))
+
+        stock.adjust(self.paper, 5)
+        material = Material.objects.get(pk=self.paper.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(material.get_quantity_status(), ('warning', 'Мало (5)'))
+
+    def test_deleting_proschet_releases_reservations(self):
+        self.proschet.delete()
+        self.assertEqual(self.balances(self.paper), (1000, 0))
+        self.assertEqual(StockMovement.objects.filter(kind='release').get().note, f'Компонент {self.component.number} удалён')
+
+    def test_soft_deleted_proschet_restore_reserves_again(self):
+        Laminate.objects.create(print_component=self.component, is_enabled=True, film=self.film)
+
+        self.proschet.is_deleted = True
+        self.proschet.save()
+        self.assertEqual(self.balances(self.paper), (1000, 0))
+        self.assertEqual(self.balances(self.film), (500, 0))
+
+        self.proschet.is_deleted = False
+        self.proschet.save(update_fields=['is_deleted'])
+        self.assertEqual(self.balances(self.paper), (1000, 125))
+        self.assertEqual(self.balances(self.film), (500, 125))
+        self.assertEqual(StockReservation.objects.count(), 2)
+
+        # Обычное сохранение восстановленного просчёта резервы не дублирует
+        self.proschet.save()
+        self.assertEqual(self.balances(self.paper), (1000, 125))
+
+    def test_inline_quantity_edit_is_adjustment(self):
+        self.client.force_login(get_user_model().objects.create_user(username='sklad', password='secret-123'))
+        response = self.client.post(
+            reverse('sklad:update_material', args=[self.paper.id]),
+            data={'field': 'quantity', 'value': '990'},
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.json()['material']['available_quantity'], 865)
+        movement = StockMovement.objects.filter(material=self.paper).first()
+        self.assertEqual((movement.kind, movement.quantity_change, movement.user.username), ('adjust', -10, 'sklad'))
+
+
+class LowStockReportTest(TestCase):
+    """Отчёт о заканчивающихся материалах (sklad/low_stock.py)."""
+
+    def setUp(self):
+        paper = Category.objects.create(name='Бумага', type='paper')
+        coated = Category.objects.create(name='Меловка', type='paper', parent=paper)
+        film = Category.objects.create(name='Плёнка', type='film')
+
+        def material(name, category, quantity, reserved=0, **fields):
+            created = Material.objects.create(name=name, category=category, type=category.type, min_quantity=100, **fields)
+            # Остатки меняет только журнал – здесь задаём их напрямую
+            Material.objects.filter(pk=created.pk).update(quantity=quantity, reserved_quantity=reserved)
+            return created
+
+        material('Офсет 80', paper, 50)
+        material('Меловка 130', coated, 300, reserved=250)    # свободно 50 – резерв просчётов
+        material('Меловка 170', coated, 500, reserved=100)    # свободно 400 – хватает
+        material('Меловка 250', coated, 0, is_active=False)   # неактивный не учитывается
+        material('Глянец 32', film, 100)                      # ровно минимум – уже мало
+
+    def test_report_and_category_rollup(self):
+        with self.assertNumQueries(2):
+            report = low_stock.get_low_stock_report('paper')
+
+        self.assertEqual(
+            [(row['name'], row['available_quantity'], row['reorder_quantity']) for row in report['materials']],
+            [('Офсет 80', 50, 50), ('Меловка 130', 50, 50)],
+        )
+        self.assertEqual(
+            [(row['name'], row['level'], row['low_stock_count'], row['reorder_total']) for row in report['categories']],
+            [('Бумага', 0, 2, 100), ('Меловка', 1, 1, 50)],
+        )
+        self.assertEqual(report['totals'], {'materials_count': 2, 'out_of_stock_count': 0, 'reorder_total': 100})
+        self.assertEqual(len(low_stock.get_low_stock_report()['materials']), 3)
+
+    def test_csv_and_xlsx_export(self):
+        self.client.force_login(get_user_model().objects.create_user(username='sklad', password='secret-123'))
+        url = reverse('sklad:low_stock_report')
+
+        response = self.client.get(url, {'type': 'film', 'format': 'csv'})
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0].split(';'), low_stock.REPORT_HEADERS)
+        self.assertEqual(lines[1:], ['Плёнка;Глянец 32;Плёнка;лист;100;0;100;100;0'])
+
+        response = self.client.get(url, {'format': 'xlsx'})
+        self.assertEqual(int(response['Content-Length']), len(b''.join(response.streaming_content)))
+
+        self.assertEqual(self.client.get(url, {'format': 'pdf'}).status_code, 400)
+
+
+class MaterialImportTest(TestCase):
+    """Массовый импорт материалов и категорий (sklad/importer.py)."""
+
+    CATALOG = (
+        'Тип;Категория;Материал;Цена;Себестоимость;Наценка;Толщина;Количество\n'
+        'Бумага;Бумага / Меловка / Глянцевая;Глянец 130;12,50;;;;100\n'
+        'Бумага;Бумага / Меловка / Матовая;Мат 130;11;;;;0\n'
+        'Бумага;Бумага / Офсет;Офсет 80;;;;;\n'
+        'Плёнка;Плёнка;Глянец 32;;2;50;32;40\n'
+    )
+
+    def run_import(self, text):
+        return import_materials(iter_rows(io.BytesIO(text.encode('utf-8')), 'catalog.csv'))
+
+    def test_import_builds_tree_and_ledger(self):
+        existing = Category.objects.create(name='Бумага', type='paper')
+
+        result = self.run_import(self.CATALOG)
+
+        self.assertEqual((result['categories'], result['created']), (5, 3))
+        self.assertEqual(result['errors'], [(4, 'price', 'Обязательное поле для нового материала')])
+
+        # Дерево пересчитано: существующий корень получил новых потомков
+        existing.refresh_from_db()
+        self.assertEqual(
+            [category.name for category in existing.get_descendants()],
+            ['Меловка', 'Глянцевая', 'Матовая', 'Офсет'],
+        )
+        glossy = Material.objects.get(name='Глянец 130')
+        self.assertEqual(glossy.category.get_full_path(), 'Бумага / Меловка / Глянцевая')
+        self.assertEqual(str(glossy.price), '12.50')
+        self.assertEqual(
+            sorted(StockMovement.objects.values_list('material__name', 'kind', 'quantity_change')),
+            [('Глянец 130', 'receipt', 100), ('Глянец 32', 'receipt', 40)],
+        )
+
+    def test_reimport_updates_by_category_and_name(self):
+        self.run_import(self.CATALOG)
+        updated = self.CATALOG.replace('12,50;;;;100', '13;;;;80')
+
+        # Запросы: категории, материалы, bulk_update, движение, задание пересчёта по новой цене
+        with self.assertNumQueries(7):
+            result = self.run_import(updated)
+
+        self.assertEqual((result['categories'], result['created'], result['updated'], result['unchanged']), (0, 0, 1, 2))
+        self.assertEqual(len(result['repricing_jobs']), 1)
+        glossy = Material.objects.get(name='Глянец 130')
+        self.assertEqual((str(glossy.price), glossy.quantity), ('13.00', 80))
+        movement = StockMovement.objects.filter(material=glossy).first()
+        self.assertEqual((movement.kind, movement.quantity_change), ('adjust', -20))
+
+
+@mock.patch.object(repricing, 'REPRICING_IN_BACKGROUND', False)
+class RepricingTest(TestCase):
+    """Пересчёт итогов просчётов после изменения цены материала (sklad/repricing.py)."""
+
+    def setUp(self):
+        paper_category = Category.objects.create(name='Бумага', type='paper')
+        film_category = Category.objects.create(name='Плёнка', type='film')
+        self.paper = Material.objects.create(name='Меловка 130', category=paper_category, type='paper', price=10)
+        self.film = Material.objects.create(name='Глянец 32', category=film_category, type='film', cost=2, markup_percent=50)
+
+        proschet = Proschet.objects.create(title='Визитки', circulation=1000)
+        self.component = PrintComponent.objects.create(proschet=proschet, paper=self.paper)
+        # 1000 экземпляров по 8 на листе – 125 листов
+        VichisliniyaListovModel.objects.create(
+            vichisliniya_listov_print_component=self.component, vichisliniya_listov_fit_total=8
+        )
+        self.component.save()
+        self.laminate = Laminate.objects.create(print_component=self.component, is_enabled=True, film=self.film)
+
+    def test_price_edit_reprices_component_in_job(self):
+        self.component.refresh_from_db()
+        self.assertEqual(self.component.total_circulation_price, Decimal('1250.00'))
+
+        self.client.force_login(get_user_model().objects.create_user(username='sklad', password='secret-123'))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('sklad:update_material', args=[self.paper.id]),
+                data={'field': 'price', 'value': '12'},
+                content_type='application/json',
+            )
+        job_id = response.json()['repricing_job_id']
+
+        self.component.refresh_from_db()
+        self.assertEqual(self.component.total_circulation_price, Decimal('1500.00'))
+
+        job = self.client.get(reverse('sklad:repricing_job', args=[job_id])).json()['job']
+        self.assertEqual((job['status'], job['material_ids'], job['components_updated']), ('done', [self.paper.id], 1))
+
+    def test_film_markup_reprices_laminate(self):
+        self.film.markup_percent = Decimal('100')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.film.save()
+
+        self.laminate.refresh_from_db()
+        self.assertEqual((self.laminate.film_price, self.laminate.total_price), (Decimal('4.00'), Decimal('500.00')))
+
+        # Сохранение без изменения цены задание не создаёт
+        self.film.save(update_fields=['name', 'updated_at'])
+        self.film.save()
+        self.assertEqual(RepricingJob.objects.count(), 1)
+
+    def test_laminate_repricing_matches_recalculate_price(self):
+        sheet_format = SheetFormat.objects.create(name='A3', width_mm=297, height_mm=420)
+        laminator = Laminator.objects.create(name='Ламинатор', sheet_format=sheet_format)
+        LaminatorPrice.objects.create(laminator=laminator, copies=1, cost=Decimal('3.10'), markup_percent=Decimal('33.33'))
+        sheet_count = VichisliniyaListovModel.objects.get(
+            vichisliniya_listov_print_component=self.component
+        ).vichisliniya_listov_list_count
+        self.laminate.laminator = laminator
+        self.laminate.recalculate_price(sheet_count)
+        self.laminate.save()
+
+        self.film.cost = Decimal('2.37')
+        self.film.markup_percent = Decimal('17.5')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.film.save()
+
+        # Тот же итог, что и при пересчёте самой ламинации
+        repriced = Laminate.objects.get(pk=self.laminate.pk)
+        expected = Laminate.objects.get(pk=self.laminate.pk)
+        expected.recalculate_price(sheet_count)
+        self.assertEqual(repriced.laminator_price, Decimal('4.13'))
+        self.assertNotEqual(repriced.total_price, self.laminate.total_price)
+        self.assertEqual(
+            (repriced.laminator_price, repriced.film_price, repriced.total_price),
+            (expected.laminator_price, expected.film_price, expected.total_price),
+        )
+
+    def test_failed_job_stores_error(self):
+        job = RepricingJob.objects.create(material_ids=[self.paper.id])
+
+        with mock.patch.object(repricing, 'reprice_materials', side_effect=RuntimeError('нет связи с БД')):
+            repricing.run_job(job.id)
 
-# Create your tests here.
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (RepricingJob.STATUS_FAILED, 'нет связи с БД'))
+        self.assertIsNotNone(job.finished_at)
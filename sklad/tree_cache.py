@@ -0,0 +1,216 @@
+"""
+tree_cache.py для приложения sklad
+Дерево категорий склада за один запрос и его версионированный кэш.
+
+Раньше дерево строилось рекурсивно: для каждой категории отдельный запрос
+children.all() и отдельный запрос количества материалов – два запроса на
+узел. Теперь категории читаются одним запросом в порядке MPTT (tree_id, lft),
+количество материалов – одним запросом с GROUP BY category_id, а дерево
+и итоги по поддеревьям собираются за один линейный проход со стеком.
+
+Готовое дерево каждого типа материала кладётся в кэш Django под ключом,
+содержащим номер версии. Версия увеличивается при любой записи в Category
+или Material (см. sklad/signals.py), поэтому устаревшее дерево просто
+перестаёт запрашиваться и истекает по TTL.
+
+В каждом узле:
+- materials_count – материалы самой категории;
+- total_materials_count – материалы категории и всех её подкатегорий.
+
+Функции:
+- get_tree_version    – текущая версия дерева
+- bump_tree_version   – увеличить версию (вызывается сигналами)
+- build_category_tree – дерево категорий типа материала из БД
+- get_category_tree   – дерево из кэша (строится при промахе)
+- get_category_count  – количество категорий типа материала (из кэша)
+- get_subcategories   – плоский список потомков категории с количествами
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Category, Material
+
+
+TREE_VERSION_KEY = 'sklad:tree:version'
+TREE_CACHE_KEY = 'sklad:tree:{material_type}:{version}'
+COUNT_CACHE_KEY = 'sklad:tree:count:{material_type}:{version}'
+
+# Сколько секунд хранится дерево в кэше (в своём процессе версия и так отсекает устаревшее)
+TREE_CACHE_TTL = getattr(settings, 'SKLAD_TREE_CACHE_TTL', 300)
+
+TREE_FIELDS = ('id', 'name', 'tree_id', 'lft', 'rght', 'level')
+
+
+def get_tree_version():
+    """Возвращает текущую версию дерева категорий (создаёт её при первом обращении)."""
+    version = cache.get(TREE_VERSION_KEY)
+    if version is None:
+        # Начальное значение от времени: после очистки кэша версии
+        # не повторят уже выданные ранее номера
+        cache.add(TREE_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(TREE_VERSION_KEY)
+    return version
+
+
+def bump_tree_version():
+    """Увеличивает версию дерева после изменения категорий или материалов."""
+    try:
+        return cache.incr(TREE_VERSION_KEY)
+    except ValueError:
+        # Ключа ещё нет (или кэш был очищен)
+        get_tree_version()
+        return cache.incr(TREE_VERSION_KEY)
+
+
+def _material_counts(material_type, categories=None):
+    """
+    Количество материалов типа material_type по категориям – один запрос
+    с GROUP BY category_id.
+
+    Args:
+        material_type: тип материала (paper/film)
+        categories: QuerySet категорий для ограничения (None – все)
+
+    Returns:
+        dict: {category_id: количество}
+    """
+    materials = Material.objects.filter(type=material_type)
+    if categories is not None:
+        materials = materials.filter(category__in=categories)
+    return dict(
+        materials.order_by()
+        .values_list('category_id')
+        .annotate(count=Count('id'))
+    )
+
+
+def _build_nodes(rows, counts):
+    """
+    Собирает дерево из строк в порядке MPTT (tree_id, lft) за один проход.
+
+    Открытые узлы лежат в стеке; узел закрывается, когда следующая строка
+    уже не входит в его интервал lft–rght (или начинается другое дерево).
+    При закрытии итог поддерева узла прибавляется к родителю.
+
+    Args:
+        rows: кортежи TREE_FIELDS в порядке tree_id, lft
+        counts: {category_id: количество материалов}
+
+    Returns:
+        list: узлы верхнего уровня
+    """
+    roots = []
+    stack = []  # (узел, tree_id, rght)
+
+    def close_node():
+        node, _, _ = stack.pop()
+        if stack:
+            stack[-1][0]['total_materials_count'] += node['total_materials_count']
+
+    for category_id, name, tree_id, lft, rght, level in rows:
+        while stack and (stack[-1][1] != tree_id or stack[-1][2] < lft):
+            close_node()
+
+        count = counts.get(category_id, 0)
+        node = {
+            'id': category_id,
+            'name': name,
+            'level': level,
+            'children': [],
+            'materials_count': count,
+            'total_materials_count': count,
+        }
+        if stack:
+            stack[-1][0]['children'].append(node)
+        else:
+            roots.append(node)
+        stack.append((node, tree_id, rght))
+
+    while stack:
+        close_node()
+
+    return roots
+
+
+def build_category_tree(material_type):
+    """
+    Строит дерево категорий типа material_type из БД (два запроса).
+
+    Args:
+        material_type: тип материала (paper/film)
+
+    Returns:
+        list: корневые категории (по имени) с вложенными children
+    """
+    root_tree_ids = Category.objects.filter(parent=None, type=material_type).values('tree_id')
+    rows = (
+        Category.objects.filter(tree_id__in=root_tree_ids)
+        .order_by('tree_id', 'lft')
+        .values_list(*TREE_FIELDS)
+    )
+    tree = _build_nodes(rows, _material_counts(material_type))
+    tree.sort(key=lambda node: node['name'])
+    return tree
+
+
+def get_category_tree(material_type):
+    """
+    Дерево категорий типа material_type для текущей версии (из кэша).
+
+    Returns:
+        list: см. build_category_tree
+    """
+    key = TREE_CACHE_KEY.format(material_type=material_type, version=get_tree_version())
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_category_tree(material_type)
+        cache.set(key, tree, TREE_CACHE_TTL)
+    return tree
+
+
+def get_category_count(material_type):
+    """Количество категорий типа material_type для текущей версии (из кэша)."""
+    key = COUNT_CACHE_KEY.format(material_type=material_type, version=get_tree_version())
+    count = cache.get(key)
+    if count is None:
+        count = Category.objects.filter(type=material_type).count()
+        cache.set(key, count, TREE_CACHE_TTL)
+    return count
+
+
+def get_subcategories(category, material_type):
+    """
+    Потомки категории в порядке дерева с количеством материалов (два запроса).
+
+    Args:
+        category: Category
+        material_type: тип материала (paper/film)
+
+    Returns:
+        tuple: (узел самой категории, плоский список потомков) – в узлах
+               level относителен категории (0 – прямые потомки)
+    """
+    subtree = category.get_descendants(include_self=True)
+    rows = subtree.order_by('tree_id', 'lft').values_list(*TREE_FIELDS)
+    counts = _material_counts(material_type, categories=subtree)
+
+    (node,) = _build_nodes(rows, counts)
+
+    descendants = []
+    pending = list(reversed(node['children']))
+    while pending:
+        child = pending.pop()
+        descendants.append({
+            'id': child['id'],
+            'name': child['name'],
+            'materials_count': child['materials_count'],
+            'total_materials_count': child['total_materials_count'],
+            'level': child['level'] - category.level - 1,
+        })
+        pending.extend(reversed(child['children']))
+
+    return node, descendants
@@ -29,4 +29,18 @@ urlpatterns = [
     path('category/delete/<int:category_id>/', views.delete_category, name='delete_category'),
     path('material/delete/<int:material_id>/', views.delete_material, name='delete_material'),
     path('api/films/', views.get_films_list, name='get_films_list'),
+
+    # Складской учёт: приход, журнал движения, списание резервов просчёта
+    path('material/<int:material_id>/receipt/', views.receive_material, name='receive_material'),
+    path('api/material/<int:material_id>/movements/', views.get_material_movements, name='material_movements'),
+    path('api/proschet/<int:proschet_id>/consume/', views.consume_proschet_materials, name='consume_proschet'),
+
+    # Отчёт о заканчивающихся материалах (?type=paper|film&format=json|csv|xlsx)
+    path('api/report/low-stock/', views.low_stock_report, name='low_stock_report'),
+
+    # Состояние пересчёта просчётов после изменения цены материала
+    path('api/repricing/<int:job_id>/', views.get_repricing_job, name='repricing_job'),
+
+    # Массовый импорт материалов и категорий из CSV/XLSX
+    path('api/import/', views.import_materials_upload, name='import_materials'),
 ]
\ No newline at end of file
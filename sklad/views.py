@@ -12,6 +12,11 @@ views.py для приложения sklad
 - Удаление материала (delete_material)
 - Inline-редактирование материала (update_material) – поддерживает все поля, включая density
 - Получение списка категорий для формы (get_categories_for_form)
+- Складской учёт: приход (receive_material), журнал движения (get_material_movements),
+  списание резервов просчёта (consume_proschet_materials) – см. sklad/stock.py
+- Отчёт о заканчивающихся материалах (low_stock_report) – JSON, CSV или XLSX, см. sklad/low_stock.py
+- Массовый импорт материалов и категорий из файла (import_materials_upload) – см. sklad/importer.py
+- Состояние пересчёта просчётов после изменения цены материала (get_repricing_job) – см. sklad/repricing.py
 - Вспомогательные тестовые API (test_api, get_category_children)
 
 Добавлена полная поддержка полей:
@@ -37,29 +42,73 @@ from django.views.decorators.cache import never_cache
 from django.contrib import messages
 # messages – фреймворк для отправки одноразовых уведомлений пользователю (flash-сообщения)
 
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 # JsonResponse – ответ в формате JSON (используется для AJAX-API)
+# StreamingHttpResponse – выгрузка отчёта блоками, без сборки всего файла в памяти
 
 from django.views.decorators.http import require_POST, require_http_methods
 # require_POST – требует, чтобы запрос был методом POST (иначе вернёт 405)
 # require_http_methods – требует определённые HTTP-методы (например, POST, PUT, PATCH)
 
+from django.db import transaction
+# transaction – создание материала и его начального прихода одной транзакцией
+
 import json
 # json – модуль для парсинга и сериализации JSON-данных
 
+import tempfile
+from datetime import datetime
+# tempfile, datetime – временный файл книги Excel и имя файла выгрузки
+
 from decimal import Decimal, InvalidOperation
 # Decimal – для точной работы с денежными суммами (избегаем ошибок float)
 # InvalidOperation – исключение, возникающее при некорректном преобразовании в Decimal
 
 # Импортируем наши модели
-from .models import Category, Material
+from .models import Category, Material, RepricingJob, MATERIAL_TYPES
+
+# Дерево категорий за один запрос и его кэш
+from . import tree_cache
+
+# Выборка материалов по интервалу MPTT и статистика одним агрегатом
+from .material_list import get_material_stats, get_materials_page, get_descendants_count
+
+# HTML правой колонки из шаблонов с кэшем строк таблицы
+from .materials_render import render_materials_panel
+
+# Журнал движения материалов и резервы под просчёты
+from . import stock
+from .stock import StockError
+
+# Отчёт о заканчивающихся материалах и его выгрузка
+from . import low_stock
+from counter.excel_export import iter_file_chunks
 
-# Импортируем функцию для получения CSRF-токена (нужна при генерации HTML-форм)
-from django.middleware.csrf import get_token
+# Массовый импорт каталога материалов
+from .importer import iter_rows, import_materials, ImportFormatError
+
+# Книга Excel отчёта до этого размера собирается в памяти, больше – во временном файле на диске
+REPORT_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+# Сколько ошибок импорта возвращать в ответе (полный отчёт – команда import_materials)
+IMPORT_ERRORS_IN_RESPONSE = 500
 
 
 # ================== AJAX API ДЛЯ БЕСПЕРЕЗАГРУЗОЧНОЙ РАБОТЫ ==================
 
+def _get_page_number(request):
+    """Номер страницы таблицы материалов из GET-параметра page (по умолчанию 1)."""
+    try:
+        return max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        return 1
+
+
+def _wants_json(request):
+    """Ответ с данными материалов (format=json) вместо HTML правой колонки."""
+    return request.GET.get('format') == 'json'
+
+
 @login_required(login_url='/counter/login/')
 def test_api(request, category_id):
     """
@@ -94,84 +143,72 @@ def get_category_data(request, category_id=None):
     """
     Возвращает все данные для отображения при выборе категории.
     Используется AJAX-запросами для бес-перезагрузочного обновления правой колонки.
-    Принимает GET-параметр type (paper/film) для фильтрации материалов по типу.
-    Возвращает JSON с HTML-кодом правой колонки, списком материалов и статистикой.
+    Принимает GET-параметр type (paper/film) для фильтрации материалов по типу,
+    page – номер страницы таблицы, format – вид ответа:
+    - по умолчанию – HTML правой колонки (ключ html) и статистика;
+    - format=json – список материалов страницы (ключ materials) и статистика.
     """
     try:
         # Получаем тип материала из GET-параметра, по умолчанию 'paper'
         material_type = request.GET.get('type', 'paper')
 
+        # Номер страницы таблицы материалов (сериализуется только она)
+        page = _get_page_number(request)
+
         # Переменная для хранения выбранной категории (будет заполнена, если передан category_id)
         selected_category = None
 
-        # Базовый QuerySet материалов – только нужного типа, отсортированные по имени,
-        # с подгрузкой связанной категории (select_related для уменьшения числа запросов)
-        materials = Material.objects.select_related('category').filter(
-            type=material_type
-        ).order_by('name')
-
         # Количество подкатегорий (для отображения в заголовке)
         descendants_count = 0
 
-        # Если передан category_id, фильтруем материалы по этой категории и её потомкам
+        # Если передан category_id, материалы отбираются по интервалу MPTT категории
+        # (один JOIN, см. sklad/material_list.py)
         if category_id:
             try:
                 # Пытаемся найти категорию с указанным id и типом
                 selected_category = Category.objects.get(id=category_id, type=material_type)
 
-                # Получаем всех потомков категории (включая саму категорию)
-                descendants = selected_category.get_descendants(include_self=True)
-
-                # Извлекаем список ID всех потомков
-                descendant_ids = list(descendants.values_list('id', flat=True))
-
-                # Количество подкатегорий = общее количество потомков минус 1 (сама категория)
-                descendants_count = len(descendant_ids) - 1
-
-                # Ограничиваем материалы только теми, чья категория входит в список descendant_ids
-                materials = materials.filter(category_id__in=descendant_ids)
+                # Количество подкатегорий вычисляется по lft/rght, без запроса
+                descendants_count = get_descendants_count(selected_category)
 
             except Category.DoesNotExist:
                 # Если категория не найдена – сбрасываем выбранную категорию и количество подкатегорий
                 selected_category = None
                 descendants_count = 0
 
-        # Преобразуем каждый объект Material в словарь с помощью метода to_dict()
-        # Это удобно для сериализации в JSON
-        materials_data = [m.to_dict() for m in materials]
+        # Статистика для текущего типа материала – один запрос с условными агрегатами
+        stats = get_material_stats(material_type, selected_category)
 
-        # Статистика для текущего типа материала
-        stats = {
-            'categories_count': Category.objects.filter(type=material_type).count(),
-            'materials_count': Material.objects.filter(type=material_type).count(),
-            'active_materials_count': Material.objects.filter(type=material_type, is_active=True).count(),
-            'current_materials_count': materials.count(),  # количество материалов после фильтрации
-        }
+        # Только запрошенная страница материалов, с подгрузкой категорий (select_related)
+        materials, pagination = get_materials_page(
+            material_type, selected_category, page=page, total=stats['current_materials_count']
+        )
 
         # Если выбрана категория, создаём словарь с её id и названием (для передачи в шаблон)
         category_dict = None
         if selected_category:
             category_dict = {'id': selected_category.id, 'name': selected_category.name}
 
-        # Получаем CSRF-токен для вставки в форму (он понадобится при генерации HTML)
-        csrf_token = get_token(request)
-
-        # Генерируем HTML для правой колонки (таблица материалов + форма добавления + статистика)
-        html_content = generate_materials_html(materials_data, category_dict, descendants_count, stats, csrf_token)
-
-        # Возвращаем JSON-ответ со всеми данными
-        return JsonResponse({
+        response = {
             'success': True,
             'category': {
                 'selected_category': category_dict,
                 'descendants_count': descendants_count,
-                'materials_count': materials.count(),
+                'materials_count': stats['current_materials_count'],
             } if category_dict else None,
-            'materials': materials_data,
             'stats': stats,
-            'html': html_content,
-            'materials_count': len(materials_data),
-        })
+            'pagination': pagination,
+            'materials_count': len(materials),
+        }
+
+        # format=json – только данные материалов, иначе – только HTML правой колонки
+        if _wants_json(request):
+            response['materials'] = [m.to_dict() for m in materials]
+        else:
+            response['html'] = render_materials_panel(
+                request, materials, category_dict, descendants_count, stats, pagination
+            )
+        return JsonResponse(response)
 
     except Exception as e:
         # Логируем ошибку в консоль сервера для отладки
@@ -210,18 +247,9 @@ def get_category_children(request, category_id):
         # Находим категорию или возвращаем 404, если не найдена
         category = get_object_or_404(Category, id=category_id, type=material_type)
 
-        # Получаем всех потомков (без самой категории, т.к. include_self=False по умолчанию)
-        descendants = category.get_descendants()
-
-        # Формируем список подкатегорий для JSON-ответа
-        subcategories = []
-        for descendant in descendants:
-            subcategories.append({
-                'id': descendant.id,
-                'name': descendant.name,
-                'materials_count': descendant.materials.filter(type=material_type).count(),
-                'level': descendant.level - category.level - 1,  # относительный уровень вложенности
-            })
+        # Потомки одним запросом по интервалу lft–rght и количество материалов
+        # одним GROUP BY (sklad/tree_cache.py); level – относительный уровень вложенности
+        node, subcategories = tree_cache.get_subcategories(category, material_type)
 
         # Возвращаем успешный JSON-ответ
         return JsonResponse({
@@ -229,10 +257,11 @@ def get_category_children(request, category_id):
             'category': {
                 'id': category.id,
                 'name': category.name,
-                'materials_count': category.materials.filter(type=material_type).count(),
+                'materials_count': node['materials_count'],
+                'total_materials_count': node['total_materials_count'],
             },
             'subcategories': subcategories,
-            'descendants_count': len(descendants),
+            'descendants_count': len(subcategories),
         })
 
     except Exception as e:
@@ -243,354 +272,35 @@ def get_category_children(request, category_id):
         }, status=500)
 
 
-def generate_materials_html(materials_data, selected_category, descendants_count, stats, csrf_token):
-    """
-    Универсальная функция для генерации HTML таблицы материалов.
-    Всегда включает форму добавления и кнопку, даже если материалов нет.
-
-    Параметры:
-    - materials_data: список словарей с данными материалов (результат to_dict())
-    - selected_category: словарь с id и name выбранной категории (или None)
-    - descendants_count: количество подкатегорий (для отображения в заголовке)
-    - stats: словарь со статистикой (количество категорий, материалов и т.д.)
-    - csrf_token: CSRF-токен для вставки в форму
-
-    ВАЖНО: все поля (density, paper_thickness, cost, markup_percent, thickness)
-    теперь имеют атрибут data-editable="true", чтобы их можно было редактировать inline.
-    """
-    materials_rows = ''   # Пустая строка, в которую будем собирать HTML строк таблицы
-
-    # Если есть материалы, формируем строки таблицы
-    if materials_data:
-        for material in materials_data:
-            # Определяем CSS-класс для количества в зависимости от остатка
-            quantity_class = ''
-            if material['quantity'] <= 0:
-                quantity_class = 'quantity-zero'          # нет в наличии
-            elif material['min_quantity'] and material['quantity'] <= material['min_quantity']:
-                quantity_class = 'quantity-low'           # мало
-
-            # Генерация дополнительной информации (extra_info) в зависимости от типа материала
-            extra_info = ''
-            if material['type'] == 'film':
-                # --- Плёнка: себестоимость, наценка, толщина (все редактируемые) ---
-                # Себестоимость
-                cost_display = material['cost'] if material['cost'] is not None else '—'
-                cost_value = material['cost'] if material['cost'] is not None else ''
-                extra_info += f'''
-                <div class="material-extra">
-                    <span class="param editable-field" 
-                        data-editable="true"
-                        data-field="cost"
-                        data-material-id="{material['id']}"
-                        data-original-value="{cost_value}"
-                        ondblclick="startInlineEdit(this)">
-                        <i class="fas fa-ruble-sign"></i> {cost_display} руб.
-                    </span>
-                </div>
-                '''
-
-                # Наценка
-                markup_display = material['markup_percent'] if material['markup_percent'] is not None else '—'
-                markup_value = material['markup_percent'] if material['markup_percent'] is not None else ''
-                extra_info += f'''
-                <div class="material-extra">
-                    <span class="param editable-field" 
-                          data-editable="true"
-                          data-field="markup_percent"
-                          data-material-id="{material['id']}"
-                          data-original-value="{markup_value}"
-                          ondblclick="startInlineEdit(this)">
-                        <i class="fas fa-percent"></i> {markup_display}%
-                    </span>
-                </div>
-                '''
-
-                # Толщина плёнки
-                thickness_display = material['thickness'] if material['thickness'] is not None else '—'
-                thickness_value = material['thickness'] if material['thickness'] is not None else ''
-                extra_info += f'''
-                <div class="material-extra">
-                    <span class="param editable-field" 
-                          data-editable="true"
-                          data-field="thickness"
-                          data-material-id="{material['id']}"
-                          data-original-value="{thickness_value}"
-                          ondblclick="startInlineEdit(this)">
-                        <i class="fas fa-ruler"></i> {thickness_display} мкм
-                    </span>
-                </div>
-                '''
-            else:  # material['type'] == 'paper'
-                # --- Бумага: плотность и толщина бумаги (оба редактируемые) ---
-                # Плотность (density) – теперь редактируемая!
-                density_display = material['density'] if material['density'] is not None else '—'
-                density_value = material['density'] if material['density'] is not None else ''
-                extra_info += f'''
-                <div class="material-extra">
-                    <span class="param editable-field" 
-                          data-editable="true"
-                          data-field="density"
-                          data-material-id="{material['id']}"
-                          data-original-value="{density_value}"
-                          ondblclick="startInlineEdit(this)">
-                        <i class="fas fa-weight-hanging"></i> {density_display} г/м²
-                    </span>
-                </div>
-                '''
-
-                # Толщина бумаги
-                paper_thickness_display = material['paper_thickness'] if material['paper_thickness'] is not None else '—'
-                paper_thickness_value = material['paper_thickness'] if material['paper_thickness'] is not None else ''
-                extra_info += f'''
-                <div class="material-extra">
-                    <span class="param editable-field" 
-                          data-editable="true"
-                          data-field="paper_thickness"
-                          data-material-id="{material['id']}"
-                          data-original-value="{paper_thickness_value}"
-                          ondblclick="startInlineEdit(this)">
-                        <i class="fas fa-ruler"></i> {paper_thickness_display} мм
-                    </span>
-                </div>
-                '''
-
-            # Экранируем спецсимволы для безопасной вставки в атрибуты HTML
-            material_name = material['name'].replace("'", "\\'").replace('"', '&quot;')
-            material_price = str(material['price']).replace("'", "\\'")
-            material_quantity = str(material['quantity']).replace("'", "\\'")
-
-            # Цена редактируется только для бумаги (для плёнки цена вычисляется)
-            price_editable = material['type'] == 'paper'
-            price_attrs = ''
-            price_class = 'price-badge'
-            if price_editable:
-                price_attrs = f'data-editable="true" data-field="price" data-original-value="{material_price}"'
-                price_class += ' editable-field'
-
-            # Количество редактируется всегда
-            quantity_attrs = (f'data-editable="true" data-field="quantity" '
-                              f'data-original-value="{material_quantity}" '
-                              f'data-min-quantity="{material["min_quantity"]}" '
-                              f'data-material-id="{material["id"]}"')
-            quantity_class = f'quantity-badge {quantity_class} editable-field'
-
-            # Формируем одну строку таблицы
-            materials_rows += f'''
-            <div class="table-row" data-material-id="{material['id']}" data-material-type="{material['type']}">
-                <div class="col-name">
-                    <div class="material-name editable-field" 
-                         data-editable="true"
-                         data-field="name"
-                         data-material-id="{material['id']}"
-                         data-original-value="{material_name}">
-                        {material['name']}
-                    </div>
-                    <div class="material-category">
-                        <i class="fas fa-folder"></i>
-                        {material['category_name']}
-                    </div>
-                    <div class="material-extra">
-                        {extra_info}
-                    </div>
-                </div>
-                <div class="col-price">
-                    <span class="{price_class}" {price_attrs}>
-                        {material['price_display']}
-                    </span>
-                </div>
-                <div class="col-quantity">
-                    <span class="{quantity_class}" {quantity_attrs}>
-                        {material['quantity']} {material['unit']}
-                    </span>
-                </div>
-                <div class="col-actions">
-                    <button type="button" 
-                            class="btn-action btn-delete"
-                            data-material-id="{material['id']}"
-                            data-material-name="{material['name']}">
-                        Удалить
-                    </button>
-                </div>
-            </div>
-            '''
-
-    # Формируем заголовок с информацией о выбранной категории
-    category_title = ''
-    if selected_category:
-        if descendants_count > 0:
-            category_title = f'в категории "<strong>{selected_category["name"]}</strong>" и {descendants_count} подкатегориях'
-        else:
-            category_title = f'в категории "<strong>{selected_category["name"]}</strong>"'
-
-    # Полный HTML правой колонки (секция материалов, статистика, форма добавления, таблица, подсказки)
-    html = f'''
-    <!-- Заголовок секции материалов -->
-    <div class="section-header">
-        <h2>
-            <i class="fas fa-box-open"></i> Материалы
-            {category_title}
-        </h2>
-        <div class="header-buttons">
-            {f'<button type="button" class="btn-action btn-reset-filter" id="reset-filter-btn" title="Сбросить фильтр"><i class="fas fa-times-circle"></i> Сбросить</button>' if selected_category else ''}
-            <button type="button" class="btn-action btn-add-material" id="add-material-btn">+ Добавить</button>
-        </div>
-    </div>
-
-    <!-- Блок статистики -->
-    <div class="stats-container">
-        <div class="stat-card"><div class="stat-value">{stats['categories_count']}</div><div class="stat-label">Категорий</div></div>
-        <div class="stat-card"><div class="stat-value">{stats['materials_count']}</div><div class="stat-label">Всего материалов</div></div>
-        <div class="stat-card"><div class="stat-value">{stats['active_materials_count']}</div><div class="stat-label">Активных</div></div>
-    </div>
-
-    <!-- Форма добавления материала (изначально скрыта) -->
-    <div class="form-section" id="material-form-section" style="display: none;">
-        <h3>Добавить новый материал</h3>
-        <form method="post" action="/sklad/material/create/" id="material-form">
-            <input type="hidden" name="csrfmiddlewaretoken" value="{csrf_token}">
-            <div class="form-group">
-                <label for="material-name">Название материала*</label>
-                <input type="text" id="material-name" name="name" class="form-control" required>
-            </div>
-            <div class="form-group">
-                <label for="material-type">Тип материала*</label>
-                <select id="material-type" name="type" class="form-control" required>
-                    <option value="paper">Бумага</option>
-                    <option value="film">Плёнка</option>
-                </select>
-            </div>
-            <div class="form-group" id="category-group">
-                <label for="material-category">Категория*</label>
-                <select id="material-category" name="category" class="form-control" required>
-                    <option value="">-- Выберите категорию --</option>
-                </select>
-            </div>
-            <!-- Поля для бумаги -->
-            <div id="paper-fields">
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="material-price">Цена*</label>
-                        <input type="number" id="material-price" name="price" class="form-control" step="0.01" min="0.01" placeholder="50.00">
-                    </div>
-                    <div class="form-group">
-                        <label for="material-unit">Единица измерения</label>
-                        <input type="text" id="material-unit" name="unit" class="form-control" value="лист">
-                    </div>
-                </div>
-                <div class="form-group">
-                    <label for="material-density">Плотность (г/кв.м)</label>
-                    <input type="number" id="material-density" name="density" class="form-control" step="1" min="1" placeholder="130">
-                </div>
-                <div class="form-group">
-                    <label for="material-paper-thickness">Толщина бумаги (мм)</label>
-                    <input type="number" id="material-paper-thickness" name="paper_thickness" class="form-control" step="0.001" min="0.001" placeholder="0.1">
-                    <small class="form-text text-muted">Толщина в миллиметрах (например, 0.1 для 100 мкм)</small>
-                </div>
-            </div>
-            <!-- Поля для плёнки -->
-            <div id="film-fields" style="display: none;">
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="material-cost">Себестоимость (руб.)*</label>
-                        <input type="number" id="material-cost" name="cost" class="form-control" step="0.01" min="0">
-                    </div>
-                    <div class="form-group">
-                        <label for="material-markup">Наценка (%)*</label>
-                        <input type="number" id="material-markup" name="markup_percent" class="form-control" step="0.01" min="0">
-                    </div>
-                </div>
-                <div class="form-group">
-                    <label for="material-thickness">Толщина (мкм)*</label>
-                    <input type="number" id="material-thickness" name="thickness" class="form-control" step="1" min="1">
-                </div>
-            </div>
-            <!-- Складские поля (общие) -->
-            <div class="form-row">
-                <div class="form-group">
-                    <label for="material-quantity">Количество на складе</label>
-                    <input type="number" id="material-quantity" name="quantity" class="form-control" step="1" min="0" value="0">
-                </div>
-                <div class="form-group">
-                    <label for="material-min-quantity">Минимальный остаток</label>
-                    <input type="number" id="material-min-quantity" name="min_quantity" class="form-control" step="1" min="0" value="10">
-                </div>
-            </div>
-            <div class="form-group">
-                <label for="material-notes">Примечание</label>
-                <textarea id="material-notes" name="notes" class="form-control" rows="3"></textarea>
-            </div>
-            <div class="form-group">
-                <label><input type="checkbox" name="is_active" class="form-check-input" checked> Активен</label>
-            </div>
-            <div class="button-group">
-                <button type="submit" class="btn-submit">Сохранить материал</button>
-                <button type="button" class="btn-clear" onclick="clearMaterialForm()">Очистить форму</button>
-            </div>
-        </form>
-    </div>
-
-    <!-- Таблица со списком материалов -->
-    <div class="materials-table">
-        <div class="table-header">
-            <div class="col-name">Название материала</div>
-            <div class="col-price">Цена</div>
-            <div class="col-quantity">Количество</div>
-            <div class="col-actions">Действия</div>
-        </div>
-        <div class="table-body" id="materials-table-body">
-            {materials_rows if materials_rows else '<div class="empty-message"><i class="fas fa-box-open"></i>Нет материалов. Нажмите "Добавить", чтобы создать первый.</div>'}
-        </div>
-    </div>
-
-    <!-- Подсказки для пользователя -->
-    <div class="table-hint">
-        <div class="hint-item"><span class="hint-icon">📁</span>Показаны материалы из выбранной категории и всех её подкатегорий</div>
-        <div class="hint-item"><span class="hint-icon">👆</span>Нажмите на название категории, чтобы увидеть иерархию</div>
-        <div class="hint-item"><span class="hint-icon">✏️</span>Двойной клик по любому полю (название, цена, количество, плотность, толщина) для быстрого редактирования</div>
-    </div>
-    '''
-    return html
-
-
 @login_required(login_url='/counter/login/')
 def get_all_materials(request):
     """
     Возвращает все материалы выбранного типа (без фильтрации по категории).
     Используется, когда не выбрана ни одна категория.
-    GET-параметр type (paper/film) определяет тип.
+    GET-параметры type (paper/film), page и format – как в get_category_data.
     """
     try:
         material_type = request.GET.get('type', 'paper')
 
-        # Получаем все материалы выбранного типа, отсортированные по имени
-        materials = Material.objects.select_related('category').filter(
-            type=material_type
-        ).order_by('name')
-
-        # Преобразуем в список словарей
-        materials_data = [m.to_dict() for m in materials]
-
-        # Статистика
-        stats = {
-            'categories_count': Category.objects.filter(type=material_type).count(),
-            'materials_count': Material.objects.filter(type=material_type).count(),
-            'active_materials_count': Material.objects.filter(type=material_type, is_active=True).count(),
-            'current_materials_count': materials.count(),
-        }
-
-        csrf_token = get_token(request)
-
-        # Генерируем HTML (без выбранной категории)
-        html_content = generate_materials_html(materials_data, None, 0, stats, csrf_token)
+        # Статистика одним запросом, затем только запрошенная страница материалов
+        stats = get_material_stats(material_type)
+        materials, pagination = get_materials_page(
+            material_type, page=_get_page_number(request), total=stats['materials_count']
+        )
 
-        return JsonResponse({
+        response = {
             'success': True,
-            'materials': materials_data,
             'stats': stats,
-            'html': html_content,
-            'materials_count': len(materials_data),
-        })
+            'pagination': pagination,
+            'materials_count': len(materials),
+        }
+
+        # format=json – только данные материалов, иначе – только HTML (без выбранной категории)
+        if _wants_json(request):
+            response['materials'] = [m.to_dict() for m in materials]
+        else:
+            response['html'] = render_materials_panel(request, materials, None, 0, stats, pagination)
+        return JsonResponse(response)
     except Exception as e:
         print(f"Ошибка при получении всех материалов: {str(e)}")
         return JsonResponse({
@@ -615,31 +325,26 @@ def index(request):
     # Категории выбранного типа (для выпадающих списков)
     categories = Category.objects.filter(type=material_type).order_by('name')
 
-    # Материалы выбранного типа (начальный QuerySet)
-    materials = Material.objects.select_related('category').filter(type=material_type).order_by('name')
-
     category_id = request.GET.get('category_id')
     selected_category = None
     descendants_count = 0
 
-    # Если указана категория, фильтруем материалы по ней и её потомкам
+    # Если указана категория, материалы отбираются по её интервалу MPTT (с потомками)
     if category_id:
         try:
             selected_category = Category.objects.get(id=category_id, type=material_type)
-            descendants = selected_category.get_descendants(include_self=True)
-            descendant_ids = list(descendants.values_list('id', flat=True))
-            descendants_count = len(descendant_ids) - 1
-            materials = materials.filter(category_id__in=descendant_ids)
+            descendants_count = get_descendants_count(selected_category)
         except Category.DoesNotExist:
             # Если категория не найдена – игнорируем
             pass
 
-    # Статистика для отображения в шаблоне
-    stats = {
-        'categories_count': Category.objects.filter(type=material_type).count(),
-        'materials_count': Material.objects.filter(type=material_type).count(),
-        'active_materials_count': Material.objects.filter(type=material_type, is_active=True).count(),
-    }
+    # Статистика для отображения в шаблоне – один запрос
+    stats = get_material_stats(material_type, selected_category)
+
+    # Первая страница материалов (дальше таблица подгружается через AJAX)
+    materials, _ = get_materials_page(
+        material_type, selected_category, total=stats['current_materials_count']
+    )
 
     # Корневые категории (для построения дерева на клиенте)
     root_categories = Category.objects.filter(parent=None, type=material_type).order_by('name')
@@ -670,20 +375,10 @@ def get_category_tree(request):
     """
     material_type = request.GET.get('type', 'paper')
 
-    # Внутренняя рекурсивная функция для сериализации категории в словарь
-    def serialize_category(category):
-        return {
-            'id': category.id,
-            'name': category.name,
-            'children': [serialize_category(child) for child in category.children.all()],
-            'materials_count': category.materials.filter(type=material_type).count()
-        }
-
-    # Корневые категории (у которых parent=None) выбранного типа
-    root_categories = Category.objects.filter(parent=None, type=material_type).order_by('name')
-
-    # Строим дерево
-    tree = [serialize_category(cat) for cat in root_categories]
+    # Дерево строится за два запроса и кэшируется до изменения категорий
+    # или материалов (sklad/tree_cache.py). В узлах: materials_count – материалы
+    # самой категории, total_materials_count – вместе с подкатегориями.
+    tree = tree_cache.get_category_tree(material_type)
 
     return JsonResponse({'tree': tree})
 
@@ -779,7 +474,6 @@ def create_material(request):
             'name': name,
             'category': category,
             'type': material_type,
-            'quantity': int(quantity),
             'min_quantity': int(min_quantity),
             'notes': notes,
             'is_active': is_active,
@@ -812,8 +506,15 @@ def create_material(request):
             material_data['markup_percent'] = Decimal(markup_percent)
             material_data['thickness'] = int(thickness)
 
-        # Создаём материал
-        material = Material.objects.create(**material_data)
+        # Создаём материал; начальный остаток оформляется приходом в журнале движения
+        initial_quantity = int(quantity)
+        if initial_quantity < 0:
+            raise ValueError('Количество не может быть отрицательным')
+        with transaction.atomic():
+            material = Material.objects.create(**material_data)
+            if initial_quantity:
+                stock.receive(material, initial_quantity, user=request.user, note='Начальный остаток')
+                material.refresh_from_db()
 
         # Если это AJAX-запрос – возвращаем JSON
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
@@ -1027,7 +728,7 @@ def update_material(request, material_id):
                         'success': False,
                         'error': 'Количество должно быть целым числом.'
                     }, status=400)
-                material.quantity = int(quantity_value)
+                new_quantity = int(quantity_value)
 
             elif field_name == 'min_quantity':
                 # Минимальное количество – целое неотрицательное
@@ -1195,8 +896,15 @@ def update_material(request, material_id):
                 'error': f'Ошибка валидации: {str(validation_error)}'
             }, status=400)
 
-        # Сохраняем изменения в базе данных
-        material.save()
+        if field_name == 'quantity':
+            # Остаток меняется только через журнал движения: корректировка
+            # на разницу с текущим остатком под блокировкой строки (sklad/stock.py)
+            stock.adjust(material, new_quantity, user=request.user, note='Правка в таблице склада')
+            material.refresh_from_db()
+        else:
+            # Сохраняем только изменённое поле: остатки и резерв в объекте
+            # могли устареть, их нельзя перезаписывать
+            material.save(update_fields=[field_name, 'updated_at'])
 
         # Возвращаем успешный ответ с обновлёнными данными материала
         response_data = {
@@ -1204,6 +912,10 @@ def update_material(request, material_id):
             'message': f'Поле "{field_name}" успешно обновлено.',
             'material': material.to_dict()
         }
+        # Изменилась цена – итоги просчётов пересчитываются в фоне (sklad/repricing.py)
+        repricing_job = getattr(material, 'repricing_job', None)
+        if repricing_job is not None:
+            response_data['repricing_job_id'] = repricing_job.id
         return JsonResponse(response_data)
 
     except Material.DoesNotExist:
@@ -1219,6 +931,156 @@ def update_material(request, material_id):
         }, status=500)
 
 
+# ================== СКЛАДСКОЙ УЧЁТ (ЖУРНАЛ ДВИЖЕНИЯ) ==================
+
+@login_required(login_url='/counter/login/')
+@require_POST
+def receive_material(request, material_id):
+    """
+    Приход материала на склад.
+    POST-параметры: quantity (целое, больше нуля), note (комментарий, необязательно).
+    """
+    material = get_object_or_404(Material, id=material_id)
+    try:
+        quantity = int(request.POST.get('quantity', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Количество должно быть целым числом.'}, status=400)
+
+    try:
+        movement = stock.receive(material, quantity, user=request.user, note=request.POST.get('note', ''))
+    except StockError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    material.refresh_from_db()
+    return JsonResponse({
+        'success': True,
+        'message': f'Приход {quantity} {material.unit} оформлен.',
+        'movement': movement.to_dict(),
+        'material': material.to_dict(),
+    })
+
+
+@login_required(login_url='/counter/login/')
+def get_material_movements(request, material_id):
+    """Журнал движения материала (последние записи, новые сверху) и текущие остатки."""
+    material = get_object_or_404(Material.objects.select_related('category'), id=material_id)
+    return JsonResponse({
+        'success': True,
+        'material': material.to_dict(),
+        'movements': [movement.to_dict() for movement in stock.get_movements(material)],
+    })
+
+
+@login_required(login_url='/counter/login/')
+@require_POST
+def consume_proschet_materials(request, proschet_id):
+    """
+    Списание со склада материалов, зарезервированных под просчёт
+    (бумага и плёнка его печатных компонентов).
+    """
+    consumed = stock.consume_proschet(proschet_id, user=request.user, note=request.POST.get('note', ''))
+    return JsonResponse({
+        'success': True,
+        'consumed': consumed,
+        'message': f'Списано резервов: {consumed}' if consumed else 'Нет резервов для списания.',
+    })
+
+
+@login_required(login_url='/counter/login/')
+def low_stock_report(request):
+    """
+    Отчёт о заканчивающихся материалах: свободный остаток (за вычетом резерва
+    под открытые просчёты) не больше минимального.
+    GET-параметры: type (paper/film, по умолчанию все), format (json/csv/xlsx).
+    """
+    material_type = request.GET.get('type') or None
+    if material_type and material_type not in dict(MATERIAL_TYPES):
+        return JsonResponse({'success': False, 'error': 'Неизвестный тип материала.'}, status=400)
+
+    export_format = request.GET.get('format', 'json')
+    filename = f'low_stock_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+
+    if export_format == 'csv':
+        response = StreamingHttpResponse(
+            low_stock.iter_csv_lines(material_type), content_type='text/csv; charset=utf-8'
+        )
+        response['Content-Disposition'] = f'attachment; filename={filename}.csv'
+        return response
+
+    if export_format == 'xlsx':
+        spooled = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE)
+        try:
+            low_stock.write_report_workbook(spooled, material_type)
+        except Exception:
+            spooled.close()
+            raise
+        size = spooled.tell()
+        response = StreamingHttpResponse(
+            iter_file_chunks(spooled),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        response['Content-Length'] = size
+        response['Content-Disposition'] = f'attachment; filename={filename}.xlsx'
+        return response
+
+    if export_format != 'json':
+        return JsonResponse({'success': False, 'error': 'Формат должен быть json, csv или xlsx.'}, status=400)
+
+    return JsonResponse({'success': True, **low_stock.get_low_stock_report(material_type)})
+
+
+# ================== ПЕРЕСЧЁТ ПРОСЧЁТОВ ПО ЦЕНАМ МАТЕРИАЛОВ ==================
+
+@login_required(login_url='/counter/login/')
+def get_repricing_job(request, job_id):
+    """
+    Состояние задания пересчёта итогов просчётов после изменения цены
+    материала: status – pending/running/done/failed, количество
+    пересчитанных компонентов и ламинаций.
+    """
+    job = get_object_or_404(RepricingJob, id=job_id)
+    return JsonResponse({'success': True, 'job': job.to_dict()})
+
+
+# ================== МАССОВЫЙ ИМПОРТ ==================
+
+@login_required(login_url='/counter/login/')
+@require_POST
+def import_materials_upload(request):
+    """
+    Массовый импорт материалов и категорий из загруженного файла CSV или XLSX.
+    POST: файл в поле 'import_file', type – тип строк без столбца type (paper/film).
+    """
+    import_file = request.FILES.get('import_file')
+    if not import_file:
+        return JsonResponse({'success': False, 'error': 'Файл не выбран'}, status=400)
+
+    material_type = request.POST.get('type', 'paper')
+    if material_type not in dict(MATERIAL_TYPES):
+        return JsonResponse({'success': False, 'error': 'Неизвестный тип материала.'}, status=400)
+
+    try:
+        result = import_materials(iter_rows(import_file, import_file.name), material_type=material_type, user=request.user)
+    except ImportFormatError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'rows': result['rows'],
+        'categories': result['categories'],
+        'created': result['created'],
+        'updated': result['updated'],
+        'unchanged': result['unchanged'],
+        'repricing_jobs': result['repricing_jobs'],
+        'timings': {name: round(seconds, 3) for name, seconds in result['timings'].items()},
+        'errors_count': len(result['errors']),
+        'errors': [
+            {'row': row_number, 'field': name, 'message': message}
+            for row_number, name, message in result['errors'][:IMPORT_ERRORS_IN_RESPONSE]
+        ],
+    })
+
+
 # ================== ПОЛУЧЕНИЕ СПИСКА КАТЕГОРИЙ ДЛЯ ФОРМЫ ==================
 
 @login_required(login_url='/counter/login/')
@@ -0,0 +1,45 @@
+"""
+spravochnik_dopolnitelnyh_rabot/management/commands/resync_additional_works.py
+Синхронизация дополнительных работ просчётов со справочником.
+
+Изменения справочника применяются к дополнительным работам автоматически
+(сигналы, resync.py). Команда нужна после изменений в обход сигналов
+(queryset.update, загрузка данных в БД) – она копирует данные справочника
+и пересчитывает итоги одним пакетом на все работы.
+
+Пример:
+    python manage.py resync_additional_works
+    python manage.py resync_additional_works --work 3 7
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from spravochnik_dopolnitelnyh_rabot.models import Work
+from spravochnik_dopolnitelnyh_rabot.resync import resync_additional_works
+
+
+class Command(BaseCommand):
+    help = 'Копирует данные справочника в дополнительные работы открытых просчётов и пересчитывает их итоги'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--work',
+            type=int,
+            nargs='+',
+            help='id работ справочника (по умолчанию – все)'
+        )
+
+    def handle(self, *args, **options):
+        if options['work']:
+            work_ids = sorted(set(options['work']))
+            found = set(Work.objects.filter(pk__in=work_ids).values_list('pk', flat=True))
+            missing = [str(work_id) for work_id in work_ids if work_id not in found]
+            if missing:
+                raise CommandError(f"Работы не найдены: {', '.join(missing)}")
+        else:
+            work_ids = list(Work.objects.values_list('pk', flat=True))
+
+        updated = resync_additional_works(work_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Работ справочника: {len(work_ids)}, обновлено дополнительных работ: {updated}"
+        ))
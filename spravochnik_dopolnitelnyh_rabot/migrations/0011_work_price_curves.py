@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:16
+
+from django.db import migrations, models
+
+from devices.interpolation import build_monotone_cubic
+
+
+def build_existing_curves(apps, schema_editor):
+    """Коэффициенты сплайна для опорных точек, заведённых до появления метода monotone_cubic."""
+    Work = apps.get_model('spravochnik_dopolnitelnyh_rabot', 'Work')
+    WorkPrice = apps.get_model('spravochnik_dopolnitelnyh_rabot', 'WorkPrice')
+    WorkCirculationPrice = apps.get_model('spravochnik_dopolnitelnyh_rabot', 'WorkCirculationPrice')
+
+    for work_id in Work.objects.values_list('id', flat=True):
+        sheet_points = WorkPrice.objects.filter(work_id=work_id).order_by('sheets').values_list('sheets', 'price')
+        circulation_points = (
+            WorkCirculationPrice.objects.filter(work_id=work_id)
+            .order_by('circulation').values_list('circulation', 'price')
+        )
+        Work.objects.filter(pk=work_id).update(price_curves={
+            'sheets': build_monotone_cubic(list(sheet_points)),
+            'circulation': build_monotone_cubic(list(circulation_points)),
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spravochnik_dopolnitelnyh_rabot', '0010_work_cost_work_markup_percent_alter_work_k_lines_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='work',
+            name='price_curves',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Кривые цен'),
+        ),
+        migrations.AlterField(
+            model_name='work',
+            name='interpolation_method',
+            field=models.CharField(choices=[('linear', 'Линейная'), ('logarithmic', 'Логарифмическая'), ('monotone_cubic', 'Монотонная кубическая')], default='linear', help_text='Способ расчёта цены для произвольного количества листов между опорными точками', max_length=20, verbose_name='Метод интерполяции цены'),
+        ),
+        migrations.RunPython(build_existing_curves, migrations.RunPython.noop),
+    ]
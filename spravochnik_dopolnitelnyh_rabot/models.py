@@ -10,6 +10,8 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+from devices.interpolation import MONOTONE_CUBIC
+
 class Work(models.Model):
     """
     Модель «Работа» – хранит информацию о дополнительной работе типографии.
@@ -31,6 +33,7 @@ class Work(models.Model):
     INTERPOLATION_CHOICES = [
         ('linear', 'Линейная'),
         ('logarithmic', 'Логарифмическая'),
+        (MONOTONE_CUBIC, 'Монотонная кубическая'),
     ]
 
     name = models.CharField(
@@ -84,6 +87,16 @@ class Work(models.Model):
         help_text='Способ расчёта цены для произвольного количества листов между опорными точками'
     )
 
+    # Коэффициенты монотонного кубического сплайна по опорным точкам:
+    # {'sheets': кривая по листам, 'circulation': кривая по тиражу}.
+    # Пересчитываются при изменении опорных точек (signals.py).
+    price_curves = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Кривые цен'
+    )
+
     k_lines = models.DecimalField(
         max_digits=5,
         decimal_places=2,
@@ -136,6 +149,13 @@ class Work(models.Model):
         if self.cost is not None and self.markup_percent is not None:
             # price = cost + cost * (markup_percent / 100)
             self.price = self.cost + (self.cost * self.markup_percent / Decimal('100'))
+        # Кривые цен пишут только сигналы опорных точек: сохранение не должно
+        # перезаписывать их значением, прочитанным до изменения точек
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'price_curves'
+            ]
         super().save(*args, **kwargs)
 
     def to_dict(self):
@@ -0,0 +1,177 @@
+"""
+resync.py для приложения spravochnik_dopolnitelnyh_rabot
+Пакетная синхронизация дополнительных работ просчётов со справочником
+
+Дополнительная работа просчёта (calculator AdditionalWork) хранит копию
+полей работы из справочника (название, себестоимость, наценка, цена,
+формула, линии реза, изделия на листе) и итог total_price, который
+зависит ещё и от опорных точек цены (WorkPrice, WorkCirculationPrice).
+Раньше сигналы пересохраняли каждую связанную работу по одной: на каждую
+строку – запросы вычислений листов, просчёта и несколько запросов
+опорных точек.
+
+Теперь изменение работы или её опорных точек (signals.py) ставит id работы
+в очередь, и после коммита транзакции выполняется один пересчёт на все
+изменённые работы:
+- работы справочника и их опорные точки читаются по одному запросу
+  (каждая кривая загружается один раз, а не на каждую строку);
+- дополнительные работы открытых просчётов читаются одним запросом –
+  тираж, количество листов и резов в том же запросе;
+- итог считается тем же AdditionalWork.recalculate_price с уже
+  интерполированной себестоимостью;
+- записываются только изменившиеся строки: скопированные поля – одним
+  UPDATE на работу, итоги – через bulk_update.
+Несколько правок в одной транзакции (например, удаление работы вместе с её
+опорными точками) дают один пересчёт.
+
+Функции:
+- schedule_resync: поставить работу в очередь на пересчёт после коммита
+- resync_additional_works: пересчитать дополнительные работы по работам справочника
+"""
+
+import threading
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from .models import Work
+from .utils import interpolate_price, load_price_points
+
+
+# Сколько строк записывать одним bulk_update
+RESYNC_BATCH_SIZE = getattr(settings, 'SPRAVOCHNIK_RESYNC_BATCH_SIZE', 500)
+
+# Формулы, себестоимость которых интерполируется по тиражу (остальные – по листам)
+CIRCULATION_FORMULAS = (2, 3)
+
+# id работ, ожидающих пересчёта (свои у каждого потока)
+_pending = threading.local()
+
+
+# ========== ОЧЕРЕДЬ ==========
+
+def schedule_resync(work_id):
+    """
+    Ставит работу справочника в очередь на пересчёт связанных дополнительных
+    работ. Пересчёт выполняется после коммита текущей транзакции (вне
+    транзакции – сразу) и видит уже сохранённые данные справочника.
+
+    Аргументы:
+        work_id: id работы (Work)
+    """
+    work_ids = getattr(_pending, 'work_ids', None)
+    if work_ids is None:
+        work_ids = _pending.work_ids = set()
+    work_ids.add(work_id)
+    # Первый обработчик после коммита заберёт все накопленные id, остальные
+    # ничего не сделают. При откате транзакции id остаются в очереди и
+    # пересчитываются со следующим коммитом (лишний пересчёт безвреден).
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    work_ids = getattr(_pending, 'work_ids', None)
+    if not work_ids:
+        return
+    _pending.work_ids = set()
+    try:
+        resync_additional_works(work_ids)
+    except Exception as e:
+        print(f"⚠️ Ошибка пересчёта дополнительных работ (работы {sorted(work_ids)}): {e}")
+
+
+# ========== ПЕРЕСЧЁТ ==========
+
+def _vich_subquery(field):
+    """Поле вычислений листов печатного компонента работы как подзапрос."""
+    from vichisliniya_listov.models import VichisliniyaListovModel
+
+    return Subquery(
+        VichisliniyaListovModel.objects
+        .filter(vichisliniya_listov_print_component_id=OuterRef('print_component_id'))
+        .values(field)[:1]
+    )
+
+
+def resync_additional_works(work_ids):
+    """
+    Копирует данные справочника в дополнительные работы открытых просчётов
+    и пересчитывает их итоги (одна транзакция). Удалённые работы и работы
+    удалённых компонентов и просчётов не меняются.
+
+    Аргументы:
+        work_ids: id работ справочника
+
+    Возвращает:
+        int: количество изменённых дополнительных работ
+    """
+    from calculator.models_list_proschet import AdditionalWork
+
+    works = Work.objects.in_bulk(list(work_ids))
+    if not works:
+        return 0
+    sheet_points, circulation_points = load_price_points(works)
+
+    sync_fields = AdditionalWork.WORK_SYNC_FIELDS
+    with transaction.atomic():
+        # Строки блокируются до конца транзакции: одновременное сохранение
+        # работы не перезапишется устаревшим итогом
+        additional_works = (
+            AdditionalWork.objects.select_for_update(of=('self',))
+            .filter(
+                work_id__in=works, is_deleted=False,
+                print_component__is_deleted=False, print_component__proschet__is_deleted=False,
+            )
+            .annotate(
+                circulation=F('print_component__proschet__circulation'),
+                list_count=_vich_subquery('vichisliniya_listov_list_count'),
+                cuts_count=_vich_subquery('vichisliniya_listov_cuts_count'),
+            )
+            .only('id', 'work_id', 'quantity', 'total_price', *sync_fields)
+            .order_by()
+        )
+        # Скопированные поля одинаковы у всех строк одной работы – они
+        # пишутся одним UPDATE на работу; bulk_update (выражение CASE на
+        # каждую строку) – только для итогов, которые у строк разные
+        copied = {}  # id работы -> id строк с устаревшими копиями
+        totals = []
+        for additional_work in additional_works:
+            work = works[additional_work.work_id]
+            # Работа из справочника уже загружена – recalculate_price не читает её заново
+            additional_work.work = work
+            copy_before = [getattr(additional_work, name) for name in sync_fields]
+            total_before = additional_work.total_price
+
+            additional_work.copy_from_work(work)
+            # Те же значения по умолчанию, что в AdditionalWork.save
+            sheet_count = additional_work.list_count or Decimal('0')
+            cuts_count = additional_work.cuts_count or 0
+            circulation = additional_work.circulation or 0
+            if additional_work.formula_type in CIRCULATION_FORMULAS:
+                cost = interpolate_price(
+                    circulation_points.get(work.pk), circulation, work.interpolation_method, work.price,
+                    curve=work.price_curves.get('circulation'),
+                )
+            else:
+                cost = interpolate_price(
+                    sheet_points.get(work.pk), sheet_count, work.interpolation_method, work.price,
+                    curve=work.price_curves.get('sheets'),
+                )
+            additional_work.recalculate_price(sheet_count, cuts_count, circulation, cost=cost)
+
+            if [getattr(additional_work, name) for name in sync_fields] != copy_before:
+                copied.setdefault(work.pk, []).append(additional_work.pk)
+            if additional_work.total_price != total_before:
+                totals.append(additional_work)
+
+        for work_id, ids in copied.items():
+            template = AdditionalWork()
+            template.copy_from_work(works[work_id])
+            values = {name: getattr(template, name) for name in sync_fields}
+            for start in range(0, len(ids), RESYNC_BATCH_SIZE):
+                AdditionalWork.objects.filter(pk__in=ids[start:start + RESYNC_BATCH_SIZE]).update(**values)
+        AdditionalWork.objects.bulk_update(totals, ['total_price'], batch_size=RESYNC_BATCH_SIZE)
+
+    return len({pk for ids in copied.values() for pk in ids} | {row.pk for row in totals})
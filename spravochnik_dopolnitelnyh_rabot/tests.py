@@ -1,3 +1,98 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from calculator.models_list_proschet import AdditionalWork, PrintComponent, Proschet
+from spravochnik_dopolnitelnyh_rabot.models import Work, WorkCirculationPrice, WorkPrice
+from spravochnik_dopolnitelnyh_rabot.resync import resync_additional_works
+from spravochnik_dopolnitelnyh_rabot.utils import (
+    calculate_price_for_work, calculate_price_for_work_by_circulation, interpolate_price,
+)
+from vichisliniya_listov.models import VichisliniyaListovModel
+
+
+class InterpolationTest(TestCase):
+    """Интерполяция цены по опорным точкам (utils.py)."""
+
+    def setUp(self):
+        self.work = Work.objects.create(name='Биговка', cost=Decimal('5'), markup_percent=Decimal('0'))
+        WorkPrice.objects.create(work=self.work, sheets=100, price=10)
+        WorkPrice.objects.create(work=self.work, sheets=200, price=20)
+        WorkCirculationPrice.objects.create(work=self.work, circulation=1000, price=1)
+
+    def test_sheets_curve(self):
+        self.assertEqual(calculate_price_for_work(self.work, 50), Decimal('10'))
+        self.assertEqual(calculate_price_for_work(self.work, 150), Decimal('15.0'))
+        self.assertEqual(calculate_price_for_work(self.work, 200), Decimal('20'))
+        self.assertEqual(calculate_price_for_work(self.work, 500), Decimal('20'))
+        self.assertEqual(calculate_price_for_work_by_circulation(self.work, 5), Decimal('1'))
+
+    def test_points_and_methods(self):
+        points = [(1, Decimal('100')), (100, Decimal('1')), (1000, Decimal('0.5'))]
+        self.assertEqual(interpolate_price([], 10, 'linear', Decimal('7')), Decimal('7'))
+        self.assertEqual(interpolate_price(points, 100, 'linear', None), Decimal('1'))
+        self.assertEqual(interpolate_price(points, 10, 'logarithmic', None), Decimal('10.0'))
+
+    def test_monotone_cubic_uses_stored_curve(self):
+        self.work.interpolation_method = 'monotone_cubic'
+        self.work.save()
+        self.work.refresh_from_db()
+        self.assertEqual(self.work.price_curves['sheets']['x'], [100.0, 200.0])
+        with self.assertNumQueries(0):
+            self.assertEqual(calculate_price_for_work(self.work, 150), Decimal('15.0'))
+            self.assertEqual(calculate_price_for_work(self.work, 200), Decimal('20.0'))
+            self.assertEqual(calculate_price_for_work_by_circulation(self.work, 5), Decimal('1.0'))
+
+
+class AdditionalWorkResyncTest(TestCase):
+    """Пакетная синхронизация дополнительных работ со справочником (resync.py)."""
+
+    def setUp(self):
+        self.work = Work.objects.create(
+            name='Ламинирование', cost=Decimal('2'), markup_percent=Decimal('50'), formula_type=5
+        )
+        WorkPrice.objects.create(work=self.work, sheets=100, price=1)
+
+        self.proschet = Proschet.objects.create(title='Визитки', circulation=1000)
+        component = PrintComponent.objects.create(proschet=self.proschet)
+        # 1000 экземпляров по 8 на листе – 125 листов
+        VichisliniyaListovModel.objects.create(
+            vichisliniya_listov_print_component=component, vichisliniya_listov_fit_total=8
+        )
+        self.additional_work = AdditionalWork.objects.create(print_component=component, work=self.work, price=0)
+        self.deleted = AdditionalWork.objects.create(
+            print_component=component, work=self.work, price=0, is_deleted=True
+        )
+
+    def test_work_edit_updates_copies_and_totals(self):
+        # Себестоимость листа 1 + наценка 50% – 1.5 × 125 листов
+        self.assertEqual(self.additional_work.total_price, Decimal('187.50'))
+
+        self.work.name = 'Ламинирование глянцевое'
+        self.work.markup_percent = Decimal('100')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.work.save()
+
+        self.additional_work.refresh_from_db()
+        self.assertEqual(
+            (self.additional_work.title, self.additional_work.price, self.additional_work.total_price),
+            ('Ламинирование глянцевое', Decimal('4.00'), Decimal('250.00')),
+        )
+        # Удалённая работа не меняется
+        self.deleted.refresh_from_db()
+        self.assertEqual(self.deleted.title, 'Ламинирование')
+
+    def test_price_points_edit_is_one_resync(self):
+        point = WorkPrice.objects.create(work=self.work, sheets=200, price=3)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            WorkPrice.objects.filter(pk=point.pk).delete()
+            WorkPrice.objects.filter(work=self.work, sheets=100).update(price=2)
+            WorkPrice.objects.create(work=self.work, sheets=120, price=2)
+        self.assertEqual(len(callbacks), 2)
+
+        self.additional_work.refresh_from_db()
+        self.assertEqual(self.additional_work.total_price, Decimal('375.00'))
+
+        # Без изменений строки не пишутся: работы, две кривые и выборка (в точке сохранения)
+        with self.assertNumQueries(6):
+            self.assertEqual(resync_additional_works([self.work.pk]), 0)
@@ -1,166 +1,170 @@
 """
 utils.py для приложения spravochnik_dopolnitelnyh_rabot.
 Содержит функции интерполяции цены по количеству листов и по тиражу.
+
+Опорные точки работы читаются одним запросом и интерполируются функцией
+interpolate_price – её же использует пакетный пересчёт дополнительных
+работ (resync.py), который загружает точки всех работ сразу (load_price_points).
+Для метода monotone_cubic опорные точки не нужны: коэффициенты сплайна
+хранятся в Work.price_curves (rebuild_work_curves).
 """
 
 from decimal import Decimal
 import math
 
+from devices.interpolation import MONOTONE_CUBIC, build_monotone_cubic, evaluate
 
-def calculate_price_for_work(work, sheets):
+
+def interpolate_price(points, value, method, default, curve=None):
     """
-    Рассчитывает себестоимость работы для заданного количества листов,
-    используя опорные точки WorkPrice и метод интерполяции, сохранённый в работе.
+    Интерполирует цену по опорным точкам.
 
     Аргументы:
-        work: объект Work
-        sheets: int, количество листов
+        points: список пар (количество, цена), отсортированный по количеству
+        value: количество листов или тираж
+        method: метод интерполяции работы ('linear', 'logarithmic', 'monotone_cubic')
+        default: цена, если опорных точек нет
+        curve: сохранённые коэффициенты сплайна (для monotone_cubic); если
+               их нет, сплайн строится по points
 
     Возвращает:
-        Decimal: интерполированная себестоимость (без наценки)
+        Decimal: интерполированная цена
     """
-    # Получаем все опорные точки для данной работы, отсортированные по sheets
-    price_points = work.work_prices.order_by('sheets')
-
-    if not price_points.exists():
-        # Если нет точек, возвращаем базовую цену работы
-        return work.price
-
-    sheets_int = int(sheets)
+    if method == MONOTONE_CUBIC:
+        if curve is None:
+            curve = build_monotone_cubic(points or [])
+        result = evaluate(curve, int(value))
+        return default if result is None else Decimal(str(round(result, 2)))
 
-    # Минимальная и максимальная точки
-    min_point = price_points.first()
-    max_point = price_points.last()
+    if not points:
+        return default
 
-    # Если запрошенное количество меньше минимального, возвращаем цену минимальной точки
-    if sheets_int <= min_point.sheets:
-        return min_point.price
+    value_int = int(value)
 
-    # Если больше максимального, возвращаем цену максимальной точки
-    if sheets_int >= max_point.sheets:
-        return max_point.price
+    # Вне диапазона опорных точек – цена крайней точки
+    if value_int <= points[0][0]:
+        return points[0][1]
+    if value_int >= points[-1][0]:
+        return points[-1][1]
 
     # Ищем две ближайшие точки для интерполяции
     prev_point = None
     next_point = None
-    for point in price_points:
-        if point.sheets <= sheets_int:
+    for point in points:
+        if point[0] <= value_int:
             prev_point = point
-        if point.sheets >= sheets_int:
+        if point[0] >= value_int:
             next_point = point
             break
 
-    # Если обе точки найдены и они разные
-    if prev_point and next_point and prev_point != next_point:
-        method = work.interpolation_method  # 'linear' или 'logarithmic'
-
-        # Линейная интерполяция
-        if method == 'linear':
-            x1, y1 = float(prev_point.sheets), float(prev_point.price)
-            x2, y2 = float(next_point.sheets), float(next_point.price)
-            x = float(sheets_int)
-            result = y1 + (y2 - y1) * (x - x1) / (x2 - x1)
-            return Decimal(str(round(result, 2)))
-
-        # Логарифмическая интерполяция
-        elif method == 'logarithmic':
-            epsilon = 1e-10  # для избежания log(0)
-            x1 = math.log(float(prev_point.sheets) + epsilon)
-            y1 = math.log(float(prev_point.price) + epsilon)
-            x2 = math.log(float(next_point.sheets) + epsilon)
-            y2 = math.log(float(next_point.price) + epsilon)
-            x = math.log(float(sheets_int) + epsilon)
-            result_log = y1 + (y2 - y1) * (x - x1) / (x2 - x1)
-            result = math.exp(result_log) - epsilon
-            return Decimal(str(round(result, 2)))
-
-        # По умолчанию (если метод не распознан) – линейная
-        else:
-            x1, y1 = float(prev_point.sheets), float(prev_point.price)
-            x2, y2 = float(next_point.sheets), float(next_point.price)
-            x = float(sheets_int)
-            result = y1 + (y2 - y1) * (x - x1) / (x2 - x1)
-            return Decimal(str(round(result, 2)))
-
-    # Если не нашли две разные точки (например, только одна точка)
-    return prev_point.price if prev_point else min_point.price
+    # Количество совпало с опорной точкой
+    if prev_point is next_point:
+        return prev_point[1]
+
+    if method == 'logarithmic':
+        epsilon = 1e-10  # для избежания log(0)
+        x1 = math.log(float(prev_point[0]) + epsilon)
+        y1 = math.log(float(prev_point[1]) + epsilon)
+        x2 = math.log(float(next_point[0]) + epsilon)
+        y2 = math.log(float(next_point[1]) + epsilon)
+        x = math.log(float(value_int) + epsilon)
+        result_log = y1 + (y2 - y1) * (x - x1) / (x2 - x1)
+        result = math.exp(result_log) - epsilon
+        return Decimal(str(round(result, 2)))
+
+    # Линейная интерполяция (и по умолчанию, если метод не распознан)
+    x1, y1 = float(prev_point[0]), float(prev_point[1])
+    x2, y2 = float(next_point[0]), float(next_point[1])
+    x = float(value_int)
+    result = y1 + (y2 - y1) * (x - x1) / (x2 - x1)
+    return Decimal(str(round(result, 2)))
+
+
+def load_price_points(work_ids):
+    """
+    Опорные точки нескольких работ – два запроса на все работы.
 
+    Аргументы:
+        work_ids: id работ
 
-# НОВАЯ ФУНКЦИЯ: интерполяция цены по тиражу
-def calculate_price_for_work_by_circulation(work, circulation):
+    Возвращает:
+        tuple: (точки по листам, точки по тиражу) – словари
+               {id работы: [(количество, цена), ...]} по возрастанию количества
     """
-    Рассчитывает себестоимость работы для заданного тиража,
-    используя опорные точки WorkCirculationPrice и метод интерполяции, сохранённый в работе.
+    from .models import WorkCirculationPrice, WorkPrice
+
+    sheet_points = {}
+    for work_id, sheets, price in (
+        WorkPrice.objects.filter(work_id__in=work_ids)
+        .order_by('work_id', 'sheets')
+        .values_list('work_id', 'sheets', 'price')
+    ):
+        sheet_points.setdefault(work_id, []).append((sheets, price))
+
+    circulation_points = {}
+    for work_id, circulation, price in (
+        WorkCirculationPrice.objects.filter(work_id__in=work_ids)
+        .order_by('work_id', 'circulation')
+        .values_list('work_id', 'circulation', 'price')
+    ):
+        circulation_points.setdefault(work_id, []).append((circulation, price))
+
+    return sheet_points, circulation_points
+
+
+def rebuild_work_curves(work_id):
+    """
+    Пересчитывает и сохраняет коэффициенты сплайна работы (Work.price_curves)
+    по её опорным точкам – после их изменения.
+    """
+    from .models import Work
+
+    sheet_points, circulation_points = load_price_points([work_id])
+    Work.objects.filter(pk=work_id).update(price_curves={
+        'sheets': build_monotone_cubic(sheet_points.get(work_id, [])),
+        'circulation': build_monotone_cubic(circulation_points.get(work_id, [])),
+    })
+
+
+def calculate_price_for_work(work, sheets):
+    """
+    Рассчитывает себестоимость работы для заданного количества листов,
+    используя опорные точки WorkPrice и метод интерполяции, сохранённый в работе.
 
     Аргументы:
         work: объект Work
-        circulation: int, тираж
+        sheets: int, количество листов
 
     Возвращает:
         Decimal: интерполированная себестоимость (без наценки)
     """
-    # Получаем все опорные точки по тиражу для данной работы, отсортированные по circulation
-    price_points = work.circulation_prices.order_by('circulation')
+    # Монотонный сплайн: коэффициенты сохранены в работе, опорные точки не читаются
+    curve = work.price_curves.get('sheets')
+    if work.interpolation_method == MONOTONE_CUBIC and curve is not None:
+        return interpolate_price(None, sheets, MONOTONE_CUBIC, work.price, curve=curve)
 
-    if not price_points.exists():
-        # Если нет точек, возвращаем базовую цену работы
-        return work.price
+    # Все опорные точки работы одним запросом, отсортированные по sheets
+    points = list(work.work_prices.order_by('sheets').values_list('sheets', 'price'))
+    return interpolate_price(points, sheets, work.interpolation_method, work.price)
 
-    circulation_int = int(circulation)
 
-    # Минимальная и максимальная точки
-    min_point = price_points.first()
-    max_point = price_points.last()
-
-    # Если запрошенный тираж меньше минимального, возвращаем цену минимальной точки
-    if circulation_int <= min_point.circulation:
-        return min_point.price
+# НОВАЯ ФУНКЦИЯ: интерполяция цены по тиражу
+def calculate_price_for_work_by_circulation(work, circulation):
+    """
+    Рассчитывает себестоимость работы для заданного тиража,
+    используя опорные точки WorkCirculationPrice и метод интерполяции, сохранённый в работе.
 
-    # Если больше максимального, возвращаем цену максимальной точки
-    if circulation_int >= max_point.circulation:
-        return max_point.price
+    Аргументы:
+        work: объект Work
+        circulation: int, тираж
 
-    # Ищем две ближайшие точки для интерполяции
-    prev_point = None
-    next_point = None
-    for point in price_points:
-        if point.circulation <= circulation_int:
-            prev_point = point
-        if point.circulation >= circulation_int:
-            next_point = point
-            break
+    Возвращает:
+        Decimal: интерполированная себестоимость (без наценки)
+    """
+    curve = work.price_curves.get('circulation')
+    if work.interpolation_method == MONOTONE_CUBIC and curve is not None:
+        return interpolate_price(None, circulation, MONOTONE_CUBIC, work.price, curve=curve)
 
-    # Если обе точки найдены и они разные
-    if prev_point and next_point and prev_point != next_point:
-        method = work.interpolation_method  # 'linear' или 'logarithmic'
-
-        # Линейная интерполяция
-        if method == 'linear':
-            x1, y1 = float(prev_point.circulation), float(prev_point.price)
-            x2, y2 = float(next_point.circulation), float(next_point.price)
-            x = float(circulation_int)
-            result = y1 + (y2 - y1) * (x - x1) / (x2 - x1)
-            return Decimal(str(round(result, 2)))
-
-        # Логарифмическая интерполяция
-        elif method == 'logarithmic':
-            epsilon = 1e-10
-            x1 = math.log(float(prev_point.circulation) + epsilon)
-            y1 = math.log(float(prev_point.price) + epsilon)
-            x2 = math.log(float(next_point.circulation) + epsilon)
-            y2 = math.log(float(next_point.price) + epsilon)
-            x = math.log(float(circulation_int) + epsilon)
-            result_log = y1 + (y2 - y1) * (x - x1) / (x2 - x1)
-            result = math.exp(result_log) - epsilon
-            return Decimal(str(round(result, 2)))
-
-        # По умолчанию (если метод не распознан) – линейная
-        else:
-            x1, y1 = float(prev_point.circulation), float(prev_point.price)
-            x2, y2 = float(next_point.circulation), float(next_point.price)
-            x = float(circulation_int)
-            result = y1 + (y2 - y1) * (x - x1) / (x2 - x1)
-            return Decimal(str(round(result, 2)))
-
-    # Если не нашли две разные точки (например, только одна точка)
-    return prev_point.price if prev_point else min_point.price
\ No newline at end of file
+    # Все опорные точки по тиражу одним запросом, отсортированные по circulation
+    points = list(work.circulation_prices.order_by('circulation').values_list('circulation', 'price'))
+    return interpolate_price(points, circulation, work.interpolation_method, work.price)
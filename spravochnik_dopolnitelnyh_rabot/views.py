@@ -427,7 +427,7 @@ def update_work_interpolation_method(request, work_id):
             'error': 'Не указан метод интерполяции'
         }, status=400)
 
-    valid_methods = ['linear', 'logarithmic']
+    valid_methods = [value for value, _ in Work.INTERPOLATION_CHOICES]
     if new_method not in valid_methods:
         return JsonResponse({
             'success': False,